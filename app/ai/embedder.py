@@ -1,20 +1,75 @@
 """OpenAI embeddings provider."""
 
 import time
-from typing import List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 import openai
 from openai import OpenAI
 
 from ..config import settings
 
 
+# Known native dimensions for OpenAI models
+MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536
+}
+
+# Models that accept the `dimensions` parameter (Matryoshka truncation)
+REDUCIBLE_MODELS = {"text-embedding-3-small", "text-embedding-3-large"}
+
+
+def get_embedding_dimension(model: str, dimensions: Optional[int] = None) -> int:
+    """Get the output dimension for a model, optionally reduced."""
+    native = MODEL_DIMENSIONS.get(model, 1536)
+    if dimensions is None:
+        return native
+    if model not in REDUCIBLE_MODELS:
+        raise ValueError(f"Model '{model}' does not support reduced dimensions")
+    if not 0 < dimensions <= native:
+        raise ValueError(f"Dimensions for '{model}' must be between 1 and {native}, got {dimensions}")
+    return dimensions
+
+
+def get_vector_name(model: str, dimensions: Optional[int] = None) -> str:
+    """Named vector for a model/dimension pair, e.g. 'text-embedding-3-small-512'."""
+    return f"{model}-{get_embedding_dimension(model, dimensions)}"
+
+
+def parse_vector_spaces(spec: Optional[str]) -> List[Tuple[str, Optional[int]]]:
+    """Parse 'model[:dimensions],...' into (model, dimensions) pairs."""
+    spaces = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        model, _, dimensions = item.partition(":")
+        spaces.append((model.strip(), int(dimensions) if dimensions else None))
+    return spaces
+
+
 class OpenAIEmbedder:
     """OpenAI embeddings provider."""
     
-    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
-        """Initialize OpenAI embedder."""
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        dimensions: Optional[int] = None
+    ):
+        """Initialize OpenAI embedder.
+        
+        ``dimensions`` requests shortened embeddings from text-embedding-3-*
+        models. Falls back to OPENAI_EMBEDDING_DIMENSIONS only when the
+        model also comes from settings.
+        """
         self.api_key = api_key or settings.openai_api_key
         self.model = model or settings.openai_embedding_model
+        if dimensions is None and model is None:
+            dimensions = settings.openai_embedding_dimensions
+        # Validates the model/dimension combination
+        get_embedding_dimension(self.model, dimensions)
+        self.dimensions = dimensions
         self.client = OpenAI(api_key=self.api_key)
         
         # Rate limiting
@@ -29,6 +84,13 @@ class OpenAIEmbedder:
             time.sleep(self.min_request_interval - time_since_last)
         self.last_request_time = time.time()
     
+    def _request_params(self) -> Dict[str, Any]:
+        """Model parameters for embeddings.create."""
+        params: Dict[str, Any] = {"model": self.model}
+        if self.dimensions is not None:
+            params["dimensions"] = self.dimensions
+        return params
+    
     def embed_text(self, text: str) -> Optional[List[float]]:
         """Get embedding for a single text."""
         try:
@@ -36,7 +98,7 @@ class OpenAIEmbedder:
             
             response = self.client.embeddings.create(
                 input=text,
-                model=self.model
+                **self._request_params()
             )
             
             return response.data[0].embedding
@@ -70,7 +132,7 @@ class OpenAIEmbedder:
             
             response = self.client.embeddings.create(
                 input=texts,
-                model=self.model
+                **self._request_params()
             )
             
             # Extract embeddings in order
@@ -107,14 +169,12 @@ class OpenAIEmbedder:
     
     def get_dimension(self) -> int:
         """Get the embedding dimension for the current model."""
-        # Known dimensions for OpenAI models
-        model_dimensions = {
-            "text-embedding-3-small": 1536,
-            "text-embedding-3-large": 3072,
-            "text-embedding-ada-002": 1536
-        }
-        
-        return model_dimensions.get(self.model, 1536)
+        return get_embedding_dimension(self.model, self.dimensions)
+    
+    @property
+    def vector_name(self) -> str:
+        """Named vector in Qdrant that holds embeddings of this model/dimension."""
+        return get_vector_name(self.model, self.dimensions)
     
     def test_connection(self) -> bool:
         """Test the connection to OpenAI API."""
@@ -0,0 +1,103 @@
+"""Vectorized matching of documents against existing features."""
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def feature_text(feature: Dict[str, Any]) -> str:
+    """Text that is embedded for a feature without a stored vector."""
+    return f"{feature['name']}: {feature.get('description', '')}"
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalizes rows; zero rows stay zero so they score 0."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+class FeatureMatcher:
+    """Scores document embeddings against a cached, normalized feature matrix.
+
+    Features that come without a ``vector`` are embedded in one
+    ``embed_batch`` call and their vectors are kept by feature text, so a
+    feature is embedded once per matcher. The matrix is rebuilt only when
+    the feature list changes; a document is then scored with one matrix
+    product, a batch of documents with one matmul.
+    """
+
+    def __init__(self, embedder: Any):
+        self.embedder = embedder
+        self._embedded: Dict[str, List[float]] = {}
+        self._matrix_key: Optional[Tuple] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def prepare(self, features: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Features with a ``vector``; missing ones are embedded, failed ones dropped."""
+        missing = sorted({
+            feature_text(feature) for feature in features
+            if feature.get("vector") is None and feature_text(feature) not in self._embedded
+        })
+        if missing:
+            for text, embedding in zip(missing, self.embedder.embed_batch(missing)):
+                if embedding:
+                    self._embedded[text] = embedding
+
+        prepared = []
+        for feature in features:
+            if feature.get("vector") is not None:
+                prepared.append(feature)
+                continue
+            embedding = self._embedded.get(feature_text(feature))
+            if embedding:
+                prepared.append({**feature, "vector": embedding})
+        return prepared
+
+    def best_match(
+        self,
+        document_embedding: Sequence[float],
+        features: List[Dict[str, Any]]
+    ) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Best feature for one document and its cosine similarity."""
+        return self.best_matches([document_embedding], features)[0]
+
+    def best_matches(
+        self,
+        document_embeddings: Sequence[Sequence[float]],
+        features: List[Dict[str, Any]]
+    ) -> List[Tuple[Optional[Dict[str, Any]], float]]:
+        """Best feature for every document, scored with one matmul.
+
+        Only features that already have a ``vector`` are considered (see
+        ``prepare``). As before, a feature wins only with a positive
+        similarity, so documents without one get ``(None, 0.0)``.
+        """
+        if not len(document_embeddings):
+            return []
+        candidates, matrix = self._feature_matrix(features)
+        if matrix is None:
+            return [(None, 0.0)] * len(document_embeddings)
+
+        documents = _normalize_rows(np.asarray(document_embeddings, dtype=np.float64))
+        scores = documents @ matrix.T
+        best = scores.argmax(axis=1)
+        similarities = scores[np.arange(len(best)), best]
+        return [
+            (candidates[index], float(similarity)) if similarity > 0 else (None, 0.0)
+            for index, similarity in zip(best.tolist(), similarities.tolist())
+        ]
+
+    def _feature_matrix(self, features: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Optional[np.ndarray]]:
+        # Stored vectors are assumed to follow the feature's id/name/description
+        candidates = [feature for feature in features if feature.get("vector") is not None]
+        key = tuple((feature.get("id"), feature.get("name"), feature.get("description"), len(feature["vector"]))
+                    for feature in candidates)
+        with self._lock:
+            if key != self._matrix_key:
+                matrix = None
+                if candidates:
+                    matrix = _normalize_rows(np.asarray([feature["vector"] for feature in candidates], dtype=np.float64))
+                self._matrix_key, self._matrix = key, matrix
+            return candidates, self._matrix
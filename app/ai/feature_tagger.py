@@ -7,23 +7,33 @@ from openai import OpenAI
 
 from ..config import settings
 from .embedder import OpenAIEmbedder
+from .feature_matcher import FeatureMatcher
+from .llm_cache import LLMResponseCache, content_hash, get_llm_cache
 
 
 class FeatureTagger:
     """AI-based feature tagger using OpenAI."""
     
+    # Bump when the prompt changes so cached features are not reused
+    CACHE_NAMESPACE = "feature_generation"
+    PROMPT_VERSION = "1"
+    
     def __init__(
         self, 
         api_key: Optional[str] = None, 
         model: Optional[str] = None,
-        threshold: float = None
+        threshold: float = None,
+        llm_cache: Optional[LLMResponseCache] = None
     ):
         """Initialize feature tagger."""
         self.api_key = api_key or settings.openai_api_key
         self.model = model or settings.openai_model
         self.threshold = threshold or settings.feature_sim_threshold
         self.client = OpenAI(api_key=self.api_key)
+        self.llm_cache = llm_cache or get_llm_cache()
         self.embedder = OpenAIEmbedder(api_key=self.api_key)
+        # Keeps feature embeddings and the feature matrix between documents
+        self.feature_matcher = FeatureMatcher(self.embedder)
     
     def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity between two vectors."""
@@ -45,26 +55,7 @@ class FeatureTagger:
         existing_features: List[Dict[str, Any]]
     ) -> Tuple[Optional[Dict[str, Any]], float]:
         """Find the best matching feature for a document embedding."""
-        if not existing_features:
-            return None, 0.0
-        
-        best_feature = None
-        best_similarity = 0.0
-        
-        for feature in existing_features:
-            if feature.get("vector") is None:
-                continue
-            
-            similarity = self.cosine_similarity(
-                document_embedding, 
-                feature["vector"]
-            )
-            
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_feature = feature
-        
-        return best_feature, best_similarity
+        return self.feature_matcher.best_match(document_embedding, existing_features)
     
     def generate_feature_from_document(
         self, 
@@ -72,10 +63,18 @@ class FeatureTagger:
         document_content: str,
         max_content_length: int = 4000
     ) -> Tuple[str, str]:
-        """Generate feature name and description from document content."""
+        """Generate feature name and description from document content.
+        
+        Successful answers are cached by model, prompt version and content hash.
+        """
         # Truncate content to avoid token limits
         content = document_content[:max_content_length]
         
+        cache_key = content_hash(document_title, content)
+        cached = self.llm_cache.get(self.CACHE_NAMESPACE, self.model, self.PROMPT_VERSION, cache_key)
+        if cached is not None:
+            return cached["name"], cached["description"]
+        
         prompt = f"""
 Analyze the following technical document and create a concise feature category for it.
 
@@ -116,7 +115,12 @@ Focus on the main functionality or system component this document describes.
             # Try to parse JSON response
             try:
                 result = json.loads(result_text)
-                return result.get("name", "General"), result.get("description", "")
+                name, description = result.get("name", "General"), result.get("description", "")
+                self.llm_cache.set(
+                    self.CACHE_NAMESPACE, self.model, self.PROMPT_VERSION, cache_key,
+                    {"name": name, "description": description}
+                )
+                return name, description
             except json.JSONDecodeError:
                 # Fallback if JSON parsing fails
                 print(f"Failed to parse JSON response: {result_text}")
@@ -130,25 +134,11 @@ Focus on the main functionality or system component this document describes.
         self, 
         existing_features: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        """Add embeddings to existing features for similarity comparison."""
-        features_with_embeddings = []
-        
-        for feature in existing_features:
-            if feature.get("vector") is not None:
-                # Already has embedding
-                features_with_embeddings.append(feature)
-                continue
-            
-            # Generate embedding for feature description
-            feature_text = f"{feature['name']}: {feature.get('description', '')}"
-            embedding = self.embedder.embed_text(feature_text)
-            
-            if embedding:
-                feature_copy = feature.copy()
-                feature_copy["vector"] = embedding
-                features_with_embeddings.append(feature_copy)
-        
-        return features_with_embeddings
+        """Add embeddings to existing features for similarity comparison.
+
+        Features without a vector are embedded in one batch and cached.
+        """
+        return self.feature_matcher.prepare(existing_features)
     
     def tag_document(
         self, 
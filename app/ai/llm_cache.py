@@ -0,0 +1,141 @@
+"""Persistent cache of parsed LLM analysis results."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from ..config import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    namespace TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (namespace, model, prompt_version, content_hash)
+)
+"""
+
+
+def content_hash(*parts: Any) -> str:
+    """sha256 of everything that goes into a prompt besides the template."""
+    payload = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Parsed LLM results keyed by (namespace, model, prompt version, content hash).
+
+    Entries are stored in a local SQLite file so re-runs over unchanged
+    pages skip the chat model. Bumping an analyzer's prompt version makes
+    its old entries unreachable; ``invalidate`` deletes them. Hits and
+    misses are counted per namespace for ``stats``.
+    """
+
+    def __init__(self, path: Optional[str] = None, enabled: Optional[bool] = None):
+        self.enabled = settings.llm_cache_enabled if enabled is None else enabled
+        self.path = path or settings.llm_cache_path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = defaultdict(int)
+        self._misses: Dict[str, int] = defaultdict(int)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened on first use so analyzers that never call the LLM create no file
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(_SCHEMA)
+            self._connection.commit()
+        return self._connection
+
+    def get(self, namespace: str, model: str, prompt_version: str, key: str) -> Optional[Any]:
+        """Cached result or None; counts a hit or a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT result FROM llm_responses "
+                "WHERE namespace = ? AND model = ? AND prompt_version = ? AND content_hash = ?",
+                (namespace, model, prompt_version, key)
+            ).fetchone()
+            if row is None:
+                self._misses[namespace] += 1
+                return None
+            self._hits[namespace] += 1
+            return json.loads(row[0])
+
+    def set(self, namespace: str, model: str, prompt_version: str, key: str, result: Any) -> None:
+        """Stores a JSON-serializable result, replacing an older one."""
+        if not self.enabled:
+            return
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_responses "
+                "(namespace, model, prompt_version, content_hash, result, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, model, prompt_version, key, json.dumps(result, ensure_ascii=False),
+                 datetime.now(timezone.utc).isoformat())
+            )
+            connection.commit()
+
+    def invalidate(
+        self,
+        namespace: Optional[str] = None,
+        model: Optional[str] = None,
+        prompt_version: Optional[str] = None
+    ) -> int:
+        """Deletes matching entries (all of them without filters); returns how many."""
+        filters = {"namespace": namespace, "model": model, "prompt_version": prompt_version}
+        conditions = [f"{column} = ?" for column, value in filters.items() if value is not None]
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            connection = self._connect()
+            deleted = connection.execute(
+                f"DELETE FROM llm_responses{where}",
+                [value for value in filters.values() if value is not None]
+            ).rowcount
+            connection.commit()
+            return deleted
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hits, misses and hit rate of this process per namespace."""
+        result = {}
+        for namespace in sorted(set(self._hits) | set(self._misses)):
+            hits, misses = self._hits[namespace], self._misses[namespace]
+            result[namespace] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+        return result
+
+    def entries(self) -> Dict[str, int]:
+        """Stored entries per namespace."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT namespace, COUNT(*) FROM llm_responses GROUP BY namespace ORDER BY namespace"
+            ).fetchall()
+        return {namespace: count for namespace, count in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+_default_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Process-wide cache shared by all analyzers, so stats cover the whole run."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = LLMResponseCache()
+    return _default_cache
@@ -8,6 +8,8 @@ from openai import OpenAI
 
 from ..config import settings
 from .embedder import OpenAIEmbedder
+from .feature_matcher import FeatureMatcher
+from .llm_cache import LLMResponseCache, content_hash, get_llm_cache
 
 
 @dataclass
@@ -36,18 +38,26 @@ class QAAnalysisResult:
 class QAContentAnalyzer:
     """Comprehensive QA content analyzer that replaces FeatureTagger."""
     
+    # Bump when the prompts change so cached results are not reused
+    CACHE_NAMESPACE = "qa_analysis"
+    PROMPT_VERSION = "1"
+    
     def __init__(
         self, 
         api_key: Optional[str] = None, 
         model: Optional[str] = None,
-        threshold: float = None
+        threshold: float = None,
+        llm_cache: Optional[LLMResponseCache] = None
     ):
         """Initialize QA analyzer."""
         self.api_key = api_key or settings.openai_api_key
         self.model = model or settings.openai_model
         self.threshold = threshold or settings.feature_sim_threshold
         self.client = OpenAI(api_key=self.api_key)
+        self.llm_cache = llm_cache or get_llm_cache()
         self.embedder = OpenAIEmbedder(api_key=self.api_key)
+        # Keeps feature embeddings and the feature matrix between documents
+        self.feature_matcher = FeatureMatcher(self.embedder)
     
     def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity between two vectors."""
@@ -64,23 +74,23 @@ class QAContentAnalyzer:
         return float(dot_product / (norm1 * norm2))
     
     def analyze_qa_content(self, title: str, content: str) -> QAAnalysisResult:
-        """Comprehensive analysis of QA content using LLM."""
+        """Comprehensive analysis of QA content using LLM.
         
-        prompt = self._create_comprehensive_analysis_prompt(title, content)
+        Parsed answers are cached by model, prompt version and content hash.
+        """
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=4000
-            )
-            
-            result_text = response.choices[0].message.content
-            analysis_data = self._parse_llm_response(result_text)
+            cache_key = content_hash(title, content)
+            analysis_data = self.llm_cache.get(self.CACHE_NAMESPACE, self.model, self.PROMPT_VERSION, cache_key)
+            if analysis_data is None:
+                result_text = self._request_analysis(title, content)
+                try:
+                    analysis_data = self._load_llm_json(result_text)
+                except Exception:
+                    # Unparsable answers are not cached
+                    analysis_data = self._parse_llm_response(result_text)
+                else:
+                    self.llm_cache.set(self.CACHE_NAMESPACE, self.model, self.PROMPT_VERSION, cache_key, analysis_data)
             
             return QAAnalysisResult(
                 section_title=analysis_data.get('section_title', ''),
@@ -100,6 +110,20 @@ class QAContentAnalyzer:
             print(f"LLM analysis failed: {e}")
             return self._fallback_analysis(title, content)
     
+    def _request_analysis(self, title: str, content: str) -> str:
+        """Raw LLM answer for a page."""
+        prompt = self._create_comprehensive_analysis_prompt(title, content)
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self._get_system_prompt()},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            max_tokens=4000
+        )
+        return response.choices[0].message.content
+    
     def _get_system_prompt(self) -> str:
         """System prompt for comprehensive QA analysis."""
         return """
@@ -177,19 +201,7 @@ class QAContentAnalyzer:
     def _parse_llm_response(self, response_text: str) -> Dict[str, Any]:
         """Parse LLM response with improved error handling."""
         try:
-            # Extract JSON from response
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            
-            if start_idx == -1 or end_idx == 0:
-                raise ValueError("JSON not found in response")
-            
-            json_text = response_text[start_idx:end_idx]
-            
-            # Try to fix common JSON issues
-            json_text = self._fix_json_issues(json_text)
-            
-            return json.loads(json_text)
+            return self._load_llm_json(response_text)
             
         except Exception as e:
             print(f"Error parsing LLM response: {e}")
@@ -205,6 +217,23 @@ class QAContentAnalyzer:
                 "confidence": 0.0
             }
     
+    def _load_llm_json(self, response_text: str) -> Dict[str, Any]:
+        """Extract the JSON object from an LLM response; raises if there is none."""
+        # Extract JSON from response
+        start_idx = response_text.find('{')
+        end_idx = response_text.rfind('}') + 1
+        
+        if start_idx == -1 or end_idx == 0:
+            raise ValueError("JSON not found in response")
+        
+        json_text = response_text[start_idx:end_idx]
+        
+        try:
+            return json.loads(json_text)
+        except json.JSONDecodeError:
+            # Try to fix common JSON issues; the fixes would break valid JSON
+            return json.loads(self._fix_json_issues(json_text))
+    
     def _fix_json_issues(self, json_text: str) -> str:
         """Fix common JSON parsing issues."""
         import re
@@ -267,26 +296,7 @@ class QAContentAnalyzer:
         existing_features: List[Dict[str, Any]]
     ) -> Tuple[Optional[Dict[str, Any]], float]:
         """Find the best matching feature for a document embedding."""
-        if not existing_features:
-            return None, 0.0
-        
-        best_feature = None
-        best_similarity = 0.0
-        
-        for feature in existing_features:
-            if feature.get("vector") is None:
-                continue
-            
-            similarity = self.cosine_similarity(
-                document_embedding, 
-                feature["vector"]
-            )
-            
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_feature = feature
-        
-        return best_feature, best_similarity
+        return self.feature_matcher.best_match(document_embedding, existing_features)
     
     def resolve_feature_id(
         self, 
@@ -295,52 +305,49 @@ class QAContentAnalyzer:
         existing_features: List[Dict[str, Any]]
     ) -> QAAnalysisResult:
         """Resolve feature ID by matching with existing features."""
-        if not document_embeddings:
-            return analysis_result
+        return self.resolve_feature_ids([analysis_result], [document_embeddings], existing_features)[0]
+    
+    def resolve_feature_ids(
+        self,
+        analysis_results: List[QAAnalysisResult],
+        documents_embeddings: List[List[List[float]]],
+        existing_features: List[Dict[str, Any]]
+    ) -> List[QAAnalysisResult]:
+        """Resolve feature IDs of many documents with one similarity matmul."""
+        # Documents without embeddings keep the feature suggested by the LLM
+        pending = [
+            (result, embeddings)
+            for result, embeddings in zip(analysis_results, documents_embeddings)
+            if embeddings
+        ]
+        if not pending:
+            return analysis_results
         
-        # Calculate average document embedding
-        doc_embedding = np.mean(document_embeddings, axis=0).tolist()
+        # Calculate average document embeddings
+        doc_embeddings = [np.mean(embeddings, axis=0) for _, embeddings in pending]
         
         # Prepare existing features with embeddings
         features_with_embeddings = self._prepare_features_with_embeddings(existing_features)
         
-        # Find best matching feature
-        best_feature, best_similarity = self.find_best_feature_match(
-            doc_embedding, 
-            features_with_embeddings
-        )
-        
-        # If similarity is above threshold, use existing feature
-        if best_feature and best_similarity >= self.threshold:
-            analysis_result.feature_name = best_feature["name"]
-            analysis_result.feature_description = best_feature.get("description", "")
-            analysis_result.feature_id = best_feature["id"]
+        matches = self.feature_matcher.best_matches(doc_embeddings, features_with_embeddings)
+        for (analysis_result, _), (best_feature, best_similarity) in zip(pending, matches):
+            # If similarity is above threshold, use existing feature
+            if best_feature and best_similarity >= self.threshold:
+                analysis_result.feature_name = best_feature["name"]
+                analysis_result.feature_description = best_feature.get("description", "")
+                analysis_result.feature_id = best_feature["id"]
         
-        return analysis_result
+        return analysis_results
     
     def _prepare_features_with_embeddings(
         self, 
         existing_features: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        """Add embeddings to existing features for similarity comparison."""
-        features_with_embeddings = []
-        
-        for feature in existing_features:
-            if feature.get("vector") is not None:
-                # Already has embedding
-                features_with_embeddings.append(feature)
-                continue
-            
-            # Generate embedding for feature description
-            feature_text = f"{feature['name']}: {feature.get('description', '')}"
-            embedding = self.embedder.embed_text(feature_text)
-            
-            if embedding:
-                feature_copy = feature.copy()
-                feature_copy["vector"] = embedding
-                features_with_embeddings.append(feature_copy)
-        
-        return features_with_embeddings
+        """Add embeddings to existing features for similarity comparison.
+
+        Features without a vector are embedded in one batch and cached.
+        """
+        return self.feature_matcher.prepare(existing_features)
     
     def test_connection(self) -> bool:
         """Test the connection to OpenAI API."""
@@ -0,0 +1,134 @@
+"""Rerankers for vector search candidates."""
+
+import math
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, Callable, Dict, List, Sequence
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens (works for Latin and Cyrillic text)."""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def candidate_text(candidate: Dict[str, Any]) -> str:
+    """Text of a search hit (document title + chunk text) used for reranking."""
+    document = candidate.get("document") or {}
+    chunk = candidate.get("chunk") or {}
+    return f"{document.get('title') or ''}\n{chunk.get('text') or ''}"
+
+
+class Reranker(ABC):
+    """Base reranker.
+
+    Subclasses only implement ``score``; model-based rerankers (cross-encoders,
+    hosted rerank APIs) plug in the same way as the local BM25 scorer.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def score(self, query: str, texts: Sequence[str]) -> List[float]:
+        """Relevance score per text, higher is better."""
+
+    def rerank(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """Return the best ``top_k`` candidates with ``rerank_score`` set.
+
+        Ties keep the original vector order, so results are deterministic.
+        """
+        if not candidates:
+            return []
+
+        scores = self.combine(self.score(query, [candidate_text(c) for c in candidates]), candidates)
+        order = sorted(range(len(candidates)), key=lambda i: (-scores[i], i))
+
+        results = []
+        for index in order[:top_k]:
+            result = dict(candidates[index])
+            result["rerank_score"] = round(scores[index], 6)
+            results.append(result)
+        return results
+
+    def combine(self, scores: List[float], candidates: List[Dict[str, Any]]) -> List[float]:
+        """Final ordering score; override to mix in the vector score."""
+        return scores
+
+
+class BM25Reranker(Reranker):
+    """Lexical BM25 scorer over the candidate set, blended with vector score.
+
+    IDF is computed from the candidates themselves, which is enough to push
+    chunks that actually mention the query terms above merely similar ones.
+    """
+
+    name = "bm25"
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, vector_weight: float = 0.3):
+        """Initialize BM25 parameters.
+
+        ``vector_weight`` mixes in the original similarity score (0 = pure BM25).
+        """
+        self.k1 = k1
+        self.b = b
+        self.vector_weight = vector_weight
+
+    def score(self, query: str, texts: Sequence[str]) -> List[float]:
+        """BM25 score per text, normalized to 0..1."""
+        query_terms = set(tokenize(query))
+        documents = [Counter(tokenize(text)) for text in texts]
+        if not query_terms or not documents:
+            return [0.0] * len(texts)
+
+        lengths = [sum(doc.values()) for doc in documents]
+        avg_length = (sum(lengths) / len(lengths)) or 1.0
+        total = len(documents)
+
+        idf = {}
+        for term in query_terms:
+            df = sum(1 for doc in documents if term in doc)
+            idf[term] = math.log(1 + (total - df + 0.5) / (df + 0.5))
+
+        scores = []
+        for doc, length in zip(documents, lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+            value = 0.0
+            for term in query_terms:
+                tf = doc.get(term, 0)
+                if tf:
+                    value += idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(value)
+
+        best = max(scores)
+        return [s / best for s in scores] if best > 0 else scores
+
+    def combine(self, scores: List[float], candidates: List[Dict[str, Any]]) -> List[float]:
+        """Blend BM25 with the original vector score."""
+        return [
+            (1 - self.vector_weight) * lexical + self.vector_weight * float(candidate.get("score", 0))
+            for lexical, candidate in zip(scores, candidates)
+        ]
+
+
+RERANKERS: Dict[str, Callable[[], Reranker]] = {
+    "bm25": BM25Reranker,
+}
+
+
+def register_reranker(name: str, factory: Callable[[], Reranker]) -> None:
+    """Register a reranker factory (e.g. a cross-encoder) under ``name``."""
+    RERANKERS[name] = factory
+
+
+def create_reranker(name: str) -> Reranker:
+    """Create a registered reranker by name."""
+    if name not in RERANKERS:
+        raise ValueError(f"Unknown reranker '{name}', available: {', '.join(RERANKERS)}")
+    return RERANKERS[name]()
@@ -19,20 +19,52 @@ class Settings(BaseSettings):
     openai_api_key: str
     openai_model: str = "gpt-4o-mini"
     openai_embedding_model: str = "text-embedding-3-small"
+    openai_embedding_dimensions: Optional[int] = None  # reduced size for text-embedding-3-*
     
     # Confluence Configuration
     confluence_base_url: Optional[str] = None
     confluence_auth_token: Optional[str] = None
     confluence_space_key: Optional[str] = None
     confluence_root_pages: Optional[str] = None
+    confluence_max_concurrency: int = 8
+    confluence_max_per_host: Optional[int] = None  # defaults to confluence_max_concurrency
+    confluence_max_retries: int = 5
     
     # Database Configuration
     mysql_dsn: str = "mysql+pymysql://qa:qa@localhost:3306/qa"
     vectordb_url: str = "http://localhost:6333"
+    vectordb_prefer_grpc: bool = False
+    vectordb_grpc_port: int = 6334
+    # Additional named vectors provisioned on collection creation ("model[:dimensions],...")
+    vectordb_extra_vectors: Optional[str] = None
+    
+    # Vector Collection Profile (quantization / HNSW tuning)
+    vectordb_collection_profile: str = "default"
+    vectordb_quantization: Optional[str] = None  # none, scalar, binary
+    vectordb_quantization_oversampling: Optional[float] = None
+    vectordb_on_disk: Optional[bool] = None
+    vectordb_hnsw_m: Optional[int] = None
+    vectordb_hnsw_ef_construct: Optional[int] = None
+    vectordb_search_ef: Optional[int] = None
     
     # Application Configuration
     app_port: int = 3000
     max_top_k: int = 50
+    jsonrpc_batch_concurrency: int = 8  # parallel calls inside one JSON-RPC batch
+    jsonrpc_max_batch_size: int = 50
+    response_compression_min_size: int = 1024  # bytes; smaller responses are sent uncompressed
+    
+    # Search Reranking Configuration
+    rerank_enabled: bool = False
+    rerank_provider: str = "bm25"
+    rerank_candidates_multiplier: int = 4
+    rerank_budget_ms: int = 200
+    
+    # Ingestion Pipeline Configuration
+    ingest_parse_workers: Optional[int] = None  # defaults to CPU count
+    ingest_embed_concurrency: int = 4
+    ingest_queue_size: int = 16
+    ingest_write_batch_size: int = 20
     
     # Chunking Configuration
     chunk_size: int = 800
@@ -41,6 +73,20 @@ class Settings(BaseSettings):
     # Feature Tagging Configuration
     feature_sim_threshold: float = 0.80
     
+    # LLM Response Cache Configuration
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = ".cache/llm_responses.sqlite"
+    
+    # Batch LLM Analysis Configuration
+    llm_batch_concurrency: int = 8
+    llm_requests_per_minute: Optional[int] = None  # no limit when unset
+    llm_tokens_per_minute: Optional[int] = None  # no limit when unset
+    llm_max_retries: int = 5
+    
+    # Duplicate Testcase Detection Configuration
+    duplicate_similarity_threshold: float = 0.92  # cosine similarity of testcase embeddings
+    duplicate_block_size: int = 2048  # rows per tile of the blocked similarity matmul
+    
     # Environment
     environment: str = "development"
     
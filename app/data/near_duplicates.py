@@ -0,0 +1,395 @@
+"""Пошук майже однакових тесткейсів: MinHash/LSH за словами і блокова схожість embeddings."""
+
+import hashlib
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+DUPLICATE_THRESHOLD = 0.85
+EMBEDDING_DUPLICATE_THRESHOLD = 0.92
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_for_comparison(text: Optional[str]) -> str:
+    """Нижній регістр, один пробіл між словами, без розділових знаків."""
+    normalized = _WHITESPACE.sub(' ', (text or '').lower().strip())
+    return _PUNCTUATION.sub('', normalized)
+
+
+def word_set(text: Optional[str]) -> FrozenSet[str]:
+    """Множина слів нормалізованого тексту."""
+    return frozenset(normalize_for_comparison(text).split())
+
+
+def jaccard(words1: Iterable[str], words2: Iterable[str]) -> float:
+    """Схожість Жаккара двох множин слів (0.0, якщо одна з них порожня)."""
+    words1, words2 = set(words1), set(words2)
+    if not words1 or not words2:
+        return 0.0
+    return len(words1 & words2) / len(words1 | words2)
+
+
+@lru_cache(maxsize=1 << 16)
+def _word_hash(word: str) -> int:
+    return int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=4).digest(), 'little')
+
+
+class MinHashIndex:
+    """Індекс множин слів, що знаходить схожі за Жаккаром вище ``threshold``.
+
+    Кожен текст перетворюється на MinHash підпис з ``bands * rows`` значень
+    (multiply-shift хеші слів, мінімум по словах - одна операція NumPy).
+    Підпис ріжеться на смуги; тексти з однаковою смугою стають кандидатами,
+    а кандидати перевіряються точним Жаккаром. Тож запит коштує кількість
+    кандидатів, а не розмір індексу. Зі смугами 20x6 пара зі схожістю 0.85
+    стає кандидатом з ймовірністю понад 99.99%.
+    """
+
+    def __init__(self, threshold: float = DUPLICATE_THRESHOLD, bands: int = 20, rows: int = 6, seed: int = 1):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        rng = np.random.default_rng(seed)
+        # Odd multipliers keep multiply-shift hashing universal
+        self._a = rng.integers(1, 2 ** 63, size=bands * rows, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=bands * rows, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [defaultdict(list) for _ in range(bands)]
+        self._words: Dict[Hashable, FrozenSet[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._words
+
+    def signature(self, words: FrozenSet[str]) -> np.ndarray:
+        """MinHash підпис непорожньої множини слів."""
+        hashes = np.fromiter((_word_hash(word) for word in words), dtype=np.uint64, count=len(words))
+        # uint64 overflow is the intended mod 2**64 of multiply-shift
+        permuted = (hashes[:, None] * self._a + self._b) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def add(self, key: Hashable, text: Optional[str] = None, words: Optional[FrozenSet[str]] = None) -> None:
+        """Додає текст (або готову множину слів) під ключем ``key``; порожні тексти ігноруються."""
+        words = word_set(text) if words is None else words
+        if not words or key in self._words:
+            return
+        self._words[key] = words
+        for band, band_key in enumerate(self._band_keys(self.signature(words))):
+            self._buckets[band][band_key].append(key)
+
+    def query(self, text: Optional[str] = None, words: Optional[FrozenSet[str]] = None) -> List[Tuple[Hashable, float]]:
+        """Ключі зі схожістю більше ``threshold``, від найсхожіших."""
+        words = word_set(text) if words is None else words
+        if not words:
+            return []
+        candidates: Set[Hashable] = set()
+        for band, band_key in enumerate(self._band_keys(self.signature(words))):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        matches = []
+        for key in candidates:
+            similarity = jaccard(words, self._words[key])
+            if similarity > self.threshold:
+                matches.append((key, similarity))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+
+class DuplicateTestcaseFilter:
+    """Відбирає нові тесткейси, яких ще немає серед прийнятих.
+
+    Дублікат - це збіг перших ``prefix_length`` символів кроку або
+    очікуваного результату (як раніше) або крок, схожий на вже прийнятий
+    більше ніж на ``threshold``. Обидві перевірки не залежать від кількості
+    прийнятих тесткейсів.
+    """
+
+    def __init__(
+        self,
+        testcases: Iterable[Dict[str, Any]] = (),
+        threshold: float = DUPLICATE_THRESHOLD,
+        prefix_length: int = 50
+    ):
+        self.prefix_length = prefix_length
+        self.index = MinHashIndex(threshold)
+        self._step_prefixes: Set[str] = set()
+        self._expected_prefixes: Set[str] = set()
+        self._count = 0
+        for testcase in testcases:
+            self.add(testcase)
+
+    @staticmethod
+    def _texts(testcase: Dict[str, Any]) -> Tuple[str, str]:
+        return (
+            (testcase.get('step') or '').strip().lower(),
+            (testcase.get('expected_result') or '').strip().lower()
+        )
+
+    def is_duplicate(self, testcase: Dict[str, Any]) -> bool:
+        step, expected = self._texts(testcase)
+        if not step and not expected:
+            return True
+        if step and step[:self.prefix_length] in self._step_prefixes:
+            return True
+        if expected and expected[:self.prefix_length] in self._expected_prefixes:
+            return True
+        return bool(step and self.index.query(step))
+
+    def add(self, testcase: Dict[str, Any]) -> None:
+        step, expected = self._texts(testcase)
+        if step:
+            self._step_prefixes.add(step[:self.prefix_length])
+            self.index.add(self._count, step)
+        if expected:
+            self._expected_prefixes.add(expected[:self.prefix_length])
+        self._count += 1
+
+    def add_if_new(self, testcase: Dict[str, Any]) -> bool:
+        """Додає тесткейс, якщо він не дублікат; повертає чи додано."""
+        if self.is_duplicate(testcase):
+            return False
+        self.add(testcase)
+        return True
+
+
+def group_near_duplicates(
+    rows: Iterable[Tuple[Hashable, Hashable, Optional[str]]],
+    threshold: float = DUPLICATE_THRESHOLD,
+    cross_group_only: bool = True
+) -> List[List[Hashable]]:
+    """Групи ключів майже однакових текстів з рядків (ключ, група, текст).
+
+    З ``cross_group_only`` пари всередині однієї групи (наприклад чекліста)
+    не зв'язуються. Групи складаються транзитивно і впорядковані за першим
+    ключем; кожна містить щонайменше два ключі.
+
+    Рядки з однаковою множиною слів спершу зводяться до одного представника:
+    в індекс потрапляють лише представники, тож тисячі однакових кроків
+    (спільних для WEB і MOB чеклістів) не стають кандидатами один одному.
+    """
+    index = MinHashIndex(threshold)
+    representatives: Dict[FrozenSet[str], int] = {}
+    members: List[List[Hashable]] = []
+    member_groups: List[Set[Hashable]] = []
+    sets = _DisjointSets()
+
+    order: List[Hashable] = []
+    for key, group, text in rows:
+        words = word_set(text)
+        if not words:
+            continue
+        sets.add(key)
+        order.append(key)
+        representative = representatives.get(words)
+        if representative is None:
+            representative = representatives[words] = len(members)
+            members.append([])
+            member_groups.append(set())
+            index.add(representative, words=words)
+        members[representative].append(key)
+        member_groups[representative].add(group)
+
+    merged = [False] * len(members)
+
+    def merge(representative: int) -> None:
+        # Each set of identical texts is unioned at most once
+        if not merged[representative]:
+            first = members[representative][0]
+            for key in members[representative][1:]:
+                sets.union(key, first)
+            merged[representative] = True
+
+    def linked(*representatives: int) -> bool:
+        # Within one group nothing is linked; with two groups or more every
+        # key has a partner from another group, so all of them end up together
+        if not cross_group_only:
+            return True
+        return len(set().union(*(member_groups[r] for r in representatives))) > 1
+
+    for words, representative in representatives.items():
+        if linked(representative):
+            merge(representative)
+        for match, _ in index.query(words=words):
+            if match <= representative or not linked(representative, match):
+                continue
+            merge(representative)
+            merge(match)
+            sets.union(members[representative][0], members[match][0])
+
+    return sets.clusters(order)
+
+
+def embedding_duplicate_pairs(
+    matrix: np.ndarray,
+    threshold: float = EMBEDDING_DUPLICATE_THRESHOLD,
+    block_size: int = 2048,
+    groups: Optional[np.ndarray] = None
+) -> Iterator[Tuple[int, int, float]]:
+    """Пари рядків (i, j), i < j, з косинусною схожістю не менше ``threshold``.
+
+    ``matrix`` - L2-нормовані embeddings по рядках, тож схожість - скалярний
+    добуток. Матриця множиться на себе плитками ``block_size x block_size``
+    лише над діагоналлю: пам'ять на схожості - одна плитка, а не n x n.
+    З ``groups`` (мітка групи на рядок) пари з однаковою міткою пропускаються.
+    """
+    count = len(matrix)
+    for row_start in range(0, count, block_size):
+        rows_block = matrix[row_start:row_start + block_size]
+        for col_start in range(row_start, count, block_size):
+            similarities = rows_block @ matrix[col_start:col_start + block_size].T
+            mask = similarities >= threshold
+            if col_start == row_start:
+                mask = np.triu(mask, k=1)
+            rows, cols = np.nonzero(mask)
+            if not len(rows):
+                continue
+            values = similarities[rows, cols]
+            rows = rows + row_start
+            cols = cols + col_start
+            if groups is not None:
+                keep = groups[rows] != groups[cols]
+                rows, cols, values = rows[keep], cols[keep], values[keep]
+            yield from zip(rows.tolist(), cols.tolist(), values.tolist())
+
+
+def cluster_pairs(pairs: Iterable[Tuple[int, int, float]]) -> Tuple[List[List[int]], Dict[int, float]]:
+    """Транзитивні групи з пар (i, j, схожість) і найкраща схожість кожного рядка.
+
+    Групи впорядковані за першим рядком, рядки в групі - за зростанням.
+    """
+    sets = _DisjointSets()
+    best: Dict[int, float] = {}
+    for left, right, similarity in pairs:
+        sets.add(left)
+        sets.add(right)
+        sets.union(left, right)
+        best[left] = max(best.get(left, similarity), similarity)
+        best[right] = max(best.get(right, similarity), similarity)
+    return sets.clusters(sorted(best)), best
+
+
+def embedding_duplicate_clusters(
+    matrix: np.ndarray,
+    threshold: float = EMBEDDING_DUPLICATE_THRESHOLD,
+    block_size: int = 2048,
+    groups: Optional[np.ndarray] = None
+) -> Tuple[List[List[int]], Dict[int, float]]:
+    """Те саме, що ``cluster_pairs(embedding_duplicate_pairs(...))``, без пар однакових рядків.
+
+    Однакові рядки (тесткейси з тим самим текстом ділять вектор) спершу
+    зводяться до одного представника: плитки множаться і пари обробляються
+    лише для унікальних векторів, тож тисячі копій не дають квадратичну
+    кількість пар у Python. З ``groups`` пари між представниками, всі рядки
+    яких в одній і тій самій групі, пропускаються.
+    """
+    count = len(matrix)
+    if not count:
+        return [], {}
+    matrix = np.ascontiguousarray(matrix)
+    rows_bytes = matrix.view(np.dtype((np.void, matrix.dtype.itemsize * matrix.shape[1])))[:, 0]
+    _, first, inverse = np.unique(rows_bytes, return_index=True, return_inverse=True)
+    # Representatives in the order of their first row
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    classes = rank[inverse]
+    first = first[order]
+    representatives = matrix[first]
+    self_similarity = np.einsum('ij,ij->i', representatives, representatives)
+
+    if groups is None:
+        codes = None
+        spans_groups = np.bincount(classes, minlength=len(first)) > 1
+        representative_groups = None
+    else:
+        group_labels, codes = np.unique(np.asarray(groups), return_inverse=True)
+        group_count = len(group_labels)
+        class_groups = np.unique(classes.astype(np.int64) * group_count + codes)
+        spans_groups = np.bincount(class_groups // group_count, minlength=len(first)) > 1
+        # A representative spanning several groups gets a label of its own,
+        # so pairs are skipped only between two single-group representatives
+        # of the same group
+        representative_groups = np.where(
+            spans_groups, group_count + np.arange(len(first)), codes[first]
+        )
+
+    sets = _DisjointSets()
+    best_all: Dict[int, float] = {}
+    best_by_group: Dict[int, List[Tuple[float, int]]] = {}
+    for representative in np.flatnonzero(spans_groups & (self_similarity >= threshold)).tolist():
+        sets.add(representative)
+        best_all[representative] = float(self_similarity[representative])
+    for left, right, similarity in embedding_duplicate_pairs(
+        representatives, threshold=threshold, block_size=block_size, groups=representative_groups
+    ):
+        sets.add(left)
+        sets.add(right)
+        sets.union(left, right)
+        for target, other in ((left, right), (right, left)):
+            if codes is None or spans_groups[other]:
+                best_all[target] = max(best_all.get(target, similarity), similarity)
+            else:
+                # Partners from one group count only for rows of other groups
+                _keep_best_two(best_by_group.setdefault(target, []), similarity, int(representative_groups[other]))
+
+    best: Dict[int, float] = {}
+    clusters: Dict[Hashable, List[int]] = defaultdict(list)
+    row_codes = codes.tolist() if codes is not None else [None] * count
+    for row, (representative, code) in enumerate(zip(classes.tolist(), row_codes)):
+        similarity = best_all.get(representative)
+        for value, group in best_by_group.get(representative, ()):
+            if group != code:
+                similarity = value if similarity is None else max(similarity, value)
+                break
+        if similarity is not None:
+            best[row] = similarity
+            clusters[sets.find(representative)].append(row)
+    return [rows for rows in clusters.values() if len(rows) > 1], best
+
+
+def _keep_best_two(best: List[Tuple[float, int]], similarity: float, group: int) -> None:
+    """Дві найкращі схожості з різних груп, від більшої."""
+    for index, (value, known_group) in enumerate(best):
+        if known_group == group:
+            if similarity > value:
+                best[index] = (similarity, group)
+                best.sort(reverse=True)
+            return
+    best.append((similarity, group))
+    best.sort(reverse=True)
+    del best[2:]
+
+
+class _DisjointSets:
+    """Union-find зі стисненням шляхів."""
+
+    def __init__(self):
+        self._parent: Dict[Hashable, Hashable] = {}
+
+    def add(self, key: Hashable) -> None:
+        self._parent.setdefault(key, key)
+
+    def find(self, key: Hashable) -> Hashable:
+        parent = self._parent
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    def union(self, left: Hashable, right: Hashable) -> None:
+        self._parent[self.find(left)] = self.find(right)
+
+    def clusters(self, order: Sequence[Hashable]) -> List[List[Hashable]]:
+        """Групи щонайменше з двох ключів у порядку ``order``."""
+        clusters: Dict[Hashable, List[Hashable]] = defaultdict(list)
+        for key in order:
+            clusters[self.find(key)].append(key)
+        return [members for members in clusters.values() if len(members) > 1]
@@ -1,15 +1,101 @@
 """Repository для роботи з QA структурою."""
 
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from sqlalchemy.orm import sessionmaker, Session, joinedload
-from sqlalchemy import create_engine, func, and_, or_, text
+from sqlalchemy import create_engine, func, and_, or_, text, select, update
 from sqlalchemy.exc import SQLAlchemyError
+import hashlib
 import json
 import math
+import time
+import unicodedata
+
+import numpy as np
 
 from ..config import settings
 from ..models.qa_models import Base, QASection, Checklist, TestCase, Config, IngestionJob
-from ..ai.embedder import OpenAIEmbedder
+from ..ai.embedder import OpenAIEmbedder, get_embedding_dimension, get_vector_name
+from .near_duplicates import (
+    DUPLICATE_THRESHOLD, embedding_duplicate_clusters, group_near_duplicates
+)
+
+
+def embedding_text(step: Optional[str], expected_result: Optional[str]) -> str:
+    """Текст тесткейсу для embedding: step + expected_result з нормалізованими пробілами."""
+    text_for_embedding = unicodedata.normalize("NFKC", f"{step or ''} {expected_result or ''}")
+    return " ".join(text_for_embedding.split())
+
+
+def embedding_text_hash(text_for_embedding: str, vector_space: str) -> str:
+    """Ключ дедуплікації embeddings (зберігається в TestCase.embedding_text_hash).
+    
+    ``vector_space`` - модель і розмірність (``get_vector_name``): вектор
+    того самого тексту від іншої моделі не підходить, тож після зміни моделі
+    хеші не збігаються і тесткейси рахуються заново.
+    """
+    return hashlib.sha256(f"{vector_space}\n{text_for_embedding}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class EmbeddingBatchResult:
+    """Результат одного батчу backfill."""
+    updated: int = 0
+    failed: int = 0
+    # Unchanged text, nothing written
+    skipped: int = 0
+    # Old embeddings that only got their text hash
+    stamped: int = 0
+    # Rows served from a vector of the same text instead of the API
+    reused: int = 0
+    embedded_texts: int = 0
+
+
+@dataclass
+class EmbeddingBackfillProgress:
+    """Прогрес заповнення embeddings тесткейсів."""
+    total: int
+    updated: int = 0
+    failed: int = 0
+    skipped: int = 0
+    stamped: int = 0
+    reused: int = 0
+    embedded_texts: int = 0
+    # All testcases with id <= committed_id are committed; a rerun can start after it
+    committed_id: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    
+    def add(self, batch: EmbeddingBatchResult) -> None:
+        for name in ('updated', 'failed', 'skipped', 'stamped', 'reused', 'embedded_texts'):
+            setattr(self, name, getattr(self, name) + getattr(batch, name))
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'updated': self.updated,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'stamped': self.stamped,
+            'reused': self.reused,
+            'embedded_texts': self.embedded_texts,
+            'last_committed_id': self.committed_id
+        }
+    
+    @property
+    def processed(self) -> int:
+        return self.updated + self.failed + self.skipped + self.stamped
+    
+    @property
+    def rate(self) -> float:
+        """Тесткейсів за секунду."""
+        elapsed = time.monotonic() - self.started_at
+        return self.processed / elapsed if elapsed > 0 else 0.0
+    
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        rate = self.rate
+        return max(self.total - self.processed, 0) / rate if rate > 0 else None
 
 
 class QARepository:
@@ -443,7 +529,11 @@ class QARepository:
         return dot_product / (norm1 * norm2)
     
     def update_testcase_embedding(self, testcase_id: int) -> bool:
-        """Оновлює embedding для конкретного тесткейса."""
+        """Оновлює embedding для конкретного тесткейса.
+        
+        Якщо текст не змінився - нічого не робить; якщо такий самий текст
+        вже має інший тесткейс - копіює його вектор без запиту до API.
+        """
         session = self.get_session()
         try:
             testcase = session.query(TestCase).filter(TestCase.id == testcase_id).first()
@@ -451,15 +541,19 @@ class QARepository:
                 return False
             
             # Створюємо текст для embedding (step + expected_result)
-            text_for_embedding = f"{testcase.step} {testcase.expected_result}"
+            text_for_embedding = embedding_text(testcase.step, testcase.expected_result)
+            text_hash = embedding_text_hash(text_for_embedding, self._vector_space())
+            if testcase.embedding is not None and testcase.embedding_text_hash == text_hash:
+                return True
             
             # Отримуємо embedding
-            embedding = self.embedder.embed_text(text_for_embedding)
+            embedding = self._resolve_embeddings(session, {text_hash: text_for_embedding})[0].get(text_hash)
             if embedding is None:
                 return False
             
             # Оновлюємо в БД
             testcase.embedding = embedding
+            testcase.embedding_text_hash = text_hash
             session.commit()
             return True
             
@@ -470,62 +564,38 @@ class QARepository:
         finally:
             session.close()
     
-    def update_all_embeddings(self, batch_size: int = 50) -> Dict[str, Any]:
-        """Оновлює embeddings для всіх тесткейсів які їх не мають."""
+    def update_all_embeddings(
+        self,
+        batch_size: int = 50,
+        concurrency: Optional[int] = None,
+        start_after_id: int = 0,
+        on_progress: Optional[Callable[[EmbeddingBackfillProgress], None]] = None,
+        recheck: bool = False,
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """Оновлює embeddings для всіх тесткейсів які їх не мають.
+        
+        Тесткейси читаються сторінками за id (без ORM об'єктів), до
+        ``concurrency`` батчів embeddings виконуються одночасно, кожен батч
+        записується одним bulk UPDATE у власній транзакції - помилка батчу не
+        відкочує інші. ``on_progress`` викликається після кожного батчу;
+        ``committed_id`` з прогресу можна передати як ``start_after_id``.
+        
+        Вектори дедуплікуються за хешем нормалізованого тексту: API
+        викликається один раз на унікальний текст, вектори вже збережених
+        однакових текстів копіюються. Хеш враховує модель і розмірність
+        embeddings, тож після їх зміни ``recheck`` перераховує всі тесткейси,
+        а інакше - лише ті, текст яких змінився. ``force`` заново рахує через
+        API всі тесткейси, не довіряючи збереженим векторам.
+        """
+        recheck = recheck or force
+        concurrency = concurrency or settings.ingest_embed_concurrency
         session = self.get_session()
         try:
-            # Знаходимо тесткейси без embeddings
-            testcases_without_embeddings = session.query(TestCase).filter(
-                TestCase.embedding.is_(None)
-            ).all()
-            
-            total_count = len(testcases_without_embeddings)
-            if total_count == 0:
-                return {
-                    'success': True,
-                    'message': 'All testcases already have embeddings',
-                    'total': 0,
-                    'updated': 0
-                }
-            
-            updated_count = 0
-            failed_count = 0
-            
-            # Обробляємо батчами
-            for i in range(0, total_count, batch_size):
-                batch = testcases_without_embeddings[i:i + batch_size]
-                
-                # Підготовляємо тексти для embedding
-                texts = []
-                for testcase in batch:
-                    text = f"{testcase.step} {testcase.expected_result}"
-                    texts.append(text)
-                
-                # Отримуємо embeddings для батчу
-                embeddings = self.embedder.embed_batch(texts)
-                
-                # Оновлюємо в БД
-                for testcase, embedding in zip(batch, embeddings):
-                    if embedding is not None:
-                        testcase.embedding = embedding
-                        updated_count += 1
-                    else:
-                        failed_count += 1
-                
-                # Комітимо батч
-                session.commit()
-                print(f"Updated embeddings for batch {i//batch_size + 1}: {len([e for e in embeddings if e is not None])}/{len(embeddings)}")
-            
-            return {
-                'success': True,
-                'message': f'Updated embeddings for {updated_count} testcases',
-                'total': total_count,
-                'updated': updated_count,
-                'failed': failed_count
-            }
-            
+            total_count = session.query(func.count(TestCase.id)).filter(
+                self._embedding_candidates(recheck), TestCase.id > start_after_id
+            ).scalar()
         except Exception as e:
-            session.rollback()
             return {
                 'success': False,
                 'error': f'Error updating embeddings: {str(e)}',
@@ -534,6 +604,207 @@ class QARepository:
             }
         finally:
             session.close()
+        
+        if total_count == 0:
+            return {
+                'success': True,
+                'message': 'All testcases already have embeddings',
+                'total': 0,
+                'updated': 0
+            }
+        
+        progress = EmbeddingBackfillProgress(total=total_count, committed_id=start_after_id)
+        # Submitted batches in id order: (last id, future); the committed id only
+        # moves past a batch when it and every batch before it fully succeeded
+        in_flight: List[Tuple[int, Future]] = []
+        blocked = False
+        
+        def settle(done_futures) -> None:
+            nonlocal blocked
+            for future in done_futures:
+                progress.add(future.result())
+            while in_flight and in_flight[0][1].done():
+                last_id, future = in_flight.pop(0)
+                blocked = blocked or future.result().failed > 0
+                if not blocked:
+                    progress.committed_id = last_id
+            if on_progress and done_futures:
+                on_progress(progress)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                pending = set()
+                for batch in self._iter_embedding_candidates(start_after_id, batch_size, recheck):
+                    future = executor.submit(self._embed_testcase_batch, batch, force)
+                    in_flight.append((batch[-1][0], future))
+                    pending.add(future)
+                    # Bounded read-ahead: at most two batches per worker are held in memory
+                    if len(pending) >= concurrency * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        settle(done)
+                done, _ = wait(pending)
+                settle(done)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Error updating embeddings: {str(e)}',
+                **progress.as_dict()
+            }
+        
+        return {
+            'success': True,
+            'message': f'Updated embeddings for {progress.updated} testcases',
+            **progress.as_dict()
+        }
+    
+    @staticmethod
+    def _embedding_candidates(recheck: bool):
+        """Умова вибору тесткейсів для backfill."""
+        if recheck:
+            return TestCase.id.isnot(None)
+        # Rows embedded before text hashes existed only get their hash stamped
+        return or_(TestCase.embedding.is_(None), TestCase.embedding_text_hash.is_(None))
+    
+    def _iter_embedding_candidates(
+        self,
+        start_after_id: int,
+        batch_size: int,
+        recheck: bool = False,
+        batches_per_page: int = 20
+    ) -> Iterator[List[Tuple[int, str, str, Optional[str], bool]]]:
+        """Батчі (id, step, expected_result, hash, чи є embedding) у порядку id.
+        
+        Кожна сторінка читається окремою короткою сесією (keyset за id), тож
+        з'єднання не тримається відкритим, поки батчі обробляються.
+        """
+        last_id = start_after_id
+        while True:
+            stmt = (
+                select(
+                    TestCase.id, TestCase.step, TestCase.expected_result,
+                    TestCase.embedding_text_hash, TestCase.embedding.isnot(None)
+                )
+                .where(self._embedding_candidates(recheck), TestCase.id > last_id)
+                .order_by(TestCase.id)
+                .limit(batch_size * batches_per_page)
+                .execution_options(yield_per=batch_size)
+            )
+            session = self.get_session()
+            try:
+                batches = [[tuple(row) for row in partition] for partition in session.execute(stmt).partitions()]
+            finally:
+                session.close()
+            
+            if not batches:
+                return
+            yield from batches
+            last_id = batches[-1][-1][0]
+    
+    def _vector_space(self) -> str:
+        """Модель і розмірність поточних embeddings, напр. 'text-embedding-3-small-1536'."""
+        return get_vector_name(self.embedder.model, self.embedder.dimensions)
+    
+    def _embed_testcase_batch(
+        self,
+        batch: List[Tuple[int, str, str, Optional[str], bool]],
+        force: bool = False
+    ) -> "EmbeddingBatchResult":
+        """Рахує embeddings унікальних змінених текстів батчу та записує їх одним UPDATE."""
+        result = EmbeddingBatchResult()
+        try:
+            vector_space = self._vector_space()
+            texts: Dict[str, str] = {}
+            changed: List[Tuple[int, str]] = []
+            unhashed: Dict[int, Tuple[str, str]] = {}
+            for testcase_id, step, expected_result, stored_hash, has_embedding in batch:
+                text_for_embedding = embedding_text(step, expected_result)
+                text_hash = embedding_text_hash(text_for_embedding, vector_space)
+                if force:
+                    texts[text_hash] = text_for_embedding
+                    changed.append((testcase_id, text_hash))
+                elif has_embedding and stored_hash == text_hash:
+                    result.skipped += 1
+                elif has_embedding and stored_hash is None:
+                    unhashed[testcase_id] = (text_hash, text_for_embedding)
+                else:
+                    texts[text_hash] = text_for_embedding
+                    changed.append((testcase_id, text_hash))
+            
+            session = self.get_session()
+            try:
+                stamps = []
+                if unhashed:
+                    # Embedded from this text before hashes were stored; a vector
+                    # of another dimension came from another model and is redone
+                    dimension = get_embedding_dimension(self.embedder.model, self.embedder.dimensions)
+                    stored = session.execute(
+                        select(TestCase.id, TestCase.embedding).where(TestCase.id.in_(list(unhashed)))
+                    )
+                    for testcase_id, embedding in stored:
+                        text_hash, text_for_embedding = unhashed[testcase_id]
+                        if embedding is not None and len(embedding) == dimension:
+                            stamps.append({'id': testcase_id, 'embedding_text_hash': text_hash})
+                        else:
+                            texts[text_hash] = text_for_embedding
+                            changed.append((testcase_id, text_hash))
+                
+                vectors, result.embedded_texts = self._resolve_embeddings(session, texts, reuse_stored=not force)
+                rows = [
+                    {'id': testcase_id, 'embedding': vectors[text_hash], 'embedding_text_hash': text_hash}
+                    for testcase_id, text_hash in changed
+                    if vectors.get(text_hash) is not None
+                ]
+                if rows:
+                    session.execute(update(TestCase), rows)
+                if stamps:
+                    session.execute(update(TestCase), stamps)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+            
+            result.updated = len(rows)
+            result.stamped = len(stamps)
+            result.failed = len(changed) - len(rows)
+            result.reused = len(rows) - result.embedded_texts
+            return result
+        except Exception as e:
+            print(f"Error updating embeddings for testcases {batch[0][0]}..{batch[-1][0]}: {e}")
+            return EmbeddingBatchResult(failed=len(batch))
+    
+    def _resolve_embeddings(
+        self,
+        session: Session,
+        texts: Dict[str, str],
+        reuse_stored: bool = True
+    ) -> Tuple[Dict[str, Optional[List[float]]], int]:
+        """Вектори для текстів за хешем: збережені в БД або один запит до API на унікальний текст.
+        
+        Повертає вектори та кількість текстів, порахованих через API.
+        """
+        if not texts:
+            return {}, 0
+        
+        vectors: Dict[str, Optional[List[float]]] = {}
+        if reuse_stored:
+            # One stored row per hash is enough, the others carry the same vector
+            first_ids = (
+                select(func.min(TestCase.id))
+                .where(TestCase.embedding_text_hash.in_(list(texts)), TestCase.embedding.isnot(None))
+                .group_by(TestCase.embedding_text_hash)
+            )
+            stored = session.execute(
+                select(TestCase.embedding_text_hash, TestCase.embedding).where(TestCase.id.in_(first_ids))
+            )
+            vectors.update((text_hash, embedding) for text_hash, embedding in stored)
+        
+        missing = [text_hash for text_hash in texts if text_hash not in vectors]
+        if missing:
+            embeddings = self.embedder.embed_batch([texts[text_hash] for text_hash in missing])
+            vectors.update(zip(missing, embeddings))
+        return vectors, sum(1 for text_hash in missing if vectors.get(text_hash) is not None)
     
     def semantic_search_testcases(
         self,
@@ -607,6 +878,199 @@ class QARepository:
         finally:
             session.close()
 
+    def find_near_duplicate_testcases(
+        self,
+        threshold: float = DUPLICATE_THRESHOLD,
+        cross_checklist_only: bool = True,
+        page_size: int = 5000
+    ) -> List[Dict[str, Any]]:
+        """Групи майже однакових тесткейсів (крок + очікуваний результат) по всій таблиці.
+        
+        Таблиця читається сторінками за id, а пари шукаються MinHash/LSH
+        індексом, тож сканування лінійне. З ``cross_checklist_only`` дублікати
+        всередині одного чекліста не враховуються. Групи від найбільших.
+        """
+        groups = group_near_duplicates(
+            (
+                (testcase_id, checklist_id, f"{step or ''} {expected_result or ''}")
+                for testcase_id, checklist_id, step, expected_result in self._iter_testcase_texts(page_size)
+            ),
+            threshold=threshold,
+            cross_group_only=cross_checklist_only
+        )
+        return self._duplicate_groups_report(groups)
+    
+    def find_semantic_duplicate_testcases(
+        self,
+        threshold: Optional[float] = None,
+        cross_checklist_only: bool = True,
+        section_id: Optional[int] = None,
+        page_size: int = 5000,
+        block_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Групи тесткейсів зі схожими embeddings (косинус >= ``threshold``).
+        
+        Нормовані embeddings читаються сторінками в одну float32 матрицю n x d,
+        а пари шукаються блоковим множенням матриці на себе
+        (``embedding_duplicate_pairs``), тож понад матрицю пам'ять займає
+        лише одна плитка ``block_size x block_size``. Однакові вектори
+        скануються одним представником (``embedding_duplicate_clusters``);
+        пари збираються в групи транзитивно, кожен тесткейс отримує найкращу
+        схожість у групі.
+        """
+        threshold = settings.duplicate_similarity_threshold if threshold is None else threshold
+        block_size = block_size or settings.duplicate_block_size
+        ids, checklist_ids, matrix, skipped = self._load_embedding_matrix(page_size, section_id)
+        groups = None
+        if cross_checklist_only and len(ids):
+            _, groups = np.unique(np.array(checklist_ids, dtype=str), return_inverse=True)
+        clusters, best = embedding_duplicate_clusters(
+            matrix, threshold=threshold, block_size=block_size, groups=groups
+        )
+        report = self._duplicate_groups_report(
+            [[ids[row] for row in cluster] for cluster in clusters],
+            similarities={ids[row]: similarity for row, similarity in best.items()}
+        )
+        return {
+            'groups': report,
+            'testcases_scanned': len(ids),
+            'skipped_embeddings': skipped,
+            'threshold': threshold
+        }
+    
+    def _load_embedding_matrix(
+        self,
+        page_size: int,
+        section_id: Optional[int] = None
+    ) -> Tuple[List[int], List[Any], np.ndarray, int]:
+        """(ids, checklist_ids, нормована float32 матриця, пропущені) тесткейсів з embeddings.
+        
+        Матриця виділяється один раз за кількістю рядків, тож пам'ять - n x d x 4
+        байти без проміжних копій; d - розмірність поточної моделі embedder.
+        Вектори іншої розмірності (після зміни моделі) і нульові пропускаються.
+        """
+        filters = [TestCase.embedding.isnot(None)]
+        if section_id:
+            filters.append(TestCase.checklist_id.in_(
+                select(Checklist.id).where(Checklist.section_id == section_id)
+            ))
+        session = self.get_session()
+        try:
+            total = session.execute(select(func.count(TestCase.id)).where(*filters)).scalar() or 0
+        finally:
+            session.close()
+        
+        ids: List[int] = []
+        checklist_ids: List[Any] = []
+        dimension = get_embedding_dimension(self.embedder.model, self.embedder.dimensions)
+        matrix = np.empty((total, dimension), dtype=np.float32)
+        skipped = 0
+        last_id = 0
+        while len(ids) < total:
+            session = self.get_session()
+            try:
+                rows = session.execute(
+                    select(TestCase.id, TestCase.checklist_id, TestCase.embedding)
+                    .where(TestCase.id > last_id, *filters)
+                    .order_by(TestCase.id)
+                    .limit(page_size)
+                ).all()
+            finally:
+                session.close()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            for testcase_id, checklist_id, embedding in rows:
+                if isinstance(embedding, str):
+                    embedding = json.loads(embedding)
+                if embedding is None:
+                    # JSON null passes the IS NOT NULL filter
+                    continue
+                if len(ids) >= total or len(embedding) != dimension:
+                    skipped += 1
+                    continue
+                vector = matrix[len(ids)]
+                vector[:] = embedding
+                norm = float(np.linalg.norm(vector))
+                if not norm:
+                    skipped += 1
+                    continue
+                vector /= norm
+                ids.append(testcase_id)
+                checklist_ids.append(checklist_id)
+        return ids, checklist_ids, matrix[:len(ids)], skipped
+    
+    def _duplicate_groups_report(
+        self,
+        groups: List[List[int]],
+        similarities: Optional[Dict[int, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """Групи id тесткейсів з контекстом чекліста і секції, від найбільших."""
+        if not groups:
+            return []
+        
+        details = {}
+        session = self.get_session()
+        try:
+            ids = [testcase_id for group in groups for testcase_id in group]
+            for start in range(0, len(ids), 1000):
+                rows = session.execute(
+                    select(
+                        TestCase.id, TestCase.checklist_id, Checklist.title,
+                        Checklist.section_id, QASection.title,
+                        TestCase.step, TestCase.expected_result
+                    )
+                    .join(Checklist, TestCase.checklist_id == Checklist.id)
+                    .outerjoin(QASection, Checklist.section_id == QASection.id)
+                    .where(TestCase.id.in_(ids[start:start + 1000]))
+                )
+                for testcase_id, checklist_id, checklist_title, section_id, section_title, step, expected_result in rows:
+                    details[testcase_id] = {
+                        'id': testcase_id,
+                        'checklist_id': checklist_id,
+                        'checklist_title': checklist_title,
+                        'section_id': section_id,
+                        'section_title': section_title,
+                        'step': step,
+                        'expected_result': expected_result
+                    }
+                    if similarities is not None:
+                        details[testcase_id]['similarity'] = round(similarities[testcase_id], 4)
+        finally:
+            session.close()
+        
+        result = []
+        for group in groups:
+            testcases = [details[testcase_id] for testcase_id in group if testcase_id in details]
+            if len(testcases) > 1:
+                result.append({
+                    'testcases': testcases,
+                    'checklists': len({testcase['checklist_id'] for testcase in testcases}),
+                    'sections': len({testcase['section_id'] for testcase in testcases})
+                })
+        result.sort(key=lambda group: len(group['testcases']), reverse=True)
+        return result
+    
+    def _iter_testcase_texts(self, page_size: int) -> Iterator[Tuple[int, Any, str, str]]:
+        """(id, checklist_id, step, expected_result) усіх тесткейсів у порядку id, сторінками за id."""
+        last_id = 0
+        while True:
+            session = self.get_session()
+            try:
+                rows = session.execute(
+                    select(TestCase.id, TestCase.checklist_id, TestCase.step, TestCase.expected_result)
+                    .where(TestCase.id > last_id)
+                    .order_by(TestCase.id)
+                    .limit(page_size)
+                ).all()
+            finally:
+                session.close()
+            if not rows:
+                return
+            for row in rows:
+                yield tuple(row)
+            last_id = rows[-1][0]
+
     # Feature/document helpers
 
     def list_functionalities(self, limit: int = 100, offset: int = 0) -> Tuple[List[str], int]:
@@ -2,41 +2,298 @@
 
 import uuid
 import hashlib
-from typing import List, Dict, Any, Optional, Tuple
-from qdrant_client import QdrantClient
+from dataclasses import dataclass, replace
+from typing import List, Dict, Any, Optional, Tuple, Union
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.models import (
-    Distance, VectorParams, CollectionInfo, PointStruct, 
-    Filter, FieldCondition, MatchValue, SearchRequest
+    Distance, VectorParams, VectorParamsDiff, CollectionInfo, PointStruct, 
+    Filter, FieldCondition, MatchAny, MatchValue, ScoredPoint,
+    HnswConfigDiff, SearchParams, QuantizationSearchParams,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    BinaryQuantization, BinaryQuantizationConfig, Disabled, PointVectors
 )
 from qdrant_client.http.exceptions import UnexpectedResponse
 
+from ..ai.embedder import get_embedding_dimension, get_vector_name, parse_vector_spaces
 from ..config import settings
 
 
+QUANTIZATION_TYPES = ("none", "scalar", "binary")
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    """Storage and index tuning for the qa_chunks collection.
+    
+    Trades RAM against recall: quantized vectors stay in RAM for the HNSW
+    walk while the original float32 vectors can live on disk and are only
+    read back to rescore the oversampled candidates.
+    """
+    name: str
+    quantization: str = "none"
+    on_disk: bool = False
+    hnsw_m: Optional[int] = None
+    hnsw_ef_construct: Optional[int] = None
+    search_ef: Optional[int] = None
+    rescore: bool = True
+    oversampling: Optional[float] = None
+    
+    def __post_init__(self):
+        if self.quantization not in QUANTIZATION_TYPES:
+            raise ValueError(
+                f"Unknown quantization '{self.quantization}', expected one of {QUANTIZATION_TYPES}"
+            )
+    
+    def vector_params(self, size: int) -> VectorParams:
+        """Vector params for collection creation."""
+        return VectorParams(size=size, distance=Distance.COSINE, on_disk=self.on_disk)
+    
+    def hnsw_config(self) -> Optional[HnswConfigDiff]:
+        """HNSW graph parameters, None keeps Qdrant defaults."""
+        if self.hnsw_m is None and self.hnsw_ef_construct is None:
+            return None
+        return HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+    
+    def quantization_config(self) -> Optional[Union[ScalarQuantization, BinaryQuantization]]:
+        """Quantization config, None when vectors are kept as float32 only."""
+        if self.quantization == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        if self.quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        return None
+    
+    def search_params(self) -> Optional[SearchParams]:
+        """Search-time params (ef and quantization rescoring)."""
+        quantization = None
+        if self.quantization != "none":
+            quantization = QuantizationSearchParams(
+                rescore=self.rescore,
+                oversampling=self.oversampling
+            )
+        if self.search_ef is None and quantization is None:
+            return None
+        return SearchParams(hnsw_ef=self.search_ef, quantization=quantization)
+
+
+COLLECTION_PROFILES: Dict[str, CollectionProfile] = {
+    # Qdrant defaults, full float32 vectors in RAM
+    "default": CollectionProfile(name="default"),
+    # int8 vectors in RAM (~4x less memory), originals in RAM for rescoring
+    "balanced": CollectionProfile(
+        name="balanced", quantization="scalar",
+        hnsw_m=16, hnsw_ef_construct=128, search_ef=128, oversampling=1.5
+    ),
+    # int8 vectors in RAM, originals on disk
+    "low_memory": CollectionProfile(
+        name="low_memory", quantization="scalar", on_disk=True,
+        hnsw_m=16, hnsw_ef_construct=100, search_ef=128, oversampling=2.0
+    ),
+    # 1 bit per dimension (~32x less memory), needs heavier oversampling
+    "binary": CollectionProfile(
+        name="binary", quantization="binary", on_disk=True,
+        hnsw_m=16, hnsw_ef_construct=100, search_ef=128, oversampling=3.0
+    ),
+    # denser graph and wider search for maximum recall
+    "high_recall": CollectionProfile(
+        name="high_recall", hnsw_m=32, hnsw_ef_construct=256, search_ef=256
+    ),
+}
+
+
+def get_collection_profile(name: Optional[str] = None) -> CollectionProfile:
+    """Resolve a named profile and apply per-setting overrides from Settings."""
+    profile_name = name or settings.vectordb_collection_profile
+    if profile_name not in COLLECTION_PROFILES:
+        raise ValueError(
+            f"Unknown collection profile '{profile_name}', "
+            f"available: {', '.join(COLLECTION_PROFILES)}"
+        )
+    
+    overrides = {
+        "quantization": settings.vectordb_quantization,
+        "oversampling": settings.vectordb_quantization_oversampling,
+        "on_disk": settings.vectordb_on_disk,
+        "hnsw_m": settings.vectordb_hnsw_m,
+        "hnsw_ef_construct": settings.vectordb_hnsw_ef_construct,
+        "search_ef": settings.vectordb_search_ef,
+    }
+    return replace(
+        COLLECTION_PROFILES[profile_name],
+        **{key: value for key, value in overrides.items() if value is not None}
+    )
+
+
+def _default_vector_name() -> str:
+    """Named vector for the configured embedding model/dimensions."""
+    return get_vector_name(settings.openai_embedding_model, settings.openai_embedding_dimensions)
+
+
+def _default_vector_size() -> int:
+    """Embedding size for the configured embedding model/dimensions."""
+    return get_embedding_dimension(settings.openai_embedding_model, settings.openai_embedding_dimensions)
+
+
+def _collection_vector_spaces(vector_name: str, vector_size: int) -> Dict[str, int]:
+    """Named vectors (name -> size) to provision when creating the collection."""
+    spaces = {}
+    for model, dimensions in parse_vector_spaces(settings.vectordb_extra_vectors):
+        spaces[get_vector_name(model, dimensions)] = get_embedding_dimension(model, dimensions)
+    spaces[vector_name] = vector_size
+    return spaces
+
+
+def _chunk_point_id(chunk_id: str) -> int:
+    """Convert chunk_id to integer hash for Qdrant compatibility."""
+    return int(hashlib.md5(chunk_id.encode()).hexdigest()[:8], 16)
+
+
+def _build_search_filter(
+    feature_names: Optional[List[str]] = None,
+    space_keys: Optional[List[str]] = None,
+    filters: Optional[Dict[str, Any]] = None
+) -> Optional[Filter]:
+    """Build Qdrant filter shared by sync and async search."""
+    filter_conditions = []
+    
+    if feature_names:
+        filter_conditions.append(
+            FieldCondition(
+                key="feature_name",
+                match=MatchValue(value=feature_names[0]) if len(feature_names) == 1 else MatchAny(any=feature_names)
+            )
+        )
+    
+    if space_keys:
+        filter_conditions.append(
+            FieldCondition(
+                key="space",
+                match=MatchValue(value=space_keys[0]) if len(space_keys) == 1 else MatchAny(any=space_keys)
+            )
+        )
+    
+    # Add custom filters
+    if filters:
+        for key, value in filters.items():
+            if key in ["space", "feature_name", "document_id"]:
+                filter_conditions.append(
+                    FieldCondition(
+                        key=key,
+                        match=MatchValue(value=value)
+                    )
+                )
+    
+    return Filter(must=filter_conditions) if filter_conditions else None
+
+
+def _format_search_hit(hit: ScoredPoint) -> Dict[str, Any]:
+    """Convert a scored point into the search result dict used by MCP tools."""
+    return {
+        "score": float(hit.score),
+        "feature": {
+            "name": hit.payload.get("feature_name"),
+            "id": hit.payload.get("feature_id")
+        },
+        "document": {
+            "id": hit.payload.get("document_id"),
+            "title": hit.payload.get("title"),
+            "url": hit.payload.get("url"),
+            "space": hit.payload.get("space"),
+            "labels": hit.payload.get("labels", [])
+        },
+        "chunk": {
+            "id": str(hit.id),
+            "text": hit.payload.get("text", ""),
+            "position": hit.payload.get("chunk_ordinal", 0)
+        }
+    }
+
+
 class VectorDBRepository:
     """Repository for vector database operations using Qdrant."""
     
     COLLECTION_NAME = "qa_chunks"
     
-    def __init__(self, url: Optional[str] = None):
-        """Initialize Qdrant client."""
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        profile: Optional[CollectionProfile] = None,
+        vector_name: Optional[str] = None,
+        vector_size: Optional[int] = None
+    ):
+        """Initialize Qdrant client.
+        
+        ``vector_name`` selects the named vector used for reads and writes and
+        ``vector_size`` is its length (from ``get_embedding_dimension``); both
+        default to the configured embedding model/dimensions.
+        """
+        if vector_name is not None and vector_size is None:
+            raise ValueError(f"vector_size is required for vector '{vector_name}'")
         self.url = url or settings.vectordb_url
+        self.profile = profile or get_collection_profile()
+        self.vector_name = vector_name or _default_vector_name()
+        self.vector_size = vector_size or _default_vector_size()
+        # Named vector actually used in requests; None for legacy single-vector collections
+        self.using: Optional[str] = self.vector_name
         self.client = QdrantClient(url=self.url)
         self._ensure_collection()
     
     def _ensure_collection(self) -> None:
-        """Ensure the collection exists."""
+        """Ensure the collection exists and has the named vector this repository uses."""
         try:
-            self.client.get_collection(self.COLLECTION_NAME)
+            info = self.client.get_collection(self.COLLECTION_NAME)
         except UnexpectedResponse:
-            # Collection doesn't exist, create it
+            # Collection doesn't exist, create it with a named vector per embedding space
             self.client.create_collection(
                 collection_name=self.COLLECTION_NAME,
-                vectors_config=VectorParams(
-                    size=1536,  # OpenAI text-embedding-3-small dimension
-                    distance=Distance.COSINE
+                vectors_config={
+                    name: self.profile.vector_params(size=size)
+                    for name, size in _collection_vector_spaces(self.vector_name, self.vector_size).items()
+                },
+                hnsw_config=self.profile.hnsw_config(),
+                quantization_config=self.profile.quantization_config()
+            )
+            return
+        
+        vectors = info.config.params.vectors
+        if isinstance(vectors, dict):
+            if self.vector_name not in vectors:
+                raise ValueError(
+                    f"Vector '{self.vector_name}' is not configured in "
+                    f"{self.COLLECTION_NAME} (available: {', '.join(vectors) or 'none'})"
                 )
+        else:
+            # Collection created before named vectors were introduced
+            self.using = None
+    
+    def _point_vector(self, embedding: List[float]) -> Union[List[float], Dict[str, List[float]]]:
+        """Wrap an embedding for the vector this repository writes to."""
+        return {self.using: embedding} if self.using else embedding
+    
+    def apply_collection_profile(self, profile: Optional[CollectionProfile] = None) -> bool:
+        """Apply quantization/HNSW/on_disk settings to the existing collection.
+        
+        Qdrant rebuilds the affected indexes in the background; the collection
+        stays searchable while the optimizer runs.
+        """
+        if profile is not None:
+            self.profile = profile
+        try:
+            vectors = self.client.get_collection(self.COLLECTION_NAME).config.params.vectors
+            vector_names = list(vectors) if isinstance(vectors, dict) else [""]
+            self.client.update_collection(
+                collection_name=self.COLLECTION_NAME,
+                vectors_config={
+                    name: VectorParamsDiff(on_disk=self.profile.on_disk) for name in vector_names
+                },
+                hnsw_config=self.profile.hnsw_config(),
+                quantization_config=self.profile.quantization_config() or Disabled.DISABLED
             )
+            return True
+        except Exception as e:
+            print(f"Error applying collection profile '{self.profile.name}': {e}")
+            return False
     
     def upsert_chunk(
         self,
@@ -69,12 +326,9 @@ class VectorDBRepository:
                 "text": text[:512] if text else ""  # Truncate for storage
             }
             
-            # Convert chunk_id to integer hash for Qdrant compatibility
-            point_id = int(hashlib.md5(chunk_id.encode()).hexdigest()[:8], 16)
-            
             point = PointStruct(
-                id=point_id,
-                vector=embedding,
+                id=_chunk_point_id(chunk_id),
+                vector=self._point_vector(embedding),
                 payload={**payload, "original_chunk_id": chunk_id}
             )
             
@@ -112,13 +366,10 @@ class VectorDBRepository:
                     "text": chunk_data["text"][:512] if chunk_data["text"] else ""
                 }
                 
-                # Convert chunk_id to integer hash for Qdrant compatibility
                 chunk_id = chunk_data["chunk_id"]
-                point_id = int(hashlib.md5(chunk_id.encode()).hexdigest()[:8], 16)
-                
                 point = PointStruct(
-                    id=point_id,
-                    vector=chunk_data["embedding"],
+                    id=_chunk_point_id(chunk_id),
+                    vector=self._point_vector(chunk_data["embedding"]),
                     payload={**payload, "original_chunk_id": chunk_id}
                 )
                 points.append(point)
@@ -142,6 +393,37 @@ class VectorDBRepository:
         
         return successful, failed
     
+    def update_chunk_vectors(
+        self,
+        chunks_data: List[Dict[str, Any]],
+        vector_name: str
+    ) -> Tuple[int, int]:
+        """Write embeddings into one named vector of existing chunks.
+        
+        Leaves payload and other named vectors untouched, so a new
+        model/dimension can be backfilled side by side while searches keep
+        using the current vector.
+        """
+        points = [
+            PointVectors(
+                id=_chunk_point_id(chunk_data["chunk_id"]),
+                vector={vector_name: chunk_data["embedding"]}
+            )
+            for chunk_data in chunks_data
+        ]
+        if not points:
+            return 0, 0
+        
+        try:
+            self.client.update_vectors(
+                collection_name=self.COLLECTION_NAME,
+                points=points
+            )
+            return len(points), 0
+        except Exception as e:
+            print(f"Error updating '{vector_name}' vectors: {e}")
+            return 0, len(points)
+    
     def search(
         self,
         query_vector: List[float],
@@ -152,80 +434,29 @@ class VectorDBRepository:
     ) -> List[Dict[str, Any]]:
         """Search for similar chunks."""
         try:
-            # Build filter conditions
-            filter_conditions = []
-            
-            if feature_names:
-                filter_conditions.append(
-                    FieldCondition(
-                        key="feature_name",
-                        match=MatchValue(value=feature_names[0] if len(feature_names) == 1 else feature_names)
-                    )
-                )
-            
-            if space_keys:
-                filter_conditions.append(
-                    FieldCondition(
-                        key="space",
-                        match=MatchValue(value=space_keys[0] if len(space_keys) == 1 else space_keys)
-                    )
-                )
-            
-            # Add custom filters
-            if filters:
-                for key, value in filters.items():
-                    if key in ["space", "feature_name", "document_id"]:
-                        filter_conditions.append(
-                            FieldCondition(
-                                key=key,
-                                match=MatchValue(value=value)
-                            )
-                        )
-            
-            # Perform search
-            search_filter = Filter(must=filter_conditions) if filter_conditions else None
-            
-            search_results = self.client.search(
+            response = self.client.query_points(
                 collection_name=self.COLLECTION_NAME,
-                query_vector=query_vector,
-                query_filter=search_filter,
+                query=query_vector,
+                using=self.using,
+                query_filter=_build_search_filter(feature_names, space_keys, filters),
+                search_params=self.profile.search_params(),
                 limit=top_k,
                 with_payload=True,
                 with_vectors=False
             )
             
-            # Format results
-            results = []
-            for hit in search_results:
-                result = {
-                    "score": float(hit.score),
-                    "feature": {
-                        "name": hit.payload.get("feature_name"),
-                        "id": hit.payload.get("feature_id")
-                    },
-                    "document": {
-                        "id": hit.payload.get("document_id"),
-                        "title": hit.payload.get("title"),
-                        "url": hit.payload.get("url"),
-                        "space": hit.payload.get("space"),
-                        "labels": hit.payload.get("labels", [])
-                    },
-                    "chunk": {
-                        "id": str(hit.id),
-                        "text": hit.payload.get("text", ""),
-                        "position": hit.payload.get("chunk_ordinal", 0)
-                    }
-                }
-                results.append(result)
-            
-            return results
+            return [_format_search_hit(hit) for hit in response.points]
             
         except Exception as e:
             print(f"Error searching vector database: {e}")
             return []
     
-    def delete_document_chunks(self, document_id: int) -> bool:
-        """Delete all chunks for a specific document."""
+    def delete_document_chunks(self, document_id: int, keep_ordinals: Optional[List[int]] = None) -> bool:
+        """Delete all chunks for a specific document.
+        
+        With ``keep_ordinals`` the chunks just upserted for a new version of
+        the document are kept and only the leftovers of the old one go.
+        """
         try:
             filter_condition = Filter(
                 must=[
@@ -233,7 +464,10 @@ class VectorDBRepository:
                         key="document_id",
                         match=MatchValue(value=document_id)
                     )
-                ]
+                ],
+                must_not=[
+                    FieldCondition(key="chunk_ordinal", match=MatchAny(any=keep_ordinals))
+                ] if keep_ordinals else None
             )
             
             self.client.delete(
@@ -318,3 +552,83 @@ class VectorDBRepository:
         """Close the client connection."""
         if hasattr(self.client, 'close'):
             self.client.close()
+
+
+class AsyncVectorDBRepository:
+    """Async read-only repository for vector search on the request path.
+    
+    Used by the MCP/HTTP document search tools so that Qdrant round trips
+    do not block the event loop. Collection management and writes stay in
+    the synchronous ``VectorDBRepository`` used by the loaders.
+    """
+    
+    COLLECTION_NAME = VectorDBRepository.COLLECTION_NAME
+    
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        prefer_grpc: Optional[bool] = None,
+        grpc_port: Optional[int] = None,
+        profile: Optional[CollectionProfile] = None,
+        vector_name: Optional[str] = None
+    ):
+        """Initialize async Qdrant client (optionally over gRPC)."""
+        self.url = url or settings.vectordb_url
+        self.profile = profile or get_collection_profile()
+        self.vector_name = vector_name or _default_vector_name()
+        self._using: Optional[str] = None
+        self._using_resolved = False
+        self.prefer_grpc = settings.vectordb_prefer_grpc if prefer_grpc is None else prefer_grpc
+        self.client = AsyncQdrantClient(
+            url=self.url,
+            prefer_grpc=self.prefer_grpc,
+            grpc_port=grpc_port or settings.vectordb_grpc_port
+        )
+    
+    async def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 10,
+        feature_names: Optional[List[str]] = None,
+        space_keys: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Search for similar chunks without blocking the event loop."""
+        try:
+            response = await self.client.query_points(
+                collection_name=self.COLLECTION_NAME,
+                query=query_vector,
+                using=await self._resolve_using(),
+                query_filter=_build_search_filter(feature_names, space_keys, filters),
+                search_params=self.profile.search_params(),
+                limit=top_k,
+                with_payload=True,
+                with_vectors=False
+            )
+            
+            return [_format_search_hit(hit) for hit in response.points]
+            
+        except Exception as e:
+            print(f"Error searching vector database: {e}")
+            return []
+    
+    async def _resolve_using(self) -> Optional[str]:
+        """Named vector to query; None for legacy single-vector collections."""
+        if not self._using_resolved:
+            info = await self.client.get_collection(self.COLLECTION_NAME)
+            vectors = info.config.params.vectors
+            self._using = self.vector_name if isinstance(vectors, dict) else None
+            self._using_resolved = True
+        return self._using
+    
+    async def health_check(self) -> bool:
+        """Simple health check for the vector database."""
+        try:
+            await self.client.get_collection(self.COLLECTION_NAME)
+            return True
+        except Exception:
+            return False
+    
+    async def close(self) -> None:
+        """Close the client connection."""
+        await self.client.close()
@@ -6,22 +6,34 @@ from functools import partial
 from threading import RLock
 from typing import Callable, Optional
 
+from .ai.reranker import Reranker, create_reranker
+from .config import settings
 from .data.qa_repository import QARepository
+from .data.vectordb_repo import AsyncVectorDBRepository
 from .services.qa_service import QAService
 
 __all__ = [
+    "close_async_vector_repository",
+    "get_async_vector_repository",
     "get_qa_repository",
     "get_qa_service",
+    "get_reranker",
+    "override_async_vector_repository",
     "override_qa_repository",
     "override_qa_service",
+    "override_reranker",
 ]
 
 
 _lock = RLock()
 _repo_factory: Callable[[], QARepository] = QARepository
 _service_factory: Callable[[QARepository], QAService] = QAService
+_async_vector_repo_factory: Callable[[], AsyncVectorDBRepository] = AsyncVectorDBRepository
 _repo_instance: Optional[QARepository] = None
 _service_instance: Optional[QAService] = None
+_async_vector_repo_instance: Optional[AsyncVectorDBRepository] = None
+_reranker_factory: Callable[[], Reranker] = lambda: create_reranker(settings.rerank_provider)
+_reranker_instance: Optional[Reranker] = None
 
 
 def _reset_singletons() -> None:
@@ -46,6 +58,24 @@ def override_qa_service(factory: Callable[[QARepository], QAService]) -> None:
         _reset_singletons()
 
 
+def override_async_vector_repository(
+    factory: Callable[[], AsyncVectorDBRepository]
+) -> None:
+    """Override the default AsyncVectorDBRepository factory (useful for tests)."""
+    global _async_vector_repo_factory, _async_vector_repo_instance
+    with _lock:
+        _async_vector_repo_factory = factory
+        _async_vector_repo_instance = None
+
+
+def override_reranker(factory: Callable[[], Reranker]) -> None:
+    """Override the default search reranker factory (useful for tests)."""
+    global _reranker_factory, _reranker_instance
+    with _lock:
+        _reranker_factory = factory
+        _reranker_instance = None
+
+
 def get_qa_repository() -> QARepository:
     """Return a lazily-instantiated QARepository instance."""
     global _repo_instance
@@ -63,3 +93,31 @@ def get_qa_service() -> QAService:
             repository = get_qa_repository()
             _service_instance = _service_factory(repository)
         return _service_instance
+
+
+def get_async_vector_repository() -> AsyncVectorDBRepository:
+    """Return a lazily-instantiated AsyncVectorDBRepository instance."""
+    global _async_vector_repo_instance
+    with _lock:
+        if _async_vector_repo_instance is None:
+            _async_vector_repo_instance = _async_vector_repo_factory()
+        return _async_vector_repo_instance
+
+
+def get_reranker() -> Reranker:
+    """Return a lazily-instantiated search reranker."""
+    global _reranker_instance
+    with _lock:
+        if _reranker_instance is None:
+            _reranker_instance = _reranker_factory()
+        return _reranker_instance
+
+
+async def close_async_vector_repository() -> None:
+    """Close the shared AsyncVectorDBRepository if it was created."""
+    global _async_vector_repo_instance
+    with _lock:
+        instance = _async_vector_repo_instance
+        _async_vector_repo_instance = None
+    if instance is not None:
+        await instance.close()
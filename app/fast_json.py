@@ -0,0 +1,37 @@
+"""Fast JSON encoding for HTTP responses (orjson for dicts, pydantic-core for models)."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_bytes(value: Any) -> bytes:
+    """Serialize ``value`` to UTF-8 JSON bytes.
+
+    Pydantic models are written by their compiled serializer (what
+    ``model_dump_json`` uses) without building an intermediate dict; anything
+    else goes through orjson, which also handles datetimes, enums and numpy
+    scalars natively.
+    """
+    if isinstance(value, BaseModel):
+        return value.__pydantic_serializer__.to_json(value)
+    return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with ``json_bytes``."""
+
+    def render(self, content: Any) -> bytes:
+        return json_bytes(content)
@@ -4,50 +4,56 @@ HTTP API Server - FastAPI сервер з HTTP endpoints та JSON-RPC для MC
 Використовує функції з mcp_tools.py для бізнес-логіки
 """
 
-import json
 import sys
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 
+import orjson
 import uvicorn
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request, Response
+from pydantic import BaseModel, ValidationError
 
+from .compression import CompressionMiddleware
 from .config import settings
+from .dependencies import close_async_vector_repository
+from .fast_json import FastJSONResponse, json_bytes
 from .mcp_tools import (
+    TOOL_DEFINITIONS,
+    model_results,
+    tool_schemas,
     qa_search_documents,
     qa_search_testcases, 
-    qa_search_testcases_text,
     qa_list_features,
     qa_docs_by_feature,
-    qa_health,
-    qa_get_sections,
-    qa_get_checklists,
-    qa_get_testcases,
-    qa_get_configs,
-    qa_get_statistics,
-    qa_get_full_structure
+    qa_health
 )
 
 # FastAPI app
 app = FastAPI(
     title="QA HTTP API Server",
     description="HTTP API Server with QA tools and MCP JSON-RPC support",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
+app.add_middleware(CompressionMiddleware, minimum_size=settings.response_compression_min_size)
 
 # JSON-RPC models
 class JSONRPCRequest(BaseModel):
     jsonrpc: str = "2.0"
     method: str
     params: Dict[str, Any] = {}
-    id: Optional[int] = None
+    id: Optional[Union[int, str]] = None
+
+    @property
+    def is_notification(self) -> bool:
+        """Notification - запит без поля id, на нього не відповідають."""
+        return "id" not in self.model_fields_set
 
 class JSONRPCResponse(BaseModel):
     jsonrpc: str = "2.0"
     result: Optional[Dict[str, Any]] = None
     error: Optional[Dict[str, Any]] = None
-    id: Optional[int] = None
+    id: Optional[Union[int, str]] = None
 
 # Request models for HTTP endpoints
 class SearchDocumentsRequest(BaseModel):
@@ -57,6 +63,7 @@ class SearchDocumentsRequest(BaseModel):
     space_keys: Optional[List[str]] = None
     filters: Optional[Dict[str, Any]] = None
     return_chunks: bool = True
+    rerank: Optional[bool] = None
 
 class SearchTestcasesRequest(BaseModel):
     query: str
@@ -69,21 +76,74 @@ class SearchTestcasesRequest(BaseModel):
     priority: Optional[str] = None
 
 # MCP Tools registry - всі інструменти з зрозумілими назвами
-TOOLS = {
-    "qa.search_documents": qa_search_documents,  # Пошук в документації/знаннях
-    "qa.search_testcases": qa_search_testcases,  # Пошук в тесткейсах (AI)
-    "qa.list_features": qa_list_features,
-    "qa.docs_by_feature": qa_docs_by_feature,
-    "qa.health": qa_health,
-    "qa.get_sections": qa_get_sections,
-    "qa.get_checklists": qa_get_checklists,
-    "qa.get_testcases": qa_get_testcases,
-    "qa.search_testcases_text": qa_search_testcases_text,  # Текстовий пошук тесткейсів
-    "qa.get_configs": qa_get_configs,
-    "qa.get_statistics": qa_get_statistics,
-    "qa.get_full_structure": qa_get_full_structure
+TOOLS = {definition.name: definition.handler for definition in TOOL_DEFINITIONS}
+
+SERVER_INFO = {
+    "protocolVersion": "2024-11-05",
+    "capabilities": {
+        "tools": {}
+    },
+    "serverInfo": {
+        "name": "qa-search",
+        "version": "1.0.0"
+    }
+}
+
+# initialize і tools/list не залежать від запиту: серіалізуємо result один раз
+_CACHED_RESULTS: Dict[str, bytes] = {
+    "initialize": json_bytes(SERVER_INFO),
+    "tools/list": json_bytes({"tools": tool_schemas()}),
+}
+
+
+def _result_response(request_id: Any, result: bytes) -> Response:
+    """JSON-RPC відповідь з уже серіалізованим result (та сама форма, що й JSONRPCResponse)."""
+    body = b'{"jsonrpc":"2.0","result":' + result + b',"error":null,"id":' + json_bytes(request_id) + b'}'
+    return Response(content=body, media_type="application/json")
+
+
+async def _run_tool(tool, arguments: Dict[str, Any]) -> bytes:
+    """Викликає інструмент і серіалізує результат без проміжного dict (див. model_results)."""
+    with model_results():
+        result = await tool(**arguments)
+    return json_bytes(result)
+
+
+async def _call_tool(request: JSONRPCRequest) -> Union[JSONRPCResponse, Response]:
+    tool_name = request.params.get("name")
+    tool_args = request.params.get("arguments", {})
+    if tool_name not in TOOLS:
+        return JSONRPCResponse(
+            id=request.id,
+            error={
+                "code": -32601,
+                "message": f"Tool not found: {tool_name}"
+            }
+        )
+    text = (await _run_tool(TOOLS[tool_name], tool_args)).decode("utf-8")
+    return _result_response(request.id, json_bytes({"content": [{"type": "text", "text": text}]}))
+
+
+async def _ping(request: JSONRPCRequest) -> JSONRPCResponse:
+    return JSONRPCResponse(id=request.id, result={})
+
+
+async def _notification_initialized(request: JSONRPCRequest) -> JSONRPCResponse:
+    # Notification methods should not have an id in the response
+    return JSONRPCResponse(result={})
+
+
+METHOD_HANDLERS = {
+    "tools/call": _call_tool,
+    "ping": _ping,
+    "notifications/initialized": _notification_initialized,
 }
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared async clients on server shutdown"""
+    await close_async_vector_repository()
+
 @app.get("/health")
 async def health_check():
     """Simple health check endpoint"""
@@ -93,249 +153,31 @@ async def health_check():
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
-@app.post("/jsonrpc")
 async def jsonrpc_handler(request: JSONRPCRequest):
-    """JSON-RPC endpoint for MCP tools"""
+    """Handle a single JSON-RPC request"""
     try:
         method = request.method
-        params = request.params
         
-        # Handle standard MCP methods
-        if method == "initialize":
-            return JSONRPCResponse(
-                id=request.id,
-                result={
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {
-                        "tools": {}
-                    },
-                    "serverInfo": {
-                        "name": "qa-search",
-                        "version": "1.0.0"
-                    }
-                }
-            )
+        cached = _CACHED_RESULTS.get(method)
+        if cached is not None:
+            return _result_response(request.id, cached)
         
-        elif method == "tools/list":
-            # Генеруємо список інструментів з TOOLS registry
-            tools_list = []
-            for tool_name in TOOLS.keys():
-                # Базові схеми для кожного інструменту
-                if tool_name == "qa.search_documents":
-                    tool_schema = {
-                        "name": tool_name,
-                        "description": "🔍 Search in DOCUMENTATION and knowledge base - finds relevant docs, guides, and information chunks",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "query": {"type": "string", "description": "Search query for documentation"},
-                                "top_k": {"type": "integer", "default": 10, "description": "Number of documents to return"},
-                                "feature_names": {"type": "array", "items": {"type": "string"}, "description": "Filter by feature names"},
-                                "space_keys": {"type": "array", "items": {"type": "string"}, "description": "Filter by Confluence space keys"},
-                                "return_chunks": {"type": "boolean", "default": True, "description": "Whether to return chunk information"}
-                            },
-                            "required": ["query"]
-                        }
-                    }
-                elif tool_name == "qa.search_testcases":
-                    tool_schema = {
-                        "name": tool_name,
-                        "description": "🧪 Search in TEST CASES using AI - finds specific tests by semantic similarity (step, expected_result)",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "query": {"type": "string", "description": "Search query for test cases"},
-                                "limit": {"type": "integer", "default": 10, "description": "Maximum number of test cases"},
-                                "min_similarity": {"type": "number", "default": 0.5, "description": "Minimum similarity (0.0-1.0)"},
-                                "section_id": {"type": "integer", "description": "Filter by section ID"},
-                                "checklist_id": {"type": "integer", "description": "Filter by checklist ID"},
-                                "test_group": {"type": "string", "description": "Filter by test group (GENERAL or CUSTOM)"},
-                                "priority": {"type": "string", "description": "Filter by priority"}
-                            },
-                            "required": ["query"]
-                        }
-                    }
-                elif tool_name == "qa.search_testcases_text":
-                    tool_schema = {
-                        "name": tool_name,
-                        "description": "📝 Search test cases by TEXT - simple text search in step and expected_result fields",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "query": {"type": "string", "description": "Text search query"},
-                                "section_id": {"type": "integer", "description": "Section ID to filter by"},
-                                "checklist_id": {"type": "integer", "description": "Checklist ID to filter by"},
-                                "limit": {"type": "integer", "default": 100, "description": "Maximum number of results"}
-                            },
-                            "required": ["query"]
-                        }
-                    }
-                elif tool_name == "qa.list_features":
-                    tool_schema = {
-                        "name": tool_name,
-                        "description": "List all features with descriptions",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "limit": {"type": "integer", "default": 100, "description": "Maximum number of features"},
-                                "offset": {"type": "integer", "default": 0, "description": "Number of features to skip"}
-                            }
-                        }
-                    }
-                elif tool_name == "qa.docs_by_feature":
-                    tool_schema = {
-                        "name": tool_name,
-                        "description": "Get documents for a specific feature",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "feature_name": {"type": "string", "description": "Feature name"},
-                                "limit": {"type": "integer", "default": 50, "description": "Maximum number of documents"}
-                            }
-                        }
-                    }
-                elif tool_name == "qa.health":
-                    tool_schema = {
-                        "name": tool_name,
-                        "description": "Check system health",
-                        "inputSchema": {"type": "object", "properties": {}}
-                    }
-                elif tool_name == "qa.get_sections":
-                    tool_schema = {
-                        "name": tool_name,
-                        "description": "Get list of QA sections (Checklist WEB, Checklist MOB, etc.)",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "limit": {"type": "integer", "default": 100, "description": "Maximum number of sections"},
-                                "offset": {"type": "integer", "default": 0, "description": "Number of sections to skip"}
-                            }
-                        }
-                    }
-                elif tool_name == "qa.get_checklists":
-                    tool_schema = {
-                        "name": tool_name,
-                        "description": "Get list of checklists, optionally filtered by section",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "section_id": {"type": "integer", "description": "Section ID to filter by"},
-                                "limit": {"type": "integer", "default": 100, "description": "Maximum number of checklists"},
-                                "offset": {"type": "integer", "default": 0, "description": "Number of checklists to skip"}
-                            }
-                        }
-                    }
-                elif tool_name == "qa.get_testcases":
-                    tool_schema = {
-                        "name": tool_name,
-                        "description": "Get list of test cases with filters",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "checklist_id": {"type": "integer", "description": "Checklist ID to filter by"},
-                                "test_group": {"type": "string", "description": "Test group (GENERAL or CUSTOM)"},
-                                "functionality": {"type": "string", "description": "Functionality to filter by"},
-                                "priority": {"type": "string", "description": "Priority (LOW, MEDIUM, HIGH, CRITICAL)"},
-                                "limit": {"type": "integer", "default": 100, "description": "Maximum number of test cases"},
-                                "offset": {"type": "integer", "default": 0, "description": "Number of test cases to skip"}
-                            }
-                        }
-                    }
-                elif tool_name == "qa.get_configs":
-                    tool_schema = {
-                        "name": tool_name,
-                        "description": "Get list of configurations",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "limit": {"type": "integer", "default": 100, "description": "Maximum number of configs"},
-                                "offset": {"type": "integer", "default": 0, "description": "Number of configs to skip"}
-                            }
-                        }
-                    }
-                elif tool_name == "qa.get_statistics":
-                    tool_schema = {
-                        "name": tool_name,
-                        "description": "Get QA structure statistics",
-                        "inputSchema": {"type": "object", "properties": {}}
-                    }
-                elif tool_name == "qa.get_full_structure":
-                    tool_schema = {
-                        "name": tool_name,
-                        "description": "Get full QA structure with hierarchy of sections, checklists and test cases",
-                        "inputSchema": {"type": "object", "properties": {}}
-                    }
-                else:
-                    # Fallback для невідомих інструментів
-                    tool_schema = {
-                        "name": tool_name,
-                        "description": f"QA tool: {tool_name}",
-                        "inputSchema": {"type": "object", "properties": {}}
-                    }
-                
-                tools_list.append(tool_schema)
-            
-            return JSONRPCResponse(
-                id=request.id,
-                result={
-                    "tools": tools_list
-                }
-            )
-        
-        elif method == "tools/call":
-            tool_name = params.get("name")
-            tool_args = params.get("arguments", {})
-            
-            if tool_name in TOOLS:
-                result = await TOOLS[tool_name](**tool_args)
-                return JSONRPCResponse(
-                    id=request.id,
-                    result={
-                        "content": [
-                            {
-                                "type": "text", 
-                                "text": json.dumps(result, ensure_ascii=False)
-                            }
-                        ]
-                    }
-                )
-            else:
-                return JSONRPCResponse(
-                    id=request.id,
-                    error={
-                        "code": -32601,
-                        "message": f"Tool not found: {tool_name}"
-                    }
-                )
-        
-        elif method == "ping":
-            return JSONRPCResponse(
-                id=request.id,
-                result={}
-            )
-        
-        elif method == "notifications/initialized":
-            # Notification methods should not have an id in the response
-            return JSONRPCResponse(
-                result={}
-            )
+        handler = METHOD_HANDLERS.get(method)
+        if handler is not None:
+            return await handler(request)
         
-        elif method in TOOLS:
+        tool = TOOLS.get(method)
+        if tool is not None:
             # Direct tool call
-            result = await TOOLS[method](**params)
-            return JSONRPCResponse(
-                id=request.id,
-                result=result
-            )
+            return _result_response(request.id, await _run_tool(tool, request.params))
         
-        else:
-            return JSONRPCResponse(
-                id=request.id,
-                error={
-                    "code": -32601,
-                    "message": f"Method not found: {method}"
-                }
-            )
+        return JSONRPCResponse(
+            id=request.id,
+            error={
+                "code": -32601,
+                "message": f"Method not found: {method}"
+            }
+        )
             
     except Exception as e:
         return JSONRPCResponse(
@@ -346,6 +188,70 @@ async def jsonrpc_handler(request: JSONRPCRequest):
             }
         )
 
+def _encode_response(response: Union[JSONRPCResponse, Response]) -> bytes:
+    if isinstance(response, Response):
+        return response.body
+    return json_bytes(response)
+
+
+def _error_body(code: int, message: str, request_id: Any = None) -> bytes:
+    return _encode_response(JSONRPCResponse(id=request_id, error={"code": code, "message": message}))
+
+
+async def _handle_message(message: Any) -> Optional[bytes]:
+    """Серіалізована відповідь на одне повідомлення; None для notification."""
+    try:
+        request = JSONRPCRequest.model_validate(message)
+    except ValidationError as e:
+        request_id = message.get("id") if isinstance(message, dict) else None
+        if not isinstance(request_id, (int, str)):
+            request_id = None
+        return _error_body(-32600, f"Invalid Request: {e.errors()[0]['msg']}", request_id)
+    response = await jsonrpc_handler(request)
+    if request.is_notification:
+        return None
+    return _encode_response(response)
+
+
+async def handle_jsonrpc_payload(payload: Any) -> Optional[bytes]:
+    """Обробляє один запит або batch масив (JSON-RPC 2.0).
+
+    Запити batch виконуються паралельно, не більше ніж
+    JSONRPC_BATCH_CONCURRENCY одночасно, а відповіді повертаються в порядку
+    запитів. Notifications виконуються, але відповіді не мають; якщо
+    відповідати нема на що, повертається None.
+    """
+    if not isinstance(payload, list):
+        return await _handle_message(payload)
+    if not payload:
+        return _error_body(-32600, "Invalid Request: empty batch")
+    if len(payload) > settings.jsonrpc_max_batch_size:
+        return _error_body(-32600, f"Invalid Request: batch larger than {settings.jsonrpc_max_batch_size}")
+    
+    semaphore = asyncio.Semaphore(settings.jsonrpc_batch_concurrency)
+    
+    async def run(message: Any) -> Optional[bytes]:
+        async with semaphore:
+            return await _handle_message(message)
+    
+    responses = [body for body in await asyncio.gather(*(run(message) for message in payload)) if body is not None]
+    if not responses:
+        return None
+    return b"[" + b",".join(responses) + b"]"
+
+
+@app.post("/jsonrpc")
+async def jsonrpc_endpoint(http_request: Request) -> Response:
+    """JSON-RPC endpoint for MCP tools (single requests and batches)"""
+    try:
+        payload = orjson.loads(await http_request.body())
+    except ValueError as e:
+        return Response(content=_error_body(-32700, f"Parse error: {str(e)}"), media_type="application/json")
+    body = await handle_jsonrpc_payload(payload)
+    if body is None:
+        return Response(status_code=202)
+    return Response(content=body, media_type="application/json")
+
 # Direct HTTP endpoints for each tool
 @app.post("/api/search_documents")
 async def api_search_documents(request: SearchDocumentsRequest):
@@ -357,9 +263,10 @@ async def api_search_documents(request: SearchDocumentsRequest):
             feature_names=request.feature_names,
             space_keys=request.space_keys,
             filters=request.filters,
-            return_chunks=request.return_chunks
+            return_chunks=request.return_chunks,
+            rerank=request.rerank
         )
-        return result
+        return FastJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -367,17 +274,18 @@ async def api_search_documents(request: SearchDocumentsRequest):
 async def api_search_testcases(request: SearchTestcasesRequest):
     """Direct HTTP endpoint for testcase search"""
     try:
-        result = await qa_search_testcases(
-            query=request.query,
-            limit=request.limit,
-            min_similarity=request.min_similarity,
-            section_id=request.section_id,
-            checklist_id=request.checklist_id,
-            test_group=request.test_group,
-            functionality=request.functionality,
-            priority=request.priority
-        )
-        return result
+        with model_results():
+            result = await qa_search_testcases(
+                query=request.query,
+                limit=request.limit,
+                min_similarity=request.min_similarity,
+                section_id=request.section_id,
+                checklist_id=request.checklist_id,
+                test_group=request.test_group,
+                functionality=request.functionality,
+                priority=request.priority
+            )
+        return FastJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -389,12 +297,13 @@ async def api_list_features(
 ):
     """Direct HTTP endpoint for listing features"""
     try:
-        result = await qa_list_features(
-            limit=limit,
-            offset=offset,
-            with_documents=with_documents
-        )
-        return result
+        with model_results():
+            result = await qa_list_features(
+                limit=limit,
+                offset=offset,
+                with_documents=with_documents
+            )
+        return FastJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -406,12 +315,13 @@ async def api_docs_by_feature(
 ):
     """Direct HTTP endpoint for getting docs by feature"""
     try:
-        result = await qa_docs_by_feature(
-            feature_name=feature_name,
-            limit=limit,
-            offset=offset
-        )
-        return result
+        with model_results():
+            result = await qa_docs_by_feature(
+                feature_name=feature_name,
+                limit=limit,
+                offset=offset
+            )
+        return FastJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -420,7 +330,7 @@ async def api_health():
     """Direct HTTP endpoint for health check"""
     try:
         result = await qa_health()
-        return result
+        return FastJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -434,30 +344,18 @@ async def stdio_jsonrpc_handler():
                 continue
                 
             try:
-                request_data = json.loads(line)
-                request = JSONRPCRequest(**request_data)
-                response = await jsonrpc_handler(request)
-                print(json.dumps(response.dict(), ensure_ascii=False))
-                sys.stdout.flush()
-                
-            except json.JSONDecodeError as e:
-                error_response = JSONRPCResponse(
-                    error={
-                        "code": -32700,
-                        "message": f"Parse error: {str(e)}"
-                    }
-                )
-                print(json.dumps(error_response.dict()))
+                payload = orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                print(_error_body(-32700, f"Parse error: {str(e)}").decode("utf-8"))
                 sys.stdout.flush()
-                
+                continue
+            
+            try:
+                body = await handle_jsonrpc_payload(payload)
             except Exception as e:
-                error_response = JSONRPCResponse(
-                    error={
-                        "code": -32603,
-                        "message": f"Internal error: {str(e)}"
-                    }
-                )
-                print(json.dumps(error_response.dict()))
+                body = _error_body(-32603, f"Internal error: {str(e)}")
+            if body is not None:
+                print(body.decode("utf-8"))
                 sys.stdout.flush()
                 
     except KeyboardInterrupt:
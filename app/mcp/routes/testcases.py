@@ -7,6 +7,7 @@ from typing import Optional
 from fastmcp import Context, FastMCP
 
 from ...mcp_tools import (
+    qa_find_duplicate_testcases,
     qa_get_testcases,
     qa_search_testcases,
     qa_search_testcases_text,
@@ -94,3 +95,23 @@ def register_testcase_tools(mcp: FastMCP) -> None:
             priority=priority,
             limit=limit,
         )
+
+    @mcp.tool()
+    async def qa_find_duplicate_testcases_tool(
+        threshold: Optional[float] = None,
+        cross_checklist_only: bool = True,
+        section_id: Optional[int] = None,
+        limit: int = 20,
+        ctx: Optional[Context] = None,
+    ) -> dict:
+        if ctx:
+            await ctx.info(
+                "Finding duplicate testcases",
+                meta={"threshold": threshold, "section_id": section_id, "limit": limit},
+            )
+        return await qa_find_duplicate_testcases(
+            threshold=threshold,
+            cross_checklist_only=cross_checklist_only,
+            section_id=section_id,
+            limit=limit,
+        )
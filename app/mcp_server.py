@@ -9,10 +9,11 @@ import sys
 
 from fastmcp import FastMCP
 
-from .dependencies import get_qa_repository
+from .dependencies import close_async_vector_repository, get_qa_repository
 from .mcp import create_mcp_server
 from .mcp_tools import (
     qa_docs_by_feature,
+    qa_find_duplicate_testcases,
     qa_get_checklists,
     qa_get_configs,
     qa_get_full_structure,
@@ -54,6 +55,7 @@ async def cleanup_server() -> None:
     repo = get_qa_repository()
     try:
         await asyncio.to_thread(repo.close)
+        await close_async_vector_repository()
     except Exception as exc:  # pragma: no cover - defensive
         logger.error("Error during cleanup: %s", exc)
     else:
@@ -6,16 +6,23 @@ MCP Tools - QA інструменти з бізнес-логікою
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, Union
 
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 
-from .dependencies import get_qa_service
+from .config import settings
+from .dependencies import get_async_vector_repository, get_qa_service, get_reranker
 from .services.qa_service import QAService
+from .schemas.tools import ToolDefinition
 from .schemas.requests import (
     ChecklistsQuery,
     ConfigsQuery,
+    DuplicateTestcasesQuery,
     FeatureDocumentsQuery,
     FeaturesQuery,
     SectionsQuery,
@@ -33,6 +40,26 @@ logger = logging.getLogger(__name__)
 
 qa_repo: Optional["QARepository"] = None
 
+_return_models: ContextVar[bool] = ContextVar("qa_tools_return_models", default=False)
+
+
+@contextmanager
+def model_results() -> Iterator[None]:
+    """Let service-backed tools return their Pydantic response model instead of a dict.
+
+    Transports that write JSON themselves (the HTTP API) serialize the model
+    straight to bytes and skip the ``model_dump()`` dict of large payloads.
+    """
+    token = _return_models.set(True)
+    try:
+        yield
+    finally:
+        _return_models.reset(token)
+
+
+def _tool_result(response: BaseModel) -> Union[BaseModel, Dict[str, Any]]:
+    return response if _return_models.get() else response.model_dump()
+
 
 def _get_service() -> QAService:
     """Return QA service instance, respecting test overrides."""
@@ -49,23 +76,55 @@ def _validation_error_response(error: ValidationError) -> Dict[str, Any]:
     return {"success": False, "error": "; ".join(messages)}
 
 
+async def _rerank_results(
+    query: str,
+    candidates: List[Dict[str, Any]],
+    top_k: int
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Rerank search candidates within the latency budget.
+
+    Returns the results and whether reranking was applied.
+    """
+    reranker = get_reranker()
+    try:
+        results = await asyncio.wait_for(
+            asyncio.to_thread(reranker.rerank, query, candidates, top_k),
+            timeout=settings.rerank_budget_ms / 1000
+        )
+        return results, True
+    except asyncio.TimeoutError:
+        logger.warning("Reranker '%s' exceeded %d ms budget, using vector order", reranker.name, settings.rerank_budget_ms)
+    except Exception as exc:
+        logger.warning("Reranker '%s' failed, using vector order: %s", reranker.name, exc)
+    return candidates[:top_k], False
+
+
 async def qa_search_documents(
     query: str,
     top_k: int = 10,
     feature_names: Optional[List[str]] = None,
     space_keys: Optional[List[str]] = None,
     filters: Optional[Dict[str, Any]] = None,
-    return_chunks: bool = True
+    return_chunks: bool = True,
+    rerank: Optional[bool] = None
 ) -> Dict[str, Any]:
-    """Vector search in QA knowledge base (documents and chunks)."""
+    """Vector search in QA knowledge base (documents and chunks).
+    
+    With ``rerank`` (default: RERANK_ENABLED) over-retrieves
+    ``top_k * RERANK_CANDIDATES_MULTIPLIER`` chunks and reorders them with
+    the configured reranker; falls back to vector order if reranking does
+    not finish within RERANK_BUDGET_MS.
+    """
     try:
         from .ai.embedder import OpenAIEmbedder
-        from .data.vectordb_repo import VectorDBRepository
+
+        start_time = time.perf_counter()
+        use_rerank = settings.rerank_enabled if rerank is None else rerank
 
         embedder = OpenAIEmbedder()
-        vector_repo = VectorDBRepository()
+        vector_repo = get_async_vector_repository()
 
-        query_embedding = embedder.embed_text(query)
+        query_embedding = await asyncio.to_thread(embedder.embed_text, query)
         if not query_embedding:
             return {
                 "success": False,
@@ -75,14 +134,18 @@ async def qa_search_documents(
                 "count": 0
             }
 
-        search_results = vector_repo.search(
+        search_results = await vector_repo.search(
             query_vector=query_embedding,
-            top_k=top_k,
+            top_k=top_k * settings.rerank_candidates_multiplier if use_rerank else top_k,
             feature_names=feature_names,
             space_keys=space_keys,
             filters=filters
         )
 
+        reranked = False
+        if use_rerank:
+            search_results, reranked = await _rerank_results(query, search_results, top_k)
+
         formatted_results = []
         for result in search_results:
             formatted_result = {
@@ -92,6 +155,8 @@ async def qa_search_documents(
                 "space": result.get("space", ""),
                 "url": result.get("url", "")
             }
+            if "rerank_score" in result:
+                formatted_result["rerank_score"] = result["rerank_score"]
             if return_chunks and "chunk" in result:
                 formatted_result["chunk"] = result["chunk"]
             formatted_results.append(formatted_result)
@@ -101,8 +166,9 @@ async def qa_search_documents(
             "query": query,
             "results": formatted_results,
             "count": len(formatted_results),
-            "took_ms": 1,
-            "search_type": "vector_documents"
+            "took_ms": int((time.perf_counter() - start_time) * 1000),
+            "search_type": "vector_documents",
+            "reranked": reranked
         }
     except Exception as exc:  # pragma: no cover - defensive
         logger.error("Document search failed: %s", exc)
@@ -142,7 +208,7 @@ async def qa_search_testcases(
 
     try:
         response = await _get_service().search_testcases_semantic(params)
-        return response.model_dump()
+        return _tool_result(response)
     except Exception as exc:  # pragma: no cover - defensive
         logger.error("Testcase semantic search failed: %s", exc)
         return {"success": False, "error": str(exc)}
@@ -173,12 +239,37 @@ async def qa_search_testcases_text(
 
     try:
         response = await _get_service().search_testcases_text(params)
-        return response.model_dump()
+        return _tool_result(response)
     except Exception as exc:  # pragma: no cover - defensive
         logger.error("Text search testcases failed: %s", exc)
         return {"success": False, "error": str(exc)}
 
 
+async def qa_find_duplicate_testcases(
+    threshold: Optional[float] = None,
+    cross_checklist_only: bool = True,
+    section_id: Optional[int] = None,
+    limit: int = 20
+) -> Dict[str, Any]:
+    """Find groups of near-identical test cases by embedding similarity."""
+    try:
+        params = DuplicateTestcasesQuery(
+            threshold=threshold,
+            cross_checklist_only=cross_checklist_only,
+            section_id=section_id,
+            limit=limit,
+        )
+    except ValidationError as exc:
+        return _validation_error_response(exc)
+
+    try:
+        response = await _get_service().find_duplicate_testcases(params)
+        return _tool_result(response)
+    except Exception as exc:  # pragma: no cover - defensive
+        logger.error("Duplicate testcase search failed: %s", exc)
+        return {"success": False, "error": str(exc)}
+
+
 async def qa_list_features(
     limit: int = 100,
     offset: int = 0,
@@ -192,7 +283,7 @@ async def qa_list_features(
 
     try:
         response = await _get_service().list_features(params)
-        return response.model_dump()
+        return _tool_result(response)
     except Exception as exc:  # pragma: no cover - defensive
         logger.error("List features failed: %s", exc)
         return {"success": False, "error": str(exc)}
@@ -218,9 +309,7 @@ async def qa_docs_by_feature(
     service = _get_service()
     try:
         response = await service.documents_by_feature(params)
-        payload = response.model_dump()
-        payload.setdefault("feature_name", params.feature_name)
-        return payload
+        return _tool_result(response)
     except ValueError as exc:
         return {"success": False, "error": str(exc)}
     except Exception as exc:  # pragma: no cover - defensive
@@ -249,7 +338,7 @@ async def qa_get_sections(limit: int = 100, offset: int = 0) -> Dict[str, Any]:
 
     try:
         response = await _get_service().list_sections(params)
-        return response.model_dump()
+        return _tool_result(response)
     except Exception as exc:  # pragma: no cover - defensive
         logger.error("Get QA sections failed: %s", exc)
         return {"success": False, "error": str(exc)}
@@ -299,7 +388,7 @@ async def qa_get_testcases(
 
     try:
         response = await _get_service().list_testcases(params)
-        return response.model_dump()
+        return _tool_result(response)
     except Exception as exc:  # pragma: no cover - defensive
         logger.error("Get testcases failed: %s", exc)
         return {"success": False, "error": str(exc)}
@@ -314,7 +403,7 @@ async def qa_get_configs(limit: int = 100, offset: int = 0) -> Dict[str, Any]:
 
     try:
         response = await _get_service().list_configs(params)
-        return response.model_dump()
+        return _tool_result(response)
     except Exception as exc:  # pragma: no cover - defensive
         logger.error("Get configs failed: %s", exc)
         return {"success": False, "error": str(exc)}
@@ -324,7 +413,7 @@ async def qa_get_statistics() -> Dict[str, Any]:
     """Get QA structure statistics."""
     try:
         response = await _get_service().get_statistics()
-        return response.model_dump()
+        return _tool_result(response)
     except Exception as exc:  # pragma: no cover - defensive
         logger.error("Get statistics failed: %s", exc)
         return {"success": False, "error": str(exc)}
@@ -334,7 +423,66 @@ async def qa_get_full_structure() -> Dict[str, Any]:
     """Get full QA structure with hierarchy."""
     try:
         response = await _get_service().get_full_structure()
-        return response.model_dump()
+        return _tool_result(response)
     except Exception as exc:  # pragma: no cover - defensive
         logger.error("Get full structure failed: %s", exc)
         return {"success": False, "error": str(exc)}
+
+
+# Order is the order of tools/list
+TOOL_DEFINITIONS: List[ToolDefinition] = [
+    ToolDefinition(
+        "qa.search_documents",
+        qa_search_documents,
+        "🔍 Search in DOCUMENTATION and knowledge base - finds relevant docs, guides, and information chunks",
+        parameter_descriptions={
+            "query": "Search query for documentation",
+            "top_k": "Number of documents to return",
+            "feature_names": "Filter by feature names",
+            "space_keys": "Filter by Confluence space keys",
+            "filters": "Additional payload filters",
+            "return_chunks": "Whether to return chunk information",
+            "rerank": "Over-retrieve and rerank candidates (default from server config)",
+        },
+    ),
+    ToolDefinition(
+        "qa.search_testcases",
+        qa_search_testcases,
+        "🧪 Search in TEST CASES using AI - finds specific tests by semantic similarity (step, expected_result)",
+        TestcaseSemanticSearchQuery,
+    ),
+    ToolDefinition(
+        "qa.search_testcases_text",
+        qa_search_testcases_text,
+        "📝 Search test cases by TEXT - simple text search in step and expected_result fields",
+        TestcaseTextSearchQuery,
+    ),
+    ToolDefinition(
+        "qa.find_duplicate_testcases",
+        qa_find_duplicate_testcases,
+        "♻️ Find DUPLICATE test cases across checklists - groups of near-identical tests by embedding similarity",
+        DuplicateTestcasesQuery,
+    ),
+    ToolDefinition("qa.list_features", qa_list_features, "List all features with descriptions", FeaturesQuery),
+    ToolDefinition("qa.docs_by_feature", qa_docs_by_feature, "Get documents for a specific feature", FeatureDocumentsQuery),
+    ToolDefinition("qa.health", qa_health, "Check system health"),
+    ToolDefinition(
+        "qa.get_sections", qa_get_sections, "Get list of QA sections (Checklist WEB, Checklist MOB, etc.)", SectionsQuery
+    ),
+    ToolDefinition(
+        "qa.get_checklists", qa_get_checklists, "Get list of checklists, optionally filtered by section", ChecklistsQuery
+    ),
+    ToolDefinition("qa.get_testcases", qa_get_testcases, "Get list of test cases with filters", TestcasesQuery),
+    ToolDefinition("qa.get_configs", qa_get_configs, "Get list of configurations", ConfigsQuery),
+    ToolDefinition("qa.get_statistics", qa_get_statistics, "Get QA structure statistics"),
+    ToolDefinition(
+        "qa.get_full_structure",
+        qa_get_full_structure,
+        "Get full QA structure with hierarchy of sections, checklists and test cases",
+    ),
+]
+
+
+def tool_schemas(separator: str = ".") -> List[Dict[str, Any]]:
+    """tools/list entries of all QA tools; ``separator="_"`` gives the stdio client names."""
+    return [definition.schema(separator) for definition in TOOL_DEFINITIONS]
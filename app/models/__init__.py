@@ -1,5 +1,5 @@
 """QA data models for the application."""
 
-from .qa_models import Base, QASection, Checklist, TestCase, Config, IngestionJob
+from .qa_models import Base, QASection, Checklist, TestCase, Config, IngestionJob, IngestionCheckpoint
 
-__all__ = ["Base", "QASection", "Checklist", "TestCase", "Config", "IngestionJob"]
+__all__ = ["Base", "QASection", "Checklist", "TestCase", "Config", "IngestionJob", "IngestionCheckpoint"]
@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import List, Optional
 from sqlalchemy import (
     Column, Integer, String, Text, TIMESTAMP, ForeignKey, 
-    CHAR, Enum, func, Index, Table, JSON
+    CHAR, Enum, func, Index, Table, JSON, UniqueConstraint
 )
 from sqlalchemy.orm import relationship, Mapped, declarative_base
 from enum import Enum as PyEnum
@@ -176,6 +176,8 @@ class TestCase(Base):
     qa_auto_coverage = Column(String(255), nullable=True)
     # Embedding для семантичного пошуку (JSON масив з float значеннями)
     embedding = Column(JSON, nullable=True)
+    # sha256 of the normalized text the embedding was computed from; rows with the same text share the vector
+    embedding_text_hash = Column(CHAR(64), nullable=True, index=True)
     created_at = Column(TIMESTAMP, default=func.current_timestamp())
     updated_at = Column(
         TIMESTAMP, 
@@ -212,6 +214,11 @@ class IngestionJob(Base):
         nullable=False, 
         default="running"
     )  # running, success, failed
+    mode = Column(String(20), nullable=True)  # full, incremental
+    # Latest Confluence modification time seen by the job (ISO, UTC); next delta sync starts here
+    sync_cursor = Column(String(64), nullable=True)
+    # Page selection of the run (page_ids, space_keys, labels, since, limit); --resume reuses it
+    params = Column(JSON, nullable=True)
     details = Column(Text, nullable=True)
     documents_processed = Column(Integer, default=0)
     chunks_created = Column(Integer, default=0)
@@ -221,6 +228,28 @@ class IngestionJob(Base):
         return f"<IngestionJob(id={self.id}, status='{self.status}')>"
 
 
+class IngestionCheckpoint(Base):
+    """Per-page progress of an ingestion job, used to resume interrupted loads."""
+    
+    __tablename__ = "ingestion_checkpoints"
+    __table_args__ = (UniqueConstraint("job_id", "page_id", name="uq_ingestion_checkpoint_page"),)
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(Integer, ForeignKey('ingestion_jobs.id', ondelete="CASCADE"), nullable=False, index=True)
+    page_id = Column(String(64), nullable=False)
+    stage = Column(String(20), nullable=False)  # fetched, parsed, embedded, written, failed
+    content_hash = Column(CHAR(64), nullable=True)
+    error = Column(Text, nullable=True)
+    updated_at = Column(
+        TIMESTAMP,
+        default=func.current_timestamp(),
+        onupdate=func.current_timestamp()
+    )
+    
+    def __repr__(self) -> str:
+        return f"<IngestionCheckpoint(job_id={self.job_id}, page_id='{self.page_id}', stage='{self.stage}')>"
+
+
 # Indexes for better performance
 Index("idx_testcases_checklist_order", TestCase.checklist_id, TestCase.order_index)
 # Note: Full-text index on TEXT columns requires different approach in MySQL
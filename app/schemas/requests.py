@@ -18,8 +18,8 @@ class StrippingModel(BaseModel):
 class PaginationParams(StrippingModel):
     """Base pagination parameters with classic validation messages."""
 
-    limit: int = Field(default=100)
-    offset: int = Field(default=0)
+    limit: int = Field(default=100, description="Maximum number of items to return")
+    offset: int = Field(default=0, description="Number of items to skip")
 
     limit_max: ClassVar[int] = 500
 
@@ -46,16 +46,16 @@ class ChecklistsQuery(PaginationParams):
     """Parameters for listing checklists."""
 
     limit_max: ClassVar[int] = 200
-    section_id: Optional[int] = Field(default=None, ge=1)
+    section_id: Optional[int] = Field(default=None, ge=1, description="Section ID to filter by")
 
 
 class TestcasesQuery(PaginationParams):
     """Parameters for listing testcases."""
 
-    checklist_id: Optional[str] = None
-    test_group: Optional[TestGroup | str] = None
-    functionality: Optional[str] = None
-    priority: Optional[Priority | str] = None
+    checklist_id: Optional[str] = Field(default=None, description="Checklist ID to filter by")
+    test_group: Optional[TestGroup | str] = Field(default=None, description="Test group to filter by")
+    functionality: Optional[str] = Field(default=None, description="Functionality to filter by")
+    priority: Optional[Priority | str] = Field(default=None, description="Priority to filter by")
 
     @field_validator("test_group", mode="before")
     @classmethod
@@ -79,13 +79,13 @@ class TestcasesQuery(PaginationParams):
 class TestcaseTextSearchQuery(StrippingModel):
     """Parameters for text-based testcase search."""
 
-    query: str
-    section_id: Optional[int] = Field(default=None, ge=1)
-    checklist_id: Optional[str] = None
-    test_group: Optional[TestGroup | str] = None
-    functionality: Optional[str] = None
-    priority: Optional[Priority | str] = None
-    limit: int = Field(default=100)
+    query: str = Field(description="Text to find in step or expected_result")
+    section_id: Optional[int] = Field(default=None, ge=1, description="Section ID to filter by")
+    checklist_id: Optional[str] = Field(default=None, description="Checklist ID to filter by")
+    test_group: Optional[TestGroup | str] = Field(default=None, description="Test group to filter by")
+    functionality: Optional[str] = Field(default=None, description="Functionality to filter by")
+    priority: Optional[Priority | str] = Field(default=None, description="Priority to filter by")
+    limit: int = Field(default=100, description="Maximum number of results")
 
     @field_validator("query")
     @classmethod
@@ -123,9 +123,9 @@ class TestcaseTextSearchQuery(StrippingModel):
 class TestcaseSemanticSearchQuery(TestcaseTextSearchQuery):
     """Parameters for semantic testcase search."""
 
-    query: str
-    limit: int = Field(default=10)
-    min_similarity: float = Field(default=0.5)
+    query: str = Field(description="Search query for test cases")
+    limit: int = Field(default=10, description="Maximum number of test cases")
+    min_similarity: float = Field(default=0.5, description="Minimum similarity (0.0-1.0)")
 
     @field_validator("query")
     @classmethod
@@ -159,16 +159,16 @@ class FeaturesQuery(PaginationParams):
     """Parameters for listing features (functionalities)."""
 
     limit_max: ClassVar[int] = 500
-    with_documents: bool = True
+    with_documents: bool = Field(default=True, description="Include linked document titles")
 
 
 class FeatureDocumentsQuery(StrippingModel):
     """Parameters for retrieving documents attached to a feature."""
 
-    feature_name: Optional[str] = None
-    feature_id: Optional[int] = Field(default=None, ge=1)
-    limit: int = Field(default=50)
-    offset: int = Field(default=0)
+    feature_name: Optional[str] = Field(default=None, description="Feature name")
+    feature_id: Optional[int] = Field(default=None, ge=1, description="Feature ID from qa_list_features")
+    limit: int = Field(default=50, description="Maximum number of documents")
+    offset: int = Field(default=0, description="Number of documents to skip")
 
     @field_validator("limit")
     @classmethod
@@ -193,6 +193,31 @@ class FeatureDocumentsQuery(StrippingModel):
         return value
 
 
+class DuplicateTestcasesQuery(StrippingModel):
+    """Parameters for the embedding-based duplicate testcase report."""
+
+    threshold: Optional[float] = Field(
+        default=None, description="Minimum cosine similarity of embeddings (default from server config)"
+    )
+    cross_checklist_only: bool = Field(default=True, description="Ignore duplicates inside one checklist")
+    section_id: Optional[int] = Field(default=None, ge=1, description="Only compare test cases of this section")
+    limit: int = Field(default=20, description="Maximum number of groups")
+
+    @field_validator("threshold")
+    @classmethod
+    def validate_threshold(cls, value: Optional[float]) -> Optional[float]:
+        if value is not None and (value <= 0.0 or value > 1.0):
+            raise ValueError("threshold must be between 0.0 (exclusive) and 1.0")
+        return value
+
+    @field_validator("limit")
+    @classmethod
+    def validate_limit(cls, value: int) -> int:
+        if value < 1 or value > 200:
+            raise ValueError("limit must be between 1 and 200")
+        return value
+
+
 class HealthCheckQuery(StrippingModel):
     """Placeholder for health check parameters (currently none)."""
 
@@ -195,6 +195,39 @@ class FeatureDocumentsResponse(BaseModel):
     total: Optional[int] = None
 
 
+class DuplicateTestcaseDTO(BaseModel):
+    """DTO representing a testcase inside a duplicate group."""
+
+    id: int
+    checklist_id: str
+    checklist_title: Optional[str] = None
+    section_id: Optional[int] = None
+    section_title: Optional[str] = None
+    step: Optional[str] = None
+    expected_result: Optional[str] = None
+    similarity: Optional[float] = None
+
+
+class DuplicateGroupDTO(BaseModel):
+    """DTO representing a group of near-identical testcases."""
+
+    testcases: List[DuplicateTestcaseDTO]
+    checklists: int
+    sections: int
+
+
+class DuplicateTestcasesResponse(BaseModel):
+    success: bool = True
+    groups: List[DuplicateGroupDTO]
+    count: int
+    total: int
+    testcases_scanned: int
+    skipped_embeddings: int
+    threshold: float
+    cross_checklist_only: bool
+    section_id: Optional[int] = None
+
+
 class StatisticsResponse(BaseModel):
     success: bool = True
     statistics: dict
@@ -0,0 +1,98 @@
+"""JSON schemas of QA tools generated from their signatures and request models."""
+
+from __future__ import annotations
+
+import inspect
+import types
+import typing
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", dict: "object", list: "array"}
+
+
+@dataclass(frozen=True)
+class ToolDefinition:
+    """A QA tool exposed over MCP/JSON-RPC.
+
+    ``name`` uses dots (``qa.get_sections``); stdio clients use the same
+    name with underscores. Parameter descriptions and enum values come from
+    ``params_model`` fields; ``parameter_descriptions`` covers tools without
+    a request model.
+    """
+
+    name: str
+    handler: Callable[..., Any]
+    description: str
+    params_model: Optional[Type[BaseModel]] = None
+    parameter_descriptions: Dict[str, str] = field(default_factory=dict)
+
+    def schema(self, separator: str = ".") -> Dict[str, Any]:
+        return {
+            "name": self.name.replace(".", separator),
+            "description": self.description,
+            "inputSchema": tool_input_schema(self.handler, self.params_model, self.parameter_descriptions),
+        }
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if typing.get_origin(annotation) not in (typing.Union, types.UnionType):
+        return annotation
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    return args[0] if len(args) == 1 else annotation
+
+
+def _json_type(annotation: Any) -> Dict[str, Any]:
+    annotation = _unwrap_optional(annotation)
+    origin = typing.get_origin(annotation) or annotation
+    schema: Dict[str, Any] = {"type": _JSON_TYPES.get(origin, "string")}
+    if origin is list:
+        item_args = typing.get_args(annotation)
+        schema["items"] = _json_type(item_args[0]) if item_args else {}
+    return schema
+
+
+def _enum_values(annotation: Any) -> Optional[List[Any]]:
+    """Values of the first Enum found in a (possibly nested Optional/Union) annotation."""
+    if inspect.isclass(annotation) and issubclass(annotation, Enum):
+        return [member.value for member in annotation]
+    for arg in typing.get_args(annotation):
+        values = _enum_values(arg)
+        if values:
+            return values
+    return None
+
+
+def tool_input_schema(
+    handler: Callable[..., Any],
+    params_model: Optional[Type[BaseModel]] = None,
+    parameter_descriptions: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """``inputSchema`` of a tool: types and defaults from the signature, the rest from the model."""
+    hints = typing.get_type_hints(handler)
+    model_fields = params_model.model_fields if params_model else {}
+    parameter_descriptions = parameter_descriptions or {}
+    properties: Dict[str, Any] = {}
+    required: List[str] = []
+    for name, parameter in inspect.signature(handler).parameters.items():
+        prop = _json_type(hints.get(name, str))
+        model_field = model_fields.get(name)
+        if model_field is not None:
+            values = _enum_values(model_field.annotation)
+            if values:
+                prop["enum"] = values
+        if parameter.default is inspect.Parameter.empty:
+            required.append(name)
+        elif parameter.default is not None:
+            prop["default"] = parameter.default
+        description = parameter_descriptions.get(name) or (model_field.description if model_field else None)
+        if description:
+            prop["description"] = description
+        properties[name] = prop
+    schema: Dict[str, Any] = {"type": "object", "properties": properties}
+    if required:
+        schema["required"] = required
+    return schema
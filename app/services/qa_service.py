@@ -11,6 +11,7 @@ from ..models.qa_models import TestCase
 from ..schemas.requests import (
     ChecklistsQuery,
     ConfigsQuery,
+    DuplicateTestcasesQuery,
     FeatureDocumentsQuery,
     FeaturesQuery,
     SectionsQuery,
@@ -23,6 +24,8 @@ from ..schemas.responses import (
     ChecklistsResponse,
     ConfigDTO,
     ConfigsResponse,
+    DuplicateGroupDTO,
+    DuplicateTestcasesResponse,
     FeatureDTO,
     FeatureDocumentDTO,
     FeatureDocumentsResponse,
@@ -179,6 +182,27 @@ class QAService:
             offset=params.offset,
         )
 
+    async def find_duplicate_testcases(
+        self, params: DuplicateTestcasesQuery
+    ) -> DuplicateTestcasesResponse:
+        report = await self._run_repo(
+            self._repository.find_semantic_duplicate_testcases,
+            threshold=params.threshold,
+            cross_checklist_only=params.cross_checklist_only,
+            section_id=params.section_id,
+        )
+        groups = [DuplicateGroupDTO.model_validate(group) for group in report["groups"][:params.limit]]
+        return DuplicateTestcasesResponse(
+            groups=groups,
+            count=len(groups),
+            total=len(report["groups"]),
+            testcases_scanned=report["testcases_scanned"],
+            skipped_embeddings=report["skipped_embeddings"],
+            threshold=report["threshold"],
+            cross_checklist_only=params.cross_checklist_only,
+            section_id=params.section_id,
+        )
+
     async def get_statistics(self) -> StatisticsResponse:
         stats = await self._run_repo(self._repository.get_qa_statistics)
         return StatisticsResponse(statistics=stats)
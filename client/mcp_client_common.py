@@ -4,170 +4,22 @@ MCP Common Module - спільні компоненти для MCP сервер
 Містить загальні функції, схеми інструментів та обробники для локального та віддаленого MCP серверів
 """
 
+import gzip
 import json
+import os
 import sys
-from typing import Dict, Any, List
+import urllib.request
+from typing import Dict, Any, List, Optional, Tuple
 
-# Список інструментів з підкресленнями для Cursor (зрозумілі назви)
-TOOLS_SCHEMA = [
-    {
-        "name": "qa_search_documents",
-        "description": "🔍 Search in DOCUMENTATION and knowledge base - finds relevant docs, guides, and information chunks",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "query": {"type": "string", "description": "Search query for documentation"},
-                "top_k": {"type": "integer", "default": 10, "description": "Number of documents to return"},
-                "feature_names": {"type": "array", "items": {"type": "string"}, "description": "Filter by feature names"},
-                "space_keys": {"type": "array", "items": {"type": "string"}, "description": "Filter by Confluence space keys"},
-                "return_chunks": {"type": "boolean", "default": True, "description": "Whether to return chunk information"}
-            },
-            "required": ["query"]
-        }
-    },
-    {
-        "name": "qa_search_testcases",
-        "description": "🧪 Search in TEST CASES using AI - finds specific tests by semantic similarity (step, expected_result)",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "query": {"type": "string", "description": "Search query for test cases"},
-                "limit": {"type": "integer", "default": 10, "description": "Maximum number of test cases"},
-                "min_similarity": {"type": "number", "default": 0.5, "description": "Minimum similarity (0.0-1.0)"},
-                "section_id": {"type": "integer", "description": "Filter by section ID"},
-                "checklist_id": {"type": "integer", "description": "Filter by checklist ID"},
-                "test_group": {"type": "string", "description": "Filter by test group (GENERAL or CUSTOM)"},
-                "priority": {"type": "string", "description": "Filter by priority"}
-            },
-            "required": ["query"]
-        }
-    },
-    {
-        "name": "qa_search_testcases_text",
-        "description": "📝 Search test cases by TEXT - simple text search in step and expected_result fields",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "query": {"type": "string", "description": "Text search query"},
-                "section_id": {"type": "integer", "description": "Section ID to filter by"},
-                "checklist_id": {"type": "integer", "description": "Checklist ID to filter by"},
-                "limit": {"type": "integer", "default": 100, "description": "Maximum number of results"}
-            },
-            "required": ["query"]
-        }
-    },
-    {
-        "name": "qa_list_features",
-        "description": "List all features with descriptions",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "limit": {"type": "integer", "default": 100, "description": "Maximum number of features"},
-                "offset": {"type": "integer", "default": 0, "description": "Number of features to skip"}
-            }
-        }
-    },
-    {
-        "name": "qa_docs_by_feature",
-        "description": "Get documents for a specific feature",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "feature_name": {"type": "string", "description": "Feature name"},
-                "limit": {"type": "integer", "default": 50, "description": "Maximum number of documents"}
-            }
-        }
-    },
-    {
-        "name": "qa_health",
-        "description": "Check system health",
-        "inputSchema": {
-            "type": "object",
-            "properties": {}
-        }
-    },
-    {
-        "name": "qa_get_sections",
-        "description": "Get list of QA sections (Checklist WEB, Checklist MOB, etc.)",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "limit": {"type": "integer", "default": 100, "description": "Maximum number of sections"},
-                "offset": {"type": "integer", "default": 0, "description": "Number of sections to skip"}
-            }
-        }
-    },
-    {
-        "name": "qa_get_checklists",
-        "description": "Get list of checklists, optionally filtered by section",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "section_id": {"type": "integer", "description": "Section ID to filter by"},
-                "limit": {"type": "integer", "default": 100, "description": "Maximum number of checklists"},
-                "offset": {"type": "integer", "default": 0, "description": "Number of checklists to skip"}
-            }
-        }
-    },
-    {
-        "name": "qa_get_testcases",
-        "description": "Get list of test cases with filters",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "checklist_id": {"type": "integer", "description": "Checklist ID to filter by"},
-                "test_group": {"type": "string", "description": "Test group (GENERAL or CUSTOM)"},
-                "functionality": {"type": "string", "description": "Functionality to filter by"},
-                "priority": {"type": "string", "description": "Priority (LOW, MEDIUM, HIGH, CRITICAL)"},
-                "limit": {"type": "integer", "default": 100, "description": "Maximum number of test cases"},
-                "offset": {"type": "integer", "default": 0, "description": "Number of test cases to skip"}
-            }
-        }
-    },
-    {
-        "name": "qa_get_configs",
-        "description": "Get list of configurations",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "limit": {"type": "integer", "default": 100, "description": "Maximum number of configs"},
-                "offset": {"type": "integer", "default": 0, "description": "Number of configs to skip"}
-            }
-        }
-    },
-    {
-        "name": "qa_get_statistics",
-        "description": "Get QA structure statistics",
-        "inputSchema": {
-            "type": "object",
-            "properties": {}
-        }
-    },
-    {
-        "name": "qa_get_full_structure",
-        "description": "Get full QA structure with hierarchy of sections, checklists and test cases",
-        "inputSchema": {
-            "type": "object",
-            "properties": {}
-        }
-    }
-]
+# Список інструментів з підкресленнями для Cursor (зрозумілі назви).
+# Генерується з реєстру сервера: python scripts/export_tool_schema.py
+TOOLS_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools_schema.json")
+
+with open(TOOLS_SCHEMA_PATH, "r", encoding="utf-8") as _schema_file:
+    TOOLS_SCHEMA: List[Dict[str, Any]] = json.load(_schema_file)
 
 # Мапінг назв інструментів з підкресленнями на назви з крапками для HTTP серверів
-TOOL_NAME_MAPPING = {
-    "qa_search_documents": "qa.search_documents",
-    "qa_search_testcases": "qa.search_testcases",
-    "qa_search_testcases_text": "qa.search_testcases_text",
-    "qa_list_features": "qa.list_features",
-    "qa_docs_by_feature": "qa.docs_by_feature",
-    "qa_health": "qa.health",
-    "qa_get_sections": "qa.get_sections",
-    "qa_get_checklists": "qa.get_checklists",
-    "qa_get_testcases": "qa.get_testcases",
-    "qa_get_configs": "qa.get_configs",
-    "qa_get_statistics": "qa.get_statistics",
-    "qa_get_full_structure": "qa.get_full_structure"
-}
+TOOL_NAME_MAPPING = {tool["name"]: tool["name"].replace("_", ".", 1) for tool in TOOLS_SCHEMA}
 
 
 class MCPHandler:
@@ -224,6 +76,42 @@ class MCPHandler:
             "result": {}
         }
     
+    def call_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """Результати кількох викликів інструментів - за замовчуванням по одному.
+        
+        Підкласи з HTTP сервером перевизначають це одним batch запитом.
+        """
+        results = []
+        for tool_name, tool_args in calls:
+            response = self.handle_tools_call(None, tool_name, tool_args)
+            results.append(json.loads(response["result"]["content"][0]["text"]))
+        return results
+    
+    def handle_batch(self, requests: List[Any]) -> List[Dict[str, Any]]:
+        """Обробляє JSON-RPC batch: усі tools/call йдуть на сервер разом.
+        
+        Відповіді в порядку запитів; notifications (без id) відповіді не мають.
+        """
+        responses: List[Optional[Dict[str, Any]]] = []
+        calls: List[Tuple[int, Any, str, Dict[str, Any]]] = []
+        for request in requests:
+            if not isinstance(request, dict):
+                responses.append(create_error_response(None, -32600, "Invalid Request"))
+            elif request.get("method") == "tools/call":
+                params = request.get("params") or {}
+                calls.append((len(responses), request.get("id"), params.get("name"), params.get("arguments", {})))
+                responses.append(None)
+            else:
+                responses.append(self.handle_request(request))
+        if calls:
+            results = self.call_tools_batch([(tool_name, tool_args) for _, _, tool_name, tool_args in calls])
+            for (position, request_id, _, _), result in zip(calls, results):
+                responses[position] = create_mcp_response(request_id, result)
+        return [
+            response for request, response in zip(requests, responses)
+            if not (isinstance(request, dict) and is_notification(request))
+        ]
+    
     def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Основний обробник MCP запитів"""
         method = request.get("method")
@@ -253,6 +141,39 @@ class MCPHandler:
             }
 
 
+def is_notification(request: Dict[str, Any]) -> bool:
+    """Notification - запит без id, відповідь на нього не надсилається"""
+    return "id" not in request
+
+
+def post_jsonrpc(url: str, payload: Any, timeout: int = 30) -> Any:
+    """Надсилає JSON-RPC запит або batch масив на HTTP сервер"""
+    req = urllib.request.Request(
+        f"{url}/jsonrpc",
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'}
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        body = response.read()
+        # Великі відповіді сервер стискає gzip
+        if response.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return json.loads(body.decode('utf-8'))
+
+
+def batch_results(responses: List[Dict[str, Any]], count: int, unwrap) -> List[Any]:
+    """Розкладає відповіді batch за id (0..count-1); ``unwrap`` перетворює одну відповідь на результат"""
+    if isinstance(responses, dict):
+        # Помилка всього batch (наприклад, завеликий) приходить одним об'єктом
+        error = (responses.get("error") or {}).get("message", "Invalid batch response")
+        return [{"error": error, "success": False} for _ in range(count)]
+    by_id = {response.get("id"): response for response in responses if isinstance(response, dict)}
+    return [
+        unwrap(by_id[index]) if index in by_id else {"error": "Missing response in batch", "success": False}
+        for index in range(count)
+    ]
+
+
 def create_mcp_response(request_id: Any, result: Any) -> Dict[str, Any]:
     """Створює стандартну MCP відповідь з результатом"""
     return {
@@ -294,7 +215,16 @@ def run_stdio_server(handler: MCPHandler, debug: bool = False):
                 
             try:
                 request = json.loads(line)
-                response = handler.handle_request(request)
+                if isinstance(request, list):
+                    response = handler.handle_batch(request) if request else create_error_response(
+                        None, -32600, "Invalid Request: empty batch"
+                    )
+                    if not response:
+                        continue
+                else:
+                    response = handler.handle_request(request)
+                    if is_notification(request):
+                        continue
                 print(json.dumps(response, ensure_ascii=False))
                 sys.stdout.flush()
             except json.JSONDecodeError as e:
@@ -4,10 +4,10 @@ MCP Local Server - stdio прослойка для локального HTTP API
 Використовує mcp_common для спільної функціональності
 """
 
-import json
-import urllib.request
-from typing import Dict, Any
-from mcp_client_common import MCPHandler, TOOL_NAME_MAPPING, create_mcp_response, run_stdio_server
+from typing import Dict, Any, List, Tuple
+from mcp_client_common import (
+    MCPHandler, TOOL_NAME_MAPPING, batch_results, create_mcp_response, post_jsonrpc, run_stdio_server
+)
 
 # Адреса локального сервера
 LOCAL_SERVER_URL = "http://localhost:3000"
@@ -20,41 +20,45 @@ class LocalMCPHandler(MCPHandler):
         super().__init__("qa-search-local", "1.0.0")
         self.local_url = LOCAL_SERVER_URL
     
+    @staticmethod
+    def _request(method: str, params: Dict[str, Any], request_id: int) -> Dict[str, Any]:
+        """JSON-RPC запит прямого виклику методу локального сервера"""
+        # Конвертуємо qa_xxx в qa.xxx для HTTP сервера
+        if method.startswith("qa_"):
+            server_method = method.replace("qa_", "qa.", 1)
+        else:
+            server_method = method
+        return {
+            "jsonrpc": "2.0",
+            "method": server_method,
+            "params": params,
+            "id": request_id
+        }
+    
+    @staticmethod
+    def _unwrap(result: Dict[str, Any]) -> Dict[str, Any]:
+        if "error" in result and result["error"] is not None:
+            return {"error": f"Local server error: {result['error']}", "success": False}
+        
+        # Повертаємо результат або пустий dict якщо результат None
+        return result.get("result") or {}
+    
     def call_local_server(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Викликає локальний HTTP API сервер через JSON-RPC"""
         try:
-            # Конвертуємо qa_xxx в qa.xxx для HTTP сервера
-            if method.startswith("qa_"):
-                server_method = method.replace("qa_", "qa.", 1)
-            else:
-                server_method = method
-            
-            # Для локального сервера використовуємо прямий виклик методу
-            payload = {
-                "jsonrpc": "2.0",
-                "method": server_method,
-                "params": params,
-                "id": 1
-            }
-            
-            req = urllib.request.Request(
-                f"{self.local_url}/jsonrpc",
-                data=json.dumps(payload).encode('utf-8'),
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            with urllib.request.urlopen(req, timeout=30) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                
-            if "error" in result and result["error"] is not None:
-                return {"error": f"Local server error: {result['error']}", "success": False}
-            
-            # Повертаємо результат або пустий dict якщо результат None
-            return result.get("result") or {}
-            
+            return self._unwrap(post_jsonrpc(self.local_url, self._request(method, params, 1)))
         except Exception as e:
             return {"error": f"Failed to call local server: {str(e)}", "success": False}
     
+    def call_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """Викликає кілька інструментів одним batch запитом до локального сервера"""
+        payload = [self._request(method, params, index) for index, (method, params) in enumerate(calls)]
+        try:
+            responses = post_jsonrpc(self.local_url, payload)
+        except Exception as e:
+            return [{"error": f"Failed to call local server: {str(e)}", "success": False} for _ in calls]
+        return batch_results(responses, len(calls), self._unwrap)
+    
     def handle_tools_call(self, request_id: Any, tool_name: str, tool_args: Dict[str, Any]) -> Dict[str, Any]:
         """Обробляє виклик інструмента через локальний сервер"""
         result = self.call_local_server(tool_name, tool_args)
@@ -68,4 +72,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
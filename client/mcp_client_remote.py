@@ -5,9 +5,10 @@ MCP Remote Server - stdio прослойка для віддаленого HTTP
 """
 
 import json
-import urllib.request
-from typing import Dict, Any
-from mcp_client_common import MCPHandler, TOOL_NAME_MAPPING, create_mcp_response, run_stdio_server
+from typing import Dict, Any, List, Tuple
+from mcp_client_common import (
+    MCPHandler, TOOL_NAME_MAPPING, batch_results, create_mcp_response, post_jsonrpc, run_stdio_server
+)
 
 # Адреса віддаленого сервера
 REMOTE_SERVER_URL = "http://10.11.0.128:3000"
@@ -20,48 +21,50 @@ class RemoteMCPHandler(MCPHandler):
         super().__init__("qa-search-remote", "1.0.0")
         self.remote_url = REMOTE_SERVER_URL
     
+    @staticmethod
+    def _request(method: str, params: Dict[str, Any], request_id: int) -> Dict[str, Any]:
+        """JSON-RPC tools/call запит з назвою інструмента сервера"""
+        # Мапимо назву інструмента
+        remote_method = TOOL_NAME_MAPPING.get(method, method)
+        return {
+            "jsonrpc": "2.0",
+            "method": "tools/call",
+            "params": {
+                "name": remote_method,
+                "arguments": params
+            },
+            "id": request_id
+        }
+    
+    @staticmethod
+    def _unwrap(result: Dict[str, Any]) -> Dict[str, Any]:
+        if 'error' in result and result['error']:
+            return {"error": result['error']['message'], "success": False}
+        
+        # Розпаковуємо відповідь MCP
+        if 'result' in result and 'content' in result['result']:
+            content = result['result']['content']
+            if content and len(content) > 0 and 'text' in content[0]:
+                return json.loads(content[0]['text'])
+        
+        return {"error": "Invalid response format", "success": False}
+    
     def call_remote_server(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Викликає віддалений HTTP API сервер"""
         try:
-            # Мапимо назву інструмента
-            remote_method = TOOL_NAME_MAPPING.get(method, method)
-            
-            # Формуємо JSON-RPC запит
-            jsonrpc_request = {
-                "jsonrpc": "2.0",
-                "method": "tools/call",
-                "params": {
-                    "name": remote_method,
-                    "arguments": params
-                },
-                "id": 1
-            }
-            
-            # Відправляємо запит
-            data = json.dumps(jsonrpc_request).encode('utf-8')
-            req = urllib.request.Request(
-                f"{self.remote_url}/jsonrpc",
-                data=data,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            with urllib.request.urlopen(req, timeout=30) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                
-                if 'error' in result and result['error']:
-                    return {"error": result['error']['message'], "success": False}
-                
-                # Розпаковуємо відповідь MCP
-                if 'result' in result and 'content' in result['result']:
-                    content = result['result']['content']
-                    if content and len(content) > 0 and 'text' in content[0]:
-                        return json.loads(content[0]['text'])
-                
-                return {"error": "Invalid response format", "success": False}
-            
+            return self._unwrap(post_jsonrpc(self.remote_url, self._request(method, params, 1)))
         except Exception as e:
             return {"error": f"Failed to call remote server: {str(e)}", "success": False}
     
+    def call_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """Викликає кілька інструментів одним batch запитом до віддаленого сервера"""
+        payload = [self._request(method, params, index) for index, (method, params) in enumerate(calls)]
+        try:
+            responses = post_jsonrpc(self.remote_url, payload)
+        except Exception as e:
+            return [{"error": f"Failed to call remote server: {str(e)}", "success": False} for _ in calls]
+        return batch_results(responses, len(calls), self._unwrap)
+    
     def handle_tools_call(self, request_id: Any, tool_name: str, tool_args: Dict[str, Any]) -> Dict[str, Any]:
         """Обробляє виклик інструмента через віддалений сервер"""
         result = self.call_remote_server(tool_name, tool_args)
@@ -75,4 +78,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,258 @@
+"""Асинхронний пакетний LLM-аналіз чеклістів з лімітами запитів і токенів."""
+
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+import openai
+from openai import AsyncOpenAI
+
+from app.config import settings
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+BATCH_ENDPOINT = "/v1/chat/completions"
+CUSTOM_ID_PREFIX = "checklist:"
+
+
+def estimate_tokens(request: Dict[str, Any]) -> int:
+    """Оцінка токенів запиту для TPM бюджету: ~3 символи на токен плюс max_tokens."""
+    prompt_chars = sum(len(message["content"]) for message in request["messages"])
+    return prompt_chars // 3 + request.get("max_tokens", 0)
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES
+
+
+def _retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Retry-After заголовок відповіді (секунди або HTTP дата)."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class MinuteBudget:
+    """Бюджет на хвилину (запити або токени), що рівномірно поповнюється.
+
+    ``None`` означає без обмежень. Запит, більший за весь бюджет, чекає
+    повного бюджету і проходить сам. ``adjust`` враховує різницю між
+    оцінкою і фактичним використанням.
+    """
+
+    def __init__(
+        self,
+        per_minute: Optional[int],
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Any] = asyncio.sleep
+    ):
+        self.per_minute = per_minute
+        self.clock = clock
+        self.sleep = sleep
+        self._available = float(per_minute or 0)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self._available = min(
+            float(self.per_minute), self._available + (now - self._updated) * self.per_minute / 60
+        )
+        self._updated = now
+
+    async def acquire(self, amount: int = 1) -> None:
+        if not self.per_minute:
+            return
+        amount = min(amount, self.per_minute)
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._available >= amount:
+                    self._available -= amount
+                    return
+                await self.sleep((amount - self._available) * 60 / self.per_minute)
+
+    def adjust(self, delta: int) -> None:
+        if not self.per_minute or not delta:
+            return
+        self._refill()
+        self._available = min(float(self.per_minute), self._available - delta)
+
+
+class BatchLLMAnalyzer:
+    """Аналізує багато чеклістів паралельно, повертаючи результати в порядку входу.
+
+    Промпти, розбір і кеш беруться з ``LLMChecklistAnalyzer``; тут лише
+    планування: до ``concurrency`` запитів одночасно, RPM/TPM бюджети,
+    спільна пауза після 429 і повтори з експоненційною затримкою. Результати
+    буферизуються не більше ніж на ``2 * concurrency`` чеклістів вперед.
+    """
+
+    def __init__(
+        self,
+        analyzer: Any,
+        client: Optional[Any] = None,
+        concurrency: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: float = 1.0
+    ):
+        self.analyzer = analyzer
+        self.client = client or AsyncOpenAI(api_key=settings.openai_api_key)
+        self.concurrency = concurrency or settings.llm_batch_concurrency
+        self.max_retries = settings.llm_max_retries if max_retries is None else max_retries
+        self.backoff_base = backoff_base
+        self.request_budget = MinuteBudget(requests_per_minute or settings.llm_requests_per_minute)
+        self.token_budget = MinuteBudget(tokens_per_minute or settings.llm_tokens_per_minute)
+        self.stats = {"requests": 0, "cached": 0, "retries": 0, "throttled": 0, "failed": 0, "tokens": 0}
+        self._blocked_until = 0.0
+
+    async def analyze(self, checklists: List[Dict[str, str]]) -> AsyncIterator[Tuple[int, Any]]:
+        """Видає (індекс, ChecklistAnalysis) в порядку ``checklists`` по мірі готовності."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        window = 2 * self.concurrency
+        pending: Deque[Tuple[int, asyncio.Task]] = deque()
+        items = enumerate(checklists)
+        try:
+            while True:
+                while len(pending) < window:
+                    item = next(items, None)
+                    if item is None:
+                        break
+                    index, checklist = item
+                    pending.append((index, asyncio.create_task(self._analyze_one(semaphore, checklist))))
+                if not pending:
+                    return
+                index, task = pending[0]
+                analysis = await task
+                pending.popleft()
+                yield index, analysis
+        finally:
+            # Consumer stopped early or failed: do not leave requests running
+            for _, task in pending:
+                task.cancel()
+
+    async def _analyze_one(self, semaphore: asyncio.Semaphore, checklist: Dict[str, str]) -> Any:
+        title, content = checklist['title'], checklist.get('content', '')
+        analyzer = self.analyzer
+        cache_key = analyzer.cache_key(title, content)
+        cached = analyzer.llm_cache.get(analyzer.CACHE_NAMESPACE, analyzer.model, analyzer.PROMPT_VERSION, cache_key)
+        if cached is not None:
+            self.stats["cached"] += 1
+            return analyzer.analysis_from_data(title, cached)
+
+        async with semaphore:
+            try:
+                result_text = await self._complete(analyzer.completion_request(title, content))
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"Помилка LLM аналізу '{title}': {e}")
+                return analyzer._fallback_analysis(title, content)
+        return analyzer.analysis_from_data(title, analyzer.parse_and_cache(cache_key, result_text))
+
+    async def _complete(self, request: Dict[str, Any]) -> str:
+        """Chat completion з бюджетами і повторами на 429/5xx."""
+        estimated = estimate_tokens(request)
+        for attempt in range(self.max_retries + 1):
+            delay = self._blocked_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.request_budget.acquire()
+            await self.token_budget.acquire(estimated)
+            self.stats["requests"] += 1
+            try:
+                response = await self.client.chat.completions.create(**request)
+            except Exception as e:
+                if not _is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = _retry_after_seconds(e)
+                if delay is None:
+                    delay = self.backoff_base * (2 ** attempt) + random.uniform(0, self.backoff_base)
+                if getattr(e, "status_code", None) == 429:
+                    # Every worker waits out the throttle instead of piling on
+                    self.stats["throttled"] += 1
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+                continue
+
+            total_tokens = getattr(getattr(response, "usage", None), "total_tokens", None)
+            if isinstance(total_tokens, int):
+                self.stats["tokens"] += total_tokens
+                self.token_budget.adjust(total_tokens - estimated)
+            return response.choices[0].message.content
+
+
+def export_batch_requests(analyzer: Any, checklists: List[Dict[str, str]], path: str) -> Dict[str, int]:
+    """Записує JSONL файл запитів для Batch API провайдера.
+
+    ``custom_id`` містить ключ кешу, тож ``import_batch_results`` кладе
+    відповіді в кеш і наступний звичайний запуск бере їх звідти. Чеклісти,
+    що вже є в кеші, і дублікати контенту пропускаються.
+    """
+    counts = {"requests": 0, "cached": 0, "duplicates": 0}
+    seen = set()
+    with open(path, 'w', encoding='utf-8') as f:
+        for checklist in checklists:
+            title, content = checklist['title'], checklist.get('content', '')
+            cache_key = analyzer.cache_key(title, content)
+            if cache_key in seen:
+                counts["duplicates"] += 1
+                continue
+            seen.add(cache_key)
+            if analyzer.llm_cache.get(analyzer.CACHE_NAMESPACE, analyzer.model, analyzer.PROMPT_VERSION, cache_key) is not None:
+                counts["cached"] += 1
+                continue
+            line = {
+                "custom_id": CUSTOM_ID_PREFIX + cache_key,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": analyzer.completion_request(title, content)
+            }
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            counts["requests"] += 1
+    return counts
+
+
+def import_batch_results(analyzer: Any, path: str) -> Dict[str, int]:
+    """Кладе розібрані відповіді з результату Batch API в кеш аналізатора."""
+    counts = {"imported": 0, "failed": 0}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            custom_id = item.get("custom_id") or ""
+            response = item.get("response") or {}
+            try:
+                if not custom_id.startswith(CUSTOM_ID_PREFIX) or response.get("status_code") != 200:
+                    raise ValueError(item.get("error") or f"status {response.get('status_code')}")
+                result_text = response["body"]["choices"][0]["message"]["content"]
+                analysis_data = analyzer._load_llm_json(result_text)
+            except Exception as e:
+                counts["failed"] += 1
+                print(f"Пропущено результат {custom_id or '?'}: {e}")
+                continue
+            analyzer.llm_cache.set(
+                analyzer.CACHE_NAMESPACE, analyzer.model, analyzer.PROMPT_VERSION,
+                custom_id[len(CUSTOM_ID_PREFIX):], analysis_data
+            )
+            counts["imported"] += 1
+    return counts
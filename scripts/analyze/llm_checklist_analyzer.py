@@ -4,6 +4,7 @@
 import os
 import sys
 import json
+import asyncio
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 import click
@@ -13,6 +14,9 @@ from openai import OpenAI
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from app.config import settings
+from app.ai.llm_cache import LLMResponseCache, content_hash, get_llm_cache
+from scripts.llm_cache import echo_hit_rates
+from scripts.analyze.batch_llm_analyzer import BatchLLMAnalyzer, export_batch_requests, import_batch_results
 
 
 @dataclass
@@ -29,46 +33,76 @@ class ChecklistAnalysis:
 class LLMChecklistAnalyzer:
     """Аналізатор чеклістів з використанням LLM."""
     
-    def __init__(self):
+    # Змініть версію при зміні промптів, щоб не використовувати старі результати з кешу
+    CACHE_NAMESPACE = "checklist_analysis"
+    PROMPT_VERSION = "1"
+    
+    def __init__(self, llm_cache: Optional[LLMResponseCache] = None):
         """Ініціалізація."""
         if not settings.openai_api_key:
             raise ValueError("OPENAI_API_KEY не встановлений")
         
         self.client = OpenAI(api_key=settings.openai_api_key)
+        self.model = "gpt-4"
+        self.llm_cache = llm_cache or get_llm_cache()
     
     def analyze_checklist_content(self, title: str, content: str) -> ChecklistAnalysis:
-        """Аналізує контент чеклісту за допомогою LLM."""
+        """Аналізує контент чеклісту за допомогою LLM.
         
-        prompt = self._create_analysis_prompt(title, content)
+        Розібрані відповіді кешуються за моделлю, версією промпту і хешем контенту.
+        """
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=4000
-            )
-            
-            result_text = response.choices[0].message.content
-            analysis_data = self._parse_llm_response(result_text)
+            cache_key = self.cache_key(title, content)
+            analysis_data = self.llm_cache.get(self.CACHE_NAMESPACE, self.model, self.PROMPT_VERSION, cache_key)
+            if analysis_data is None:
+                response = self.client.chat.completions.create(**self.completion_request(title, content))
+                analysis_data = self.parse_and_cache(cache_key, response.choices[0].message.content)
             
-            return ChecklistAnalysis(
-                title=title,
-                description=analysis_data.get('description', ''),
-                additional_content=analysis_data.get('additional_content', ''),
-                testcases=analysis_data.get('testcases', []),
-                configs=analysis_data.get('configs', []),
-                structure_confidence=analysis_data.get('confidence', 0.0)
-            )
+            return self.analysis_from_data(title, analysis_data)
             
         except Exception as e:
             click.echo(f"Помилка LLM аналізу: {e}")
             # Fallback до простого парсингу
             return self._fallback_analysis(title, content)
     
+    def cache_key(self, title: str, content: str) -> str:
+        """Ключ кешу для контенту чеклісту."""
+        return content_hash(title, content)
+    
+    def completion_request(self, title: str, content: str) -> Dict[str, Any]:
+        """Параметри chat completion запиту для чеклісту."""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self._get_system_prompt()},
+                {"role": "user", "content": self._create_analysis_prompt(title, content)}
+            ],
+            "temperature": 0.1,
+            "max_tokens": 4000
+        }
+    
+    def parse_and_cache(self, cache_key: str, result_text: str) -> Dict[str, Any]:
+        """Розбирає відповідь LLM і кешує її, якщо JSON валідний."""
+        try:
+            analysis_data = self._load_llm_json(result_text)
+        except Exception:
+            # Відповіді, які не вдалося розібрати, не кешуємо
+            return self._parse_llm_response(result_text)
+        self.llm_cache.set(self.CACHE_NAMESPACE, self.model, self.PROMPT_VERSION, cache_key, analysis_data)
+        return analysis_data
+    
+    def analysis_from_data(self, title: str, analysis_data: Dict[str, Any]) -> ChecklistAnalysis:
+        """Будує результат аналізу з розібраної відповіді LLM."""
+        return ChecklistAnalysis(
+            title=title,
+            description=analysis_data.get('description', ''),
+            additional_content=analysis_data.get('additional_content', ''),
+            testcases=analysis_data.get('testcases', []),
+            configs=analysis_data.get('configs', []),
+            structure_confidence=analysis_data.get('confidence', 0.0)
+        )
+    
     def _get_system_prompt(self) -> str:
         """Системний промпт для LLM."""
         return """
@@ -141,15 +175,7 @@ class LLMChecklistAnalyzer:
     def _parse_llm_response(self, response_text: str) -> Dict[str, Any]:
         """Парсить відповідь LLM."""
         try:
-            # Витягуємо JSON з відповіді
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            
-            if start_idx == -1 or end_idx == 0:
-                raise ValueError("JSON не знайдений в відповіді")
-            
-            json_text = response_text[start_idx:end_idx]
-            return json.loads(json_text)
+            return self._load_llm_json(response_text)
             
         except Exception as e:
             click.echo(f"Помилка парсингу LLM відповіді: {e}")
@@ -161,6 +187,18 @@ class LLMChecklistAnalyzer:
                 "confidence": 0.0
             }
     
+    def _load_llm_json(self, response_text: str) -> Dict[str, Any]:
+        """Витягує JSON з відповіді LLM; кидає помилку, якщо його немає."""
+        # Витягуємо JSON з відповіді
+        start_idx = response_text.find('{')
+        end_idx = response_text.rfind('}') + 1
+        
+        if start_idx == -1 or end_idx == 0:
+            raise ValueError("JSON не знайдений в відповіді")
+        
+        json_text = response_text[start_idx:end_idx]
+        return json.loads(json_text)
+    
     def _fallback_analysis(self, title: str, content: str) -> ChecklistAnalysis:
         """Резервний аналіз без LLM."""
         return ChecklistAnalysis(
@@ -200,13 +238,60 @@ class LLMChecklistAnalyzer:
         return results
 
 
+def _analysis_record(analysis: ChecklistAnalysis) -> Dict[str, Any]:
+    """Результат аналізу у форматі вихідного файлу."""
+    return {
+        'title': analysis.title,
+        'description': analysis.description,
+        'additional_content': analysis.additional_content,
+        'testcases': analysis.testcases,
+        'configs': analysis.configs,
+        'confidence': analysis.structure_confidence
+    }
+
+
+async def run_batch_analysis(
+    batch: BatchLLMAnalyzer,
+    checklists: List[Dict[str, str]],
+    stream_file: Optional[str] = None
+) -> List[ChecklistAnalysis]:
+    """Аналізує чеклісти паралельно; з ``stream_file`` пише JSONL рядки в порядку входу по мірі готовності."""
+    results = []
+    stream = open(stream_file, 'w', encoding='utf-8') if stream_file else None
+    try:
+        async for index, analysis in batch.analyze(checklists):
+            results.append(analysis)
+            click.echo(f"Чекліст {index + 1}/{len(checklists)}: {analysis.title} - "
+                       f"{len(analysis.testcases)} тесткейсів (впевненість: {analysis.structure_confidence:.2f})")
+            if stream:
+                record = {'page_id': checklists[index].get('page_id'), **_analysis_record(analysis)}
+                stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+                stream.flush()
+    finally:
+        if stream:
+            stream.close()
+    return results
+
+
 @click.command()
 @click.option('--input-file', required=True, help='JSON файл з чеклістами для аналізу')
-@click.option('--output-file', required=True, help='JSON файл для збереження результатів')
+@click.option('--output-file', default=None,
+              help='Файл для збереження результатів (.jsonl - записи пишуться по мірі готовності)')
 @click.option('--confidence-threshold', default=0.7, help='Мінімальна впевненість для прийняття результату')
-def main(input_file, output_file, confidence_threshold):
+@click.option('--concurrency', '-j', default=None, type=int, help='Паралельні запити до LLM (default: LLM_BATCH_CONCURRENCY)')
+@click.option('--rpm', default=None, type=int, help='Ліміт запитів на хвилину (default: LLM_REQUESTS_PER_MINUTE)')
+@click.option('--tpm', default=None, type=int, help='Ліміт токенів на хвилину (default: LLM_TOKENS_PER_MINUTE)')
+@click.option('--max-retries', default=None, type=int, help='Повтори на 429/5xx (default: LLM_MAX_RETRIES)')
+@click.option('--export-batch', default=None, help='Записати JSONL запити для Batch API замість аналізу')
+@click.option('--import-batch-results', 'batch_results', default=None, help='Завантажити результати Batch API (JSONL) в кеш перед аналізом')
+def main(input_file, output_file, confidence_threshold, concurrency, rpm, tpm, max_retries,
+         export_batch, batch_results):
     """Аналізує чекліст за допомогою LLM."""
     
+    if not output_file and not export_batch:
+        click.echo("Потрібно вказати --output-file або --export-batch")
+        sys.exit(1)
+    
     if not os.path.exists(input_file):
         click.echo(f"Файл {input_file} не знайдений")
         sys.exit(1)
@@ -233,9 +318,28 @@ def main(input_file, output_file, confidence_threshold):
     
     click.echo(f"Знайдено {len(checklists)} чеклістів для аналізу")
     
-    # Аналізуємо
     analyzer = LLMChecklistAnalyzer()
-    results = analyzer.batch_analyze_checklists(checklists)
+    
+    if batch_results:
+        counts = import_batch_results(analyzer, batch_results)
+        click.echo(f"Результати Batch API: {counts['imported']} додано в кеш, {counts['failed']} пропущено")
+    
+    if export_batch:
+        counts = export_batch_requests(analyzer, checklists, export_batch)
+        click.echo(f"Запити для Batch API збережено у {export_batch}: {counts['requests']} запитів "
+                   f"({counts['cached']} вже в кеші, {counts['duplicates']} дублікатів)")
+        return
+    
+    # Аналізуємо
+    batch = BatchLLMAnalyzer(
+        analyzer,
+        concurrency=concurrency,
+        requests_per_minute=rpm,
+        tokens_per_minute=tpm,
+        max_retries=max_retries
+    )
+    stream_file = output_file if output_file.endswith('.jsonl') else None
+    results = asyncio.run(run_batch_analysis(batch, checklists, stream_file))
     
     # Фільтруємо по впевненості
     high_confidence_results = [r for r in results if r.structure_confidence >= confidence_threshold]
@@ -244,29 +348,18 @@ def main(input_file, output_file, confidence_threshold):
     click.echo(f"\nРезультати:")
     click.echo(f"  Високої впевненості: {len(high_confidence_results)}")
     click.echo(f"  Низької впевненості: {len(low_confidence_results)}")
+    click.echo(f"  Запитів до LLM: {batch.stats['requests']} (повторів: {batch.stats['retries']}, "
+               f"429: {batch.stats['throttled']}, помилок: {batch.stats['failed']}, токенів: {batch.stats['tokens']})")
+    echo_hit_rates(analyzer.llm_cache)
+    
+    if stream_file:
+        click.echo(f"\nРезультати збережено у {output_file}")
+        return
     
     # Зберігаємо результати
     output_data = {
-        'high_confidence': [
-            {
-                'title': r.title,
-                'description': r.description,
-                'additional_content': r.additional_content,
-                'testcases': r.testcases,
-                'configs': r.configs,
-                'confidence': r.structure_confidence
-            } for r in high_confidence_results
-        ],
-        'low_confidence': [
-            {
-                'title': r.title,
-                'description': r.description,
-                'additional_content': r.additional_content,
-                'testcases': r.testcases,
-                'configs': r.configs,
-                'confidence': r.structure_confidence
-            } for r in low_confidence_results
-        ],
+        'high_confidence': [_analysis_record(r) for r in high_confidence_results],
+        'low_confidence': [_analysis_record(r) for r in low_confidence_results],
         'summary': {
             'total_checklists': len(results),
             'high_confidence_count': len(high_confidence_results),
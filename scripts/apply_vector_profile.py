@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Скрипт для застосування профілю квантизації/HNSW до колекції qa_chunks.
+Змінює параметри існуючої колекції без повторного завантаження даних.
+"""
+
+import sys
+import os
+import click
+
+# Додаємо корінь проекту до Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data.vectordb_repo import (
+    COLLECTION_PROFILES, CollectionProfile, VectorDBRepository, get_collection_profile
+)
+
+
+def describe_profile(profile: CollectionProfile) -> None:
+    """Виводить параметри профілю."""
+    click.echo(f"📋 Профіль: {profile.name}")
+    click.echo(f"   • Квантизація: {profile.quantization}")
+    click.echo(f"   • Вектори на диску: {'так' if profile.on_disk else 'ні'}")
+    click.echo(f"   • HNSW m: {profile.hnsw_m or 'за замовчуванням'}")
+    click.echo(f"   • HNSW ef_construct: {profile.hnsw_ef_construct or 'за замовчуванням'}")
+    click.echo(f"   • Search ef: {profile.search_ef or 'за замовчуванням'}")
+    if profile.quantization != "none":
+        click.echo(f"   • Rescoring: {'так' if profile.rescore else 'ні'}")
+        click.echo(f"   • Oversampling: {profile.oversampling or 'за замовчуванням'}")
+
+
+@click.command()
+@click.option('--profile', '-p', default=None, type=click.Choice(list(COLLECTION_PROFILES)),
+              help='Назва профілю (за замовчуванням VECTORDB_COLLECTION_PROFILE)')
+@click.option('--show', '-s', is_flag=True, help='Тільки показати поточні параметри колекції')
+@click.option('--dry-run', '-d', is_flag=True, help='Тільки показати що буде зроблено, не виконувати')
+def main(profile: str, show: bool, dry_run: bool):
+    """Застосовує профіль квантизації та HNSW до колекції qa_chunks."""
+    
+    click.echo("🔧 Qdrant Collection Profile")
+    click.echo("=" * 50)
+    
+    try:
+        target = get_collection_profile(profile)
+    except ValueError as e:
+        click.echo(f"❌ Помилка: {e}")
+        sys.exit(1)
+    
+    describe_profile(target)
+    
+    if dry_run:
+        click.echo("🔍 DRY RUN - нічого не буде змінено")
+        sys.exit(0)
+    
+    repo = VectorDBRepository(profile=target)
+    try:
+        info = repo.get_collection_info()
+        if info is None:
+            click.echo(f"❌ Колекція {repo.COLLECTION_NAME} недоступна")
+            sys.exit(1)
+        click.echo(f"📊 Колекція {repo.COLLECTION_NAME}: {info.points_count or 0} точок")
+        
+        if show:
+            click.echo(f"   • Статус: {info.status}")
+            click.echo(f"   • Квантизація: {info.config.quantization_config or 'немає'}")
+            click.echo(f"   • HNSW: m={info.config.hnsw_config.m}, ef_construct={info.config.hnsw_config.ef_construct}")
+            sys.exit(0)
+        
+        if repo.apply_collection_profile():
+            click.echo("✅ Профіль застосовано, Qdrant перебудовує індекси у фоні")
+            sys.exit(0)
+        else:
+            click.echo("💥 Не вдалося застосувати профіль")
+            sys.exit(1)
+    except KeyboardInterrupt:
+        click.echo("\n⏹️  Операцію перервано користувачем")
+        sys.exit(1)
+    finally:
+        repo.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 """Mock Confluence API for development and testing."""
 
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional
 import random
 
 
@@ -334,6 +334,17 @@ Provide examples in:
         # Apply limit
         return filtered_pages[:limit]
     
+    def iter_pages(
+        self,
+        space_keys: Optional[List[str]] = None,
+        labels: Optional[List[str]] = None,
+        updated_since: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield filtered pages one by one (same contract as the real API)."""
+        pages = self.get_pages(space_keys, labels, updated_since, limit=len(self.mock_pages))
+        yield from pages[:limit] if limit else pages
+    
     def get_page_content(self, page_id: str) -> Optional[Dict[str, Any]]:
         """Get full page content by ID."""
         for page in self.mock_pages:
@@ -1,18 +1,42 @@
 """Real Confluence API client."""
 
-import re
-import html
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Dict, Any, Optional
 from atlassian import Confluence
 from app.config import settings
 
+try:
+    from .content_normalizer import normalize_content
+    from .page_crawler import ConfluenceCrawler
+except ImportError:
+    # Fallback for direct script execution
+    from content_normalizer import normalize_content
+    from page_crawler import ConfluenceCrawler
+
+CQL_TIMEZONE_MARGIN = timedelta(hours=14)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Make a datetime timezone-aware (UTC) so naive and aware values compare."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
 
 class RealConfluenceAPI:
     """Real Confluence API client using atlassian-python-api."""
     
-    def __init__(self):
-        """Initialize Confluence API client."""
+    # ancestors: loader resolves section/subcategory without re-fetching the page
+    PAGE_EXPAND = 'body.storage,version,metadata.labels,space,ancestors'
+    CHILDREN_PAGE_SIZE = 25
+    SEARCH_PAGE_SIZE = 100
+    
+    def __init__(self, max_workers: Optional[int] = None):
+        """Initialize Confluence API client.
+        
+        ``max_workers`` is the number of concurrent requests used for
+        crawling (default: CONFLUENCE_MAX_CONCURRENCY).
+        """
         if not settings.confluence_base_url or not settings.confluence_auth_token:
             raise ValueError(
                 "CONFLUENCE_BASE_URL and CONFLUENCE_AUTH_TOKEN must be set in environment"
@@ -33,6 +57,17 @@ class RealConfluenceAPI:
                 url=settings.confluence_base_url,
                 token=settings.confluence_auth_token
             )
+        
+        self.crawler = ConfluenceCrawler(
+            self.confluence,
+            extract_page=self._extract_page_data,
+            base_url=settings.confluence_base_url,
+            page_expand=self.PAGE_EXPAND,
+            max_workers=max_workers or settings.confluence_max_concurrency,
+            max_per_host=settings.confluence_max_per_host,
+            max_retries=settings.confluence_max_retries,
+            children_page_size=self.CHILDREN_PAGE_SIZE
+        )
     
     def get_pages_by_ids(
         self,
@@ -40,69 +75,30 @@ class RealConfluenceAPI:
         include_children: bool = True
     ) -> List[Dict[str, Any]]:
         """Get specific pages by IDs and optionally their children."""
-        all_pages = []
-        
-        for page_id in page_ids:
-            try:
-                print(f"Fetching page {page_id}...")
-                # Get the root page
-                page = self.confluence.get_page_by_id(
-                    page_id,
-                    expand='body.storage,version,metadata.labels,space'
-                )
-                print(f"Page response type: {type(page)}")
-                if isinstance(page, dict):
-                    print(f"Page keys: {list(page.keys())}")
-                else:
-                    print(f"Page content: {str(page)[:200]}")
-                
-                page_data = self._extract_page_data(page)
-                all_pages.append(page_data)
-                print(f"Successfully processed page: {page_data['title']}")
-                
-                # Get child pages recursively if requested
-                if include_children:
-                    children = self._get_child_pages_recursive(page_id)
-                    all_pages.extend(children)
-                    print(f"Found {len(children)} child pages")
-                    
-            except Exception as e:
-                print(f"Error processing page {page_id}: {e}")
-                import traceback
-                traceback.print_exc()
-                continue
-        
-        return all_pages
+        return list(self.iter_pages_by_ids(page_ids, include_children))
+    
+    def iter_pages_by_ids(
+        self,
+        page_ids: List[str],
+        include_children: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield specific pages by IDs and optionally their children as they are fetched.
+        
+        The tree is crawled breadth-first with several requests in flight,
+        so pages of one level arrive in completion order.
+        """
+        print(f"Crawling pages {', '.join(map(str, page_ids))} "
+              f"({self.crawler.max_workers} concurrent requests)...")
+        count = 0
+        for page in self.crawler.crawl(page_ids, include_children=include_children):
+            count += 1
+            yield page
+        print(f"Fetched {count} pages ({self.crawler.stats['retries']} retries, "
+              f"{self.crawler.stats['throttled']} throttled)")
     
     def _get_child_pages_recursive(self, parent_page_id: str) -> List[Dict[str, Any]]:
         """Recursively get all child pages."""
-        children = []
-        
-        try:
-            # Get direct children
-            child_pages = self.confluence.get_page_child_by_type(
-                parent_page_id,
-                type='page',
-                expand='body.storage,version,metadata.labels,space'
-            )
-            
-            for child in child_pages:
-                try:
-                    child_data = self._extract_page_data(child)
-                    children.append(child_data)
-                    
-                    # Recursively get children of this child
-                    grandchildren = self._get_child_pages_recursive(child['id'])
-                    children.extend(grandchildren)
-                    
-                except Exception as e:
-                    print(f"Error processing child page {child.get('id', 'unknown')}: {e}")
-                    continue
-                    
-        except Exception as e:
-            print(f"Error getting children of page {parent_page_id}: {e}")
-        
-        return children
+        return list(self.crawler.crawl_children(parent_page_id))
 
     def get_pages(
         self,
@@ -112,52 +108,92 @@ class RealConfluenceAPI:
         limit: int = 25
     ) -> List[Dict[str, Any]]:
         """Get pages with filtering."""
-        all_pages = []
+        # CQL returns newest first, so only `limit` bodies are downloaded
+        all_pages = list(self.iter_pages(space_keys, labels, updated_since, limit=limit))
         
-        # If specific spaces are requested, get pages from those spaces
-        if space_keys:
-            spaces_to_search = space_keys
-        else:
-            # Get all spaces
-            spaces = self.confluence.get_all_spaces(start=0, limit=500)
-            spaces_to_search = [space['key'] for space in spaces['results']]
+        # Bodies arrive in completion order - restore newest first
+        all_pages.sort(key=lambda x: _as_utc(x['updated']), reverse=True)
+        return all_pages
+    
+    def iter_pages(
+        self,
+        space_keys: Optional[List[str]] = None,
+        labels: Optional[List[str]] = None,
+        updated_since: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield filtered pages as their content is fetched.
+        
+        Matching pages are discovered server-side with CQL (newest first),
+        so only their bodies are downloaded.
+        """
+        cql = self.build_cql(space_keys, labels, updated_since)
+        print(f"Searching pages with CQL: {cql}")
+        
+        yielded = 0
+        for page_ids in self._iter_cql_page_ids(cql, limit):
+            # Get full page content concurrently
+            for page_data in self.crawler.fetch_pages(page_ids):
+                # Safety net for CQL date granularity (minutes)
+                if not self._should_include_page(page_data, labels, updated_since):
+                    continue
+                yield page_data
+                yielded += 1
+                if limit and yielded >= limit:
+                    return
+    
+    @staticmethod
+    def build_cql(
+        space_keys: Optional[List[str]] = None,
+        labels: Optional[List[str]] = None,
+        updated_since: Optional[datetime] = None
+    ) -> str:
+        """Build a CQL query for pages matching the loader filters."""
+        def quoted(values: List[str]) -> str:
+            return ", ".join('"{}"'.format(value.replace('"', '\\"')) for value in values)
         
-        for space_key in spaces_to_search:
+        clauses = ["type = page"]
+        if space_keys:
+            clauses.append(f"space in ({quoted(space_keys)})")
+        if labels:
+            clauses.append(f"label in ({quoted(labels)})")
+        if updated_since:
+            # CQL dates are read in the account's timezone; widen by the max UTC offset
+            # and let _should_include_page drop the extra pages
+            since = _as_utc(updated_since) - CQL_TIMEZONE_MARGIN
+            clauses.append(f'lastmodified >= "{since.strftime("%Y-%m-%d %H:%M")}"')
+        return " AND ".join(clauses) + " order by lastmodified desc"
+    
+    def _iter_cql_page_ids(self, cql: str, limit: Optional[int] = None) -> Iterator[List[str]]:
+        """Yield batches of page IDs matching ``cql``, paging with start/limit."""
+        start = 0
+        found = 0
+        while True:
+            batch_size = self.SEARCH_PAGE_SIZE
+            if limit:
+                batch_size = min(batch_size, limit - found)
             try:
-                # Get pages from space
-                pages = self.confluence.get_all_pages_from_space(
-                    space=space_key,
-                    start=0,
-                    limit=100,
-                    expand='version,metadata.labels'
-                )
-                
-                for page in pages:
-                    try:
-                        # Get full page content
-                        page_content = self.confluence.get_page_by_id(
-                            page['id'],
-                            expand='body.storage,version,metadata.labels,space'
-                        )
-                        
-                        # Extract page data
-                        page_data = self._extract_page_data(page_content)
-                        
-                        # Apply filters
-                        if self._should_include_page(page_data, labels, updated_since):
-                            all_pages.append(page_data)
-                            
-                    except Exception as e:
-                        print(f"Error processing page {page['id']}: {e}")
-                        continue
-                        
+                response = self.crawler.request(self.confluence.cql, cql, start=start, limit=batch_size)
             except Exception as e:
-                print(f"Error accessing space {space_key}: {e}")
-                continue
-        
-        # Sort by update date (newest first) and apply limit
-        all_pages.sort(key=lambda x: x['updated'], reverse=True)
-        return all_pages[:limit]
+                self.crawler.record_failure()
+                print(f"Error searching pages with CQL: {e}")
+                return
+            
+            results = (response or {}).get('results', [])
+            page_ids = [
+                str(result['content']['id']) for result in results
+                if result.get('content', {}).get('id')
+            ]
+            if page_ids:
+                yield page_ids
+            
+            found += len(page_ids)
+            start += len(results)
+            total = (response or {}).get('totalSize')
+            if len(results) < batch_size or (total is not None and start >= total):
+                return
+            if limit and found >= limit:
+                return
     
     def _extract_page_data(self, page: Dict[str, Any]) -> Dict[str, Any]:
         """Extract standardized page data from Confluence API response."""
@@ -239,8 +275,8 @@ class RealConfluenceAPI:
             if not page_labels.intersection(filter_labels):
                 return False
         
-        # Filter by update date
-        if updated_since and page["updated"] < updated_since:
+        # Filter by update date (naive values are treated as UTC)
+        if updated_since and _as_utc(page["updated"]) < _as_utc(updated_since):
             return False
         
         return True
@@ -259,120 +295,7 @@ class RealConfluenceAPI:
     
     def normalize_content(self, content: str) -> str:
         """Normalize Confluence storage format content to plain text."""
-        if not content:
-            return ""
-        
-        # Remove CDATA sections
-        content = re.sub(r'<!\[CDATA\[(.*?)\]\]>', r'\1', content, flags=re.DOTALL)
-        
-        # Convert common Confluence macros to readable text
-        content = self._convert_macros(content)
-        
-        # Remove HTML tags but preserve structure
-        content = self._html_to_text(content)
-        
-        # Normalize whitespace
-        content = re.sub(r'\n\s*\n\s*\n+', '\n\n', content)
-        content = re.sub(r'[ \t]+', ' ', content)
-        content = content.strip()
-        
-        return content
-    
-    def _convert_macros(self, content: str) -> str:
-        """Convert Confluence macros to readable text."""
-        # Code macro
-        content = re.sub(
-            r'<ac:structured-macro ac:name="code"[^>]*>.*?<ac:plain-text-body><!\[CDATA\[(.*?)\]\]></ac:plain-text-body>.*?</ac:structured-macro>',
-            r'```\n\1\n```',
-            content,
-            flags=re.DOTALL
-        )
-        
-        # Info macro
-        content = re.sub(
-            r'<ac:structured-macro ac:name="info"[^>]*>(.*?)</ac:structured-macro>',
-            r'ℹ️ \1',
-            content,
-            flags=re.DOTALL
-        )
-        
-        # Warning macro
-        content = re.sub(
-            r'<ac:structured-macro ac:name="warning"[^>]*>(.*?)</ac:structured-macro>',
-            r'⚠️ \1',
-            content,
-            flags=re.DOTALL
-        )
-        
-        # Note macro
-        content = re.sub(
-            r'<ac:structured-macro ac:name="note"[^>]*>(.*?)</ac:structured-macro>',
-            r'📝 \1',
-            content,
-            flags=re.DOTALL
-        )
-        
-        # Table of contents
-        content = re.sub(
-            r'<ac:structured-macro ac:name="toc"[^>]*>.*?</ac:structured-macro>',
-            '[Table of Contents]',
-            content,
-            flags=re.DOTALL
-        )
-        
-        # Remove other macros (keep content if available)
-        content = re.sub(
-            r'<ac:structured-macro[^>]*>(.*?)</ac:structured-macro>',
-            r'\1',
-            content,
-            flags=re.DOTALL
-        )
-        
-        return content
-    
-    def _html_to_text(self, content: str) -> str:
-        """Convert HTML to plain text while preserving structure."""
-        # Headers
-        content = re.sub(r'<h([1-6])[^>]*>(.*?)</h[1-6]>', r'\n\n' + r'#' * 1 + r' \2\n\n', content)
-        
-        # Paragraphs
-        content = re.sub(r'<p[^>]*>(.*?)</p>', r'\1\n\n', content, flags=re.DOTALL)
-        
-        # Line breaks
-        content = re.sub(r'<br[^>]*/?>', '\n', content)
-        
-        # Lists
-        content = re.sub(r'<ul[^>]*>', '\n', content)
-        content = re.sub(r'</ul>', '\n', content)
-        content = re.sub(r'<ol[^>]*>', '\n', content)
-        content = re.sub(r'</ol>', '\n', content)
-        content = re.sub(r'<li[^>]*>(.*?)</li>', r'- \1\n', content, flags=re.DOTALL)
-        
-        # Tables (simple conversion)
-        content = re.sub(r'<table[^>]*>', '\n\n', content)
-        content = re.sub(r'</table>', '\n\n', content)
-        content = re.sub(r'<tr[^>]*>', '\n', content)
-        content = re.sub(r'</tr>', '', content)
-        content = re.sub(r'<t[hd][^>]*>(.*?)</t[hd]>', r'\1 | ', content, flags=re.DOTALL)
-        
-        # Strong/bold
-        content = re.sub(r'<strong[^>]*>(.*?)</strong>', r'**\1**', content, flags=re.DOTALL)
-        content = re.sub(r'<b[^>]*>(.*?)</b>', r'**\1**', content, flags=re.DOTALL)
-        
-        # Emphasis/italic
-        content = re.sub(r'<em[^>]*>(.*?)</em>', r'*\1*', content, flags=re.DOTALL)
-        content = re.sub(r'<i[^>]*>(.*?)</i>', r'*\1*', content, flags=re.DOTALL)
-        
-        # Links
-        content = re.sub(r'<a[^>]*href="([^"]*)"[^>]*>(.*?)</a>', r'\2 (\1)', content, flags=re.DOTALL)
-        
-        # Remove remaining HTML tags
-        content = re.sub(r'<[^>]+>', '', content)
-        
-        # Decode HTML entities
-        content = html.unescape(content)
-        
-        return content
+        return normalize_content(content)
     
     def test_connection(self) -> Dict[str, Any]:
         """Test connection to Confluence."""
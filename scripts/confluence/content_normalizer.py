@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Перетворення Confluence storage format у текст за один прохід.
+
+Раніше ``normalize_content`` застосовував до сторінки два десятки ``re.sub``
+підряд, частина з яких з ``DOTALL`` та ``.*?``. Тут сторінка один раз
+розбивається на теги та текст, для кожного тегу визначається правило, пари
+відкриваючих/закриваючих тегів зіставляються за тією ж семантикою, що й у
+старих регулярних виразах (найближчий закриваючий тег, вкладені відкриття
+ігноруються), і результат збирається одним ``join``.
+
+Вихід має збігатися зі старою реалізацією (``normalize_content_legacy``)
+символ у символ. Для входів, де це не можна гарантувати без повторення всіх
+проходів (голий ``<``, з якого могло б початися правило, незакрита лапка в
+``href``, вкладений CDATA), використовується стара реалізація.
+"""
+
+import html
+import re
+from functools import lru_cache
+from typing import Any, List, Optional, Set, Tuple
+
+CDATA_OPEN = '<![CDATA['
+CDATA_CLOSE = ']]>'
+
+_TOKEN_SPLIT_RE = re.compile(r'(<[^<>]+>)')
+_TAG_RE = re.compile(r'<[^>]+>')
+# A '<' that does not start a tag is left to the final tag removal, as before,
+# unless a rule pattern could start at it (also once the tag right after it is replaced)
+_UNSAFE_BARE_LT_RE = re.compile(r'<(?![^<>]+>)[<abehilopstu]')
+_LINK_OPEN_RE = re.compile(r'<a[^>]*href="([^"]*)"[^>]*>')
+# Same matches as r'\n\s*\n\s*\n+' without its backtracking on long whitespace runs
+_BLANK_LINES_RE = re.compile(r'\n(?:[^\S\n]*\n){2,}')
+_SPACES_RE = re.compile(r'[ \t]+')
+
+MACRO_OPEN_PREFIX = '<ac:structured-macro'
+MACRO_CLOSE = '</ac:structured-macro>'
+# Macro rules in the order the legacy passes applied them; None is "any other macro"
+_MACRO_RULES = (
+    ('<ac:structured-macro ac:name="info"', 'ℹ️ '),
+    ('<ac:structured-macro ac:name="warning"', '⚠️ '),
+    ('<ac:structured-macro ac:name="note"', '📝 '),
+    ('<ac:structured-macro ac:name="toc"', None),
+    (None, ''),
+)
+TOC_TEXT = '[Table of Contents]'
+
+# Paired rules: open replacement, close replacement
+_HEADER, _PARAGRAPH, _ITEM, _CELL, _STRONG, _BOLD, _EM, _ITALIC, _LINK = range(9)
+_PAIRS = {
+    _HEADER: ('\n\n# ', '\n\n'),
+    _PARAGRAPH: ('', '\n\n'),
+    _ITEM: ('- ', '\n'),
+    _CELL: ('', ' | '),
+    _STRONG: ('**', '**'),
+    _BOLD: ('**', '**'),
+    _EM: ('*', '*'),
+    _ITALIC: ('*', '*'),
+    _LINK: ('', None),  # close becomes " (url)"
+}
+_CLOSE_TAGS = {
+    '</p>': _PARAGRAPH,
+    '</li>': _ITEM,
+    '</th>': _CELL,
+    '</td>': _CELL,
+    '</strong>': _STRONG,
+    '</b>': _BOLD,
+    '</em>': _EM,
+    '</i>': _ITALIC,
+    '</a>': _LINK,
+    **{f'</h{level}>': _HEADER for level in range(1, 7)},
+}
+# Single tags replaced regardless of pairing
+_SINGLE_TAGS = {'</ul>': '\n', '</ol>': '\n', '</table>': '\n\n', '</tr>': ''}
+
+
+def _unwrap_cdata(content: str) -> str:
+    """``re.sub(r'<!\\[CDATA\\[(.*?)\\]\\]>', r'\\1', ..., flags=re.DOTALL)`` через str.find."""
+    start = content.find(CDATA_OPEN)
+    if start < 0:
+        return content
+
+    parts = []
+    position = 0
+    while start >= 0:
+        end = content.find(CDATA_CLOSE, start + len(CDATA_OPEN))
+        if end < 0:
+            break
+        parts.append(content[position:start])
+        parts.append(content[start + len(CDATA_OPEN):end])
+        position = end + len(CDATA_CLOSE)
+        start = content.find(CDATA_OPEN, position)
+    parts.append(content[position:])
+    return ''.join(parts)
+
+
+# Kinds of tags: left for the final tag removal, replaced by a fixed string,
+# opening or closing a paired rule, opening a link, not supported by the single pass
+_KEEP, _REPLACE, _OPEN, _CLOSE, _LINK_OPEN, _UNSUPPORTED = range(6)
+_DROP = (_KEEP, None)
+
+
+@lru_cache(maxsize=4096)
+def _classify(tag: str) -> Tuple[int, Any]:
+    """Що стара реалізація зробила б з тегом: (вид, правило/заміна/URL)."""
+    second = tag[1]
+    if second == '/':
+        rule = _CLOSE_TAGS.get(tag)
+        if rule is not None:
+            return (_CLOSE, rule)
+        return (_REPLACE, _SINGLE_TAGS[tag]) if tag in _SINGLE_TAGS else _DROP
+    if second == 'a':
+        last_quote = tag.rfind('"')
+        if last_quote >= 5 and tag[last_quote - 5:last_quote + 1] == 'href="':
+            # The legacy pattern would continue the href value past this tag
+            return (_UNSUPPORTED, None)
+        match = _LINK_OPEN_RE.match(tag)
+        return (_LINK_OPEN, match.group(1)) if match else _DROP
+    if second == 'h':
+        return (_OPEN, _HEADER) if tag[2:3] in ('1', '2', '3', '4', '5', '6') else _DROP
+    if second == 'p':
+        return (_OPEN, _PARAGRAPH)
+    if second == 'b':
+        return (_REPLACE, '\n') if tag.startswith('<br') else (_OPEN, _BOLD)
+    if second == 'u':
+        return (_REPLACE, '\n') if tag.startswith('<ul') else _DROP
+    if second == 'o':
+        return (_REPLACE, '\n') if tag.startswith('<ol') else _DROP
+    if second == 'l':
+        return (_OPEN, _ITEM) if tag.startswith('<li') else _DROP
+    if second == 't':
+        if tag.startswith('<table'):
+            return (_REPLACE, '\n\n')
+        if tag.startswith('<tr'):
+            return (_REPLACE, '\n')
+        if tag.startswith('<th') or tag.startswith('<td'):
+            return (_OPEN, _CELL)
+        return _DROP
+    if second == 's':
+        return (_OPEN, _STRONG) if tag.startswith('<strong') else _DROP
+    if second == 'e':
+        return (_OPEN, _EM) if tag.startswith('<em') else _DROP
+    if second == 'i':
+        return (_OPEN, _ITALIC)
+    return _DROP
+
+
+def _convert_macros(parts: List[str]) -> Set[int]:
+    """
+    Замінити макроси в ``parts`` на місці; повертає індекси використаних тегів.
+
+    Кожне правило, як окремий прохід ``re.sub``, зіставляє свої відкриття з
+    найближчим закриттям, яке ще не використали попередні правила.
+    """
+    consumed: Set[int] = set()
+    macro_indexes = [
+        2 * i + 1 for i, tag in enumerate(parts[1::2])
+        if 'ac:structured-macro' in tag and (tag == MACRO_CLOSE or tag.startswith(MACRO_OPEN_PREFIX))
+    ]
+    for prefix, replacement in _MACRO_RULES:
+        pending = None
+        for j in macro_indexes:
+            if j in consumed:
+                continue
+            tag = parts[j]
+            if tag == MACRO_CLOSE:
+                if pending is None:
+                    continue
+                consumed.add(pending)
+                consumed.add(j)
+                parts[j] = ''
+                if replacement is None:
+                    # Table of contents drops the macro body with everything in it
+                    consumed.update(range(pending + 2, j, 2))
+                    parts[pending + 1:j] = [''] * (j - pending - 1)
+                    parts[pending] = TOC_TEXT
+                else:
+                    parts[pending] = replacement
+                pending = None
+            elif pending is None and (prefix is None or tag.startswith(prefix)):
+                pending = j
+    return consumed
+
+
+def _normalize_single_pass(content: str) -> Optional[str]:
+    """
+    Однопрохідна нормалізація.
+
+    Повертає None, якщо вхід потребує старої реалізації.
+    """
+    content = _unwrap_cdata(content)
+    if CDATA_OPEN in content:
+        return None
+
+    # Text and tags alternate: tags are at odd indexes and get replaced in place
+    parts = _TOKEN_SPLIT_RE.split(content)
+    if len(parts) // 2 != content.count('<') and _UNSAFE_BARE_LT_RE.search(content):
+        return None
+
+    consumed = _convert_macros(parts) if 'ac:structured-macro' in content else ()
+
+    pending: List[Optional[int]] = [None] * len(_PAIRS)
+    url = None
+    classify = _classify
+    for j in range(1, len(parts), 2):
+        # Headers were matched without DOTALL: a newline inside the span cancels the open
+        if pending[_HEADER] is not None and ('\n' in parts[j - 1] or '\n' in parts[j]):
+            pending[_HEADER] = None
+        if consumed and j in consumed:
+            continue
+
+        # Unmatched tags stay in place for the final tag removal
+        kind, value = classify(parts[j])
+        if kind == _KEEP:
+            continue
+        if kind == _REPLACE:
+            parts[j] = value
+        elif kind == _OPEN:
+            if pending[value] is None:
+                pending[value] = j
+        elif kind == _CLOSE:
+            opened = pending[value]
+            if opened is not None:
+                pending[value] = None
+                opening, closing = _PAIRS[value]
+                parts[opened] = opening
+                parts[j] = closing if value != _LINK else f' ({url})'
+        elif kind == _LINK_OPEN:
+            if pending[_LINK] is None:
+                pending[_LINK] = j
+                url = value
+        else:
+            return None
+
+    text = html.unescape(_TAG_RE.sub('', ''.join(parts)))
+    text = _BLANK_LINES_RE.sub('\n\n', text)
+    text = _SPACES_RE.sub(' ', text)
+    return text.strip()
+
+
+def normalize_content(content: str) -> str:
+    """Нормалізувати Confluence storage format до тексту."""
+    if not content:
+        return ""
+
+    text = _normalize_single_pass(content)
+    if text is None:
+        return normalize_content_legacy(content)
+    return text
+
+
+# Попередня реалізація: послідовні re.sub. Залишена як еталон і для входів,
+# які однопрохідний варіант не може обробити з гарантовано тим самим виходом.
+
+def normalize_content_legacy(content: str) -> str:
+    """Normalize Confluence storage format content to plain text."""
+    if not content:
+        return ""
+
+    # Remove CDATA sections
+    content = re.sub(r'<!\[CDATA\[(.*?)\]\]>', r'\1', content, flags=re.DOTALL)
+
+    # Convert common Confluence macros to readable text
+    content = _convert_macros_legacy(content)
+
+    # Remove HTML tags but preserve structure
+    content = _html_to_text_legacy(content)
+
+    # Normalize whitespace
+    content = re.sub(r'\n\s*\n\s*\n+', '\n\n', content)
+    content = re.sub(r'[ \t]+', ' ', content)
+    content = content.strip()
+
+    return content
+
+
+def _convert_macros_legacy(content: str) -> str:
+    """Convert Confluence macros to readable text."""
+    # Code macro
+    content = re.sub(
+        r'<ac:structured-macro ac:name="code"[^>]*>.*?<ac:plain-text-body><!\[CDATA\[(.*?)\]\]></ac:plain-text-body>.*?</ac:structured-macro>',
+        r'```\n\1\n```',
+        content,
+        flags=re.DOTALL
+    )
+
+    # Info macro
+    content = re.sub(
+        r'<ac:structured-macro ac:name="info"[^>]*>(.*?)</ac:structured-macro>',
+        r'ℹ️ \1',
+        content,
+        flags=re.DOTALL
+    )
+
+    # Warning macro
+    content = re.sub(
+        r'<ac:structured-macro ac:name="warning"[^>]*>(.*?)</ac:structured-macro>',
+        r'⚠️ \1',
+        content,
+        flags=re.DOTALL
+    )
+
+    # Note macro
+    content = re.sub(
+        r'<ac:structured-macro ac:name="note"[^>]*>(.*?)</ac:structured-macro>',
+        r'📝 \1',
+        content,
+        flags=re.DOTALL
+    )
+
+    # Table of contents
+    content = re.sub(
+        r'<ac:structured-macro ac:name="toc"[^>]*>.*?</ac:structured-macro>',
+        '[Table of Contents]',
+        content,
+        flags=re.DOTALL
+    )
+
+    # Remove other macros (keep content if available)
+    content = re.sub(
+        r'<ac:structured-macro[^>]*>(.*?)</ac:structured-macro>',
+        r'\1',
+        content,
+        flags=re.DOTALL
+    )
+
+    return content
+
+
+def _html_to_text_legacy(content: str) -> str:
+    """Convert HTML to plain text while preserving structure."""
+    # Headers
+    content = re.sub(r'<h([1-6])[^>]*>(.*?)</h[1-6]>', r'\n\n' + r'#' * 1 + r' \2\n\n', content)
+
+    # Paragraphs
+    content = re.sub(r'<p[^>]*>(.*?)</p>', r'\1\n\n', content, flags=re.DOTALL)
+
+    # Line breaks
+    content = re.sub(r'<br[^>]*/?>', '\n', content)
+
+    # Lists
+    content = re.sub(r'<ul[^>]*>', '\n', content)
+    content = re.sub(r'</ul>', '\n', content)
+    content = re.sub(r'<ol[^>]*>', '\n', content)
+    content = re.sub(r'</ol>', '\n', content)
+    content = re.sub(r'<li[^>]*>(.*?)</li>', r'- \1\n', content, flags=re.DOTALL)
+
+    # Tables (simple conversion)
+    content = re.sub(r'<table[^>]*>', '\n\n', content)
+    content = re.sub(r'</table>', '\n\n', content)
+    content = re.sub(r'<tr[^>]*>', '\n', content)
+    content = re.sub(r'</tr>', '', content)
+    content = re.sub(r'<t[hd][^>]*>(.*?)</t[hd]>', r'\1 | ', content, flags=re.DOTALL)
+
+    # Strong/bold
+    content = re.sub(r'<strong[^>]*>(.*?)</strong>', r'**\1**', content, flags=re.DOTALL)
+    content = re.sub(r'<b[^>]*>(.*?)</b>', r'**\1**', content, flags=re.DOTALL)
+
+    # Emphasis/italic
+    content = re.sub(r'<em[^>]*>(.*?)</em>', r'*\1*', content, flags=re.DOTALL)
+    content = re.sub(r'<i[^>]*>(.*?)</i>', r'*\1*', content, flags=re.DOTALL)
+
+    # Links
+    content = re.sub(r'<a[^>]*href="([^"]*)"[^>]*>(.*?)</a>', r'\2 (\1)', content, flags=re.DOTALL)
+
+    # Remove remaining HTML tags
+    content = re.sub(r'<[^>]+>', '', content)
+
+    # Decode HTML entities
+    content = html.unescape(content)
+
+    return content
@@ -13,6 +13,7 @@ from dataclasses import dataclass
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from app.ai.qa_analyzer import QAContentAnalyzer, QAAnalysisResult
+from app.data.near_duplicates import DuplicateTestcaseFilter
 
 
 class EnhancedQAAnalyzer(QAContentAnalyzer):
@@ -55,6 +56,7 @@ class EnhancedQAAnalyzer(QAContentAnalyzer):
         
         # Спробуємо витягти більше тесткейсів, розбивши контент на частини
         enhanced_testcases = list(initial_testcases)  # Копіюємо початкові
+        duplicates = DuplicateTestcaseFilter(enhanced_testcases)
         
         # Розділяємо контент на логічні блоки
         content_blocks = self._split_content_into_blocks(content)
@@ -71,9 +73,10 @@ class EnhancedQAAnalyzer(QAContentAnalyzer):
                 
                 # Додаємо нові унікальні тесткейси
                 for testcase in block_analysis.testcases:
-                    if not self._is_duplicate_testcase(testcase, enhanced_testcases):
+                    if not duplicates.is_duplicate(testcase):
                         testcase['order_index'] = len(enhanced_testcases)
                         enhanced_testcases.append(testcase)
+                        duplicates.add(testcase)
                 
             except Exception as e:
                 print(f"⚠️ Помилка аналізу блоку {i+1}: {e}")
@@ -165,21 +168,8 @@ class EnhancedQAAnalyzer(QAContentAnalyzer):
         return "Content Block"
     
     def _is_duplicate_testcase(self, testcase: Dict, existing_testcases: List[Dict]) -> bool:
-        """Перевіряє чи є тесткейс дублікатом."""
+        """Перевіряє чи є тесткейс дублікатом.
         
-        step = testcase.get('step', '').strip().lower()
-        expected = testcase.get('expected_result', '').strip().lower()
-        
-        if not step and not expected:
-            return True
-        
-        for existing in existing_testcases:
-            existing_step = existing.get('step', '').strip().lower()
-            existing_expected = existing.get('expected_result', '').strip().lower()
-            
-            # Простий алгоритм схожості
-            if (step and existing_step and step[:50] == existing_step[:50]) or \
-               (expected and existing_expected and expected[:50] == existing_expected[:50]):
-                return True
-        
-        return False
+        Для перевірки багатьох тесткейсів використовуйте один ``DuplicateTestcaseFilter``.
+        """
+        return DuplicateTestcaseFilter(existing_testcases).is_duplicate(testcase)
@@ -5,18 +5,71 @@
 """
 
 import re
-from typing import List, Dict, Any, Optional, Tuple
-from bs4 import BeautifulSoup, Tag
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 import logging
 from datetime import datetime
 import os
 
+try:
+    from .table_stream import StreamCell, iter_table_rows, unwrap_cdata
+except ImportError:
+    # Fallback for direct script execution
+    from table_stream import StreamCell, iter_table_rows, unwrap_cdata
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_HTML_BACKEND = 'lxml'
+except ImportError:
+    DEFAULT_HTML_BACKEND = 'html.parser'
+
 logger = logging.getLogger(__name__)
 
+# Порядок полів у компактному представленні тесткейсу (tuple)
+TESTCASE_FIELDS = (
+    'step', 'expected_result', 'priority', 'test_group', 'functionality',
+    'config', 'qa_auto_coverage', 'screenshot', 'section'
+)
+
+# Only tables matter, the rest of the page is not built into the tree
+_TABLES_ONLY = SoupStrainer('table')
+
+# dom - BeautifulSoup дерево таблиць; streaming - події парсера, в пам'яті лише поточний рядок
+EXTRACTORS = ('dom', 'streaming')
+
+
+def testcase_to_tuple(testcase: Dict[str, Any]) -> Tuple:
+    """Компактне представлення тесткейсу (для передачі між процесами)."""
+    return tuple(testcase.get(field) for field in TESTCASE_FIELDS)
+
+
+def testcase_from_tuple(values: Tuple) -> Dict[str, Any]:
+    """Відновлює dict тесткейсу з компактного tuple."""
+    return dict(zip(TESTCASE_FIELDS, values))
+
+
+@dataclass
+class _TableState:
+    """Стан розбору таблиці між рядками"""
+    schema: Dict[str, Any]
+    current_section: str = "GENERAL"
+    current_functionality: Optional[str] = None
+    previous_step: Optional[str] = None
+    row_number: int = 0
+
+
 class EnhancedConfluenceTableParser:
     """Покращений парсер для витягування тесткейсів з HTML таблиць Confluence"""
     
-    def __init__(self):
+    def __init__(self, html_backend: Optional[str] = None, extractor: str = 'dom'):
+        # lxml у кілька разів швидший за html.parser; використовується, якщо встановлений
+        self.html_backend = html_backend or DEFAULT_HTML_BACKEND
+        if extractor not in EXTRACTORS:
+            raise ValueError(f"Unknown extractor '{extractor}', available: {', '.join(EXTRACTORS)}")
+        # streaming не будує DOM - для дуже великих сторінок
+        self.extractor = extractor
         self.priority_map = {
             'HIGHEST': 'HIGHEST',
             'HIGH': 'HIGH', 
@@ -123,15 +176,19 @@ class EnhancedConfluenceTableParser:
             # Скидаємо флаг репортування для нового чекліста
             self._functionality_header_reported = False
             
-            soup = BeautifulSoup(html_content, 'html.parser')
-            testcases = []
-            
-            # Знаходимо всі таблиці з тесткейсами
-            testcase_tables = self._find_testcase_tables(soup)
-            
-            for table in testcase_tables:
-                table_testcases = self._parse_table(table, checklist_name)
-                testcases.extend(table_testcases)
+            if self.extractor == 'streaming':
+                testcases = self._parse_testcases_streaming(html_content, checklist_name)
+            else:
+                if self.html_backend == 'lxml':
+                    # lxml drops CDATA (link bodies, code macros) that html.parser keeps as text
+                    html_content = unwrap_cdata(html_content)
+                soup = BeautifulSoup(html_content, self.html_backend, parse_only=_TABLES_ONLY)
+                testcases = []
+                
+                # Знаходимо всі таблиці з тесткейсами (рядки кожної таблиці збираються один раз)
+                for table, rows, headers in self._iter_testcase_tables(soup):
+                    table_testcases = self._parse_table(table, checklist_name, rows=rows, headers=headers)
+                    testcases.extend(table_testcases)
             
             logger.info(f"Витягнуто {len(testcases)} тесткейсів з HTML")
             return testcases
@@ -140,17 +197,91 @@ class EnhancedConfluenceTableParser:
             logger.error(f"Помилка при парсингу HTML: {e}")
             return []
     
-    def _find_testcase_tables(self, soup: BeautifulSoup) -> List[Tag]:
-        """Знаходить всі таблиці з тесткейсами"""
+    def _parse_testcases_streaming(self, html_content: str, checklist_name: str) -> List[Dict[str, Any]]:
+        """Витягує тесткейси з потоку рядків таблиць без побудови DOM"""
         
-        tables = soup.find_all('table')
-        testcase_tables = []
+        # table_id -> стан розбору (None - таблиця без тесткейсів)
+        tables: Dict[int, Optional[_TableState]] = {}
+        testcases = []
         
-        for table in tables:
-            if self._is_testcase_table(table):
-                testcase_tables.append(table)
+        for table_id, cells in iter_table_rows(html_content, self.html_backend):
+            if table_id not in tables:
+                # Перший рядок - заголовок таблиці
+                headers = [cell.get_text(strip=True).upper() for cell in cells]
+                tables[table_id] = (
+                    _TableState(schema=self._detect_table_schema(None, headers))
+                    if self._is_testcase_header(headers) else None
+                )
+                continue
+            
+            state = tables[table_id]
+            if state is None:
+                continue
+            
+            testcase = self._parse_row(state, None, cells, checklist_name)
+            if testcase:
+                testcases.append(testcase)
         
-        return testcase_tables
+        return testcases
+    
+    def parse_testcases_compact(self, html_content: str, checklist_name: str = "Unknown") -> List[Tuple]:
+        """Як parse_testcases_from_html, але тесткейси - tuples у порядку TESTCASE_FIELDS."""
+        return [testcase_to_tuple(tc) for tc in self.parse_testcases_from_html(html_content, checklist_name)]
+    
+    def parse_many(
+        self,
+        pages: Iterable[Tuple[str, str]],
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Парсить багато сторінок паралельно в пулі процесів.
+        
+        Args:
+            pages: пари (html_content, checklist_name)
+            max_workers: кількість процесів (default: кількість CPU)
+            executor: готовий пул (не закривається)
+        
+        Returns:
+            Список тесткейсів для кожної сторінки, в порядку ``pages``
+        """
+        pages = list(pages)
+        if not pages:
+            return []
+        
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        try:
+            workers = max_workers or os.cpu_count() or 1
+            results = executor.map(
+                parse_compact_in_worker,
+                [html for html, _ in pages],
+                [name for _, name in pages],
+                [self.html_backend] * len(pages),
+                [self.extractor] * len(pages),
+                chunksize=max(1, len(pages) // (workers * 4))
+            )
+            return [[testcase_from_tuple(values) for values in compact] for compact in results]
+        finally:
+            if own_executor:
+                executor.shutdown()
+    
+    def _iter_testcase_tables(self, soup: BeautifulSoup) -> Iterable[Tuple[Tag, List[Tag], List[str]]]:
+        """Повертає таблиці з тесткейсами разом з рядками та заголовками (обхід один раз)"""
+        
+        for table in soup.find_all('table'):
+            rows = table.find_all('tr')
+            if not rows:
+                continue
+            headers = self._header_texts(rows[0])
+            if self._is_testcase_header(headers):
+                yield table, rows, headers
+    
+    def _find_testcase_tables(self, soup: BeautifulSoup) -> List[Tag]:
+        """Знаходить всі таблиці з тесткейсами"""
+        
+        return [table for table, _, _ in self._iter_testcase_tables(soup)]
     
     def _is_testcase_table(self, table: Tag) -> bool:
         """Перевіряє чи є таблиця таблицею з тесткейсами"""
@@ -160,8 +291,10 @@ class EnhancedConfluenceTableParser:
             return False
         
         # Перевіряємо заголовки таблиці
-        header_row = rows[0]
-        headers = [th.get_text(strip=True).upper() for th in header_row.find_all(['th', 'td'])]
+        return self._is_testcase_header(self._header_texts(rows[0]))
+    
+    def _is_testcase_header(self, headers: List[str]) -> bool:
+        """Перевіряє заголовки на наявність ключових колонок тесткейсів"""
         
         # Перевіряємо наявність ключових колонок
         key_columns = ['STEP', 'EXPECTED', 'PRIORITY', 'CONFIG', 'ШАГ', 'ОЖИДАЕМЫЙ', 'ПРИОРИТЕТ']
@@ -169,57 +302,78 @@ class EnhancedConfluenceTableParser:
         
         return any(col in header_text for col in key_columns)
     
-    def _parse_table(self, table: Tag, checklist_name: str = "Unknown") -> List[Dict[str, Any]]:
+    def _header_texts(self, header_row: Tag) -> List[str]:
+        """Тексти заголовків таблиці у верхньому регістрі"""
+        
+        return [th.get_text(strip=True).upper() for th in header_row.find_all(['th', 'td'])]
+    
+    def _parse_table(
+        self,
+        table: Tag,
+        checklist_name: str = "Unknown",
+        rows: Optional[List[Tag]] = None,
+        headers: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
         """Парсить одну таблицю"""
         
-        rows = table.find_all('tr')
+        if rows is None:
+            rows = table.find_all('tr')
         if not rows:
             return []
         
         # Визначаємо схему таблиці
-        schema = self._detect_table_schema(rows[0])
+        schema = self._detect_table_schema(rows[0], headers)
         if not schema:
             logger.warning("Не вдалося визначити схему таблиці")
             return []
         
         testcases = []
-        current_section = "GENERAL"
-        current_functionality = None
-        previous_step = None
+        state = _TableState(schema=schema)
         
-        for i, row in enumerate(rows[1:], 1):  # Пропускаємо заголовок
-            cells = row.find_all(['td', 'th'])
-            
-            # Перевіряємо чи це заголовок секції
-            if self._is_section_header_row(row, cells):
-                section_info = self._extract_section_info(cells)
-                current_section = section_info['section']
-                current_functionality = section_info['functionality']
-                previous_step = None  # Скидаємо попередній step при зміні секції
-                continue
-            
-            # Перевіряємо чи це розділовий рядок (підзаголовок)
-            if self._is_subsection_header(cells):
-                # Витягуємо функціональність з розділового рядка
-                divider_functionality = self._extract_functionality_from_divider_row(cells)
-                if divider_functionality:
-                    current_functionality = divider_functionality
-                previous_step = None  # Скидаємо попередній step при зміні функціональності
-                continue
-            
-            # Парсимо тесткейс з репортуванням помилок
-            testcase = self._parse_testcase_row(cells, schema, current_section, current_functionality, previous_step, checklist_name, i)
+        for row in rows[1:]:  # Пропускаємо заголовок
+            testcase = self._parse_row(state, row, row.find_all(['td', 'th']), checklist_name)
             if testcase:
                 testcases.append(testcase)
-                # Оновлюємо попередній step для наступного рядка
-                previous_step = testcase.get('step')
         
         return testcases
     
-    def _detect_table_schema(self, header_row: Tag) -> Optional[Dict[str, Any]]:
+    def _parse_row(self, state: _TableState, row: Optional[Tag], cells: List[Any], checklist_name: str) -> Optional[Dict[str, Any]]:
+        """Обробляє один рядок таблиці (після заголовка), оновлюючи стан секції"""
+        
+        state.row_number += 1
+        
+        # Перевіряємо чи це заголовок секції
+        if self._is_section_header_row(row, cells):
+            section_info = self._extract_section_info(cells)
+            state.current_section = section_info['section']
+            state.current_functionality = section_info['functionality']
+            state.previous_step = None  # Скидаємо попередній step при зміні секції
+            return None
+        
+        # Перевіряємо чи це розділовий рядок (підзаголовок)
+        if self._is_subsection_header(cells):
+            # Витягуємо функціональність з розділового рядка
+            divider_functionality = self._extract_functionality_from_divider_row(cells)
+            if divider_functionality:
+                state.current_functionality = divider_functionality
+            state.previous_step = None  # Скидаємо попередній step при зміні функціональності
+            return None
+        
+        # Парсимо тесткейс з репортуванням помилок
+        testcase = self._parse_testcase_row(
+            cells, state.schema, state.current_section, state.current_functionality,
+            state.previous_step, checklist_name, state.row_number
+        )
+        if testcase:
+            # Оновлюємо попередній step для наступного рядка
+            state.previous_step = testcase.get('step')
+        return testcase
+    
+    def _detect_table_schema(self, header_row: Tag, headers: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """Визначає схему таблиці на основі заголовків"""
         
-        headers = [th.get_text(strip=True).upper() for th in header_row.find_all(['th', 'td'])]
+        if headers is None:
+            headers = self._header_texts(header_row)
         column_count = len(headers)
         
         # Спробуємо знайти найкращу відповідність
@@ -487,6 +641,10 @@ class EnhancedConfluenceTableParser:
         if not cell:
             return ""
         
+        if isinstance(cell, StreamCell):
+            # Списки вже розгорнуті під час потокового розбору
+            return re.sub(r'\s+', ' ', cell.rendered_text())
+        
         # Обробляємо списки
         lists = cell.find_all(['ul', 'ol'])
         for list_elem in lists:
@@ -523,8 +681,27 @@ class EnhancedConfluenceTableParser:
         # Видалено логіку визначення функціональності по ключовим словам
         # Функціональність тепер визначається тільки з розділових рядків
         return None
-    
-    
+
+
+# Parser instances of the current worker process, per (HTML backend, extractor)
+_worker_parsers: Dict[Tuple[str, str], EnhancedConfluenceTableParser] = {}
+
+
+def parse_compact_in_worker(
+    html_content: str,
+    checklist_name: str = "Unknown",
+    html_backend: Optional[str] = None,
+    extractor: str = 'dom'
+) -> List[Tuple]:
+    """
+    Точка входу для ProcessPoolExecutor: парсить сторінку парсером,
+    створеним один раз на процес, і повертає компактні tuples.
+    """
+    key = (html_backend or DEFAULT_HTML_BACKEND, extractor)
+    parser = _worker_parsers.get(key)
+    if parser is None:
+        parser = _worker_parsers[key] = EnhancedConfluenceTableParser(*key)
+    return parser.parse_testcases_compact(html_content, checklist_name)
 
 
 def main():
@@ -0,0 +1,123 @@
+"""Per-page checkpoints of ingestion jobs, used to resume interrupted loads."""
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+
+from app.models.qa_models import IngestionCheckpoint
+
+FETCHED = "fetched"
+PARSED = "parsed"
+EMBEDDED = "embedded"
+WRITTEN = "written"
+FAILED = "failed"
+
+
+def content_hash(page: Dict[str, Any]) -> Optional[str]:
+    """Hash of the page body (same as ``Checklist.content_hash``); None if the body is not loaded yet."""
+    if 'content' not in page:
+        return None
+    return hashlib.md5(page.get('content', '').encode()).hexdigest()
+
+
+@dataclass
+class PageCheckpoint:
+    """Stored progress of one page."""
+    stage: str
+    content_hash: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.stage == WRITTEN and not self.error
+
+    def matches(self, page: Dict[str, Any]) -> bool:
+        """Page is the one that was written (unknown hashes are trusted)."""
+        page_hash = content_hash(page)
+        return page_hash is None or self.content_hash is None or page_hash == self.content_hash
+
+
+class CheckpointStore:
+    """Collects page checkpoints of one job and writes them in one transaction.
+
+    ``mark`` only updates memory and is cheap to call from pipeline stages;
+    ``flush`` upserts everything marked since the previous flush. A failed
+    flush keeps the marks for the next one.
+    """
+
+    def __init__(self, session_factory: Callable[[], Any], job_id: int):
+        self.session_factory = session_factory
+        self.job_id = job_id
+        self._pending: Dict[str, PageCheckpoint] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, page_id: str, stage: str, page_hash: Optional[str] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            previous = self._pending.get(page_id)
+            if page_hash is None and previous is not None:
+                page_hash = previous.content_hash
+            self._pending[page_id] = PageCheckpoint(stage, page_hash, error)
+
+    def flush(self) -> int:
+        """Writes pending checkpoints; returns how many were written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        session = None
+        try:
+            session = self.session_factory()
+            existing = dict(
+                session.query(IngestionCheckpoint.page_id, IngestionCheckpoint.id)
+                .filter(IngestionCheckpoint.job_id == self.job_id, IngestionCheckpoint.page_id.in_(list(pending)))
+            )
+            updates, inserts = self._rows(pending, existing)
+            if updates:
+                session.execute(update(IngestionCheckpoint), updates)
+            if inserts:
+                session.execute(insert(IngestionCheckpoint), inserts)
+            session.commit()
+            return len(pending)
+        except Exception:
+            if session is not None:
+                session.rollback()
+            with self._lock:
+                # Newer marks made during the flush win over the ones being restored
+                self._pending = {**pending, **self._pending}
+            raise
+        finally:
+            if session is not None:
+                session.close()
+
+    def _rows(
+        self,
+        pending: Dict[str, PageCheckpoint],
+        existing: Dict[str, int]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        updates, inserts = [], []
+        for page_id, checkpoint in pending.items():
+            row = {'stage': checkpoint.stage, 'error': checkpoint.error}
+            if checkpoint.content_hash is not None:
+                row['content_hash'] = checkpoint.content_hash
+            if page_id in existing:
+                updates.append({'id': existing[page_id], **row})
+            else:
+                inserts.append({'job_id': self.job_id, 'page_id': page_id, 'content_hash': None, **row})
+        return updates, inserts
+
+    @staticmethod
+    def load(session_factory: Callable[[], Any], job_id: int) -> Dict[str, PageCheckpoint]:
+        """Stored checkpoints of a job by page id."""
+        session = session_factory()
+        try:
+            rows = session.query(
+                IngestionCheckpoint.page_id, IngestionCheckpoint.stage,
+                IngestionCheckpoint.content_hash, IngestionCheckpoint.error
+            ).filter(IngestionCheckpoint.job_id == job_id)
+            return {page_id: PageCheckpoint(stage, page_hash, error) for page_id, stage, page_hash, error in rows}
+        finally:
+            session.close()
@@ -0,0 +1,210 @@
+"""Bounded multi-stage asyncio pipeline used by the unified loader."""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+_END = object()
+
+
+@dataclass
+class StageStats:
+    """Throughput counters of one pipeline stage."""
+    name: str
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    # Time spent waiting for room in the next queue (backpressure from downstream)
+    blocked_seconds: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def items_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def utilization(self) -> float:
+        """Share of worker time spent in the handler (1.0 = saturated stage)."""
+        capacity = self.elapsed_seconds * self.workers
+        return min(1.0, self.busy_seconds / capacity) if capacity > 0 else 0.0
+
+
+@dataclass
+class Stage:
+    """One pipeline stage.
+
+    ``handler`` is awaited with a single item and returns what is passed on
+    to the next stage; ``None`` drops the item. With ``batch_size`` set it is
+    awaited with a list of up to ``batch_size`` items and returns a list.
+    """
+    name: str
+    handler: Callable[[Any], Awaitable[Any]]
+    workers: int = 1
+    batch_size: Optional[int] = None
+    batch_timeout: float = 0.5
+    stats: StageStats = field(init=False)
+
+    def __post_init__(self):
+        if self.workers < 1:
+            raise ValueError(f"Stage '{self.name}' needs at least one worker")
+        if self.batch_size is not None and self.batch_size < 1:
+            raise ValueError(f"Stage '{self.name}' batch_size must be positive")
+        self.stats = StageStats(name=self.name, workers=self.workers)
+
+    @property
+    def batched(self) -> bool:
+        return self.batch_size is not None
+
+
+class IngestionPipeline:
+    """Runs items from an async source through stages connected by bounded queues.
+
+    Every stage has its own workers, so a slow stage only limits the overall
+    rate instead of adding its latency to every item. Queues hold at most
+    ``queue_size`` items; when a stage falls behind, upstream workers block on
+    ``put`` and eventually the source stops being pulled.
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        queue_size: int = 16,
+        on_error: Optional[Callable[[Stage, Any, BaseException], None]] = None
+    ):
+        """Initialize pipeline."""
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.on_error = on_error
+        self._stopping = False
+
+    def stop(self) -> None:
+        """Stop pulling new items from the source; items in flight still finish."""
+        self._stopping = True
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopping
+
+    @property
+    def stats(self) -> Dict[str, StageStats]:
+        return {stage.name: stage.stats for stage in self.stages}
+
+    async def run(self, source: AsyncIterator[Any]) -> Dict[str, StageStats]:
+        """Drain ``source`` through all stages and return per-stage counters."""
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        # Output of the last stage is discarded
+        queues.append(None)
+
+        tasks = [asyncio.create_task(self._feed(source, queues[0]), name="pipeline-source")]
+        for index, stage in enumerate(self.stages):
+            remaining = [stage.workers]
+            for worker in range(stage.workers):
+                tasks.append(asyncio.create_task(
+                    self._work(stage, queues[index], queues[index + 1], remaining),
+                    name=f"pipeline-{stage.name}-{worker}"
+                ))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return self.stats
+
+    async def _feed(self, source: AsyncIterator[Any], queue: asyncio.Queue) -> None:
+        try:
+            async for item in source:
+                if self._stopping:
+                    break
+                await queue.put(item)
+        finally:
+            await queue.put(_END)
+
+    async def _work(
+        self,
+        stage: Stage,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        remaining: List[int]
+    ) -> None:
+        stats = stage.stats
+        if stats.started_at is None:
+            stats.started_at = time.perf_counter()
+
+        while True:
+            item = await inbox.get()
+            if item is _END:
+                break
+
+            if stage.batched:
+                batch, finished = await self._collect_batch(stage, inbox, item)
+                await self._handle(stage, batch, outbox)
+                if finished:
+                    break
+            else:
+                await self._handle(stage, item, outbox)
+
+        # Let sibling workers see the end marker; the last one closes the next queue
+        await inbox.put(_END)
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            stats.finished_at = time.perf_counter()
+            if outbox is not None:
+                await outbox.put(_END)
+
+    async def _collect_batch(self, stage: Stage, inbox: asyncio.Queue, first: Any):
+        """Gather up to ``batch_size`` items, waiting at most ``batch_timeout``."""
+        batch = [first]
+        deadline = time.monotonic() + stage.batch_timeout
+        while len(batch) < stage.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(inbox.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _END:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _handle(self, stage: Stage, item: Any, outbox: Optional[asyncio.Queue]) -> None:
+        stats = stage.stats
+        count = len(item) if stage.batched else 1
+        started = time.perf_counter()
+        try:
+            result = await stage.handler(item)
+        except Exception as e:
+            stats.busy_seconds += time.perf_counter() - started
+            stats.failed += count
+            if self.on_error:
+                self.on_error(stage, item, e)
+            return
+        stats.busy_seconds += time.perf_counter() - started
+        stats.processed += count
+
+        if outbox is None or result is None:
+            return
+
+        started = time.perf_counter()
+        if stage.batched:
+            for output in result:
+                await outbox.put(output)
+        else:
+            await outbox.put(result)
+        stats.blocked_seconds += time.perf_counter() - started
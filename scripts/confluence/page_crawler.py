@@ -0,0 +1,221 @@
+"""Concurrent breadth-first Confluence page crawler."""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """HTTP status code of a requests/atlassian error, if any."""
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Parse the Retry-After header (seconds or HTTP date)."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostRateLimiter:
+    """Per-host concurrency limit with a shared 429 cool-down.
+
+    When any request to a host is throttled, every worker talking to that
+    host waits until the Retry-After deadline instead of piling on.
+    """
+
+    def __init__(self, max_per_host: int):
+        """Initialize limiter."""
+        self.max_per_host = max_per_host
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._blocked_until: Dict[str, float] = {}
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
+
+    def block(self, host: str, seconds: float) -> None:
+        """Pause all requests to ``host`` for ``seconds``."""
+        with self._lock:
+            deadline = time.monotonic() + seconds
+            self._blocked_until[host] = max(self._blocked_until.get(host, 0.0), deadline)
+
+    def call(self, host: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run ``func`` holding one of the host's slots."""
+        with self._semaphore(host):
+            with self._lock:
+                delay = self._blocked_until.get(host, 0.0) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            return func(*args, **kwargs)
+
+
+class ConfluenceCrawler:
+    """Breadth-first crawler that keeps up to ``max_workers`` requests in flight.
+
+    Wraps the blocking atlassian-python-api client in a thread pool. Every
+    request goes through a per-host limiter and is retried on 429/5xx with
+    Retry-After aware exponential backoff.
+    """
+
+    def __init__(
+        self,
+        confluence: Any,
+        extract_page: Callable[[Dict[str, Any]], Dict[str, Any]],
+        base_url: str,
+        page_expand: str,
+        max_workers: int = 8,
+        max_per_host: Optional[int] = None,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        children_page_size: int = 25
+    ):
+        """Initialize crawler."""
+        self.confluence = confluence
+        self.extract_page = extract_page
+        self.host = urlparse(base_url).netloc or base_url
+        self.page_expand = page_expand
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.children_page_size = children_page_size
+        self.limiter = HostRateLimiter(max_per_host or max_workers)
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def record_failure(self) -> None:
+        """Count a failure that happened outside the crawl loop (e.g. a space listing)."""
+        self._count("failed")
+
+    def request(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call the Confluence API with per-host limiting and retries."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._count("requests")
+                return self.limiter.call(self.host, func, *args, **kwargs)
+            except Exception as e:
+                status = _status_code(e)
+                if status not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                    raise
+                delay = _retry_after_seconds(e)
+                if delay is None:
+                    delay = self.backoff_base * (2 ** attempt) + random.uniform(0, self.backoff_base)
+                if status == 429:
+                    self._count("throttled")
+                    self.limiter.block(self.host, delay)
+                self._count("retries")
+                print(f"Confluence returned {status}, retrying in {delay:.1f}s (attempt {attempt + 1})")
+                time.sleep(delay)
+
+    def _fetch_page(self, page_id: str) -> Dict[str, Any]:
+        page = self.request(self.confluence.get_page_by_id, page_id, expand=self.page_expand)
+        return self.extract_page(page)
+
+    def _fetch_children(self, parent_id: str, start: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """One page of direct children and whether more follow."""
+        children = self.request(
+            self.confluence.get_page_child_by_type,
+            parent_id,
+            type='page',
+            start=start,
+            limit=self.children_page_size,
+            expand=self.page_expand
+        )
+        children = list(children or [])
+        pages = []
+        for child in children:
+            try:
+                pages.append(self.extract_page(child))
+            except Exception as e:
+                print(f"Error processing child page {child.get('id', 'unknown')}: {e}")
+        return pages, len(children) >= self.children_page_size
+
+    def crawl(self, root_ids: Iterable[str], include_children: bool = True) -> Iterator[Dict[str, Any]]:
+        """Yield root pages and (optionally) all descendants, level by level.
+
+        Pages are yielded as their requests complete, so order within a
+        level is not deterministic.
+        """
+        return self._crawl([("page", str(page_id), 0) for page_id in root_ids], include_children)
+
+    def crawl_children(self, parent_id: str) -> Iterator[Dict[str, Any]]:
+        """Yield all descendants of ``parent_id`` (without the page itself)."""
+        return self._crawl([("children", str(parent_id), 0)], include_children=True)
+
+    def fetch_pages(self, page_ids: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Fetch page bodies concurrently, yielding in completion order."""
+        return self.crawl(page_ids, include_children=False)
+
+    def _crawl(
+        self,
+        initial: List[Tuple[str, str, int]],
+        include_children: bool
+    ) -> Iterator[Dict[str, Any]]:
+        # Work items: ("page", id, 0) fetches a page, ("children", id, start) lists children.
+        # Taken from the left; new levels are appended to the right (BFS).
+        pending = deque(initial)
+        in_flight: Dict[Future, Tuple[str, str, int]] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="confluence") as pool:
+            try:
+                while pending or in_flight:
+                    while pending and len(in_flight) < self.max_workers:
+                        kind, page_id, start = pending.popleft()
+                        if kind == "page":
+                            future = pool.submit(self._fetch_page, page_id)
+                        else:
+                            future = pool.submit(self._fetch_children, page_id, start)
+                        in_flight[future] = (kind, page_id, start)
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        kind, page_id, start = in_flight.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            self._count("failed")
+                            print(f"Error fetching {kind} of page {page_id}: {e}")
+                            continue
+
+                        if kind == "page":
+                            pages = [result]
+                        else:
+                            pages, has_more = result
+                            if has_more:
+                                # Next batch of the same listing goes first
+                                pending.appendleft(("children", page_id, start + self.children_page_size))
+
+                        for page in pages:
+                            if include_children:
+                                pending.append(("children", page["id"], 0))
+                            yield page
+            finally:
+                for future in in_flight:
+                    future.cancel()
@@ -0,0 +1,64 @@
+"""Bridge blocking Confluence page iterators into asyncio."""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Callable, Iterable
+
+
+_DONE = object()
+
+
+class _ProducerError:
+    """Wraps an exception raised by the producer thread."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def stream_pages(
+    iterable_factory: Callable[[], Iterable[Any]],
+    max_buffered: int = 4
+) -> AsyncIterator[Any]:
+    """Iterate a blocking page generator in a worker thread.
+
+    At most ``max_buffered`` fetched pages wait in the queue; the producer
+    blocks until the consumer catches up, which bounds memory to a few page
+    bodies. Stopping iteration early (``break``) stops the producer after
+    its current request.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffered)
+    stop = threading.Event()
+
+    def put(item: Any) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def produce() -> None:
+        try:
+            for item in iterable_factory():
+                if stop.is_set():
+                    break
+                put(item)
+        except BaseException as exc:  # re-raised in the consumer
+            put(_ProducerError(exc))
+        finally:
+            put(_DONE)
+
+    producer = loop.run_in_executor(None, produce)
+    finished = False
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                finished = True
+                break
+            if isinstance(item, _ProducerError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        # Drain so a producer blocked on a full queue can observe the stop flag
+        while not finished:
+            if await queue.get() is _DONE:
+                finished = True
+        await producer
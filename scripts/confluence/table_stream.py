@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Потоковий екстрактор рядків таблиць з Confluence storage format.
+
+Замість повного DOM сторінки тримає в пам'яті лише комірки поточного рядка:
+HTML подається парсеру частинами, а завершені рядки віддаються одразу.
+Події приходять від lxml (``etree.HTMLParser(target=...)``), якщо він
+встановлений, або від стандартного ``html.parser.HTMLParser``.
+"""
+
+import re
+from html import escape
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+_CDATA = re.compile(r'<!\[CDATA\[(.*?)\]\]>', re.DOTALL)
+
+CELL_TAGS = ('td', 'th')
+LIST_TAGS = ('ul', 'ol')
+
+
+def unwrap_cdata(html_content: str) -> str:
+    """
+    Замінює ``<![CDATA[...]]>`` екранованим текстом для HTML парсера lxml.
+
+    lxml у HTML режимі відкидає CDATA секції, а Confluence storage format
+    тримає в них тексти посилань і code/plain-text макросів. Порожні
+    коментарі навколо зберігають окремий текстовий вузол, як у html.parser.
+    """
+    if '<![CDATA[' not in html_content:
+        return html_content
+    return _CDATA.sub(lambda match: f'<!---->{escape(match.group(1), quote=False)}<!---->', html_content)
+
+
+class StreamCell:
+    """
+    Комірка таблиці без DOM: атрибути та текстові вузли.
+
+    Підтримує ту частину інтерфейсу ``bs4.Tag``, яку використовує парсер
+    тесткейсів (``get`` та ``get_text(strip=True)``).
+    """
+
+    __slots__ = ('attrs', 'strings', 'rendered')
+
+    def __init__(self, attrs: Dict[str, Any]):
+        self.attrs = attrs
+        # Текстові вузли як є (для get_text)
+        self.strings: List[str] = []
+        # Текстові вузли, де кожен список ul/ol замінено на "- item" рядки
+        self.rendered: List[str] = []
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.attrs.get(key, default)
+
+    def get_text(self, separator: str = '', strip: bool = False) -> str:
+        if strip:
+            return separator.join(s.strip() for s in self.strings if s.strip())
+        return separator.join(self.strings)
+
+    def rendered_text(self) -> str:
+        """Текст як у ``_extract_text_from_cell``: списки розгорнуті, вузли через пробіл."""
+        return ' '.join(s.strip() for s in self.rendered if s.strip())
+
+
+class _Table:
+    """Стан відкритої таблиці."""
+
+    __slots__ = ('table_id', 'row', 'cell', 'list_depth', 'list_items', 'open_items')
+
+    def __init__(self, table_id: int):
+        self.table_id = table_id
+        self.row: Optional[List[StreamCell]] = None
+        self.cell: Optional[StreamCell] = None
+        # Lists inside the current cell: nesting depth, text of every <li>, indexes of open <li>
+        self.list_depth = 0
+        self.list_items: List[List[str]] = []
+        self.open_items: List[int] = []
+
+
+class TableRowCollector:
+    """
+    Приймач подій парсера (інтерфейс target для lxml).
+
+    Завершені рядки накопичуються в ``rows`` як пари (table_id, cells) і
+    забираються викликом ``drain()``.
+    """
+
+    def __init__(self):
+        self.rows: List[Tuple[int, List[StreamCell]]] = []
+        self._tables: List[_Table] = []
+        self._next_table_id = 0
+        # Consecutive data events form one text node (parsers may split it)
+        self._text: List[str] = []
+
+    def drain(self) -> List[Tuple[int, List[StreamCell]]]:
+        rows, self.rows = self.rows, []
+        return rows
+
+    # Події парсера
+
+    def start(self, tag: str, attrib: Dict[str, Any]) -> None:
+        self._flush_text()
+        tag = tag.lower()
+        if tag == 'table':
+            self._tables.append(_Table(self._next_table_id))
+            self._next_table_id += 1
+            return
+
+        table = self._tables[-1] if self._tables else None
+        if table is None:
+            return
+
+        if tag == 'tr':
+            self._end_row(table)
+            table.row = []
+        elif tag in CELL_TAGS:
+            if table.row is None:
+                table.row = []
+            self._end_cell(table)
+            table.cell = StreamCell(dict(attrib))
+            table.row.append(table.cell)
+        elif table.cell is not None:
+            if tag in LIST_TAGS:
+                table.list_depth += 1
+            elif tag == 'li' and table.list_depth:
+                table.list_items.append([])
+                table.open_items.append(len(table.list_items) - 1)
+
+    def end(self, tag: str) -> None:
+        self._flush_text()
+        tag = tag.lower()
+        table = self._tables[-1] if self._tables else None
+        if table is None:
+            return
+
+        if tag == 'table':
+            self._end_row(table)
+            self._tables.pop()
+        elif tag == 'tr':
+            self._end_row(table)
+        elif tag in CELL_TAGS:
+            self._end_cell(table)
+        elif table.cell is not None:
+            if tag == 'li' and table.open_items:
+                table.open_items.pop()
+            elif tag in LIST_TAGS and table.list_depth:
+                table.list_depth -= 1
+                if table.list_depth == 0:
+                    self._end_list(table)
+
+    def data(self, text: str) -> None:
+        if self._tables and self._tables[-1].cell is not None:
+            self._text.append(text)
+
+    def comment(self, text: str) -> None:
+        # Comments are not part of the cell text but split text nodes
+        self._flush_text()
+
+    def close(self) -> None:
+        self._flush_text()
+        while self._tables:
+            self._end_row(self._tables.pop())
+
+    # Внутрішнє
+
+    def _flush_text(self) -> None:
+        if not self._text:
+            return
+        text = ''.join(self._text)
+        self._text = []
+        table = self._tables[-1] if self._tables else None
+        if table is None or table.cell is None:
+            return
+
+        table.cell.strings.append(text)
+        if table.list_depth:
+            stripped = text.strip()
+            if stripped:
+                for index in table.open_items:
+                    table.list_items[index].append(stripped)
+        else:
+            table.cell.rendered.append(text)
+
+    def _end_list(self, table: _Table) -> None:
+        items = table.list_items
+        table.cell.rendered.append('\n'.join(f"- {''.join(item)}" for item in items))
+        table.list_items = []
+        table.open_items = []
+
+    def _end_cell(self, table: _Table) -> None:
+        if table.cell is not None and table.list_depth:
+            table.list_depth = 0
+            self._end_list(table)
+        table.cell = None
+
+    def _end_row(self, table: _Table) -> None:
+        self._end_cell(table)
+        if table.row is not None:
+            self.rows.append((table.table_id, table.row))
+            table.row = None
+
+
+class _StdlibEventParser(HTMLParser):
+    """Перекладає колбеки ``html.parser`` у події TableRowCollector."""
+
+    def __init__(self, target: TableRowCollector):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+    def handle_comment(self, data):
+        self.target.comment(data)
+
+    def unknown_decl(self, data):
+        # <![CDATA[...]]> is a separate text node
+        self.target.comment('')
+        if data.startswith('CDATA['):
+            self.target.data(data[len('CDATA['):])
+            self.target.comment('')
+
+    def close(self):
+        super().close()
+        self.target.close()
+
+
+def iter_table_rows(
+    html_content: str,
+    backend: str = 'html.parser',
+    chunk_size: int = 64 * 1024
+) -> Iterator[Tuple[int, List[StreamCell]]]:
+    """
+    Віддає рядки всіх таблиць сторінки як (table_id, cells) у порядку завершення.
+
+    Вкладені таблиці обробляються як окремі таблиці (їхні комірки не
+    потрапляють у рядок зовнішньої таблиці).
+    """
+    collector = TableRowCollector()
+    if backend == 'lxml' and etree is not None:
+        parser = etree.HTMLParser(target=collector)
+        html_content = unwrap_cdata(html_content)
+    else:
+        parser = _StdlibEventParser(collector)
+
+    for start in range(0, len(html_content), chunk_size):
+        parser.feed(html_content[start:start + chunk_size])
+        yield from collector.drain()
+
+    parser.close()
+    yield from collector.drain()
@@ -5,10 +5,14 @@ import os
 import sys
 import hashlib
 import asyncio
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import click
 import tiktoken
+from sqlalchemy import insert
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import aclosing
 from dataclasses import dataclass
 
 # Add app to Python path
@@ -22,12 +26,18 @@ from app.ai import OpenAIEmbedder
 try:
     from .confluence_mock import MockConfluenceAPI
     from .confluence_real import RealConfluenceAPI
-    from .html_table_parser import EnhancedConfluenceTableParser
+    from .html_table_parser import EnhancedConfluenceTableParser, parse_compact_in_worker, testcase_from_tuple
+    from .ingestion_pipeline import IngestionPipeline, Stage, StageStats
+    from .page_stream import stream_pages
+    from . import ingestion_checkpoints as checkpoints
 except ImportError:
     # Fallback for direct script execution
     from confluence_mock import MockConfluenceAPI
     from confluence_real import RealConfluenceAPI
-    from html_table_parser import EnhancedConfluenceTableParser
+    from html_table_parser import EnhancedConfluenceTableParser, parse_compact_in_worker, testcase_from_tuple
+    from ingestion_pipeline import IngestionPipeline, Stage, StageStats
+    from page_stream import stream_pages
+    import ingestion_checkpoints as checkpoints
 
 
 @dataclass
@@ -43,6 +53,10 @@ class LoadingProgress:
     created_configs: int = 0
     sections_processed: int = 0
     chunks_created: int = 0
+    updated_checklists: int = 0
+    unchanged_checklists: int = 0
+    deleted_checklists: int = 0
+    resumed_pages: int = 0
     
     def get_page_progress_percent(self) -> float:
         if self.total_pages == 0:
@@ -50,8 +64,40 @@ class LoadingProgress:
         return (self.processed_pages / self.total_pages) * 100
 
 
+@dataclass
+class PageWork:
+    """Сторінка, що проходить через етапи конвеєра завантаження."""
+    page: Dict[str, Any]
+    result: Dict[str, Any]
+    page_content: Optional[Dict[str, Any]] = None
+    testcases: Optional[List[Dict[str, Any]]] = None
+    parse_error: Optional[BaseException] = None
+    parse_seconds: float = 0.0
+    chunks: Optional[List[str]] = None
+    embeddings: Optional[List[Optional[List[float]]]] = None
+    vector_error: Optional[str] = None
+
+
+# Reasons of failed writes; pages skipped for them are retried by --resume
+_RETRYABLE_REASONS = ('Помилка', 'Не вдалося', 'HTML парсер не спрацював')
+
+
+def _as_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Приводить час до naive UTC для порівняння курсорів."""
+    if value is None or not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
 class ChunkProcessor:
-    """Text chunking processor."""
+    """Text chunking processor.
+
+    Token counts are memoized per text, so overflow sums, overlap selection
+    and the recount after the overlap don't encode the same strings again.
+    Counts are exactly those of ``count_tokens``: chunk boundaries don't change.
+    """
     
     def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
         """Initialize chunker."""
@@ -63,11 +109,29 @@ class ChunkProcessor:
         """Count tokens in text."""
         return len(self.tokenizer.encode(text))
     
+    def _token_counter(self, text: str) -> Callable[[str], int]:
+        """Memoized token counter for parts of ``text``."""
+        encode = self.tokenizer.encode_ordinary
+        if any(token in text for token in self.tokenizer.special_tokens_set):
+            # encode() keeps raising on disallowed special tokens, as count_tokens does
+            encode = self.tokenizer.encode
+        counts: Dict[str, int] = {}
+        
+        def count(part: str) -> int:
+            tokens = counts.get(part)
+            if tokens is None:
+                tokens = counts[part] = len(encode(part))
+            return tokens
+        
+        return count
+    
     def chunk_text(self, text: str) -> List[str]:
         """Split text into overlapping chunks."""
         if not text.strip():
             return []
         
+        count = self._token_counter(text)
+        
         # Split by paragraphs first
         paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
         
@@ -76,7 +140,7 @@ class ChunkProcessor:
         current_tokens = 0
         
         for paragraph in paragraphs:
-            paragraph_tokens = self.count_tokens(paragraph)
+            paragraph_tokens = count(paragraph)
             
             # If single paragraph is too big, split it
             if paragraph_tokens > self.chunk_size:
@@ -90,14 +154,14 @@ class ChunkProcessor:
                 chunk_tokens = 0
                 
                 for sentence in sentences:
-                    sentence_tokens = self.count_tokens(sentence)
+                    sentence_tokens = count(sentence)
                     
                     if chunk_tokens + sentence_tokens > self.chunk_size and chunk_sentences:
                         chunks.append(' '.join(chunk_sentences))
                         # Keep some overlap
                         overlap_sentences = chunk_sentences[-2:] if len(chunk_sentences) > 2 else chunk_sentences
                         chunk_sentences = overlap_sentences + [sentence]
-                        chunk_tokens = sum(self.count_tokens(s) for s in chunk_sentences)
+                        chunk_tokens = sum(count(s) for s in chunk_sentences)
                     else:
                         chunk_sentences.append(sentence)
                         chunk_tokens += sentence_tokens
@@ -114,9 +178,10 @@ class ChunkProcessor:
                 chunks.append(current_chunk.strip())
                 
                 # Create overlap with previous chunk
-                overlap_text = self._get_overlap_text(current_chunk)
+                overlap_text = self._get_overlap_text(current_chunk, count)
                 current_chunk = overlap_text + "\n\n" + paragraph if overlap_text else paragraph
-                current_tokens = self.count_tokens(current_chunk)
+                # Tokens may merge across the joint, so the new chunk is counted as a whole
+                current_tokens = count(current_chunk)
             else:
                 current_chunk += "\n\n" + paragraph if current_chunk else paragraph
                 current_tokens += paragraph_tokens
@@ -127,49 +192,102 @@ class ChunkProcessor:
         
         return chunks
     
-    def _get_overlap_text(self, chunk: str) -> str:
+    def _get_overlap_text(self, chunk: str, count: Optional[Callable[[str], int]] = None) -> str:
         """Get overlap text from the end of a chunk."""
+        count = count or self.count_tokens
         overlap_tokens = 0
-        sentences = chunk.split('.')
         overlap_sentences = []
         
-        # Take sentences from the end until we reach overlap size
-        for sentence in reversed(sentences):
-            sentence = sentence.strip()
+        # Take sentences from the end until we reach overlap size; only the tail is split
+        start = len(chunk)
+        while start > 0:
+            dot = chunk.rfind('.', 0, start)
+            sentence = chunk[dot + 1:start].strip()
+            start = dot
             if not sentence:
                 continue
             
-            sentence_tokens = self.count_tokens(sentence)
+            sentence_tokens = count(sentence)
             if overlap_tokens + sentence_tokens > self.chunk_overlap:
                 break
             
-            overlap_sentences.insert(0, sentence)
+            overlap_sentences.append(sentence)
             overlap_tokens += sentence_tokens
         
+        overlap_sentences.reverse()
         return '. '.join(overlap_sentences) + '.' if overlap_sentences else ""
 
 
 class UnifiedConfluenceLoader:
     """Об'єднаний завантажувач Confluence даних для MySQL та векторної бази."""
     
-    def __init__(self, use_mock: bool = True, load_mysql: bool = True, load_vector: bool = True):
-        """Initialize unified loader."""
+    def __init__(
+        self,
+        use_mock: bool = True,
+        load_mysql: bool = True,
+        load_vector: bool = True,
+        embedding_model: Optional[str] = None,
+        embedding_dimensions: Optional[int] = None,
+        side_by_side: bool = False,
+        incremental: bool = False,
+        delete_missing: bool = False,
+        parse_workers: Optional[int] = None,
+        embed_concurrency: Optional[int] = None,
+        table_extractor: str = 'dom'
+    ):
+        """Initialize unified loader.
+        
+        With ``side_by_side`` chunks are only re-embedded into the named vector
+        of ``embedding_model``/``embedding_dimensions``; existing points keep
+        serving searches from their current vector.
+        
+        With ``incremental`` pages whose Confluence version/content hash
+        changed are replaced (checklist, testcases and chunks) when their new
+        version is written, and unchanged ones are skipped; ``delete_missing``
+        also removes checklists that were not seen in a complete crawl of
+        their space (only when whole spaces are crawled, not ``page_ids``
+        subtrees or ``labels``).
+        
+        Pages go through a pipeline of concurrent stages: ``parse_workers``
+        processes parse HTML and ``embed_concurrency`` embedding requests run
+        at once (defaults from INGEST_* settings). ``table_extractor='streaming'``
+        parses checklist tables from parser events instead of a DOM.
+        """
         self.use_mock = use_mock
         self.load_mysql = load_mysql
         self.load_vector = load_vector
+        self.side_by_side = side_by_side
+        self.incremental = incremental
+        self.delete_missing = delete_missing
         self.progress = LoadingProgress()
+        self.parse_workers = parse_workers or settings.ingest_parse_workers or os.cpu_count() or 1
+        self.embed_concurrency = embed_concurrency or settings.ingest_embed_concurrency
+        self.write_batch_size = settings.ingest_write_batch_size
+        self._parse_pool: Optional[Executor] = None
+        self._pipeline_stats: Dict[str, StageStats] = {}
+        # Config name -> id for the whole run, saves a SELECT per testcase row
+        self._config_ids: Dict[str, int] = {}
+        # Per-page progress of the current job and pages finished by the resumed one
+        self._checkpoints: Optional[checkpoints.CheckpointStore] = None
+        self._resumed: Dict[str, checkpoints.PageCheckpoint] = {}
+        self._resumed_job_id: Optional[int] = None
+        self._resume_candidates: List[str] = []
         
         # Initialize repositories
         if self.load_mysql:
             self.qa_repo = QARepository()
-            self.html_parser = EnhancedConfluenceTableParser()  # Додаємо HTML парсер
+            self.html_parser = EnhancedConfluenceTableParser(extractor=table_extractor)  # Додаємо HTML парсер
             self._existing_checklists = set()
+            # confluence_page_id -> (version, content_hash, space_key)
+            self._checklist_state: Dict[str, Tuple[Optional[int], str, str]] = {}
             self._load_existing_checklists()
             self._sections_config = self._load_sections_config()
         
         if self.load_vector:
-            self.vector_repo = VectorDBRepository()
-            self.embedder = OpenAIEmbedder()
+            self.embedder = OpenAIEmbedder(model=embedding_model, dimensions=embedding_dimensions)
+            self.vector_repo = VectorDBRepository(
+                vector_name=self.embedder.vector_name, vector_size=self.embedder.get_dimension()
+            )
             self.chunker = ChunkProcessor()
         
         # Initialize Confluence API
@@ -182,8 +300,11 @@ class UnifiedConfluenceLoader:
         """Завантажуємо список існуючих чеклістів для пропуску."""
         try:
             session = self.qa_repo.get_session()
-            existing = session.query(Checklist.confluence_page_id).all()
-            self._existing_checklists = {page_id[0] for page_id in existing}
+            existing = session.query(
+                Checklist.confluence_page_id, Checklist.version, Checklist.content_hash, Checklist.space_key
+            ).all()
+            self._existing_checklists = {row[0] for row in existing}
+            self._checklist_state = {row[0]: (row[1], row[2], row[3]) for row in existing}
             click.echo(f"📋 Завантажено {len(self._existing_checklists)} існуючих чеклістів для пропуску")
             session.close()
         except Exception as e:
@@ -215,9 +336,29 @@ class UnifiedConfluenceLoader:
         space_keys: Optional[List[str]] = None,
         labels: Optional[List[str]] = None,
         updated_since: Optional[str] = None,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        resume_job_id: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Об'єднане завантаження даних в MySQL та векторну базу."""
+        """Об'єднане завантаження даних в MySQL та векторну базу.
+        
+        Прогрес кожної сторінки зберігається в ingestion_checkpoints. З
+        ``resume_job_id`` завантаження продовжує перерваний job з тими ж
+        параметрами вибірки: записані сторінки пропускаються, а якщо обхід
+        тоді завершився - повторно завантажуються лише незавершені сторінки.
+        """
+        
+        resumed_job = None
+        if resume_job_id is not None:
+            resumed_job = self._load_resumed_job(resume_job_id)
+            params = resumed_job.params or {}
+            page_ids = params.get('page_ids')
+            space_keys = params.get('space_keys')
+            labels = params.get('labels')
+            updated_since = params.get('updated_since')
+            limit = params.get('limit')
+            click.echo(
+                f"♻️ Продовжуємо job #{resume_job_id}: {len(self._resumed)} сторінок вже записано"
+            )
         
         click.echo(f"🚀 Об'єднане завантаження Confluence даних...")
         click.echo(f"📊 MySQL завантаження: {'✅' if self.load_mysql else '❌'}")
@@ -231,75 +372,112 @@ class UnifiedConfluenceLoader:
         if labels:
             click.echo(f"🏷️ Labels: {', '.join(labels)}")
         if limit:
-            click.echo(f"📋 Ліміт: {limit} чеклістів")
+            click.echo(f"📋 Ліміт: {limit} сторінок до обробки")
         
         # Parse updated_since
         since_date = None
         if updated_since:
             since_date = datetime.fromisoformat(updated_since)
         
-        # Fetch pages
-        if page_ids and not self.use_mock:
+        # Stream pages: processing starts while later pages are still downloading
+        resume_pages = self._pages_to_resume(resumed_job) if resumed_job else None
+        # Only a crawl of whole spaces shows which stored checklists have vanished
+        space_crawl = False
+        if resume_pages is not None:
+            # The crawl of the resumed job finished: fetch only unfinished pages
+            click.echo(f"♻️ Обхід job #{resume_job_id} завершено, повторюємо {len(resume_pages)} сторінок")
+            
+            def page_source():
+                for page_id in resume_pages:
+                    page = self.confluence_api.get_page_content(page_id)
+                    if page:
+                        yield page
+        elif page_ids and not self.use_mock:
             # Load specific pages with children for real API
-            pages = self.confluence_api.get_pages_by_ids(
-                page_ids=page_ids,
-                include_children=True
-            )
+            def page_source():
+                return self.confluence_api.iter_pages_by_ids(
+                    page_ids=page_ids,
+                    include_children=True
+                )
         else:
             # Use regular filtering method
-            pages = self.confluence_api.get_pages(
-                space_keys=space_keys,
-                labels=labels,
-                updated_since=since_date
-            )
-        
-        click.echo(f"📄 Знайдено {len(pages)} сторінок для обробки")
-        self.progress.total_pages = len(pages)
-        self.progress.total_checklists = len(pages)
+            space_crawl = not labels
+            
+            def page_source():
+                return self.confluence_api.iter_pages(
+                    space_keys=space_keys,
+                    labels=labels,
+                    updated_since=since_date
+                )
         
         # Create ingestion job
-        job_desc = f"Unified loading: {len(pages)} pages, MySQL: {self.load_mysql}, Vector: {self.load_vector}"
+        job_desc = f"Unified loading (pipeline), MySQL: {self.load_mysql}, Vector: {self.load_vector}"
         if limit:
-            job_desc += f", max {limit} checklists"
-        job = self._create_ingestion_job(job_desc) if self.load_mysql else None
+            job_desc += f", max {limit} pages"
+        job_params = {
+            'page_ids': page_ids,
+            'space_keys': space_keys,
+            'labels': labels,
+            'updated_since': updated_since,
+            'limit': limit
+        }
+        if resumed_job:
+            job = resumed_job
+        else:
+            job = self._create_ingestion_job(job_desc, job_params) if self.load_mysql else None
+        if job:
+            self._checkpoints = checkpoints.CheckpointStore(self.qa_repo.get_session, job.id)
+            click.echo(f"🆔 Job #{job.id} (продовжити після збою: --resume {job.id})")
+        
+        run = {
+            'documents_processed': 0,
+            'seen_pages': {},
+            'sync_cursor': None,
+            # A resume over a subset of pages does not see the whole space
+            'crawl_complete': resume_pages is None,
+            'limit': limit,
+            # Pages let into the pipeline for parsing/embedding/writing, counted against the limit
+            'admitted': 0
+        }
         
         try:
-            documents_processed = 0
-            chunks_created = 0
+            failures_before = self._crawl_failures()
             
-            for i, page in enumerate(pages):
-                if limit and self.progress.created_checklists >= limit:
-                    click.echo(f"🛑 Досягнуто ліміт {limit} чекліст, зупиняємо")
-                    break
-                
-                try:
-                    click.echo(f"\n🔄 Обробка сторінки {i+1}/{len(pages)}: {page['title']}")
-                    
-                    # Process page for both MySQL and Vector DB
-                    result = await self._process_page_unified(page)
-                    
-                    documents_processed += 1
-                    chunks_created += result.get('chunks_created', 0)
-                    
-                    if result.get('mysql_success'):
-                        self.progress.created_checklists += 1
-                        self.progress.created_testcases += result.get('testcases_created', 0)
-                        self.progress.created_configs += result.get('configs_created', 0)
-                        click.echo(f"  ✅ MySQL: Створено {result.get('testcases_created', 0)} тесткейсів")
-                    else:
-                        self.progress.skipped_checklists += 1
-                        click.echo(f"  ⏭️ MySQL: Пропущено ({result.get('mysql_reason', 'Unknown')})")
-                    
-                    if result.get('vector_success'):
-                        click.echo(f"  ✅ Vector: Створено {result.get('chunks_created', 0)} чанків")
-                    else:
-                        click.echo(f"  ⏭️ Vector: Пропущено ({result.get('vector_reason', 'Unknown')})")
-                    
-                    self.progress.processed_pages += 1
-                    
-                except Exception as e:
-                    click.echo(f"  ❌ Помилка обробки сторінки: {e}", err=True)
-                    continue
+            # Fetch, parse, chunk, embed and write run as concurrent stages
+            pipeline = self._build_pipeline(run)
+            self._parse_pool = self._create_parse_pool() if self.load_mysql else None
+            try:
+                async with aclosing(stream_pages(page_source)) as pages:
+                    self._pipeline_stats = await pipeline.run(pages)
+            finally:
+                if self._parse_pool:
+                    self._parse_pool.shutdown(cancel_futures=True)
+                    self._parse_pool = None
+                # Also on crashes and Ctrl+C: what was done must survive for --resume
+                self._flush_checkpoints()
+            
+            seen_pages = run['seen_pages']
+            sync_cursor = run['sync_cursor']
+            crawl_complete = run['crawl_complete']
+            chunks_created = self.progress.chunks_created
+            crawl_failed = self._crawl_failures() > failures_before
+            if crawl_failed:
+                crawl_complete = False
+            
+            if job and crawl_complete:
+                # Every page of the selection has a checkpoint now
+                self._save_job_params(job, {**job_params, 'crawl_complete': True})
+            
+            if self.delete_missing:
+                if crawl_failed:
+                    click.echo("⚠️ Були помилки отримання сторінок - видалення зниклих чеклістів пропущено")
+                if updated_since:
+                    click.echo("⚠️ З --since видно лише змінені сторінки - видалення зниклих чеклістів пропущено")
+                elif not space_crawl:
+                    click.echo("⚠️ Обхід охоплює лише частину простору (--page-ids/--labels) - "
+                               "видалення зниклих чеклістів пропущено")
+                elif crawl_complete:
+                    self._delete_vanished_checklists(seen_pages)
             
             # Update job
             if job:
@@ -308,29 +486,245 @@ class UnifiedConfluenceLoader:
                     'testcases': self.progress.created_testcases,
                     'configs': self.progress.created_configs,
                     'chunks': chunks_created,
-                    'skipped': self.progress.skipped_checklists
-                })
+                    'skipped': self.progress.skipped_checklists,
+                    'updated': self.progress.updated_checklists,
+                    'unchanged': self.progress.unchanged_checklists,
+                    'deleted': self.progress.deleted_checklists
+                }, sync_cursor=sync_cursor.isoformat() if sync_cursor else None)
             
             self._print_final_summary()
             
             return {
                 "success": True,
-                "documents_processed": documents_processed,
+                "job_id": job.id if job else None,
+                "documents_processed": run['documents_processed'],
                 "checklists_created": self.progress.created_checklists,
                 "testcases_created": self.progress.created_testcases,
                 "configs_created": self.progress.created_configs,
                 "chunks_created": chunks_created,
-                "skipped_checklists": self.progress.skipped_checklists
+                "skipped_checklists": self.progress.skipped_checklists,
+                "updated_checklists": self.progress.updated_checklists,
+                "unchanged_checklists": self.progress.unchanged_checklists,
+                "deleted_checklists": self.progress.deleted_checklists,
+                "resumed_pages": self.progress.resumed_pages
             }
             
         except Exception as e:
             if job:
                 self._update_ingestion_job(job, "failed", {'error': str(e)})
             click.echo(f"❌ Помилка завантаження: {e}")
+            if job:
+                click.echo(f"♻️ Продовжити з місця зупинки: --resume {job.id}")
             raise
     
-    async def _process_page_unified(self, page: Dict[str, Any]) -> Dict[str, Any]:
-        """Обробляє одну сторінку для MySQL та векторної бази."""
+    def _create_parse_pool(self) -> Executor:
+        """Пул процесів для парсингу HTML (BeautifulSoup навантажує CPU)."""
+        return ProcessPoolExecutor(max_workers=self.parse_workers)
+    
+    def _build_pipeline(self, run: Dict[str, Any]) -> IngestionPipeline:
+        """Етапи: prepare -> parse (процеси) -> chunk -> embed (async) -> write (батчі)."""
+        pipeline = None
+        
+        async def prepare(page: Dict[str, Any]) -> Optional[PageWork]:
+            return await self._prepare_work(page, run, pipeline)
+        
+        async def write(batch: List[PageWork]) -> None:
+            await self._write_batch(batch, run)
+        
+        def on_error(stage: Stage, item: Any, error: BaseException) -> None:
+            click.echo(f"  ❌ Помилка обробки сторінки (етап {stage.name}): {error}", err=True)
+            for work in item if isinstance(item, list) else [item]:
+                page = work.page if isinstance(work, PageWork) else work
+                self._checkpoint(page, checkpoints.FAILED, f"{stage.name}: {error}")
+        
+        pipeline = IngestionPipeline([
+            Stage("prepare", prepare),
+            Stage("parse", self._parse_work, workers=self.parse_workers),
+            Stage("chunk", self._chunk_work, workers=2),
+            Stage("embed", self._embed_work, workers=self.embed_concurrency),
+            Stage("write", write, batch_size=self.write_batch_size)
+        ], queue_size=settings.ingest_queue_size, on_error=on_error)
+        return pipeline
+    
+    async def _prepare_work(
+        self,
+        page: Dict[str, Any],
+        run: Dict[str, Any],
+        pipeline: IngestionPipeline
+    ) -> Optional[PageWork]:
+        """Етап prepare: інкрементальна перевірка та план обробки сторінки.
+        
+        Ліміт перевіряється тут, до парсингу та embeddings: сторінки понад
+        ліміт не потрапляють далі, а обхід зупиняється.
+        """
+        # Seen as soon as the crawl returns it: a page that fails in a later
+        # stage still exists in Confluence and must not count as vanished
+        run['seen_pages'][page['id']] = page.get('space', '')
+        limit = run['limit']
+        if limit and run['admitted'] >= limit:
+            if not pipeline.stopped:
+                click.echo(f"🛑 Досягнуто ліміт {limit} сторінок до обробки, зупиняємо")
+                pipeline.stop()
+            run['crawl_complete'] = False
+            return None
+        
+        result = await asyncio.to_thread(self._plan_page, page)
+        if result.get('mysql_pending') or result.get('vector_pending'):
+            run['admitted'] += 1
+        if not result.get('resumed'):
+            self._checkpoint(page, checkpoints.FETCHED)
+        return PageWork(page=page, result=result)
+    
+    async def _parse_work(self, work: PageWork) -> PageWork:
+        """Етап parse: витягує тесткейси в пулі процесів."""
+        if not work.result.get('mysql_pending'):
+            return work
+        
+        page = work.page
+        if 'content' not in page:
+            page = await asyncio.to_thread(self.confluence_api.get_page_content, page['id'])
+        work.page_content = page
+        if not page:
+            return work
+        
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            compact = await loop.run_in_executor(
+                self._parse_pool, parse_compact_in_worker,
+                page.get('content', ''), work.page['title'],
+                self.html_parser.html_backend, self.html_parser.extractor
+            )
+            work.testcases = [testcase_from_tuple(values) for values in compact]
+        except Exception as e:
+            work.parse_error = e
+        work.parse_seconds = time.perf_counter() - started
+        self._checkpoint(page, checkpoints.PARSED)
+        return work
+    
+    async def _chunk_work(self, work: PageWork) -> PageWork:
+        """Етап chunk: нормалізація та розбиття на чанки."""
+        if work.result.get('vector_pending'):
+            try:
+                work.chunks = await asyncio.to_thread(self._chunk_page, work.page)
+            except Exception as e:
+                work.vector_error = f'Помилка: {str(e)}'
+        return work
+    
+    async def _embed_work(self, work: PageWork) -> PageWork:
+        """Етап embed: embeddings чанків (кілька запитів одночасно)."""
+        if work.chunks:
+            try:
+                work.embeddings = await asyncio.to_thread(self._embed_chunks, work.page, work.chunks)
+                self._checkpoint(work.page, checkpoints.EMBEDDED)
+            except Exception as e:
+                work.vector_error = f'Помилка: {str(e)}'
+        return work
+    
+    async def _write_batch(self, batch: List[PageWork], run: Dict[str, Any]) -> None:
+        """Етап write: MySQL по сторінці, чанки всього батчу одним upsert."""
+        for work in batch:
+            result = work.result
+            if not result.get('unchanged') and result.pop('mysql_pending', False):
+                mysql_result = await asyncio.to_thread(self._write_parsed_checklist, work)
+                self._apply_mysql_result(work.page, result, mysql_result)
+        
+        # One Qdrant request for the chunks of all pages in the batch
+        chunks_data = []
+        vector_pages = []
+        for work in batch:
+            if not work.result.pop('vector_pending', False):
+                continue
+            if work.vector_error:
+                work.result['vector_reason'] = work.vector_error
+            elif not work.chunks:
+                work.result['vector_reason'] = 'Немає контенту для чанків'
+                if work.result.get('replaced'):
+                    await asyncio.to_thread(self.vector_repo.delete_document_chunks, work.page['id'])
+            else:
+                page_chunks = self._build_chunks_data(work.page, work.chunks, work.embeddings)
+                chunks_data.extend(page_chunks)
+                vector_pages.append((work, page_chunks))
+        
+        if vector_pages:
+            try:
+                successful, failed = await asyncio.to_thread(self._upsert_chunks, chunks_data)
+                error = 'Помилка запису в Qdrant' if failed and not successful else None
+            except Exception as e:
+                error = f'Помилка: {str(e)}'
+            for work, page_chunks in vector_pages:
+                self._apply_vector_result(
+                    work.result,
+                    {'success': False, 'reason': error} if error else {'success': True, 'chunks_created': len(page_chunks)}
+                )
+                # Old chunks go only once the new version is in Qdrant
+                if not error and work.result.get('replaced'):
+                    await asyncio.to_thread(self._delete_stale_chunks, work.page['id'], page_chunks)
+        
+        for work in batch:
+            self._report_page(work.page, work.result, run)
+            if not work.result.get('resumed'):
+                error = self._page_error(work.result)
+                self._checkpoint(
+                    work.page_content or work.page, checkpoints.FAILED if error else checkpoints.WRITTEN, error
+                )
+        await asyncio.to_thread(self._flush_checkpoints)
+    
+    @staticmethod
+    def _page_error(result: Dict[str, Any]) -> Optional[str]:
+        """Помилка, через яку сторінку треба повторити при --resume (звичайні пропуски не рахуються)."""
+        for reason in (result.get('mysql_reason'), result.get('vector_reason')):
+            if reason and reason.startswith(_RETRYABLE_REASONS):
+                return reason
+        return None
+    
+    def _report_page(self, page: Dict[str, Any], result: Dict[str, Any], run: Dict[str, Any]) -> None:
+        """Оновлює прогрес і виводить результат обробки сторінки."""
+        self.progress.total_pages += 1
+        self.progress.total_checklists += 1
+        run['documents_processed'] += 1
+        page_updated = _as_utc_naive(page.get('updated'))
+        if page_updated and (run['sync_cursor'] is None or page_updated > run['sync_cursor']):
+            run['sync_cursor'] = page_updated
+        
+        click.echo(f"\n🔄 Обробка сторінки {self.progress.total_pages}: {page['title']}")
+        self.progress.chunks_created += result.get('chunks_created', 0)
+        
+        if result.get('resumed'):
+            self.progress.resumed_pages += 1
+            click.echo(f"  ⏭️ Вже записана в job #{self._resumed_job_id}")
+            self.progress.processed_pages += 1
+            return
+        
+        if result.get('unchanged'):
+            self.progress.unchanged_checklists += 1
+            click.echo("  ⏭️ Без змін (версія/хеш збігаються)")
+            self.progress.processed_pages += 1
+            return
+        
+        if result.get('parse_summary'):
+            click.echo(f"  🔍 {result['parse_summary']}")
+        
+        if result.get('mysql_success'):
+            if result.get('replaced'):
+                self.progress.updated_checklists += 1
+            self.progress.created_checklists += 1
+            self.progress.created_testcases += result.get('testcases_created', 0)
+            self.progress.created_configs += result.get('configs_created', 0)
+            click.echo(f"  ✅ MySQL: Створено {result.get('testcases_created', 0)} тесткейсів")
+        else:
+            self.progress.skipped_checklists += 1
+            click.echo(f"  ⏭️ MySQL: Пропущено ({result.get('mysql_reason', 'Unknown')})")
+        
+        if result.get('vector_success'):
+            click.echo(f"  ✅ Vector: Створено {result.get('chunks_created', 0)} чанків")
+        else:
+            click.echo(f"  ⏭️ Vector: Пропущено ({result.get('vector_reason', 'Unknown')})")
+        
+        self.progress.processed_pages += 1
+    
+    def _plan_page(self, page: Dict[str, Any]) -> Dict[str, Any]:
+        """Визначає, що робити зі сторінкою (з урахуванням інкрементальної синхронізації)."""
         result = {
             'mysql_success': False,
             'vector_success': False,
@@ -342,206 +736,321 @@ class UnifiedConfluenceLoader:
         }
         
         page_id = page['id']
-        title = page['title']
+        
+        # Resumed job: pages written before the interruption are done
+        checkpoint = self._resumed.get(page_id)
+        if checkpoint and checkpoint.matches(page):
+            result['resumed'] = True
+            return result
+        
+        # Incremental sync: skip unchanged pages; changed ones are replaced when
+        # the new version is written, so a failed page keeps its old data
+        if self.incremental and page_id in self._existing_checklists:
+            if not self._is_page_changed(page):
+                result['unchanged'] = True
+                return result
+            result['replaced'] = True
         
         # Check if already exists in MySQL
-        if self.load_mysql and page_id in self._existing_checklists:
+        if self.load_mysql and page_id in self._existing_checklists and not result.get('replaced'):
             result['mysql_reason'] = 'Вже існує в БД'
         elif self.load_mysql:
-            # Process for MySQL
+            result['mysql_pending'] = True
+        
+        if self.load_vector:
+            result['vector_pending'] = True
+        
+        return result
+    
+    async def _process_page_unified(self, page: Dict[str, Any]) -> Dict[str, Any]:
+        """Обробляє одну сторінку для MySQL та векторної бази (без конвеєра)."""
+        result = self._plan_page(page)
+        if result.get('unchanged'):
+            return result
+        
+        replace = result.get('replaced', False)
+        if result.pop('mysql_pending', False):
             try:
-                mysql_result = await self._process_page_mysql(page)
-                if mysql_result['success']:
-                    result['mysql_success'] = True
-                    result['testcases_created'] = mysql_result['testcases_created']
-                    result['configs_created'] = mysql_result['configs_created']
-                    self._existing_checklists.add(page_id)
-                else:
-                    result['mysql_reason'] = mysql_result['reason']
+                mysql_result = await self._process_page_mysql(page, replace=replace)
             except Exception as e:
-                result['mysql_reason'] = f'Помилка: {str(e)}'
+                mysql_result = {'success': False, 'reason': f'Помилка: {str(e)}'}
+            self._apply_mysql_result(page, result, mysql_result)
         
-        # Process for Vector DB
-        if self.load_vector:
+        if result.pop('vector_pending', False):
             try:
-                vector_result = await self._process_page_vector(page)
-                if vector_result['success']:
-                    result['vector_success'] = True
-                    result['chunks_created'] = vector_result['chunks_created']
-                else:
-                    result['vector_reason'] = vector_result['reason']
+                vector_result = await self._process_page_vector(page, replace=replace)
             except Exception as e:
-                result['vector_reason'] = f'Помилка: {str(e)}'
+                vector_result = {'success': False, 'reason': f'Помилка: {str(e)}'}
+            self._apply_vector_result(result, vector_result)
         
         return result
     
-    async def _process_page_mysql(self, page: Dict[str, Any]) -> Dict[str, Any]:
+    def _apply_mysql_result(self, page: Dict[str, Any], result: Dict[str, Any], mysql_result: Dict[str, Any]) -> None:
+        """Переносить результат запису чекліста в результат сторінки."""
+        if mysql_result.get('parse_summary'):
+            result['parse_summary'] = mysql_result['parse_summary']
+        if not mysql_result['success']:
+            result['mysql_reason'] = mysql_result['reason']
+            return
+        
+        page_id = page['id']
+        result['mysql_success'] = True
+        result['testcases_created'] = mysql_result['testcases_created']
+        result['configs_created'] = mysql_result['configs_created']
+        self._existing_checklists.add(page_id)
+        self._checklist_state[page_id] = (
+            page.get('version'),
+            hashlib.md5(page.get('content', '').encode()).hexdigest(),
+            page.get('space', '')
+        )
+    
+    def _apply_vector_result(self, result: Dict[str, Any], vector_result: Dict[str, Any]) -> None:
+        """Переносить результат запису чанків в результат сторінки."""
+        if vector_result['success']:
+            result['vector_success'] = True
+            result['chunks_created'] = vector_result['chunks_created']
+        else:
+            result['vector_reason'] = vector_result['reason']
+    
+    def _is_page_changed(self, page: Dict[str, Any]) -> bool:
+        """Порівнює версію та хеш сторінки зі збереженими значеннями."""
+        stored_version, stored_hash, _ = self._checklist_state[page['id']]
+        if stored_version is not None and stored_version == page.get('version'):
+            return False
+        
+        content_hash = hashlib.md5(page.get('content', '').encode()).hexdigest()
+        if content_hash != stored_hash:
+            return True
+        
+        # Only the version moved (e.g. metadata edit) - keep data, remember the version
+        session = self.qa_repo.get_session()
+        try:
+            session.query(Checklist).filter(Checklist.id == page['id']).update(
+                {Checklist.version: page.get('version')}, synchronize_session=False
+            )
+            session.commit()
+        finally:
+            session.close()
+        self._checklist_state[page['id']] = (page.get('version'), stored_hash, self._checklist_state[page['id']][2])
+        return False
+    
+    def _remove_checklist(self, page_id: str) -> None:
+        """Видаляє чекліст (з тесткейсами) та чанки сторінки."""
+        self._delete_checklist_row(page_id)
+        if self.load_vector:
+            self.vector_repo.delete_document_chunks(page_id)
+    
+    def _delete_checklist_row(self, page_id: str) -> None:
+        """Видаляє чекліст з тесткейсами з БД."""
+        session = self.qa_repo.get_session()
+        try:
+            checklist = session.get(Checklist, page_id)
+            if checklist:
+                session.delete(checklist)
+                session.commit()
+        finally:
+            session.close()
+        
+        self._existing_checklists.discard(page_id)
+        self._checklist_state.pop(page_id, None)
+    
+    def _delete_vanished_checklists(self, seen_pages: Dict[str, str]) -> None:
+        """Видаляє чеклісти сторінок, яких більше немає в просканованих просторах."""
+        crawled_spaces = set(seen_pages.values())
+        vanished = [
+            page_id for page_id, (_, _, space_key) in self._checklist_state.items()
+            if page_id not in seen_pages and space_key in crawled_spaces
+        ]
+        for page_id in vanished:
+            click.echo(f"  🗑️ Видалено зниклу сторінку {page_id}")
+            self._remove_checklist(page_id)
+            self.progress.deleted_checklists += 1
+    
+    def _crawl_failures(self) -> int:
+        """Кількість помилок отримання сторінок (для реального API)."""
+        crawler = getattr(self.confluence_api, 'crawler', None)
+        return crawler.stats.get('failed', 0) if crawler else 0
+    
+    def _get_last_sync_cursor(self) -> Optional[str]:
+        """Курсор останньої успішної інкрементальної синхронізації."""
+        session = self.qa_repo.get_session()
+        try:
+            job = (
+                session.query(IngestionJob)
+                .filter(IngestionJob.status == "success", IngestionJob.sync_cursor.isnot(None))
+                .order_by(IngestionJob.id.desc())
+                .first()
+            )
+            return job.sync_cursor if job else None
+        finally:
+            session.close()
+    
+    def _page_content(self, page: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Контент сторінки: з результатів обходу, або окремим запитом, якщо його немає."""
+        if 'content' in page:
+            return page
+        return self.confluence_api.get_page_content(page['id'])
+    
+    def _check_parse_result(
+        self,
+        testcases: List[Dict[str, Any]],
+        duration: float,
+        error: Optional[BaseException] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Логує результат HTML парсера; повертає причину пропуску, якщо писати нічого."""
+        if error is not None:
+            self._log_parser_stats("HTML", 0, duration, False, str(error))
+            return {
+                'success': False,
+                'reason': f'HTML парсер не спрацював: {error}',
+                'parse_summary': f'⚠️ HTML парсер не спрацював: {error}'
+            }
+        
+        self._log_parser_stats("HTML", len(testcases), duration, True)
+        if not testcases:
+            return {'success': False, 'reason': 'Немає тесткейсів'}
+        return None
+    
+    async def _process_page_mysql(self, page: Dict[str, Any], replace: bool = False) -> Dict[str, Any]:
         """Обробляє сторінку для MySQL (структуровані QA дані) тільки з HTML парсером."""
         try:
-            page_id = page['id']
-            title = page['title']
-            
-            # Get page content
-            page_content = self.confluence_api.get_page_content(page_id)
+            page_content = self._page_content(page)
             if not page_content:
                 return {'success': False, 'reason': 'Не вдалося отримати контент'}
             
-            content = page_content.get('content', '')
-            
-            # Використовуємо тільки HTML парсер
-            html_start_time = datetime.now()
+            started = time.perf_counter()
+            error = None
             try:
-                html_testcases = self.html_parser.parse_testcases_from_html(content, title)
-                html_duration = (datetime.now() - html_start_time).total_seconds()
-                click.echo(f"  🔍 HTML парсер знайшов {len(html_testcases)} тесткейсів за {html_duration:.2f}с")
-                
-                # Логуємо статистику HTML парсера
-                self._log_parser_stats("HTML", len(html_testcases), html_duration, True)
+                testcases = self.html_parser.parse_testcases_from_html(page_content.get('content', ''), page['title'])
             except Exception as e:
-                html_duration = (datetime.now() - html_start_time).total_seconds()
-                click.echo(f"  ⚠️ HTML парсер не спрацював: {e}")
-                self._log_parser_stats("HTML", 0, html_duration, False, str(e))
-                return {'success': False, 'reason': f'HTML парсер не спрацював: {e}'}
+                testcases, error = [], e
             
-            # Check if result is valid
-            if not html_testcases:
-                return {'success': False, 'reason': 'Немає тесткейсів'}
+            failure = self._check_parse_result(testcases, time.perf_counter() - started, error)
+            if failure:
+                if replace and error is None:
+                    # The new version has no testcases, the old ones are gone from the page too
+                    self._delete_checklist_row(page['id'])
+                return failure
+            return self._write_checklist(page_content, testcases, replace=replace)
+        
+        except Exception as e:
+            return {'success': False, 'reason': f'Помилка: {str(e)}'}
+    
+    def _write_parsed_checklist(self, work: PageWork) -> Dict[str, Any]:
+        """Записує чекліст, розпарсений на етапі parse конвеєра."""
+        try:
+            if not work.page_content:
+                return {'success': False, 'reason': 'Не вдалося отримати контент'}
             
-            # Create checklist in DB
-            session = self.qa_repo.get_session()
-            try:
-                # Визначаємо секцію на основі батьківської сторінки
-                section = self._find_or_create_section(session, page_content, title)
-                
-                # Create checklist
-                content_hash = hashlib.md5(content.encode()).hexdigest()
-                
-                # Determine subcategory from page hierarchy
-                subcategory = self._determine_subcategory(page_content, title)
-                
-                # Формуємо правильний URL
-                space_key = page_content.get('space', 'QMT')
-                confluence_url = self._build_confluence_url(page_id, space_key, title)
-                
-                checklist = Checklist(
-                    id=page_id,  # Використовуємо confluence_page_id як primary key
-                    confluence_page_id=page_id,
-                    title=title,
-                    description=title,  # Використовуємо title як description
-                    additional_content=None,
-                    url=confluence_url,
-                    space_key=space_key,
-                    section_id=section.id,
-                    subcategory=subcategory,
-                    content_hash=content_hash,
-                    version=page_content.get('version', 1)
-                )
-                
-                session.add(checklist)
-                session.flush()
-                
-                # Create testcases and configs
-                configs_created = 0
-                testcases_created = 0
-                
-                for testcase_data in html_testcases:
-                    # Create config if needed
-                    config_id = None
-                    if testcase_data.get('config'):
-                        config = self._get_or_create_config(
-                            session, testcase_data['config'], None
-                        )
-                        if config:
-                            config_id = config.id
-                            configs_created += 1
-                    
-                    # Create testcase
-                    if testcase_data.get('expected_result') and testcase_data.get('step'):
-                        priority = testcase_data.get('priority')
-                        if priority and priority not in ['LOWEST', 'LOW', 'MEDIUM', 'HIGH', 'HIGHEST', 'CRITICAL']:
-                            priority = 'MEDIUM'
-                        
-                        # Handle screenshot
-                        screenshot = testcase_data.get('screenshot')
-                        if isinstance(screenshot, list) and screenshot:
-                            screenshot = screenshot[0]
-                        elif isinstance(screenshot, list):
-                            screenshot = None
-                        
-                        # Обмежуємо довжину qa_auto_coverage
-                        qa_auto_coverage = testcase_data.get('qa_auto_coverage')
-                        if qa_auto_coverage and len(qa_auto_coverage) > 255:
-                            qa_auto_coverage = qa_auto_coverage[:252] + "..."
-                        
-                        testcase = TestCase(
-                            checklist_id=checklist.id,
-                            step=testcase_data.get('step', 'No step defined'),
-                            expected_result=testcase_data.get('expected_result', 'No result defined'),
-                            screenshot=screenshot,
-                            priority=priority,
-                            test_group=testcase_data.get('test_group'),
-                            functionality=testcase_data.get('functionality'),
-                            order_index=testcase_data.get('order_index', 0),
-                            config_id=config_id,
-                            qa_auto_coverage=qa_auto_coverage
-                        )
-                        session.add(testcase)
-                        testcases_created += 1
-                
-                session.commit()
-                
-                return {
-                    'success': True,
-                    'testcases_created': testcases_created,
-                    'configs_created': configs_created
-                }
-                
-            finally:
-                session.close()
-                
+            replace = work.result.get('replaced', False)
+            failure = self._check_parse_result(work.testcases or [], work.parse_seconds, work.parse_error)
+            if failure:
+                if replace and work.parse_error is None:
+                    # The new version has no testcases, the old ones are gone from the page too
+                    self._delete_checklist_row(work.page['id'])
+                return failure
+            
+            result = self._write_checklist(work.page_content, work.testcases, replace=replace)
+            result['parse_summary'] = (
+                f"HTML парсер знайшов {len(work.testcases)} тесткейсів за {work.parse_seconds:.2f}с"
+            )
+            return result
+        
         except Exception as e:
             return {'success': False, 'reason': f'Помилка: {str(e)}'}
     
-    async def _process_page_vector(self, page: Dict[str, Any]) -> Dict[str, Any]:
-        """Обробляє сторінку для векторної бази."""
+    def _write_checklist(
+        self,
+        page_content: Dict[str, Any],
+        html_testcases: List[Dict[str, Any]],
+        replace: bool = False
+    ) -> Dict[str, Any]:
+        """Створює чекліст з тесткейсами та конфігами в одній транзакції.
+        
+        З ``replace`` стара версія чекліста видаляється в тій самій транзакції,
+        тож при помилці запису в БД лишається попередня версія.
+        """
+        page_id = page_content['id']
+        title = page_content['title']
+        content = page_content.get('content', '')
+        
+        # Create checklist in DB
+        session = self.qa_repo.get_session()
         try:
-            # Normalize content
-            normalized_content = self.confluence_api.normalize_content(page["content"])
+            if replace:
+                previous = session.get(Checklist, page_id)
+                if previous is not None:
+                    session.delete(previous)
+                    session.flush()
+            
+            # Визначаємо секцію на основі батьківської сторінки
+            section = self._find_or_create_section(session, page_content, title)
+            
+            # Create checklist
+            content_hash = hashlib.md5(content.encode()).hexdigest()
             
-            # Chunk the content
-            chunks = self.chunker.chunk_text(normalized_content)
+            # Determine subcategory from page hierarchy
+            subcategory = self._determine_subcategory(page_content, title)
+            
+            # Формуємо правильний URL
+            space_key = page_content.get('space', 'QMT')
+            confluence_url = self._build_confluence_url(page_id, space_key, title)
+            
+            checklist = Checklist(
+                id=page_id,  # Використовуємо confluence_page_id як primary key
+                confluence_page_id=page_id,
+                title=title,
+                description=title,  # Використовуємо title як description
+                additional_content=None,
+                url=confluence_url,
+                space_key=space_key,
+                section_id=section.id,
+                subcategory=subcategory,
+                content_hash=content_hash,
+                version=page_content.get('version', 1)
+            )
+            
+            session.add(checklist)
+            session.flush()
+            
+            # Configs resolved through the run cache, testcases in one executemany
+            config_ids, new_configs = self._resolve_config_ids(
+                session, {tc['config'] for tc in html_testcases if tc.get('config')}
+            )
+            testcase_rows = [
+                self._testcase_row(checklist.id, testcase_data, config_ids)
+                for testcase_data in html_testcases
+                if testcase_data.get('expected_result') and testcase_data.get('step')
+            ]
+            if testcase_rows:
+                session.execute(insert(TestCase), testcase_rows)
+            
+            session.commit()
+            # Only committed configs go to the cache, a rolled back page must not leave stale ids
+            self._config_ids.update(new_configs)
             
+            return {
+                'success': True,
+                'testcases_created': len(testcase_rows),
+                'configs_created': len(new_configs)
+            }
+        finally:
+            session.close()
+    
+    async def _process_page_vector(self, page: Dict[str, Any], replace: bool = False) -> Dict[str, Any]:
+        """Обробляє сторінку для векторної бази."""
+        try:
+            chunks = self._chunk_page(page)
             if not chunks:
+                if replace:
+                    self.vector_repo.delete_document_chunks(page['id'])
                 return {'success': False, 'reason': 'Немає контенту для чанків'}
             
-            # Generate embeddings for chunks
-            chunk_embeddings = self.embedder.embed_batch([f"{page['title']}\n\n{chunk}" for chunk in chunks])
-            
-            # Upsert chunks to vector database
-            chunks_data = []
-            for i, (chunk_text, embedding) in enumerate(zip(chunks, chunk_embeddings)):
-                if embedding is None:
-                    continue
-                
-                chunk_id = f"{page['id']}_{i}"
-                chunk_data = {
-                    "chunk_id": chunk_id,
-                    "embedding": embedding,
-                    "document_id": page['id'],
-                    "confluence_page_id": page["id"],
-                    "title": page["title"],
-                    "url": page["url"],
-                    "space": page["space"],
-                    "labels": page["labels"],
-                    "feature_id": None,
-                    "feature_name": None,
-                    "chunk_ordinal": i,
-                    "text": chunk_text
-                }
-                chunks_data.append(chunk_data)
-            
-            # Batch upsert to vector database
-            successful_chunks, failed_chunks = self.vector_repo.upsert_chunks_batch(chunks_data)
+            chunk_embeddings = self._embed_chunks(page, chunks)
+            chunks_data = self._build_chunks_data(page, chunks, chunk_embeddings)
+            successful_chunks, failed_chunks = self._upsert_chunks(chunks_data)
+            if replace and successful_chunks:
+                self._delete_stale_chunks(page['id'], chunks_data)
             
             return {
                 'success': True,
@@ -551,6 +1060,59 @@ class UnifiedConfluenceLoader:
         except Exception as e:
             return {'success': False, 'reason': f'Помилка: {str(e)}'}
     
+    def _chunk_page(self, page: Dict[str, Any]) -> List[str]:
+        """Нормалізує контент сторінки та розбиває на чанки."""
+        normalized_content = self.confluence_api.normalize_content(page["content"])
+        return self.chunker.chunk_text(normalized_content)
+    
+    def _embed_chunks(self, page: Dict[str, Any], chunks: List[str]) -> List[Optional[List[float]]]:
+        """Generate embeddings for chunks (title is prepended for context)."""
+        return self.embedder.embed_batch([f"{page['title']}\n\n{chunk}" for chunk in chunks])
+    
+    def _build_chunks_data(
+        self,
+        page: Dict[str, Any],
+        chunks: List[str],
+        chunk_embeddings: Optional[List[Optional[List[float]]]]
+    ) -> List[Dict[str, Any]]:
+        """Формує дані чанків для upsert у векторну базу."""
+        chunks_data = []
+        for i, (chunk_text, embedding) in enumerate(zip(chunks, chunk_embeddings or [])):
+            if embedding is None:
+                continue
+            
+            chunks_data.append({
+                "chunk_id": f"{page['id']}_{i}",
+                "embedding": embedding,
+                "document_id": page['id'],
+                "confluence_page_id": page["id"],
+                "title": page["title"],
+                "url": page["url"],
+                "space": page["space"],
+                "labels": page["labels"],
+                "feature_id": None,
+                "feature_name": None,
+                "chunk_ordinal": i,
+                "text": chunk_text
+            })
+        return chunks_data
+    
+    def _delete_stale_chunks(self, page_id: str, chunks_data: List[Dict[str, Any]]) -> None:
+        """Видаляє чанки старої версії сторінки, яких немає серед щойно записаних.
+        
+        Id чанків детерміновані (``<page_id>_<ordinal>``), тож upsert уже
+        перезаписав спільні позиції; лишаються зайві чанки довшої старої версії.
+        """
+        self.vector_repo.delete_document_chunks(
+            page_id, keep_ordinals=[chunk['chunk_ordinal'] for chunk in chunks_data]
+        )
+    
+    def _upsert_chunks(self, chunks_data: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Batch upsert to vector database."""
+        if self.side_by_side:
+            return self.vector_repo.update_chunk_vectors(chunks_data, self.embedder.vector_name)
+        return self.vector_repo.upsert_chunks_batch(chunks_data)
+    
     
     def _log_parser_stats(self, parser_type: str, testcases_count: int, duration: float, success: bool, error: str = None, confidence: float = None):
         """Логує статистику парсера"""
@@ -578,42 +1140,145 @@ class UnifiedConfluenceLoader:
             logger.warning(f"Parser {parser_type} failed: {error}", extra=log_data)
     
     
-    def _get_or_create_config(self, session, config_name: str, config_url: str = None) -> Optional[Config]:
-        """Отримує або створює конфігурацію."""
-        if not config_name:
-            return None
+    def _resolve_config_ids(self, session, config_names) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Повертає id конфігів за назвою та окремо щойно створені конфіги.
+        
+        Назви шукаються спершу в кеші запуску, решта - одним SELECT; відсутні
+        конфіги вставляються одним executemany.
+        """
+        config_ids = {name: self._config_ids[name] for name in config_names if name in self._config_ids}
+        missing = [name for name in config_names if name not in config_ids]
+        if not missing:
+            return config_ids, {}
         
-        # Look for existing config
-        config = session.query(Config).filter(Config.name == config_name).first()
-        if config:
-            return config
+        found = dict(session.query(Config.name, Config.id).filter(Config.name.in_(missing)))
+        config_ids.update(found)
+        self._config_ids.update(found)
         
-        # Create new
-        config = Config(
-            name=config_name,
-            description=config_name,
-            url=config_url
+        new_names = [name for name in missing if name not in found]
+        if not new_names:
+            return config_ids, {}
+        
+        session.execute(
+            insert(Config),
+            [{'name': name, 'description': name, 'url': None} for name in new_names]
         )
-        session.add(config)
-        session.flush()
-        return config
+        # MySQL executemany returns no ids, read them back in one query
+        new_configs = dict(session.query(Config.name, Config.id).filter(Config.name.in_(new_names)))
+        config_ids.update(new_configs)
+        return config_ids, new_configs
+    
+    @staticmethod
+    def _testcase_row(checklist_id: str, testcase_data: Dict[str, Any], config_ids: Dict[str, int]) -> Dict[str, Any]:
+        """Значення колонок тесткейсу для bulk insert."""
+        priority = testcase_data.get('priority')
+        if priority and priority not in ['LOWEST', 'LOW', 'MEDIUM', 'HIGH', 'HIGHEST', 'CRITICAL']:
+            priority = 'MEDIUM'
+        
+        # Handle screenshot
+        screenshot = testcase_data.get('screenshot')
+        if isinstance(screenshot, list) and screenshot:
+            screenshot = screenshot[0]
+        elif isinstance(screenshot, list):
+            screenshot = None
+        
+        # Обмежуємо довжину qa_auto_coverage
+        qa_auto_coverage = testcase_data.get('qa_auto_coverage')
+        if qa_auto_coverage and len(qa_auto_coverage) > 255:
+            qa_auto_coverage = qa_auto_coverage[:252] + "..."
+        
+        return {
+            'checklist_id': checklist_id,
+            'step': testcase_data.get('step', 'No step defined'),
+            'expected_result': testcase_data.get('expected_result', 'No result defined'),
+            'screenshot': screenshot,
+            'priority': priority,
+            'test_group': testcase_data.get('test_group'),
+            'functionality': testcase_data.get('functionality'),
+            'order_index': testcase_data.get('order_index', 0),
+            'config_id': config_ids.get(testcase_data.get('config')) if testcase_data.get('config') else None,
+            'qa_auto_coverage': qa_auto_coverage
+        }
     
-    def _create_ingestion_job(self, description: str) -> IngestionJob:
+    def _create_ingestion_job(self, description: str, params: Optional[Dict[str, Any]] = None) -> IngestionJob:
         """Створює job для відстеження."""
         session = self.qa_repo.get_session()
         try:
-            job = IngestionJob(details=description)
+            job = IngestionJob(
+                details=description, mode="incremental" if self.incremental else "full", params=params
+            )
             session.add(job)
             session.commit()
+            # Loaded attributes stay readable after the session is closed
+            session.refresh(job)
             return job
         finally:
             session.close()
     
-    def _update_ingestion_job(self, job: IngestionJob, status: str, details: Dict[str, Any]):
+    def _load_resumed_job(self, job_id: int) -> IngestionJob:
+        """Повертає job для продовження та завантажує його checkpoint-и."""
+        session = self.qa_repo.get_session()
+        try:
+            job = session.get(IngestionJob, job_id)
+            if job is None:
+                raise ValueError(f"Job #{job_id} не знайдено")
+            job.status = "running"
+            job.finished_at = None
+            session.commit()
+            session.refresh(job)
+        finally:
+            session.close()
+        
+        stored = checkpoints.CheckpointStore.load(self.qa_repo.get_session, job_id)
+        self._resumed = {page_id: checkpoint for page_id, checkpoint in stored.items() if checkpoint.done}
+        self._resumed_job_id = job_id
+        self._resume_candidates = [page_id for page_id, checkpoint in stored.items() if not checkpoint.done]
+        return job
+    
+    def _pages_to_resume(self, job: IngestionJob) -> Optional[List[str]]:
+        """Незавершені сторінки job-а, якщо його обхід завершився (інакше None - обходимо знову)."""
+        if not (job.params or {}).get('crawl_complete'):
+            return None
+        return self._resume_candidates
+    
+    def _save_job_params(self, job: IngestionJob, params: Dict[str, Any]) -> None:
+        """Зберігає параметри вибірки job-а."""
+        session = self.qa_repo.get_session()
+        try:
+            # Set on the object too, so a later merge does not write the old value back
+            job.params = params
+            session.merge(job)
+            session.commit()
+        finally:
+            session.close()
+    
+    def _checkpoint(self, page: Dict[str, Any], stage: str, error: Optional[str] = None) -> None:
+        """Відмічає етап сторінки в checkpoint-ах поточного job-а."""
+        if self._checkpoints:
+            self._checkpoints.mark(page['id'], stage, checkpoints.content_hash(page), error)
+    
+    def _flush_checkpoints(self) -> None:
+        """Записує накопичені checkpoint-и; помилка запису не зупиняє завантаження."""
+        if not self._checkpoints:
+            return
+        try:
+            self._checkpoints.flush()
+        except Exception as e:
+            click.echo(f"⚠️ Не вдалося зберегти checkpoint-и: {e}", err=True)
+    
+    def _update_ingestion_job(
+        self,
+        job: IngestionJob,
+        status: str,
+        details: Dict[str, Any],
+        sync_cursor: Optional[str] = None
+    ):
         """Оновлює job."""
         session = self.qa_repo.get_session()
         try:
             job.status = status
+            if sync_cursor:
+                job.sync_cursor = sync_cursor
             job.details = f"Completed: {details}"
             job.documents_processed = details.get('checklists', 0)
             job.chunks_created = details.get('chunks', 0)
@@ -633,8 +1298,23 @@ class UnifiedConfluenceLoader:
             click.echo(f"🧪 Створено тесткейсів: {self.progress.created_testcases}")
             click.echo(f"⚙️ Створено конфігів: {self.progress.created_configs}")
             click.echo(f"⏭️ Пропущено чеклістів: {self.progress.skipped_checklists}")
+            if self.incremental:
+                click.echo(f"🔄 Оновлено чеклістів: {self.progress.updated_checklists}")
+                click.echo(f"💤 Без змін: {self.progress.unchanged_checklists}")
+                click.echo(f"🗑️ Видалено зниклих: {self.progress.deleted_checklists}")
+        if self._resumed_job_id is not None:
+            click.echo(f"♻️ Вже записано до продовження: {self.progress.resumed_pages}")
         if self.load_vector:
             click.echo(f"🔍 Створено чанків: {self.progress.chunks_created}")
+        if self._pipeline_stats:
+            click.echo("⏱️ Етапи конвеєра:")
+            for stats in self._pipeline_stats.values():
+                click.echo(
+                    f"  {stats.name:<8} {stats.processed:>5} шт, {stats.items_per_second:6.2f}/с, "
+                    f"зайнятість {stats.utilization:.0%} ({stats.workers} воркер.), "
+                    f"очікування черги {stats.blocked_seconds:.1f}с"
+                    + (f", помилок {stats.failed}" if stats.failed else "")
+                )
     
     def _build_confluence_url(self, page_id: str, space_key: str, title: str) -> str:
         """Побудова правильного URL для Confluence сторінки."""
@@ -756,13 +1436,30 @@ class UnifiedConfluenceLoader:
 @click.option('--spaces', help='Comma-separated list of space keys (e.g., QA,ENG)')
 @click.option('--labels', help='Comma-separated list of labels to filter by')
 @click.option('--since', help='Load documents updated since this date (ISO format)')
-@click.option('--limit', type=int, help='Maximum number of checklists to process')
+@click.option('--limit', type=int,
+              help='Maximum number of pages admitted for processing (including pages that only need '
+                   're-vectorizing and pages that fail to parse); unchanged pages are not counted')
 @click.option('--use-config', is_flag=True, help='Use page IDs from config')
 @click.option('--use-real-api', is_flag=True, help='Use real Confluence API instead of mock')
 @click.option('--test-connection', is_flag=True, help='Test Confluence connection and exit')
 @click.option('--mysql-only', is_flag=True, help='Load only to MySQL (skip vector DB)')
 @click.option('--vector-only', is_flag=True, help='Load only to vector DB (skip MySQL)')
-def main(page_ids, spaces, labels, since, limit, use_config, use_real_api, test_connection, mysql_only, vector_only):
+@click.option('--embedding-model', help='Embedding model (default: OPENAI_EMBEDDING_MODEL)')
+@click.option('--embedding-dimensions', type=int, help='Reduced embedding dimensions for text-embedding-3-* models')
+@click.option('--side-by-side', is_flag=True, help='Only write the named vector of the given model/dimensions into existing chunks')
+@click.option('--incremental', is_flag=True, help='Replace only checklists whose Confluence version/content changed')
+@click.option('--delete-missing', is_flag=True,
+              help='With --incremental: delete checklists no longer present in crawled spaces (--spaces crawls only)')
+@click.option('--since-last-sync', is_flag=True, help='With --incremental: use the cursor of the last successful sync as --since')
+@click.option('--parse-workers', type=int, help='HTML parsing processes (default: INGEST_PARSE_WORKERS or CPU count)')
+@click.option('--embed-concurrency', type=int, help='Concurrent embedding requests (default: INGEST_EMBED_CONCURRENCY)')
+@click.option('--table-extractor', type=click.Choice(['dom', 'streaming']), default='dom',
+              help='Checklist table extraction: full DOM or streaming parser events (large pages)')
+@click.option('--resume', 'resume_job_id', type=int,
+              help='Resume an interrupted ingestion job: skip written pages, retry failed ones')
+def main(page_ids, spaces, labels, since, limit, use_config, use_real_api, test_connection, mysql_only, vector_only,
+         embedding_model, embedding_dimensions, side_by_side, incremental, delete_missing, since_last_sync,
+         parse_workers, embed_concurrency, table_extractor, resume_job_id):
     """Unified Confluence loader - завантажує дані в MySQL та векторну базу."""
     
     # Validate environment
@@ -778,6 +1475,28 @@ def main(page_ids, spaces, labels, since, limit, use_config, use_real_api, test_
         click.echo("Error: Must load to at least one destination (MySQL or Vector DB)", err=True)
         sys.exit(1)
     
+    if side_by_side and load_mysql:
+        click.echo("Error: --side-by-side requires --vector-only", err=True)
+        sys.exit(1)
+    
+    if (delete_missing or since_last_sync) and not incremental:
+        click.echo("Error: --delete-missing and --since-last-sync require --incremental", err=True)
+        sys.exit(1)
+    
+    if delete_missing and (page_ids or use_config or labels or not spaces):
+        # A subtree or label selection would make the rest of the space look deleted
+        click.echo("Error: --delete-missing needs a crawl of whole spaces: use --spaces "
+                   "without --page-ids/--use-config/--labels", err=True)
+        sys.exit(1)
+    
+    if incremental and not load_mysql:
+        click.echo("Error: --incremental needs MySQL (stored versions), remove --vector-only", err=True)
+        sys.exit(1)
+    
+    if resume_job_id is not None and not load_mysql:
+        click.echo("Error: --resume needs MySQL (stored checkpoints), remove --vector-only", err=True)
+        sys.exit(1)
+    
     # Parse arguments
     space_keys = spaces.split(',') if spaces else None
     label_list = labels.split(',') if labels else None
@@ -786,9 +1505,22 @@ def main(page_ids, spaces, labels, since, limit, use_config, use_real_api, test_
     loader = UnifiedConfluenceLoader(
         use_mock=not use_real_api,
         load_mysql=load_mysql,
-        load_vector=load_vector
+        load_vector=load_vector,
+        embedding_model=embedding_model,
+        embedding_dimensions=embedding_dimensions,
+        side_by_side=side_by_side,
+        incremental=incremental,
+        delete_missing=delete_missing,
+        parse_workers=parse_workers,
+        embed_concurrency=embed_concurrency,
+        table_extractor=table_extractor
     )
     
+    if since_last_sync and not since:
+        since = loader._get_last_sync_cursor()
+        if since:
+            click.echo(f"🕒 Продовжуємо з курсора останньої синхронізації: {since}")
+    
     # Determine page IDs to load
     pages_to_load = None
     if use_config:
@@ -800,8 +1532,8 @@ def main(page_ids, spaces, labels, since, limit, use_config, use_real_api, test_
         pages_to_load = page_ids.split(',')
     else:
         # Якщо не передано page_ids і не використовується --use-config,
-        # використовуємо ID з sections.json
-        if load_mysql:
+        # використовуємо ID з sections.json (крім --delete-missing: там обходимо простори цілком)
+        if load_mysql and not delete_missing:
             config_ids = loader.get_section_ids_from_config()
             if config_ids:
                 click.echo(f"📄 Використано ID секцій з конфігурації: {', '.join(config_ids)}")
@@ -850,7 +1582,8 @@ def main(page_ids, spaces, labels, since, limit, use_config, use_real_api, test_
             space_keys=space_keys,
             labels=label_list,
             updated_since=since,
-            limit=limit
+            limit=limit,
+            resume_job_id=resume_job_id
         ))
         
         if result["success"]:
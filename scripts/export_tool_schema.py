@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Скрипт для генерації client/tools_schema.json з реєстру інструментів сервера.
+Схеми будуються з сигнатур функцій app/mcp_tools.py і моделей app/schemas/requests.py.
+"""
+
+import sys
+import os
+import json
+import click
+
+# Додаємо корінь проекту до Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.mcp_tools import tool_schemas
+
+CLIENT_SCHEMA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'client', 'tools_schema.json'
+)
+
+
+def render_client_schema() -> str:
+    """Вміст tools_schema.json: назви з підкресленнями для stdio клієнтів."""
+    return json.dumps(tool_schemas(separator='_'), ensure_ascii=False, indent=2) + '\n'
+
+
+@click.command()
+@click.option('--output', '-o', default=CLIENT_SCHEMA_PATH, show_default=True, help='Куди записати схему')
+@click.option('--check', is_flag=True, help='Лише перевірити, що файл актуальний')
+def main(output: str, check: bool):
+    """Генерує схему інструментів для stdio MCP клієнтів."""
+    content = render_client_schema()
+    tools_count = len(json.loads(content))
+    if check:
+        with open(output, 'r', encoding='utf-8') as f:
+            if f.read() != content:
+                click.echo(f"❌ {output} застарів, запустіть scripts/export_tool_schema.py")
+                sys.exit(1)
+        click.echo(f"✅ {output} актуальний")
+        return
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(content)
+    click.echo(f"💾 Схему {tools_count} інструментів збережено у {output}")
+
+
+if __name__ == '__main__':
+    main()
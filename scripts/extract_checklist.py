@@ -17,10 +17,14 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from app.config import settings
 from app.data.qa_repository import QARepository
+from app.data.near_duplicates import (
+    DUPLICATE_THRESHOLD, DuplicateTestcaseFilter, MinHashIndex, jaccard, normalize_for_comparison
+)
 from app.models.qa_models import QASection, Checklist, TestCase, Config
 from app.ai.qa_analyzer import QAContentAnalyzer
 from scripts.confluence.confluence_real import RealConfluenceAPI
 from scripts.confluence.html_table_parser import EnhancedConfluenceTableParser
+from scripts.llm_cache import echo_hit_rates
 
 
 class UniversalChecklistExtractor:
@@ -169,6 +173,7 @@ class UniversalChecklistExtractor:
         
         # Спробуємо витягти більше тесткейсів, розбивши контент на частини
         enhanced_testcases = list(initial_testcases)  # Копіюємо початкові
+        duplicates = DuplicateTestcaseFilter(enhanced_testcases)
         
         # Розділяємо контент на логічні блоки
         content_blocks = self._split_content_into_blocks(content)
@@ -185,9 +190,10 @@ class UniversalChecklistExtractor:
                 
                 # Додаємо нові унікальні тесткейси
                 for testcase in block_analysis.testcases:
-                    if not self._is_duplicate_testcase(testcase, enhanced_testcases):
+                    if not duplicates.is_duplicate(testcase):
                         testcase['order_index'] = len(enhanced_testcases)
                         enhanced_testcases.append(testcase)
+                        duplicates.add(testcase)
                 
             except Exception as e:
                 print(f"⚠️ Помилка аналізу блоку {i+1}: {e}")
@@ -360,10 +366,14 @@ class UniversalChecklistExtractor:
         return (keyword_count >= 2 and has_table_structure) or has_priorities or keyword_count >= 5
     
     def _remove_duplicates_enhanced(self, testcases: List[Dict]) -> List[Dict]:
-        """Покращений метод видалення дублікатів з урахуванням різних джерел."""
+        """Покращений метод видалення дублікатів з урахуванням різних джерел.
+        
+        Кроки, схожі на вже прийняті більше ніж на 0.85, шукаються через
+        MinHash/LSH індекс, тож час росте лінійно з кількістю тесткейсів.
+        """
         
         unique_testcases = []
-        seen_steps = set()
+        seen_steps = MinHashIndex(DUPLICATE_THRESHOLD)
         
         for testcase in testcases:
             step = (testcase.get('step') or '').strip()
@@ -371,75 +381,33 @@ class UniversalChecklistExtractor:
             if not step or len(step) < 10:
                 continue  # Пропускаємо занадто короткі кроки
             
-            # Створюємо нормалізований ключ для порівняння
-            normalized_step = self._normalize_step_for_comparison(step)
-            
-            # Перевіряємо на дублікат
-            is_duplicate = False
-            for seen_step in seen_steps:
-                if self._calculate_similarity(normalized_step, seen_step) > 0.85:
-                    is_duplicate = True
-                    break
+            # Перевіряємо на дублікат серед прийнятих кроків
+            if seen_steps.query(step):
+                continue
             
-            if not is_duplicate:
-                seen_steps.add(normalized_step)
-                unique_testcases.append(testcase)
+            seen_steps.add(len(unique_testcases), step)
+            unique_testcases.append(testcase)
         
         return unique_testcases
     
     def _normalize_step_for_comparison(self, step: str) -> str:
         """Нормалізує крок для порівняння."""
-        
-        import re
-        
-        # Приводимо до нижнього регістру
-        normalized = step.lower().strip()
-        
-        # Видаляємо зайві пробіли
-        normalized = re.sub(r'\s+', ' ', normalized)
-        
-        # Видаляємо розділові знаки
-        normalized = re.sub(r'[^\w\s]', '', normalized)
-        
-        return normalized
+        return normalize_for_comparison(step)
     
     def _calculate_similarity(self, text1: str, text2: str) -> float:
-        """Обчислює схожість між двома текстами (простий алгоритм)."""
+        """Обчислює схожість між двома текстами (Жаккар за словами)."""
         
         if not text1 or not text2:
             return 0.0
         
-        # Простий алгоритм на основі спільних слів
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
-        
-        if not words1 or not words2:
-            return 0.0
-        
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        return len(intersection) / len(union) if union else 0.0
+        return jaccard(text1.lower().split(), text2.lower().split())
 
     def _is_duplicate_testcase(self, testcase: Dict, existing_testcases: List[Dict]) -> bool:
-        """Перевіряє чи є тесткейс дублікатом."""
-        
-        step = (testcase.get('step') or '').strip().lower()
-        expected = (testcase.get('expected_result') or '').strip().lower()
+        """Перевіряє чи є тесткейс дублікатом.
         
-        if not step and not expected:
-            return True
-        
-        for existing in existing_testcases:
-            existing_step = (existing.get('step') or '').strip().lower()
-            existing_expected = (existing.get('expected_result') or '').strip().lower()
-            
-            # Простий алгоритм схожості
-            if (step and existing_step and step[:50] == existing_step[:50]) or \
-               (expected and existing_expected and expected[:50] == existing_expected[:50]):
-                return True
-        
-        return False
+        Для перевірки багатьох тесткейсів використовуйте один ``DuplicateTestcaseFilter``.
+        """
+        return DuplicateTestcaseFilter(existing_testcases).is_duplicate(testcase)
     
     async def _add_testcases_to_database(self, testcases: List[Dict], configs: List[str]) -> Dict[str, Any]:
         """Додає тесткейси до бази даних."""
@@ -603,6 +571,7 @@ def main(checklist, list_checklists, dry_run):
             print(f"✅ Чекліст оновлено: {result['checklist_updated']}")
         else:
             print(f"\n❌ ПОМИЛКА: {result['error']}")
+        echo_hit_rates(extractor.qa_analyzer.llm_cache)
             
     except KeyboardInterrupt:
         print("\n\n⏹️ Перервано користувачем")
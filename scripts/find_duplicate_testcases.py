@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Скрипт для пошуку майже однакових тесткейсів у різних чеклістах.
+Порівнює крок і очікуваний результат за схожістю Жаккара (MinHash/LSH індекс)
+або, з --semantic, за косинусною схожістю збережених embeddings.
+"""
+
+import sys
+import os
+import json
+import time
+import click
+
+# Додаємо корінь проекту до Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.data.near_duplicates import DUPLICATE_THRESHOLD
+from app.data.qa_repository import QARepository
+
+
+def _shorten(text: str, length: int = 100) -> str:
+    text = ' '.join((text or '').split())
+    return text if len(text) <= length else text[:length - 3] + '...'
+
+
+@click.command()
+@click.option('--threshold', '-t', type=float, default=None,
+              help=f'Мінімальна схожість (default: {DUPLICATE_THRESHOLD} за словами, '
+                   f'{settings.duplicate_similarity_threshold} з --semantic)')
+@click.option('--semantic', is_flag=True, help='Порівнювати embeddings тесткейсів (блокове множення матриць)')
+@click.option('--section-id', type=int, default=None, help='З --semantic: лише тесткейси секції')
+@click.option('--block-size', type=int, default=None, help='З --semantic: рядків у плитці матриці схожості')
+@click.option('--include-same-checklist', is_flag=True, help='Враховувати дублікати всередині одного чекліста')
+@click.option('--limit', '-l', default=20, help='Скільки груп показати')
+@click.option('--output', '-o', default=None, help='Зберегти всі групи у JSON файл')
+def main(threshold: float, semantic: bool, section_id: int, block_size: int,
+         include_same_checklist: bool, limit: int, output: str):
+    """Знаходить групи майже однакових тесткейсів по всій таблиці testcases."""
+    if semantic:
+        threshold = settings.duplicate_similarity_threshold if threshold is None else threshold
+        click.echo(f"🔍 Пошук дублікатів за embeddings (косинус >= {threshold})...")
+    else:
+        threshold = DUPLICATE_THRESHOLD if threshold is None else threshold
+        click.echo(f"🔍 Пошук дублікатів (схожість > {threshold})...")
+    qa_repo = QARepository()
+    started = time.monotonic()
+    try:
+        if semantic:
+            report = qa_repo.find_semantic_duplicate_testcases(
+                threshold=threshold,
+                cross_checklist_only=not include_same_checklist,
+                section_id=section_id,
+                block_size=block_size
+            )
+            groups = report['groups']
+            click.echo(f"🧮 Порівняно {report['testcases_scanned']} embeddings"
+                       f" (пропущено {report['skipped_embeddings']})")
+        else:
+            groups = qa_repo.find_near_duplicate_testcases(
+                threshold=threshold,
+                cross_checklist_only=not include_same_checklist
+            )
+    finally:
+        qa_repo.close()
+    elapsed = time.monotonic() - started
+
+    duplicates = sum(len(group['testcases']) for group in groups)
+    click.echo(f"📊 Знайдено {len(groups)} груп ({duplicates} тесткейсів) за {elapsed:.1f}с")
+
+    for number, group in enumerate(groups[:limit], 1):
+        click.echo(f"\n#{number}: {len(group['testcases'])} тесткейсів у {group['checklists']} чеклістах"
+                   f" ({group['sections']} секціях)")
+        for testcase in group['testcases']:
+            similarity = f" ({testcase['similarity']:.3f})" if 'similarity' in testcase else ''
+            click.echo(f"   • [{testcase['id']}] {testcase['section_title']} / {testcase['checklist_title']}:"
+                       f" {_shorten(testcase['step'])}{similarity}")
+    if len(groups) > limit:
+        click.echo(f"\n... ще {len(groups) - limit} груп")
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(groups, f, ensure_ascii=False, indent=2)
+        click.echo(f"\n💾 Групи збережено у {output}")
+
+
+if __name__ == '__main__':
+    main()
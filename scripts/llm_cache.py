@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Скрипт для перегляду і очищення кешу відповідей LLM.
+Кеш зберігає розібрані результати аналізу чеклістів і фіч за моделлю, версією промпту і хешем контенту.
+"""
+
+import sys
+import os
+import click
+
+# Додаємо корінь проекту до Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.llm_cache import LLMResponseCache, get_llm_cache
+
+
+def echo_hit_rates(cache: LLMResponseCache) -> None:
+    """Виводить влучання в кеш за поточний запуск."""
+    stats = cache.stats()
+    if not stats:
+        return
+    click.echo("💾 Кеш LLM:")
+    for namespace, item in stats.items():
+        click.echo(f"   • {namespace}: {item['hits']} з кешу, {item['misses']} запитів до LLM "
+                   f"({item['hit_rate']:.0%} влучань)")
+
+
+@click.group()
+def main():
+    """Кеш відповідей LLM."""
+
+
+@main.command()
+def stats():
+    """Показує кількість записів у кеші."""
+    cache = get_llm_cache()
+    entries = cache.entries()
+    click.echo(f"📁 Файл кешу: {cache.path}")
+    if not entries:
+        click.echo("ℹ️  Кеш порожній")
+        return
+    for namespace, count in entries.items():
+        click.echo(f"   • {namespace}: {count} записів")
+    click.echo(f"📊 Всього: {sum(entries.values())}")
+
+
+@main.command()
+@click.option('--namespace', '-n', default=None, help='Тільки записи аналізатора (qa_analysis, checklist_analysis, feature_generation)')
+@click.option('--model', '-m', default=None, help='Тільки записи моделі')
+@click.option('--prompt-version', default=None, help='Тільки записи версії промпту')
+def clear(namespace, model, prompt_version):
+    """Видаляє записи з кешу (всі, якщо не вказано фільтрів)."""
+    deleted = get_llm_cache().invalidate(namespace=namespace, model=model, prompt_version=prompt_version)
+    click.echo(f"🗑️  Видалено записів: {deleted}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Скрипт для міграції таблиці testcases під дедуплікацію embeddings.
+Додає поле embedding_text_hash (хеш нормалізованого тексту embedding) з індексом.
+Хеші для вже порахованих embeddings проставляє scripts/update_embeddings.py без запитів до API.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data.qa_repository import QARepository
+from sqlalchemy import text
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate_embedding_hash():
+    """Виконує міграцію поля embedding_text_hash."""
+    
+    qa_repo = QARepository()
+    session = qa_repo.get_session()
+    
+    try:
+        logger.info("🚀 Починаємо міграцію testcases...")
+        
+        result = session.execute(text("SHOW COLUMNS FROM testcases LIKE 'embedding_text_hash'"))
+        if result.fetchone() is not None:
+            logger.info("ℹ️ Поле embedding_text_hash вже існує - пропускаємо")
+        else:
+            logger.info("🔧 Додаємо поле embedding_text_hash до таблиці testcases...")
+            session.execute(text("""
+                ALTER TABLE testcases
+                ADD COLUMN embedding_text_hash CHAR(64) NULL
+                COMMENT 'sha256 of the normalized text the embedding was computed from'
+            """))
+            session.execute(text("""
+                ALTER TABLE testcases
+                ADD INDEX ix_testcases_embedding_text_hash (embedding_text_hash)
+            """))
+            logger.info("✅ Поле embedding_text_hash додано")
+        
+        session.commit()
+        logger.info("🎉 Міграція успішно завершена!")
+        
+    except Exception as e:
+        session.rollback()
+        logger.error(f"❌ Помилка під час міграції: {e}")
+        raise
+    finally:
+        session.close()
+        qa_repo.close()
+
+if __name__ == "__main__":
+    migrate_embedding_hash()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Скрипт для міграції таблиці ingestion_jobs під інкрементальну синхронізацію.
+Додає поля mode та sync_cursor (курсор останньої зміни в Confluence),
+params (вибірка сторінок для --resume) та таблицю ingestion_checkpoints.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data.qa_repository import QARepository
+from app.models.qa_models import IngestionCheckpoint
+from sqlalchemy import text
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COLUMNS = {
+    "mode": "VARCHAR(20) NULL COMMENT 'full or incremental'",
+    "sync_cursor": "VARCHAR(64) NULL COMMENT 'Latest Confluence modification time seen (UTC)'",
+    "params": "JSON NULL COMMENT 'Page selection of the run, reused by --resume'",
+}
+
+
+def migrate_ingestion_sync():
+    """Виконує міграцію полів інкрементальної синхронізації."""
+    
+    qa_repo = QARepository()
+    session = qa_repo.get_session()
+    
+    try:
+        logger.info("🚀 Починаємо міграцію ingestion_jobs...")
+        
+        for column, definition in COLUMNS.items():
+            result = session.execute(text(f"SHOW COLUMNS FROM ingestion_jobs LIKE '{column}'"))
+            if result.fetchone() is not None:
+                logger.info(f"ℹ️ Поле {column} вже існує - пропускаємо")
+                continue
+            
+            logger.info(f"🔧 Додаємо поле {column} до таблиці ingestion_jobs...")
+            session.execute(text(f"ALTER TABLE ingestion_jobs ADD COLUMN {column} {definition}"))
+            logger.info(f"✅ Поле {column} додано")
+        
+        session.commit()
+        
+        logger.info("🔧 Створюємо таблицю ingestion_checkpoints (якщо її немає)...")
+        IngestionCheckpoint.__table__.create(qa_repo.engine, checkfirst=True)
+        logger.info("🎉 Міграція успішно завершена!")
+        
+    except Exception as e:
+        session.rollback()
+        logger.error(f"❌ Помилка під час міграції: {e}")
+        raise
+    finally:
+        session.close()
+        qa_repo.close()
+
+if __name__ == "__main__":
+    migrate_ingestion_sync()
@@ -8,16 +8,26 @@ import sys
 import os
 import click
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # Додаємо корінь проекту до Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.config import settings
-from app.data.qa_repository import QARepository
+from app.data.qa_repository import EmbeddingBackfillProgress, QARepository
 from app.ai.embedder import OpenAIEmbedder
 
 
+def _format_duration(seconds: float) -> str:
+    """Тривалість у вигляді 1г02м03с."""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}г{minutes:02d}м{seconds:02d}с"
+    return f"{minutes}м{seconds:02d}с" if minutes else f"{seconds}с"
+
+
 class EmbeddingUpdater:
     """Клас для оновлення embeddings тесткейсів."""
     
@@ -25,6 +35,8 @@ class EmbeddingUpdater:
         """Ініціалізація."""
         self.qa_repo = QARepository()
         self.embedder = OpenAIEmbedder()
+        # Last reported progress, used to print where to resume after Ctrl+C
+        self.progress: Optional[EmbeddingBackfillProgress] = None
         
     def check_connection(self) -> bool:
         """Перевіряє з'єднання з OpenAI API."""
@@ -65,10 +77,37 @@ class EmbeddingUpdater:
         finally:
             session.close()
     
-    def update_embeddings(self, batch_size: int = 50, dry_run: bool = False) -> Dict[str, Any]:
-        """Оновлює embeddings для тесткейсів."""
+    def _report_progress(self, progress: EmbeddingBackfillProgress) -> None:
+        """Виводить швидкість, ETA та id, з якого можна продовжити."""
+        self.progress = progress
+        eta = _format_duration(progress.eta_seconds) if progress.eta_seconds is not None else "?"
+        click.echo(
+            f"⏳ {progress.processed}/{progress.total} ({progress.processed / progress.total * 100:.1f}%), "
+            f"{progress.rate:.1f}/с, ETA {eta}, записано до id {progress.committed_id}"
+            + (f", помилок {progress.failed}" if progress.failed else "")
+        )
+    
+    def update_embeddings(
+        self,
+        batch_size: int = 50,
+        dry_run: bool = False,
+        concurrency: Optional[int] = None,
+        start_after_id: int = 0,
+        recheck: bool = False,
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """Оновлює embeddings для тесткейсів.
+        
+        Однакові (після нормалізації) тексти рахуються через API один раз;
+        з ``recheck`` перевіряються всі тесткейси і заново рахуються лише ті,
+        текст або модель/розмірність embeddings яких змінились; з ``force``
+        заново рахуються всі.
+        """
+        recheck = recheck or force
         click.echo(f"🚀 Початок оновлення embeddings...")
-        click.echo(f"📊 Розмір батчу: {batch_size}")
+        click.echo(f"📊 Розмір батчу: {batch_size}, паралельних батчів: {concurrency or settings.ingest_embed_concurrency}")
+        if start_after_id:
+            click.echo(f"▶️ Продовжуємо після id {start_after_id}")
         
         if dry_run:
             click.echo("🔍 DRY RUN - нічого не буде змінено")
@@ -80,7 +119,7 @@ class EmbeddingUpdater:
         click.echo(f"   • З embeddings: {stats['with_embeddings']} ({stats['percentage']:.1f}%)")
         click.echo(f"   • Без embeddings: {stats['without_embeddings']}")
         
-        if stats['without_embeddings'] == 0:
+        if stats['without_embeddings'] == 0 and not recheck:
             click.echo("✅ Всі тесткейси вже мають embeddings!")
             return {
                 'success': True,
@@ -89,6 +128,15 @@ class EmbeddingUpdater:
                 'updated': 0
             }
         
+        if dry_run and recheck:
+            click.echo(f"🔍 DRY RUN: Було б {'перераховано' if force else 'перевірено'} {stats['total']} тесткейсів")
+            return {
+                'success': True,
+                'message': f'DRY RUN: Would recheck {stats["total"]} testcases',
+                'total': stats['total'],
+                'updated': 0
+            }
+        
         if dry_run:
             click.echo(f"🔍 DRY RUN: Було б оновлено {stats['without_embeddings']} тесткейсів")
             return {
@@ -99,13 +147,21 @@ class EmbeddingUpdater:
             }
         
         # Підтвердження
-        if not click.confirm(f"❓ Продовжити оновлення {stats['without_embeddings']} тесткейсів?"):
+        to_update = stats['total'] if recheck else stats['without_embeddings']
+        if not click.confirm(f"❓ Продовжити оновлення {to_update} тесткейсів?"):
             click.echo("❌ Операцію скасовано")
             return {'success': False, 'message': 'Cancelled by user'}
         
         # Виконуємо оновлення
         start_time = time.time()
-        result = self.qa_repo.update_all_embeddings(batch_size=batch_size)
+        result = self.qa_repo.update_all_embeddings(
+            batch_size=batch_size,
+            concurrency=concurrency,
+            start_after_id=start_after_id,
+            on_progress=self._report_progress,
+            recheck=recheck,
+            force=force
+        )
         end_time = time.time()
         
         # Виводимо результати
@@ -114,11 +170,22 @@ class EmbeddingUpdater:
             click.echo(f"📊 Результати:")
             click.echo(f"   • Всього оброблено: {result['total']}")
             click.echo(f"   • Успішно оновлено: {result['updated']}")
+            if result.get('updated'):
+                click.echo(
+                    f"   • Запитів до API: {result['embedded_texts']} унікальних текстів, "
+                    f"скопійовано вектор однакового тексту: {result['reused']}"
+                )
+            if result.get('skipped'):
+                click.echo(f"   • Текст не змінився: {result['skipped']}")
+            if result.get('stamped'):
+                click.echo(f"   • Додано хеш тексту до існуючих embeddings: {result['stamped']}")
             if result.get('failed', 0) > 0:
                 click.echo(f"   • Помилок: {result['failed']}")
             click.echo(f"⏱️  Час виконання: {end_time - start_time:.1f} секунд")
         else:
             click.echo(f"❌ Помилка оновлення: {result.get('error', 'Unknown error')}")
+            if result.get('last_committed_id'):
+                click.echo(f"▶️ Продовжити: --start-after-id {result['last_committed_id']}")
         
         return result
     
@@ -132,7 +199,13 @@ class EmbeddingUpdater:
 @click.option('--dry-run', '-d', is_flag=True, help='Тільки показати що буде зроблено, не виконувати')
 @click.option('--stats-only', '-s', is_flag=True, help='Тільки показати статистику')
 @click.option('--check-connection', '-c', is_flag=True, help='Тільки перевірити з\'єднання з OpenAI')
-def main(batch_size: int, dry_run: bool, stats_only: bool, check_connection: bool):
+@click.option('--concurrency', '-j', type=int, help='Паралельних батчів (default: INGEST_EMBED_CONCURRENCY)')
+@click.option('--start-after-id', type=int, default=0, help='Продовжити з тесткейсів з id більше за вказаний')
+@click.option('--recheck', is_flag=True,
+              help='Перевірити всі тесткейси і перерахувати ті, текст або модель embeddings яких змінились')
+@click.option('--force', is_flag=True, help='Перерахувати embeddings всіх тесткейсів через API')
+def main(batch_size: int, dry_run: bool, stats_only: bool, check_connection: bool,
+         concurrency: Optional[int], start_after_id: int, recheck: bool, force: bool):
     """Скрипт для оновлення embeddings тесткейсів."""
     
     click.echo("🔧 QA Embeddings Updater")
@@ -142,6 +215,9 @@ def main(batch_size: int, dry_run: bool, stats_only: bool, check_connection: boo
     if batch_size < 1 or batch_size > 100:
         click.echo("❌ Помилка: batch_size повинен бути від 1 до 100")
         sys.exit(1)
+    if concurrency is not None and concurrency < 1:
+        click.echo("❌ Помилка: concurrency повинен бути не менше 1")
+        sys.exit(1)
     
     updater = EmbeddingUpdater()
     
@@ -166,7 +242,14 @@ def main(batch_size: int, dry_run: bool, stats_only: bool, check_connection: boo
             sys.exit(1)
         
         # Оновлюємо embeddings
-        result = updater.update_embeddings(batch_size=batch_size, dry_run=dry_run)
+        result = updater.update_embeddings(
+            batch_size=batch_size,
+            dry_run=dry_run,
+            concurrency=concurrency,
+            start_after_id=start_after_id,
+            recheck=recheck,
+            force=force
+        )
         
         if result['success']:
             click.echo("🎉 Операція завершена успішно!")
@@ -177,6 +260,8 @@ def main(batch_size: int, dry_run: bool, stats_only: bool, check_connection: boo
             
     except KeyboardInterrupt:
         click.echo("\n⏹️  Операцію перервано користувачем")
+        if updater.progress and updater.progress.committed_id:
+            click.echo(f"▶️ Продовжити: --start-after-id {updater.progress.committed_id}")
         sys.exit(1)
     except Exception as e:
         click.echo(f"💥 Неочікувана помилка: {e}")
@@ -99,6 +99,15 @@ def mock_vector_repo():
     return repo
 
 
+@pytest.fixture
+def mock_async_vector_repo(mock_vector_repo):
+    """Create mocked async vector repository with the same search results."""
+    repo = Mock()
+    repo.search = AsyncMock(return_value=mock_vector_repo.search.return_value)
+    repo.close = AsyncMock()
+    return repo
+
+
 @pytest.fixture
 def sample_qa_data(test_session):
     """Create sample QA data for tests."""
@@ -0,0 +1,200 @@
+"""Unit tests for the concurrent batch LLM analyzer."""
+
+import asyncio
+import json
+import time
+
+import pytest
+from unittest.mock import Mock
+
+from app.ai.llm_cache import LLMResponseCache
+from scripts.analyze.batch_llm_analyzer import (
+    BatchLLMAnalyzer, MinuteBudget, estimate_tokens, export_batch_requests, import_batch_results
+)
+from scripts.analyze.llm_checklist_analyzer import LLMChecklistAnalyzer, run_batch_analysis
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = Mock(headers={"retry-after": retry_after} if retry_after else {})
+
+
+def _completion(text, total_tokens=100):
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = text
+    response.usage.total_tokens = total_tokens
+    return response
+
+
+class _FakeAsyncClient:
+    """Chat client whose latency depends on the checklist, with optional scripted errors."""
+
+    def __init__(self, latency=0.05, errors=None):
+        self.latency = latency
+        self.errors = errors or {}
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat = Mock()
+        self.chat.completions.create = self.create
+
+    async def create(self, **request):
+        title = request["messages"][1]["content"].split("НАЗВА: ")[1].split("\n")[0]
+        self.calls.append(title)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Earlier checklists are slower, so completion order differs from input order
+            await asyncio.sleep(self.latency * (1 + 1 / (1 + len(self.calls))))
+            errors = self.errors.get(title)
+            if errors:
+                raise errors.pop(0)
+            return _completion(json.dumps({"description": title, "testcases": [{"step": title}], "confidence": 0.9}))
+        finally:
+            self.in_flight -= 1
+
+
+def _checklists(count):
+    return [{"page_id": str(i), "title": f"Checklist {i}", "content": f"<table>{i}</table>"} for i in range(count)]
+
+
+@pytest.mark.unit
+class TestBatchLLMAnalyzer:
+    """Test concurrency, ordering, retries and batch export."""
+
+    @pytest.fixture
+    def analyzer(self, tmp_path):
+        return LLMChecklistAnalyzer(llm_cache=LLMResponseCache(str(tmp_path / "llm.sqlite"), enabled=True))
+
+    @pytest.mark.asyncio
+    async def test_results_are_ordered_and_concurrent(self, analyzer):
+        client = _FakeAsyncClient(latency=0.05)
+        batch = BatchLLMAnalyzer(analyzer, client=client, concurrency=10)
+
+        started = time.perf_counter()
+        results = [item async for item in batch.analyze(_checklists(40))]
+        elapsed = time.perf_counter() - started
+
+        assert [index for index, _ in results] == list(range(40))
+        assert [analysis.description for _, analysis in results] == [f"Checklist {i}" for i in range(40)]
+        assert client.max_in_flight == 10
+        # 40 sequential calls would take over 2s
+        assert elapsed < 1.0
+        assert batch.stats["requests"] == 40 and batch.stats["tokens"] == 4000
+
+    @pytest.mark.asyncio
+    async def test_retries_then_fallback(self, analyzer):
+        client = _FakeAsyncClient(latency=0.01, errors={
+            "Checklist 1": [_StatusError(429, retry_after="0"), _StatusError(503)],
+            "Checklist 2": [_StatusError(400)],
+            "Checklist 3": [_StatusError(500)] * 3,
+        })
+        batch = BatchLLMAnalyzer(analyzer, client=client, concurrency=4, max_retries=2, backoff_base=0.01)
+
+        results = dict([item async for item in batch.analyze(_checklists(5))])
+
+        assert results[1].description == "Checklist 1"
+        assert results[2].structure_confidence == 0.1  # not retryable
+        assert results[3].structure_confidence == 0.1  # retries exhausted
+        assert client.calls.count("Checklist 1") == 3
+        assert client.calls.count("Checklist 2") == 1
+        assert client.calls.count("Checklist 3") == 3
+        assert batch.stats["throttled"] == 1 and batch.stats["retries"] == 4 and batch.stats["failed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_cached_checklists_skip_the_model(self, analyzer):
+        first = BatchLLMAnalyzer(analyzer, client=_FakeAsyncClient(latency=0.01), concurrency=4)
+        [item async for item in first.analyze(_checklists(6))]
+
+        client = _FakeAsyncClient(latency=0.01)
+        second = BatchLLMAnalyzer(analyzer, client=client, concurrency=4)
+        results = [analysis for _, analysis in [item async for item in second.analyze(_checklists(8))]]
+
+        assert client.calls == ["Checklist 6", "Checklist 7"]
+        assert second.stats["cached"] == 6
+        assert [r.description for r in results] == [f"Checklist {i}" for i in range(8)]
+
+    @pytest.mark.asyncio
+    async def test_stream_file_is_written_in_order(self, analyzer, tmp_path):
+        batch = BatchLLMAnalyzer(analyzer, client=_FakeAsyncClient(latency=0.01), concurrency=5)
+        path = tmp_path / "out.jsonl"
+
+        results = await run_batch_analysis(batch, _checklists(12), str(path))
+
+        lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert [line["page_id"] for line in lines] == [str(i) for i in range(12)]
+        assert lines[3]["description"] == "Checklist 3" and len(results) == 12
+
+    def test_export_and_import_batch(self, analyzer, tmp_path):
+        checklists = _checklists(4) + [_checklists(1)[0]]
+        analyzer.llm_cache.set(
+            analyzer.CACHE_NAMESPACE, analyzer.model, analyzer.PROMPT_VERSION,
+            analyzer.cache_key("Checklist 0", "<table>0</table>"), {"description": "cached"}
+        )
+        requests_path = tmp_path / "requests.jsonl"
+
+        counts = export_batch_requests(analyzer, checklists, str(requests_path))
+
+        lines = [json.loads(line) for line in requests_path.read_text(encoding="utf-8").splitlines()]
+        assert counts == {"requests": 3, "cached": 1, "duplicates": 1}
+        assert lines[0]["url"] == "/v1/chat/completions" and lines[0]["method"] == "POST"
+        assert lines[0]["body"]["model"] == analyzer.model and lines[0]["body"]["max_tokens"] == 4000
+
+        results_path = tmp_path / "results.jsonl"
+        results = [
+            {"custom_id": line["custom_id"], "response": {"status_code": 200, "body": {
+                "choices": [{"message": {"content": json.dumps({"description": f"batch {i}"})}}]}}}
+            for i, line in enumerate(lines)
+        ]
+        results[2] = {"custom_id": lines[2]["custom_id"], "response": None, "error": {"code": "expired"}}
+        results_path.write_text("\n".join(json.dumps(r) for r in results), encoding="utf-8")
+
+        assert import_batch_results(analyzer, str(results_path)) == {"imported": 2, "failed": 1}
+        analyzer.client = Mock()
+        assert analyzer.analyze_checklist_content("Checklist 1", "<table>1</table>").description == "batch 0"
+        analyzer.client.chat.completions.create.assert_not_called()
+
+
+@pytest.mark.unit
+class TestMinuteBudget:
+    """Test the per-minute request/token budget."""
+
+    @pytest.mark.asyncio
+    async def test_waits_for_refill(self):
+        now = [0.0]
+        sleeps = []
+
+        async def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        budget = MinuteBudget(60, clock=lambda: now[0], sleep=sleep)
+        for _ in range(60):
+            await budget.acquire()
+        assert sleeps == []
+
+        await budget.acquire(3)
+        assert sleeps == [pytest.approx(3.0)]
+
+        budget.adjust(-10)  # used less than estimated
+        await budget.acquire(10)
+        assert len(sleeps) == 1
+
+    @pytest.mark.asyncio
+    async def test_unlimited_and_oversized(self):
+        await MinuteBudget(None).acquire(10 ** 9)
+        now = [0.0]
+
+        async def sleep(seconds):
+            now[0] += seconds
+
+        budget = MinuteBudget(100, clock=lambda: now[0], sleep=sleep)
+        await budget.acquire(5000)  # larger than the budget still goes through once full
+        assert now[0] == 0.0
+
+    def test_estimate_tokens(self):
+        request = {"messages": [{"content": "a" * 30}, {"content": "b" * 60}], "max_tokens": 4000}
+        assert estimate_tokens(request) == 4030
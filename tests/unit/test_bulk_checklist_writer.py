@@ -0,0 +1,133 @@
+"""Unit tests for the bulk checklist writer of the unified loader."""
+
+import pytest
+from unittest.mock import Mock
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import qa_models
+from app.models.qa_models import Base, Checklist, Config, Priority, QASection
+from scripts.confluence.unified_loader import LoadingProgress, UnifiedConfluenceLoader
+
+
+def _page(page_id):
+    return {"id": page_id, "title": f"Checklist {page_id}", "space": "QA", "version": 1, "content": "<p/>"}
+
+
+def _rows(count, configs=("Auth", "Billing", "Profile")):
+    return [
+        {
+            "step": f"Step {i}",
+            "expected_result": f"Result {i}",
+            "priority": "HIGH",
+            "config": configs[i % len(configs)] if configs else None,
+            "order_index": i,
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.unit
+class TestBulkChecklistWriter:
+    """Test round trips, the config cache and row values of _write_checklist."""
+
+    @pytest.fixture
+    def engine(self):
+        engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        yield engine
+        engine.dispose()
+
+    @pytest.fixture
+    def statements(self, engine):
+        executed = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def record(conn, cursor, statement, parameters, context, executemany):
+            executed.append(statement.split()[0].upper())
+
+        return executed
+
+    @pytest.fixture
+    def test_session(self, engine):
+        session = sessionmaker(bind=engine)()
+        session.add(QASection(id=1, title="Section", url="http://test", confluence_page_id="s1", space_key="QA"))
+        session.commit()
+        yield session
+        session.close()
+
+    @pytest.fixture
+    def loader(self, engine, test_session):
+        loader = UnifiedConfluenceLoader.__new__(UnifiedConfluenceLoader)
+        loader.progress = LoadingProgress()
+        loader._config_ids = {}
+        loader._sections_config = {}
+        loader.qa_repo = Mock()
+        loader.qa_repo.get_session.side_effect = sessionmaker(bind=engine)
+        loader._find_or_create_section = lambda session, page, title: session.get(QASection, 1)
+        return loader
+
+    def test_page_statements_do_not_grow_with_rows(self, loader, statements):
+        loader._write_checklist(_page("1"), _rows(5))
+        small = len(statements)
+        statements.clear()
+
+        result = loader._write_checklist(_page("2"), _rows(500, configs=("Auth", "Search")))
+
+        assert result["testcases_created"] == 500
+        assert len(statements) <= small
+
+    def test_configs_are_cached_for_the_run(self, loader, test_session, statements):
+        first = loader._write_checklist(_page("1"), _rows(30))
+        statements.clear()
+        second = loader._write_checklist(_page("2"), _rows(30))
+
+        # Cached names need neither a config SELECT nor an INSERT
+        assert statements == ["SELECT", "INSERT", "INSERT"]  # section, checklist, testcases
+        assert first["configs_created"] == 3
+        assert second["configs_created"] == 0
+        assert test_session.query(Config).count() == 3
+
+    def test_existing_configs_are_reused(self, loader, test_session):
+        test_session.add(Config(name="Auth", description="Auth"))
+        test_session.commit()
+        auth_id = test_session.query(Config.id).filter(Config.name == "Auth").scalar()
+
+        result = loader._write_checklist(_page("1"), _rows(6))
+
+        assert result["configs_created"] == 2
+        assert loader._config_ids["Auth"] == auth_id
+        testcase = test_session.query(qa_models.TestCase).filter_by(order_index=0).one()
+        assert testcase.config_id == auth_id
+
+    def test_failed_page_does_not_cache_configs(self, loader, test_session):
+        loader._write_checklist(_page("1"), _rows(1, configs=("Auth",)))
+        rows = _rows(2, configs=("Auth", "Broken"))
+        rows[1]["expected_result"] = object()  # fails the testcase insert after configs were written
+
+        with pytest.raises(Exception):
+            loader._write_checklist(_page("2"), rows)
+
+        assert set(loader._config_ids) == {"Auth"}
+        assert test_session.query(Config).count() == 1
+        assert test_session.get(Checklist, "2") is None
+
+    def test_row_values(self, loader, test_session):
+        rows = [
+            {"step": "Open", "expected_result": "Shown", "priority": "urgent", "screenshot": ["a.png", "b.png"],
+             "qa_auto_coverage": "x" * 300, "test_group": "GENERAL", "functionality": "Login", "order_index": 3},
+            {"step": "Close", "expected_result": "Hidden", "screenshot": []},
+            {"step": "No result", "expected_result": ""},
+        ]
+
+        result = loader._write_checklist(_page("1"), rows)
+
+        assert result == {"success": True, "testcases_created": 2, "configs_created": 0}
+        first, second = test_session.query(qa_models.TestCase).order_by(qa_models.TestCase.id).all()
+        assert first.priority == Priority.MEDIUM
+        assert first.screenshot == "a.png"
+        assert first.qa_auto_coverage == "x" * 252 + "..."
+        assert (first.test_group.value, first.functionality, first.order_index) == ("GENERAL", "Login", 3)
+        assert first.checklist_id == "1" and first.created_at is not None
+        assert (second.screenshot, second.priority, second.config_id) == (None, None, None)
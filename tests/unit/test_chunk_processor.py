@@ -0,0 +1,156 @@
+"""Unit tests for ChunkProcessor token counting and chunking."""
+
+import itertools
+import random
+import string
+
+import pytest
+import tiktoken
+
+from scripts.confluence.unified_loader import ChunkProcessor
+
+# cl100k_base split pattern; the vocabulary is a small local one so tests need no download
+CL100K_PATTERN = (
+    r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]++[\r\n]*"""
+    r"""|\s*[\r\n]|\s+(?!\S)|\s+"""
+)
+
+
+def _encoding():
+    ranks = {bytes([i]): i for i in range(256)}
+    for a, b in itertools.product(string.ascii_lowercase + " .\n", repeat=2):
+        ranks.setdefault((a + b).encode(), len(ranks))
+    for word in ("the", " the", " step", " page", ".\n\n"):
+        ranks.setdefault(word.encode(), len(ranks))
+    return tiktoken.Encoding(
+        "test", pat_str=CL100K_PATTERN, mergeable_ranks=ranks, special_tokens={"<|endoftext|>": len(ranks)}
+    )
+
+
+class _CountingEncoding:
+    """Encoding wrapper that records every encoded string."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self.encoded = []
+
+    def __getattr__(self, name):
+        return getattr(self.encoding, name)
+
+    def encode(self, text, **kwargs):
+        self.encoded.append(text)
+        return self.encoding.encode(text, **kwargs)
+
+    def encode_ordinary(self, text):
+        self.encoded.append(text)
+        return self.encoding.encode_ordinary(text)
+
+
+def _reference_chunks(chunker, text):
+    """Original algorithm: count_tokens called on every paragraph, sentence and chunk."""
+    paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+    chunks, current_chunk, current_tokens = [], "", 0
+
+    def overlap_text(chunk):
+        tokens, sentences = 0, []
+        for sentence in reversed(chunk.split(".")):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            sentence_tokens = chunker.count_tokens(sentence)
+            if tokens + sentence_tokens > chunker.chunk_overlap:
+                break
+            sentences.insert(0, sentence)
+            tokens += sentence_tokens
+        return ". ".join(sentences) + "." if sentences else ""
+
+    for paragraph in paragraphs:
+        paragraph_tokens = chunker.count_tokens(paragraph)
+        if paragraph_tokens > chunker.chunk_size:
+            if current_chunk.strip():
+                chunks.append(current_chunk.strip())
+            sentences = [s.strip() + "." for s in paragraph.split(".") if s.strip()]
+            chunk_sentences, chunk_tokens = [], 0
+            for sentence in sentences:
+                sentence_tokens = chunker.count_tokens(sentence)
+                if chunk_tokens + sentence_tokens > chunker.chunk_size and chunk_sentences:
+                    chunks.append(" ".join(chunk_sentences))
+                    overlap = chunk_sentences[-2:] if len(chunk_sentences) > 2 else chunk_sentences
+                    chunk_sentences = overlap + [sentence]
+                    chunk_tokens = sum(chunker.count_tokens(s) for s in chunk_sentences)
+                else:
+                    chunk_sentences.append(sentence)
+                    chunk_tokens += sentence_tokens
+            if chunk_sentences:
+                chunks.append(" ".join(chunk_sentences))
+            current_chunk, current_tokens = "", 0
+            continue
+        if current_tokens + paragraph_tokens > chunker.chunk_size and current_chunk:
+            chunks.append(current_chunk.strip())
+            overlap = overlap_text(current_chunk)
+            current_chunk = overlap + "\n\n" + paragraph if overlap else paragraph
+            current_tokens = chunker.count_tokens(current_chunk)
+        else:
+            current_chunk += "\n\n" + paragraph if current_chunk else paragraph
+            current_tokens += paragraph_tokens
+    if current_chunk.strip():
+        chunks.append(current_chunk.strip())
+    return chunks
+
+
+def _document(rnd, paragraphs):
+    words = "open the page step login result 3.14 user!! pay... check , ok ? - Привіт".split(" ")
+    parts = []
+    for _ in range(paragraphs):
+        length = rnd.choice([3, 10, 40, 300])
+        sentences = [" ".join(rnd.choice(words) for _ in range(rnd.randint(1, length))) for _ in range(rnd.randint(1, 5))]
+        parts.append(rnd.choice([". ", ".", " . "]).join(sentences) + rnd.choice(["", ".", " "]))
+    return rnd.choice(["\n\n", "\n\n\n", " \n\n "]).join(parts)
+
+
+@pytest.mark.unit
+class TestChunkProcessor:
+    """Test that memoized counting keeps the chunks of the original algorithm."""
+
+    @pytest.fixture
+    def make_chunker(self):
+        encoding = _encoding()
+
+        def make(chunk_size, chunk_overlap):
+            chunker = ChunkProcessor.__new__(ChunkProcessor)
+            chunker.chunk_size = chunk_size
+            chunker.chunk_overlap = chunk_overlap
+            chunker.tokenizer = _CountingEncoding(encoding)
+            return chunker
+
+        return make
+
+    def test_same_chunks_as_original_algorithm(self, make_chunker):
+        rnd = random.Random(38)
+        for _ in range(150):
+            text = _document(rnd, rnd.randint(1, 25))
+            chunker = make_chunker(rnd.choice([20, 60, 200]), rnd.choice([5, 30, 80]))
+
+            assert chunker.chunk_text(text) == _reference_chunks(chunker, text)
+
+    def test_each_string_is_encoded_once(self, make_chunker):
+        chunker = make_chunker(60, 20)
+        text = _document(random.Random(7), 40)
+
+        chunks = chunker.chunk_text(text)
+
+        assert len(chunks) > 5
+        assert len(chunker.tokenizer.encoded) == len(set(chunker.tokenizer.encoded))
+
+    def test_overlap_text_from_chunk_tail(self, make_chunker):
+        chunker = make_chunker(100, 10)
+
+        assert chunker._get_overlap_text("First one. Second one. Third.") == "Second one. Third."
+        assert chunker._get_overlap_text("No sentence end") == "No sentence end."
+        assert chunker._get_overlap_text("...") == ""
+
+    def test_special_tokens_still_raise(self, make_chunker):
+        chunker = make_chunker(60, 20)
+
+        with pytest.raises(ValueError):
+            chunker.chunk_text("Intro.\n\nText with <|endoftext|> inside.")
@@ -0,0 +1,241 @@
+"""Unit tests for streaming Confluence page iteration."""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+from unittest.mock import Mock, patch
+
+from scripts.confluence.confluence_real import RealConfluenceAPI
+from scripts.confluence.page_crawler import ConfluenceCrawler
+from scripts.confluence.page_stream import stream_pages
+
+
+def _raw_page(page_id, title):
+    return {
+        "id": page_id,
+        "title": title,
+        "space": {"key": "QA"},
+        "body": {"storage": {"value": f"<p>{title}</p>"}},
+        "version": {"number": 1},
+    }
+
+
+def _api(children, max_workers=1):
+    api = RealConfluenceAPI.__new__(RealConfluenceAPI)
+    api.confluence = Mock()
+    api.confluence.get_page_by_id.side_effect = lambda page_id, expand: _raw_page(page_id, f"Page {page_id}")
+    api.confluence.get_page_child_by_type.side_effect = (
+        lambda parent_id, type, start, limit, expand: children.get(parent_id, [])[start:start + limit]
+    )
+    api.crawler = ConfluenceCrawler(
+        api.confluence,
+        extract_page=api._extract_page_data,
+        base_url="https://confluence.test",
+        page_expand=api.PAGE_EXPAND,
+        max_workers=max_workers,
+        children_page_size=api.CHILDREN_PAGE_SIZE
+    )
+    return api
+
+
+@pytest.mark.unit
+class TestRealConfluenceIteration:
+    """Test generator variants of the Confluence client."""
+
+    def test_iter_pages_by_ids_walks_tree_breadth_first(self):
+        children = {
+            "1": [_raw_page("2", "Child"), _raw_page("3", "Child 2")],
+            "2": [_raw_page("4", "Grandchild")],
+        }
+        api = _api(children)
+        with patch("scripts.confluence.confluence_real.settings") as mock_settings:
+            mock_settings.confluence_base_url = "https://confluence.test"
+            pages = api.iter_pages_by_ids(["1"])
+            first = next(pages)
+            # Nothing below the root has been requested yet
+            assert first["id"] == "1"
+            assert api.confluence.get_page_child_by_type.call_count == 0
+            rest = [page["id"] for page in pages]
+
+        assert rest == ["2", "3", "4"]
+
+    def test_children_are_paginated(self):
+        children = {"1": [_raw_page(str(i), f"Child {i}") for i in range(100, 130)]}
+        api = _api(children, max_workers=4)
+        with patch("scripts.confluence.confluence_real.settings") as mock_settings:
+            mock_settings.confluence_base_url = "https://confluence.test"
+            pages = api._get_child_pages_recursive("1")
+
+        assert sorted(page["id"] for page in pages) == [str(i) for i in range(100, 130)]
+
+
+@pytest.mark.unit
+class TestCQLDiscovery:
+    """Test server-side page discovery with CQL."""
+
+    def test_build_cql(self):
+        cql = RealConfluenceAPI.build_cql(
+            ["QA", "ENG"], ["checklist"], datetime(2024, 1, 2, 20, 30, tzinfo=timezone.utc)
+        )
+
+        assert cql == (
+            'type = page AND space in ("QA", "ENG") AND label in ("checklist") '
+            'AND lastmodified >= "2024-01-02 06:30" order by lastmodified desc'
+        )
+
+    def test_build_cql_without_filters(self):
+        assert RealConfluenceAPI.build_cql() == "type = page order by lastmodified desc"
+
+    def test_pages_through_results_and_fetches_only_matches(self):
+        api = _api({}, max_workers=2)
+        api.SEARCH_PAGE_SIZE = 2
+        ids = ["11", "12", "13"]
+        api.confluence.cql.side_effect = lambda cql, start, limit: {
+            "results": [{"content": {"id": page_id}} for page_id in ids[start:start + limit]],
+            "totalSize": len(ids),
+        }
+
+        with patch("scripts.confluence.confluence_real.settings") as mock_settings:
+            mock_settings.confluence_base_url = "https://confluence.test"
+            pages = list(api.iter_pages(space_keys=["QA"]))
+
+        assert sorted(page["id"] for page in pages) == ids
+        assert [call.kwargs["start"] for call in api.confluence.cql.call_args_list] == [0, 2]
+        assert api.confluence.get_page_by_id.call_count == 3
+        api.confluence.get_all_pages_from_space.assert_not_called()
+
+    def test_limit_stops_discovery(self):
+        api = _api({}, max_workers=2)
+        api.confluence.cql.return_value = {"results": [{"content": {"id": "11"}}, {"content": {"id": "12"}}]}
+
+        with patch("scripts.confluence.confluence_real.settings") as mock_settings:
+            mock_settings.confluence_base_url = "https://confluence.test"
+            pages = api.get_pages(limit=2)
+
+        assert len(pages) == 2
+        assert api.confluence.cql.call_args.kwargs["limit"] == 2
+        assert api.confluence.get_page_by_id.call_count == 2
+
+
+class _HTTPError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.response = Mock(status_code=status, headers=headers or {})
+
+
+@pytest.mark.unit
+class TestConfluenceCrawler:
+    """Test concurrency and retry behaviour of the crawler."""
+
+    def _crawler(self, confluence, **kwargs):
+        return ConfluenceCrawler(
+            confluence,
+            extract_page=lambda page: {"id": str(page["id"])},
+            base_url="https://confluence.test",
+            page_expand="body.storage",
+            **kwargs
+        )
+
+    def test_keeps_multiple_requests_in_flight(self):
+        lock = threading.Lock()
+        active = {"now": 0, "max": 0}
+
+        def get_page_by_id(page_id, expand):
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            time.sleep(0.05)
+            with lock:
+                active["now"] -= 1
+            return {"id": page_id}
+
+        confluence = Mock()
+        confluence.get_page_by_id.side_effect = get_page_by_id
+        crawler = self._crawler(confluence, max_workers=4)
+
+        pages = list(crawler.fetch_pages([str(i) for i in range(12)]))
+
+        assert len(pages) == 12
+        assert active["max"] == 4
+
+    def test_per_host_limit(self):
+        lock = threading.Lock()
+        active = {"now": 0, "max": 0}
+
+        def get_page_by_id(page_id, expand):
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            time.sleep(0.02)
+            with lock:
+                active["now"] -= 1
+            return {"id": page_id}
+
+        confluence = Mock()
+        confluence.get_page_by_id.side_effect = get_page_by_id
+        crawler = self._crawler(confluence, max_workers=6, max_per_host=2)
+
+        list(crawler.fetch_pages([str(i) for i in range(8)]))
+
+        assert active["max"] == 2
+
+    def test_retries_on_429_with_retry_after(self):
+        confluence = Mock()
+        confluence.get_page_by_id.side_effect = [
+            _HTTPError(429, {"Retry-After": "0"}),
+            {"id": "1"},
+        ]
+        crawler = self._crawler(confluence, max_workers=2)
+
+        pages = list(crawler.fetch_pages(["1"]))
+
+        assert pages == [{"id": "1"}]
+        assert crawler.stats["throttled"] == 1
+        assert crawler.stats["retries"] == 1
+
+    def test_non_retryable_error_skips_page(self):
+        confluence = Mock()
+        confluence.get_page_by_id.side_effect = _HTTPError(404)
+        crawler = self._crawler(confluence)
+
+        assert list(crawler.fetch_pages(["1"])) == []
+        assert confluence.get_page_by_id.call_count == 1
+
+
+@pytest.mark.unit
+class TestStreamPages:
+    """Test the thread-to-asyncio page bridge."""
+
+    @pytest.mark.asyncio
+    async def test_yields_in_order(self):
+        results = [page async for page in stream_pages(lambda: iter(range(10)), max_buffered=2)]
+        assert results == list(range(10))
+
+    @pytest.mark.asyncio
+    async def test_producer_is_bounded_and_stops_on_break(self):
+        produced = []
+
+        def source():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        stream = stream_pages(source, max_buffered=2)
+        async for page in stream:
+            if page == 1:
+                break
+        await stream.aclose()
+
+        assert len(produced) < 10
+
+    @pytest.mark.asyncio
+    async def test_producer_errors_propagate(self):
+        def source():
+            yield 1
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError, match="boom"):
+            async for _ in stream_pages(source):
+                pass
@@ -0,0 +1,116 @@
+"""Regression corpus for the single-pass Confluence content normalizer."""
+
+import random
+
+import pytest
+
+from scripts.confluence import content_normalizer
+from scripts.confluence.confluence_real import RealConfluenceAPI
+from scripts.confluence.content_normalizer import normalize_content, normalize_content_legacy
+
+CORPUS = {
+    "empty": "",
+    "plain": "Just text &amp; entities &lt;p&gt; &nbsp;here",
+    "headers": "<h1>Title</h1><h2 id=\"a\">Sub <em>title</em></h2><h3>Open\nheader</h3><h4>Mixed</h2>",
+    "paragraphs": "<p>First</p><p class=\"x\">Second <br/>line<br>break</p><p>Unclosed",
+    "lists": "<ul><li>one</li><li>two <ol><li>nested</li></ol></li></ul><li>stray</li>",
+    "table": (
+        "<table><thead><tr><th>STEP</th><th>RESULT</th></tr></thead><tbody>"
+        "<tr><td colspan=\"2\"><h3>GENERAL</h3></td></tr>"
+        "<tr><td>Open <strong>page</strong></td><td><p>Shown</p></td></tr></tbody></table>"
+    ),
+    "inline": "<strong>s</strong> <b>b</b> <em>e</em> <i>i</i> <body>x</b> <img src=\"a.png\"/> <embed>y</em>",
+    "links": (
+        "<a href=\"http://x\">X</a> <a title=\"t\" href=\"u1\" data-href=\"u2\">Two</a> "
+        "<a name=\"anchor\">No href</a> <ac:link><ri:page ri:content-title=\"Page\"/></ac:link>"
+    ),
+    "macros": (
+        "<ac:structured-macro ac:name=\"info\"><ac:rich-text-body><p>Info</p></ac:rich-text-body>"
+        "</ac:structured-macro><ac:structured-macro ac:name=\"warning\" ac:schema-version=\"1\">Warn"
+        "</ac:structured-macro><ac:structured-macro ac:name=\"note\">Note</ac:structured-macro>"
+        "<ac:structured-macro ac:name=\"toc\"><ac:parameter ac:name=\"maxLevel\">2</ac:parameter>"
+        "</ac:structured-macro><ac:structured-macro ac:name=\"expand\"><ac:parameter ac:name=\"title\">"
+        "More</ac:parameter><ac:rich-text-body><p>Hidden</p></ac:rich-text-body></ac:structured-macro>"
+    ),
+    "nested macros": (
+        "<ac:structured-macro ac:name=\"info\"><ac:structured-macro ac:name=\"warning\">inner"
+        "</ac:structured-macro>outer</ac:structured-macro>"
+        "<ac:structured-macro ac:name=\"expand\"><ac:structured-macro ac:name=\"note\">n"
+        "</ac:structured-macro></ac:structured-macro>"
+    ),
+    "self-closing toc": (
+        "<ac:structured-macro ac:name=\"toc\"/><p>Swallowed until the next macro end</p>"
+        "<ac:structured-macro ac:name=\"expand\"><p>Body</p></ac:structured-macro><p>After</p>"
+    ),
+    "code": (
+        "<ac:structured-macro ac:name=\"code\"><ac:parameter ac:name=\"language\">python</ac:parameter>"
+        "<ac:plain-text-body><![CDATA[if a < b and c > d:\n    print('<p>')]]></ac:plain-text-body>"
+        "</ac:structured-macro>"
+    ),
+    "bare less-than": "a < b, i<10, x <= y <strong>bold</strong> <>",
+    "unsafe bare less-than": "<p <b>bold</b> text</p> <<strong>x</strong>",
+    "unterminated href": "<a x=\"1\" href=\"open>text</a> \"rest\">more",
+    "nested cdata": "<![CDATA[ a <![CDATA[ b ]]> c ]]><ac:plain-text-body>",
+    "whitespace": "a\n\n\n\nb \t c\n \n \n d\r\n\r\n\r\ne   \n\n",
+    "comments": "<!-- a > b --><p>after</p><?xml version=\"1.0\"?>",
+}
+
+VOCABULARY = [
+    "<p>", "</p>", "<pre>", "<h1>", "</h1>", "<h2 id=\"a\">", "</h3>", "<h\n1>", "<hr/>", "<br/>",
+    "<ul>", "</ul>", "<ol>", "</ol>", "<li>", "</li>", "<link rel=\"x\">",
+    "<table>", "</table>", "<tr>", "</tr>", "<track>", "<th>", "</th>", "<td colspan=\"2\">", "</td>",
+    "<thead>", "<tbody>", "<strong>", "</strong>", "<b>", "</b>", "<body>", "<em>", "</em>", "<i>", "</i>",
+    "<img src=\"x\"/>", "<a href=\"http://x\">", "<a title=\"t\" href=\"u1\" data-href=\"u2\">", "</a>",
+    "<abbr href=\"z\">", "<ac:link>", "</ac:link>",
+    "<ac:structured-macro ac:name=\"info\">", "<ac:structured-macro ac:name=\"warning\">",
+    "<ac:structured-macro ac:name=\"note\">", "<ac:structured-macro ac:name=\"toc\"/>",
+    "<ac:structured-macro ac:name=\"toc\">", "<ac:structured-macro ac:name=\"expand\">",
+    "</ac:structured-macro>", "<ac:rich-text-body>", "</ac:rich-text-body>",
+    "<![CDATA[x < y]]>", "<![CDATA[<p>a</p>]]>", "<!-- c -->", "<div>", "</div>", "<P>", "</h2 >",
+    "<p\n>", "</td\n>", "text", "  spaced\t out ", "\n", "\n\n\n", " \n \n \n ", "&amp;", "&lt;p&gt;",
+    "Привіт", "a < b", "i<10", "<", "<>", "\"", "<a href=\"open>",
+]
+
+
+def _generated_corpus(size=3000, seed=37):
+    rnd = random.Random(seed)
+    return ["".join(rnd.choice(VOCABULARY) for _ in range(rnd.randint(1, 40))) for _ in range(size)]
+
+
+@pytest.mark.unit
+class TestContentNormalizer:
+    """Test that the single pass gives exactly the output of the sequential re.sub passes."""
+
+    @pytest.mark.parametrize("content", list(CORPUS.values()), ids=list(CORPUS))
+    def test_corpus_matches_legacy(self, content):
+        assert normalize_content(content) == normalize_content_legacy(content)
+
+    def test_generated_corpus_matches_legacy(self):
+        mismatches = [
+            content for content in _generated_corpus()
+            if normalize_content(content) != normalize_content_legacy(content)
+        ]
+
+        assert mismatches == []
+
+    @pytest.mark.parametrize("name", ["headers", "table", "links", "macros", "nested macros", "bare less-than"])
+    def test_regular_pages_take_single_pass(self, name):
+        assert content_normalizer._normalize_single_pass(CORPUS[name]) is not None
+
+    @pytest.mark.parametrize("name", ["unsafe bare less-than", "unterminated href", "nested cdata"])
+    def test_ambiguous_input_uses_legacy(self, name):
+        assert content_normalizer._normalize_single_pass(CORPUS[name]) is None
+
+    def test_unclosed_tags_stay_linear(self):
+        # The legacy DOTALL passes rescan the rest of the page for every unclosed tag
+        content = "<li>item <p>para <ac:structured-macro ac:name=\"info\">" * 20000
+
+        assert content_normalizer._normalize_single_pass(content) is not None
+
+    def test_table_page(self):
+        assert normalize_content(CORPUS["table"]) == (
+            "STEP | RESULT | \n\n# GENERAL\n\n | \nOpen **page** | Shown\n\n |"
+        )
+
+    def test_api_uses_normalizer(self):
+        assert RealConfluenceAPI.normalize_content(None, CORPUS["macros"]) == normalize_content(CORPUS["macros"])
@@ -0,0 +1,312 @@
+"""Unit tests for the streaming embedding backfill of QARepository."""
+
+import threading
+import time
+
+import pytest
+from unittest.mock import Mock
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.data import qa_repository
+from app.data.qa_repository import QARepository
+from app.models import qa_models
+from app.models.qa_models import Base, Checklist, QASection
+
+
+def _hash(text):
+    return qa_repository.embedding_text_hash(text, "text-embedding-3-small-1")
+
+
+@pytest.mark.unit
+class TestEmbeddingBackfill:
+    """Test paging, concurrency, per-batch commits and the resume id."""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        # Batches commit from worker threads, each on its own connection, like on MySQL
+        engine = create_engine(f"sqlite:///{tmp_path / 'qa.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        session.add(QASection(id=1, title="Section", url="http://test", confluence_page_id="s1", space_key="QA"))
+        session.add(Checklist(
+            id="c1", confluence_page_id="c1", title="Checklist", url="http://test",
+            space_key="QA", section_id=1, content_hash="h"
+        ))
+        session.add_all([
+            qa_models.TestCase(id=i, checklist_id="c1", step=f"step {i}", expected_result=f"result {i}")
+            for i in range(1, 101)
+        ])
+        session.commit()
+        session.close()
+        yield engine
+        engine.dispose()
+
+    @pytest.fixture
+    def repo(self, engine):
+        repo = QARepository.__new__(QARepository)
+        repo.engine = engine
+        repo.Session = sessionmaker(bind=engine)
+        repo.embedder = Mock(model="text-embedding-3-small", dimensions=1)
+        repo.embedder.embed_batch.side_effect = lambda texts: [[float(len(t))] for t in texts]
+        return repo
+
+    def _embeddings(self, engine):
+        session = sessionmaker(bind=engine)()
+        try:
+            return dict(session.query(qa_models.TestCase.id, qa_models.TestCase.embedding))
+        finally:
+            session.close()
+
+    def test_all_testcases_are_updated(self, repo, engine):
+        updates = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE"):
+                updates.append(len(parameters) if executemany else 1)
+
+        result = repo.update_all_embeddings(batch_size=10, concurrency=3)
+
+        assert result["success"] and result["total"] == 100 and result["updated"] == 100
+        assert result["last_committed_id"] == 100
+        embeddings = self._embeddings(engine)
+        assert embeddings[7] == [float(len("step 7 result 7"))]
+        # One bulk UPDATE per batch
+        assert updates == [10] * 10
+
+    def test_batches_are_embedded_concurrently(self, repo):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def slow_embed(texts):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return [[1.0] for _ in texts]
+
+        repo.embedder.embed_batch.side_effect = slow_embed
+
+        repo.update_all_embeddings(batch_size=10, concurrency=4)
+
+        assert peak[0] > 1
+
+    def test_failed_batch_keeps_other_commits(self, repo, engine):
+        def flaky(texts):
+            if "step 35 result 35" in texts:
+                raise RuntimeError("rate limited")
+            return [[1.0] for _ in texts]
+
+        repo.embedder.embed_batch.side_effect = flaky
+
+        result = repo.update_all_embeddings(batch_size=10, concurrency=2)
+
+        assert result["success"]
+        assert (result["updated"], result["failed"]) == (90, 10)
+        # Nothing after the failed batch counts as committed for resuming
+        assert result["last_committed_id"] == 30
+        embeddings = self._embeddings(engine)
+        assert [i for i, e in embeddings.items() if e is None] == list(range(31, 41))
+
+    def test_missing_embeddings_block_resume_id(self, repo):
+        repo.embedder.embed_batch.side_effect = lambda texts: [None if "step 12 " in t else [1.0] for t in texts]
+
+        result = repo.update_all_embeddings(batch_size=10, concurrency=1)
+
+        assert (result["updated"], result["failed"]) == (99, 1)
+        assert result["last_committed_id"] == 10
+
+    def test_start_after_id_and_progress(self, repo, engine):
+        reports = []
+
+        result = repo.update_all_embeddings(
+            batch_size=20, concurrency=2, start_after_id=60,
+            on_progress=lambda progress: reports.append((progress.processed, progress.committed_id, progress.eta_seconds))
+        )
+
+        assert result["total"] == 40 and result["updated"] == 40
+        assert [i for i, e in self._embeddings(engine).items() if e is not None] == list(range(61, 101))
+        assert reports[-1][:2] == (40, 100)
+        assert reports[-1][2] == 0
+
+    def test_nothing_to_update(self, repo):
+        repo.update_all_embeddings(batch_size=50)
+
+        result = repo.update_all_embeddings(batch_size=50)
+
+        assert result["total"] == 0 and result["updated"] == 0
+
+
+@pytest.mark.unit
+class TestEmbeddingDeduplication:
+    """Test that identical texts are embedded once and unchanged ones are skipped."""
+
+    @pytest.fixture
+    def session_factory(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'qa.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        session.add(QASection(id=1, title="Section", url="http://test", confluence_page_id="s1", space_key="QA"))
+        for checklist_id in ("web", "mob"):
+            session.add(Checklist(
+                id=checklist_id, confluence_page_id=checklist_id, title=checklist_id, url="http://test",
+                space_key="QA", section_id=1, content_hash="h"
+            ))
+        session.commit()
+        session.close()
+        yield sessionmaker(bind=engine)
+        engine.dispose()
+
+    @pytest.fixture
+    def repo(self, session_factory):
+        repo = QARepository.__new__(QARepository)
+        repo.Session = session_factory
+        repo.embedder = Mock(model="text-embedding-3-small", dimensions=1)
+        repo.embedder.embed_batch.side_effect = lambda texts: [[float(len(t))] for t in texts]
+        return repo
+
+    def _add(self, session_factory, rows):
+        session = session_factory()
+        session.add_all([
+            qa_models.TestCase(id=i, checklist_id=checklist_id, step=step, expected_result=result)
+            for i, checklist_id, step, result in rows
+        ])
+        session.commit()
+        session.close()
+
+    def _rows(self, session_factory):
+        session = session_factory()
+        try:
+            return {
+                testcase.id: (testcase.embedding, testcase.embedding_text_hash)
+                for testcase in session.query(qa_models.TestCase)
+            }
+        finally:
+            session.close()
+
+    def _embedded(self, repo):
+        return [text for call in repo.embedder.embed_batch.call_args_list for text in call.args[0]]
+
+    def test_normalized_text(self):
+        assert qa_repository.embedding_text(" Open\n the  page ", "Page\tis shown") == "Open the page Page is shown"
+        assert qa_repository.embedding_text("Ｏpen", None) == "Open"
+        assert _hash("a b") == _hash(qa_repository.embedding_text("a ", " b"))
+        assert _hash("a b") != qa_repository.embedding_text_hash("a b", "text-embedding-3-large-1")
+
+    def test_identical_texts_are_embedded_once(self, repo, session_factory):
+        self._add(session_factory, [
+            (1, "web", "Open page", "Page shown"),
+            (2, "mob", "Open  page", "Page shown "),
+            (3, "mob", "Open page", "Page shown"),
+            (4, "web", "Close page", "Page hidden"),
+        ])
+
+        result = repo.update_all_embeddings(batch_size=2, concurrency=1)
+
+        assert self._embedded(repo) == ["Open page Page shown", "Close page Page hidden"]
+        assert (result["updated"], result["embedded_texts"], result["reused"]) == (4, 2, 2)
+        rows = self._rows(session_factory)
+        assert rows[1] == rows[2] == rows[3]
+        assert rows[1][1] == _hash("Open page Page shown")
+
+    def test_second_run_and_new_rows_reuse_stored_vectors(self, repo, session_factory):
+        self._add(session_factory, [(1, "web", "Open page", "Page shown")])
+        repo.update_all_embeddings(batch_size=10)
+        repo.embedder.embed_batch.reset_mock()
+
+        assert repo.update_all_embeddings(batch_size=10)["total"] == 0
+
+        # A re-ingested MOB checklist with the same text needs no API call
+        self._add(session_factory, [(2, "mob", "Open page", "Page  shown")])
+        result = repo.update_all_embeddings(batch_size=10)
+
+        repo.embedder.embed_batch.assert_not_called()
+        assert (result["updated"], result["reused"]) == (1, 1)
+        rows = self._rows(session_factory)
+        assert rows[2] == rows[1]
+
+    def test_recheck_reembeds_only_changed_text(self, repo, session_factory):
+        self._add(session_factory, [(1, "web", "Open page", "Page shown"), (2, "web", "Close page", "Page hidden")])
+        repo.update_all_embeddings(batch_size=10)
+        repo.embedder.embed_batch.reset_mock()
+        session = session_factory()
+        session.get(qa_models.TestCase, 2).expected_result = "Page is hidden"
+        session.commit()
+        session.close()
+
+        result = repo.update_all_embeddings(batch_size=10, recheck=True)
+
+        assert self._embedded(repo) == ["Close page Page is hidden"]
+        assert (result["updated"], result["skipped"]) == (1, 1)
+        assert self._rows(session_factory)[2][1] == _hash("Close page Page is hidden")
+
+    def test_old_embeddings_only_get_a_hash(self, repo, session_factory):
+        self._add(session_factory, [(1, "web", "Open page", "Page shown")])
+        session = session_factory()
+        session.get(qa_models.TestCase, 1).embedding = [0.5]
+        session.commit()
+        session.close()
+
+        result = repo.update_all_embeddings(batch_size=10)
+
+        repo.embedder.embed_batch.assert_not_called()
+        assert result["stamped"] == 1
+        assert self._rows(session_factory)[1] == ([0.5], _hash("Open page Page shown"))
+
+    def test_single_testcase_update(self, repo, session_factory):
+        self._add(session_factory, [(1, "web", "Open page", "Page shown"), (2, "mob", "Open page", "Page shown")])
+
+        assert repo.update_testcase_embedding(1)
+        assert repo.update_testcase_embedding(2)
+        assert repo.update_testcase_embedding(2)
+
+        assert repo.embedder.embed_batch.call_count == 1
+        rows = self._rows(session_factory)
+        assert rows[1] == rows[2]
+
+    def test_model_change_reembeds_on_recheck(self, repo, session_factory):
+        self._add(session_factory, [(1, "web", "Open page", "Page shown")])
+        repo.update_all_embeddings(batch_size=10)
+        repo.embedder.model, repo.embedder.dimensions = "text-embedding-3-large", 2
+        repo.embedder.embed_batch.side_effect = lambda texts: [[1.0, 2.0] for _ in texts]
+        repo.embedder.embed_batch.reset_mock()
+
+        # A new row with the same text does not get the old model's vector
+        self._add(session_factory, [(2, "mob", "Open page", "Page shown")])
+        repo.update_all_embeddings(batch_size=10)
+        assert self._embedded(repo) == ["Open page Page shown"]
+
+        result = repo.update_all_embeddings(batch_size=10, recheck=True)
+
+        assert (result["updated"], result["skipped"], result["reused"]) == (1, 1, 1)
+        rows = self._rows(session_factory)
+        assert rows[1] == rows[2] == ([1.0, 2.0], qa_repository.embedding_text_hash(
+            "Open page Page shown", "text-embedding-3-large-2"
+        ))
+
+    def test_force_reembeds_everything(self, repo, session_factory):
+        self._add(session_factory, [(1, "web", "Open page", "Page shown"), (2, "mob", "Open page", "Page shown")])
+        repo.update_all_embeddings(batch_size=10)
+        repo.embedder.embed_batch.reset_mock()
+        repo.embedder.embed_batch.side_effect = lambda texts: [[9.0] for _ in texts]
+
+        result = repo.update_all_embeddings(batch_size=10, force=True)
+
+        assert self._embedded(repo) == ["Open page Page shown"]
+        assert (result["total"], result["updated"], result["skipped"]) == (2, 2, 0)
+        assert self._rows(session_factory)[1][0] == self._rows(session_factory)[2][0] == [9.0]
+
+    def test_old_embeddings_of_other_dimension_are_redone(self, repo, session_factory):
+        self._add(session_factory, [(1, "web", "Open page", "Page shown")])
+        session = session_factory()
+        session.get(qa_models.TestCase, 1).embedding = [0.5, 0.5]
+        session.commit()
+        session.close()
+
+        result = repo.update_all_embeddings(batch_size=10)
+
+        assert (result["stamped"], result["updated"]) == (0, 1)
+        assert self._rows(session_factory)[1] == ([20.0], _hash("Open page Page shown"))
@@ -0,0 +1,127 @@
+"""Unit tests for model-aware embedding dimensions and named vectors."""
+
+import pytest
+from unittest.mock import Mock, patch
+
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import VectorParams
+
+from app.ai.embedder import (
+    OpenAIEmbedder,
+    get_embedding_dimension,
+    get_vector_name,
+    parse_vector_spaces,
+)
+from app.data.vectordb_repo import COLLECTION_PROFILES, VectorDBRepository
+
+
+@pytest.mark.unit
+class TestEmbeddingDimension:
+    """Test dimension resolution helpers."""
+
+    def test_native_dimensions(self):
+        assert get_embedding_dimension("text-embedding-3-small") == 1536
+        assert get_embedding_dimension("text-embedding-3-large") == 3072
+
+    def test_reduced_dimensions(self):
+        assert get_embedding_dimension("text-embedding-3-large", 256) == 256
+        assert get_vector_name("text-embedding-3-small", 512) == "text-embedding-3-small-512"
+
+    def test_invalid_dimensions(self):
+        with pytest.raises(ValueError):
+            get_embedding_dimension("text-embedding-ada-002", 512)
+        with pytest.raises(ValueError):
+            get_embedding_dimension("text-embedding-3-small", 2048)
+
+    def test_parse_vector_spaces(self):
+        assert parse_vector_spaces("text-embedding-3-small:512, text-embedding-3-large") == [
+            ("text-embedding-3-small", 512),
+            ("text-embedding-3-large", None),
+        ]
+        assert parse_vector_spaces(None) == []
+
+    def test_embedder_passes_dimensions(self):
+        with patch("app.ai.embedder.OpenAI") as openai_cls:
+            client = Mock()
+            client.embeddings.create.return_value = Mock(data=[Mock(embedding=[0.1] * 256)])
+            openai_cls.return_value = client
+            embedder = OpenAIEmbedder(api_key="test", model="text-embedding-3-large", dimensions=256)
+
+            embedder.embed_text("hello")
+
+        kwargs = client.embeddings.create.call_args.kwargs
+        assert kwargs["model"] == "text-embedding-3-large"
+        assert kwargs["dimensions"] == 256
+        assert embedder.get_dimension() == 256
+        assert embedder.vector_name == "text-embedding-3-large-256"
+
+
+@pytest.mark.unit
+class TestNamedVectors:
+    """Test named vector handling in VectorDBRepository."""
+
+    def _repo(self, client, vector_name="text-embedding-3-small-512", vector_size=512):
+        with patch("app.data.vectordb_repo.QdrantClient", return_value=client):
+            return VectorDBRepository(
+                profile=COLLECTION_PROFILES["default"], vector_name=vector_name, vector_size=vector_size
+            )
+
+    def test_named_collection_uses_vector_name(self):
+        client = Mock()
+        client.get_collection.return_value.config.params.vectors = {
+            "text-embedding-3-small-512": VectorParams(size=512, distance="Cosine")
+        }
+        repo = self._repo(client)
+        client.query_points.return_value = Mock(points=[])
+
+        repo.search([0.1] * 512)
+
+        assert client.query_points.call_args.kwargs["using"] == "text-embedding-3-small-512"
+        assert repo._point_vector([0.1]) == {"text-embedding-3-small-512": [0.1]}
+
+    def test_legacy_collection_uses_unnamed_vector(self):
+        client = Mock()
+        client.get_collection.return_value.config.params.vectors = VectorParams(size=1536, distance="Cosine")
+        repo = self._repo(client)
+
+        assert repo.using is None
+        assert repo._point_vector([0.1]) == [0.1]
+
+    def test_new_collection_uses_explicit_sizes(self, monkeypatch):
+        monkeypatch.setattr("app.data.vectordb_repo.settings.vectordb_extra_vectors", "text-embedding-3-large:256")
+        client = Mock()
+        client.get_collection.side_effect = UnexpectedResponse(404, "Not Found", b"", {})
+
+        self._repo(client, vector_name="custom", vector_size=64)
+
+        vectors_config = client.create_collection.call_args.kwargs["vectors_config"]
+        assert {name: params.size for name, params in vectors_config.items()} == {
+            "text-embedding-3-large-256": 256, "custom": 64
+        }
+
+    def test_missing_named_vector_fails(self):
+        client = Mock()
+        client.get_collection.return_value.config.params.vectors = {
+            "text-embedding-3-small-1536": VectorParams(size=1536, distance="Cosine")
+        }
+
+        with pytest.raises(ValueError, match="text-embedding-3-small-512"):
+            self._repo(client)
+        with pytest.raises(ValueError, match="vector_size"):
+            self._repo(client, vector_size=None)
+
+    def test_update_chunk_vectors_writes_single_named_vector(self):
+        client = Mock()
+        client.get_collection.return_value.config.params.vectors = {
+            "text-embedding-3-small-512": VectorParams(size=512, distance="Cosine"),
+            "text-embedding-3-large-256": VectorParams(size=256, distance="Cosine"),
+        }
+        repo = self._repo(client)
+
+        result = repo.update_chunk_vectors(
+            [{"chunk_id": "1_0", "embedding": [0.1, 0.2]}], "text-embedding-3-large-256"
+        )
+
+        assert result == (1, 0)
+        point = client.update_vectors.call_args.kwargs["points"][0]
+        assert point.vector == {"text-embedding-3-large-256": [0.1, 0.2]}
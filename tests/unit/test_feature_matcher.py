@@ -0,0 +1,159 @@
+"""Unit tests for vectorized feature matching."""
+
+import random
+
+import numpy as np
+import pytest
+from unittest.mock import Mock
+
+from app.ai.feature_matcher import FeatureMatcher, feature_text
+from app.ai.feature_tagger import FeatureTagger
+from app.ai.qa_analyzer import QAAnalysisResult, QAContentAnalyzer
+
+
+def _reference_match(document_embedding, features):
+    """Original per-feature loop of find_best_feature_match."""
+    best_feature, best_similarity = None, 0.0
+    for feature in features:
+        if feature.get("vector") is None:
+            continue
+        vec1, vec2 = np.array(document_embedding), np.array(feature["vector"])
+        norm1, norm2 = np.linalg.norm(vec1), np.linalg.norm(vec2)
+        similarity = 0.0 if norm1 == 0 or norm2 == 0 else float(np.dot(vec1, vec2) / (norm1 * norm2))
+        if similarity > best_similarity:
+            best_feature, best_similarity = feature, similarity
+    return best_feature, best_similarity
+
+
+def _embedder():
+    embedder = Mock()
+    embedder.embed_batch.side_effect = lambda texts: [[float(len(text)), 1.0, 0.0] for text in texts]
+    return embedder
+
+
+def _analysis(title):
+    return QAAnalysisResult(
+        section_title="", checklist_title=title, checklist_description="", additional_content="",
+        feature_name="LLM feature", feature_description="", feature_id=None,
+        testcases=[], configs=[], analysis_confidence=0.9, parsing_method="llm"
+    )
+
+
+@pytest.mark.unit
+class TestFeatureMatcher:
+    """Test that the matrix matcher keeps results of the per-feature loop."""
+
+    def test_same_matches_as_loop(self):
+        rnd = random.Random(43)
+        matcher = FeatureMatcher(_embedder())
+        features = [
+            {"id": i, "name": f"F{i}", "vector": [rnd.uniform(-1, 1) for _ in range(8)]}
+            for i in range(40)
+        ]
+        features[3]["vector"] = [0.0] * 8
+        features.append({"id": 99, "name": "No vector", "vector": None})
+        documents = [[rnd.uniform(-1, 1) for _ in range(8)] for _ in range(100)] + [[0.0] * 8]
+
+        matches = matcher.best_matches(documents, features)
+
+        for document, (feature, similarity) in zip(documents, matches):
+            expected_feature, expected_similarity = _reference_match(document, features)
+            assert feature is expected_feature
+            assert similarity == pytest.approx(expected_similarity)
+        assert matches[-1] == (None, 0.0)
+
+    def test_no_positive_similarity(self):
+        matcher = FeatureMatcher(_embedder())
+        features = [{"id": 1, "name": "A", "vector": [1.0, 0.0]}]
+
+        assert matcher.best_match([-1.0, 0.0], features) == (None, 0.0)
+        assert matcher.best_match([1.0, 0.0], []) == (None, 0.0)
+        assert matcher.best_matches([], features) == []
+
+    def test_matrix_is_built_once_per_feature_list(self):
+        matcher = FeatureMatcher(_embedder())
+        features = [{"id": i, "name": f"F{i}", "vector": [1.0, float(i)]} for i in range(5)]
+
+        matcher.best_match([1.0, 2.0], features)
+        matrix = matcher._matrix
+        for _ in range(10):
+            matcher.best_match([1.0, 2.0], [dict(feature) for feature in features])
+
+        assert matcher._matrix is matrix
+        assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+        feature, _ = matcher.best_match([0.0, 1.0], features + [{"id": 5, "name": "F5", "vector": [0.0, 1.0]}])
+        assert matcher._matrix.shape == (6, 2)
+        assert feature["id"] == 5
+
+    def test_missing_vectors_are_embedded_once_in_one_batch(self):
+        embedder = _embedder()
+        matcher = FeatureMatcher(embedder)
+        features = [
+            {"id": 1, "name": "Auth", "description": "Login"},
+            {"id": 2, "name": "Billing", "description": "Payments", "vector": [1.0, 0.0, 0.0]},
+            {"id": 3, "name": "Search"},
+            {"id": 4, "name": "Auth", "description": "Login"},
+        ]
+
+        first = matcher.prepare(features)
+        second = matcher.prepare(features)
+
+        embedder.embed_batch.assert_called_once_with(["Auth: Login", "Search: "])
+        assert [feature["id"] for feature in first] == [1, 2, 3, 4]
+        assert first == second
+        assert first[1] is features[1]
+        assert "vector" not in features[0]
+
+    def test_failed_embeddings_are_dropped_and_retried(self):
+        embedder = Mock()
+        embedder.embed_batch.side_effect = [[None], [[1.0, 0.0]]]
+        matcher = FeatureMatcher(embedder)
+        features = [{"id": 1, "name": "Auth", "description": "Login"}]
+
+        assert matcher.prepare(features) == []
+        assert matcher.prepare(features)[0]["vector"] == [1.0, 0.0]
+        assert feature_text(features[0]) == "Auth: Login"
+
+
+@pytest.mark.unit
+class TestAnalyzersUseMatcher:
+    """Test FeatureTagger and QAContentAnalyzer on top of the shared matcher."""
+
+    @pytest.fixture
+    def features(self):
+        return [
+            {"id": 1, "name": "Auth", "description": "Login", "vector": [1.0, 0.0]},
+            {"id": 2, "name": "Billing", "description": "Payments"},
+        ]
+
+    def test_tagger_reuses_feature_embeddings(self, features):
+        tagger = FeatureTagger(api_key="test", threshold=0.9)
+        tagger.embedder = Mock()
+        tagger.embedder.embed_batch.return_value = [[0.0, 1.0]]
+        tagger.feature_matcher = FeatureMatcher(tagger.embedder)
+
+        first = tagger.tag_document("Login page", "text", [[0.9, 0.1], [1.0, 0.0]], features)
+        second = tagger.tag_document("Billing", "text", [[0.1, 1.0]], features)
+
+        assert first == ("Auth", "Login", 1)
+        assert second == ("Billing", "Payments", 2)
+        tagger.embedder.embed_batch.assert_called_once_with(["Billing: Payments"])
+
+    def test_analyzer_resolves_many_documents(self, features):
+        analyzer = QAContentAnalyzer(api_key="test", threshold=0.9)
+        analyzer.embedder = Mock()
+        analyzer.embedder.embed_batch.return_value = [[0.0, 1.0]]
+        analyzer.feature_matcher = FeatureMatcher(analyzer.embedder)
+        results = [_analysis("Login"), _analysis("No embeddings"), _analysis("Other"), _analysis("Billing")]
+
+        resolved = analyzer.resolve_feature_ids(
+            results, [[[1.0, 0.1]], [], [[1.0, 1.0]], [[0.0, 2.0], [0.1, 1.0]]], features
+        )
+
+        assert resolved is results
+        assert [(r.feature_name, r.feature_id) for r in resolved] == [
+            ("Auth", 1), ("LLM feature", None), ("LLM feature", None), ("Billing", 2)
+        ]
+        single = analyzer.resolve_feature_id(_analysis("Login"), [[1.0, 0.0]], features)
+        assert single.feature_id == 1
+        analyzer.embedder.embed_batch.assert_called_once()
@@ -0,0 +1,216 @@
+"""Unit tests for the Confluence HTML table parser."""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from bs4 import BeautifulSoup, Tag
+
+from scripts.confluence import html_table_parser
+from scripts.confluence.html_table_parser import (
+    DEFAULT_HTML_BACKEND,
+    TESTCASE_FIELDS,
+    EnhancedConfluenceTableParser,
+    parse_compact_in_worker,
+)
+
+PAGE_HTML = """
+<h1>Checklist</h1>
+<p>Intro text with <strong>markup</strong>.</p>
+<table><tr><th>Name</th><th>Owner</th></tr><tr><td>Not a checklist</td><td>QA</td></tr></table>
+<ac:structured-macro ac:name="expand"><ac:rich-text-body>
+<table class="confluenceTable"><tbody>
+    <tr><th>№</th><th>STEP</th><th>EXPECTED RESULT</th><th>SCREENSHOT</th>
+        <th>PRIORITY</th><th>CONFIG</th><th>QA AUTO COVERAGE</th></tr>
+    <tr><td colspan="7"><h3>GENERAL</h3></td></tr>
+    <tr><td colspan="7">Login</td></tr>
+    <tr><td>1</td><td>Open login page.</td><td>Form is shown.</td><td></td>
+        <td>HIGH</td><td>Auth</td><td>LoginTests</td></tr>
+    <tr><td>2</td><td>Submit <ul><li>email</li><li>password</li></ul></td><td>User is logged in.</td>
+        <td></td><td>highest</td><td></td><td></td></tr>
+    <tr><td>3</td><td>Logged in user.</td><td></td><td></td><td>LOW</td><td></td><td></td></tr>
+    <tr><td colspan="7"><h3>CUSTOM</h3></td></tr>
+    <tr><td colspan="7">Registration</td></tr>
+    <tr><td>4</td><td>Register user.</td><td>User is registered.</td><td>shot.png</td>
+        <td>MEDIUM</td><td>Registration</td><td></td></tr>
+</tbody></table>
+</ac:rich-text-body></ac:structured-macro>
+<p>Footer</p>
+"""
+
+CDATA_HTML = """
+<table><tbody>
+    <tr><th>STEP</th><th>EXPECTED RESULT</th><th>PRIORITY</th></tr>
+    <tr><td colspan="3"><h3>GENERAL</h3></td></tr>
+    <tr><td colspan="3">Links</td></tr>
+    <tr><td>Open <ac:link><ri:page ri:content-title="Home"/>
+        <ac:plain-text-link-body><![CDATA[Home page]]></ac:plain-text-link-body></ac:link></td>
+        <td>Shown</td><td>LOW</td></tr>
+    <tr><td><ac:structured-macro ac:name="code"><ac:plain-text-body><![CDATA[if a < b && c]]></ac:plain-text-body>
+        </ac:structured-macro></td><td>Ok<![CDATA[!]]>done</td><td>LOW</td></tr>
+</tbody></table>
+"""
+
+
+def _backend(name):
+    if name == "lxml":
+        pytest.importorskip("lxml")
+    return name
+
+
+def _reference_parse(parser, html):
+    """Original algorithm: full html.parser tree, tables checked and parsed separately."""
+    soup = BeautifulSoup(html, "html.parser")
+    testcases = []
+    for table in soup.find_all("table"):
+        if parser._is_testcase_table(table):
+            testcases.extend(parser._parse_table(table, "Checklist"))
+    return testcases
+
+
+@pytest.mark.unit
+class TestEnhancedConfluenceTableParser:
+    """Test single-pass parsing, compact results and parallel mode."""
+
+    @pytest.fixture
+    def parser(self):
+        return EnhancedConfluenceTableParser(html_backend="html.parser")
+
+    def test_same_result_as_full_tree_parse(self, parser):
+        testcases = parser.parse_testcases_from_html(PAGE_HTML, "Checklist")
+
+        assert testcases == _reference_parse(EnhancedConfluenceTableParser("html.parser"), PAGE_HTML)
+        assert [tc["step"] for tc in testcases] == [
+            "Open login page.", "Submit - email - password", "Submit - email - password", "Register user."
+        ]
+        assert testcases[0]["functionality"] == "Login"
+        assert testcases[3]["test_group"] == "CUSTOM"
+
+    def test_rows_of_each_table_are_collected_once(self, parser, monkeypatch):
+        calls = []
+        original = Tag.find_all
+
+        def counting_find_all(self, name=None, *args, **kwargs):
+            if name == "tr":
+                calls.append(self)
+            return original(self, name, *args, **kwargs)
+
+        monkeypatch.setattr(Tag, "find_all", counting_find_all)
+        parser.parse_testcases_from_html(PAGE_HTML, "Checklist")
+
+        assert len(calls) == 2  # one per table
+
+    def test_compact_tuples_round_trip(self, parser):
+        testcases = parser.parse_testcases_from_html(PAGE_HTML, "Checklist")
+        compact = parser.parse_testcases_compact(PAGE_HTML, "Checklist")
+
+        assert all(isinstance(values, tuple) and len(values) == len(TESTCASE_FIELDS) for values in compact)
+        assert [html_table_parser.testcase_from_tuple(values) for values in compact] == testcases
+        assert html_table_parser.testcase_to_tuple(testcases[0]) == compact[0]
+
+    def test_worker_entry_point(self):
+        compact = parse_compact_in_worker(PAGE_HTML, "Checklist", "html.parser")
+        assert len(compact) == 4
+
+    def test_parse_many_keeps_page_order(self, parser):
+        pages = [(PAGE_HTML, "A"), ("<p>no tables</p>", "B"), (PAGE_HTML.replace("Register", "Delete"), "C")]
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = parser.parse_many(pages, executor=executor)
+
+        assert [len(r) for r in results] == [4, 0, 4]
+        assert results[2][3]["step"] == "Delete user."
+
+    def test_parse_many_in_process_pool(self, parser):
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = parser.parse_many([(PAGE_HTML, str(i)) for i in range(4)], executor=executor)
+
+        assert results == [parser.parse_testcases_from_html(PAGE_HTML, "x")] * 4
+
+    @pytest.mark.parametrize("html", [PAGE_HTML, CDATA_HTML], ids=["page", "cdata"])
+    def test_lxml_matches_html_parser(self, html):
+        lxml = EnhancedConfluenceTableParser(html_backend=_backend("lxml"))
+
+        assert lxml.parse_testcases_from_html(html, "Checklist") == EnhancedConfluenceTableParser(
+            html_backend="html.parser"
+        ).parse_testcases_from_html(html, "Checklist")
+
+    @pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+    def test_cdata_text_is_kept(self, backend):
+        testcases = EnhancedConfluenceTableParser(html_backend=_backend(backend)).parse_testcases_from_html(
+            CDATA_HTML, "Checklist"
+        )
+
+        assert [(tc["step"], tc["expected_result"]) for tc in testcases] == [
+            ("Open Home page", "Shown"),
+            ("if a < b && c", "Ok ! done"),
+        ]
+
+    def test_default_backend(self):
+        assert EnhancedConfluenceTableParser().html_backend == DEFAULT_HTML_BACKEND
+        assert DEFAULT_HTML_BACKEND in ("lxml", "html.parser")
+
+
+EDGE_CASES_HTML = """
+<table><tbody>
+    <tr><th>STEP</th><th>EXPECTED RESULT</th><th>PRIORITY</th></tr>
+    <tr><td colspan="3"><h3>GENERAL</h3></td></tr>
+    <tr><td colspan="3">Cart &amp; checkout</td></tr>
+    <tr><td>Add <b>item</b> to   cart<!-- note -->now</td><td>Item &lt;1&gt; added</td><td>MEDIUM</td></tr>
+    <tr><td><ol><li>Open <i>cart</i><ul><li>nested one</li><li>nested two</li></ul></li><li>Pay</li></ol>
+        trailing text</td><td><ul></ul>Paid</td><td>HIGH</td></tr>
+    <tr><td>Code <![CDATA[x < y]]> step</td><td>Works</td><td>LOW</td></tr>
+    <tr><td>No priority</td><td>Still parsed</td><td></td></tr>
+    <tr></tr>
+    <tr><td>Only one</td></tr>
+</tbody></table>
+"""
+
+
+@pytest.mark.unit
+class TestStreamingExtractor:
+    """Test the DOM-free extractor against the DOM parser."""
+
+    @pytest.fixture(autouse=True)
+    def no_error_report(self, monkeypatch):
+        monkeypatch.setattr(EnhancedConfluenceTableParser, "report_checklist_error", lambda *args: None)
+
+    @pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+    @pytest.mark.parametrize(
+        "html", [PAGE_HTML, EDGE_CASES_HTML, CDATA_HTML], ids=["page", "edge-cases", "cdata"]
+    )
+    def test_same_testcases_as_dom(self, html, backend):
+        backend = _backend(backend)
+        dom = EnhancedConfluenceTableParser("html.parser").parse_testcases_from_html(html, "Checklist")
+        streaming = EnhancedConfluenceTableParser(backend, extractor="streaming").parse_testcases_from_html(
+            html, "Checklist"
+        )
+
+        assert dom
+        assert streaming == dom
+
+    def test_text_split_across_chunks(self):
+        from scripts.confluence.table_stream import iter_table_rows
+
+        whole = [[c.get_text(strip=True) for c in cells] for _, cells in iter_table_rows(EDGE_CASES_HTML)]
+        chunked = [
+            [c.get_text(strip=True) for c in cells]
+            for _, cells in iter_table_rows(EDGE_CASES_HTML, chunk_size=7)
+        ]
+
+        assert chunked == whole
+
+    def test_large_table_in_worker(self):
+        rows = "".join(
+            f"<tr><td>{i}</td><td>Step {i}</td><td>Result {i}</td><td></td><td>LOW</td><td></td><td></td></tr>"
+            for i in range(500)
+        )
+        html = PAGE_HTML.replace("</tbody>", rows + "</tbody>")
+
+        compact = parse_compact_in_worker(html, "Big", "html.parser", "streaming")
+
+        assert len(compact) == 504
+        assert compact[-1][0] == "Step 499"
+
+    def test_unknown_extractor(self):
+        with pytest.raises(ValueError, match="Unknown extractor"):
+            EnhancedConfluenceTableParser(extractor="sax")
@@ -0,0 +1,295 @@
+"""Unit tests for the JSON-RPC endpoint of the HTTP API and tool schemas."""
+
+import asyncio
+import gzip
+import json
+import os
+import sys
+import time
+from typing import List, Optional
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import compression, http_api
+from app.compression import choose_encoding
+from app.fast_json import json_bytes
+from app.mcp_tools import TOOL_DEFINITIONS, model_results, qa_get_sections, tool_schemas
+from app.schemas.requests import TestcasesQuery as ListTestcasesQuery
+from app.schemas.responses import QASectionDTO, SectionsResponse
+from app.schemas.tools import tool_input_schema
+from scripts.export_tool_schema import CLIENT_SCHEMA_PATH, render_client_schema
+
+sys.path.insert(0, os.path.dirname(CLIENT_SCHEMA_PATH))
+import mcp_client_remote  # noqa: E402  (stdio clients import their siblings as top-level modules)
+
+
+@pytest.fixture
+def client():
+    return TestClient(http_api.app)
+
+
+def _rpc(client, method, params=None, request_id=1):
+    response = client.post("/jsonrpc", json={"jsonrpc": "2.0", "method": method, "params": params or {}, "id": request_id})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.unit
+class TestJSONRPCHandler:
+    """Test cached handshake responses and method dispatch."""
+
+    def test_tools_list_is_served_from_cache(self, client):
+        with patch("app.mcp_tools.ToolDefinition.schema") as schema:
+            first = _rpc(client, "tools/list", request_id=1)
+            second = _rpc(client, "tools/list", request_id=2)
+
+        schema.assert_not_called()
+        assert first["id"] == 1 and second["id"] == 2 and first["error"] is None
+        assert first["result"] == second["result"] == {"tools": tool_schemas()}
+        assert [tool["name"] for tool in first["result"]["tools"]] == [d.name for d in TOOL_DEFINITIONS]
+
+    def test_initialize_and_ping(self, client):
+        result = _rpc(client, "initialize", request_id=5)
+        assert result == {"jsonrpc": "2.0", "result": http_api.SERVER_INFO, "error": None, "id": 5}
+        assert _rpc(client, "ping")["result"] == {}
+        assert _rpc(client, "notifications/initialized")["id"] is None
+
+    def test_tool_dispatch(self, client):
+        tool = AsyncMock(return_value={"success": True, "sections": []})
+        with patch.dict(http_api.TOOLS, {"qa.get_sections": tool}):
+            called = _rpc(client, "tools/call", {"name": "qa.get_sections", "arguments": {"limit": 5}})
+            direct = _rpc(client, "qa.get_sections", {"limit": 3})
+
+        assert json.loads(called["result"]["content"][0]["text"]) == {"success": True, "sections": []}
+        assert direct["result"] == {"success": True, "sections": []}
+        assert [call.kwargs for call in tool.await_args_list] == [{"limit": 5}, {"limit": 3}]
+
+    def test_unknown_methods(self, client):
+        assert _rpc(client, "tools/call", {"name": "qa.unknown"})["error"]["code"] == -32601
+        assert _rpc(client, "qa.unknown")["error"] == {"code": -32601, "message": "Method not found: qa.unknown"}
+
+
+class _SlowTools:
+    """Tool stubs that record how many calls run at once."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def tool(self, name):
+        async def call(**arguments):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                # Later calls finish first, so completion order differs from request order
+                await asyncio.sleep(0.1 - arguments.get("n", 0) * 0.01)
+                return {"success": True, "tool": name, "arguments": arguments}
+            finally:
+                self.in_flight -= 1
+        return call
+
+
+@pytest.mark.unit
+class TestJSONRPCBatch:
+    """Test JSON-RPC 2.0 batch arrays on /jsonrpc."""
+
+    @pytest.fixture
+    def tools(self):
+        slow = _SlowTools()
+        names = ["qa.get_sections", "qa.get_statistics", "qa.search_testcases"]
+        with patch.dict(http_api.TOOLS, {name: slow.tool(name) for name in names}):
+            yield slow
+
+    def test_batch_runs_concurrently_in_order(self, client, tools):
+        batch = [
+            {"jsonrpc": "2.0", "method": "qa.get_sections", "params": {"n": 0}, "id": 1},
+            {"jsonrpc": "2.0", "method": "tools/call",
+             "params": {"name": "qa.search_testcases", "arguments": {"n": 1}}, "id": "two"},
+            {"jsonrpc": "2.0", "method": "qa.get_statistics", "params": {"n": 2}},  # notification
+            {"jsonrpc": "2.0", "method": "tools/list", "id": 3},
+            {"jsonrpc": "2.0", "method": "qa.get_statistics", "params": {"n": 3}, "id": 4},
+        ]
+
+        started = time.perf_counter()
+        response = client.post("/jsonrpc", json=batch)
+        elapsed = time.perf_counter() - started
+
+        body = response.json()
+        assert [item["id"] for item in body] == [1, "two", 3, 4]
+        assert body[0]["result"]["arguments"] == {"n": 0}
+        assert json.loads(body[1]["result"]["content"][0]["text"])["tool"] == "qa.search_testcases"
+        assert body[2]["result"] == {"tools": tool_schemas()}
+        assert tools.max_in_flight == 4
+        # Sequential calls would take over 0.3s
+        assert elapsed < 0.25
+
+    def test_concurrency_limit(self, client, tools):
+        batch = [{"jsonrpc": "2.0", "method": "qa.get_sections", "id": i} for i in range(6)]
+        with patch.object(http_api.settings, "jsonrpc_batch_concurrency", 2):
+            body = client.post("/jsonrpc", json=batch).json()
+
+        assert [item["id"] for item in body] == list(range(6))
+        assert tools.max_in_flight == 2
+
+    def test_notifications_and_errors(self, client, tools):
+        only_notifications = [{"jsonrpc": "2.0", "method": "notifications/initialized"}]
+        response = client.post("/jsonrpc", json=only_notifications)
+        assert response.status_code == 202 and response.content == b""
+
+        response = client.post("/jsonrpc", json={"jsonrpc": "2.0", "method": "ping"})
+        assert response.status_code == 202
+
+        body = client.post("/jsonrpc", json=[1, {"id": 7}, {"jsonrpc": "2.0", "method": "ping", "id": 8}]).json()
+        assert [item["error"]["code"] if item["error"] else None for item in body] == [-32600, -32600, None]
+        assert [item["id"] for item in body] == [None, 7, 8]
+
+        assert client.post("/jsonrpc", json=[]).json()["error"]["code"] == -32600
+        with patch.object(http_api.settings, "jsonrpc_max_batch_size", 2):
+            assert client.post("/jsonrpc", json=[{"method": "ping", "id": i} for i in range(3)]).json()["error"]["code"] == -32600
+        response = client.post("/jsonrpc", content=b"{not json", headers={"Content-Type": "application/json"})
+        assert response.json()["error"]["code"] == -32700
+
+    def test_stdio_client_sends_one_batch(self, client, tools):
+        posted = []
+
+        def post_jsonrpc(url, payload, timeout=30):
+            posted.append(payload)
+            return client.post("/jsonrpc", json=payload).json()
+
+        handler = mcp_client_remote.RemoteMCPHandler()
+        requests = [
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+            {"jsonrpc": "2.0", "method": "tools/call", "params": {"name": "qa_get_sections", "arguments": {}}, "id": 10},
+            {"jsonrpc": "2.0", "method": "ping", "id": 11},
+            {"jsonrpc": "2.0", "method": "tools/call",
+             "params": {"name": "qa_get_statistics", "arguments": {"n": 1}}, "id": 12},
+        ]
+        with patch.object(mcp_client_remote, "post_jsonrpc", post_jsonrpc):
+            responses = handler.handle_batch(requests)
+
+        assert len(posted) == 1 and len(posted[0]) == 2
+        assert [response["id"] for response in responses] == [10, 11, 12]
+        assert json.loads(responses[0]["result"]["content"][0]["text"])["tool"] == "qa.get_sections"
+        assert json.loads(responses[2]["result"]["content"][0]["text"])["arguments"] == {"n": 1}
+
+
+@pytest.mark.unit
+class TestToolSchemas:
+    """Test schema generation from signatures and request models."""
+
+    def test_input_schema(self):
+        async def tool(query: str, limit: int = 10, tags: Optional[List[str]] = None, priority: Optional[str] = None):
+            return {}
+
+        schema = tool_input_schema(tool, ListTestcasesQuery, {"query": "Search query"})
+
+        assert schema["required"] == ["query"]
+        assert schema["properties"]["query"] == {"type": "string", "description": "Search query"}
+        assert schema["properties"]["limit"] == {
+            "type": "integer", "default": 10, "description": "Maximum number of items to return"
+        }
+        assert schema["properties"]["tags"] == {"type": "array", "items": {"type": "string"}}
+        assert "CRITICAL" in schema["properties"]["priority"]["enum"]
+
+    def test_every_tool_parameter_is_described(self):
+        for tool in tool_schemas():
+            for name, prop in tool["inputSchema"]["properties"].items():
+                assert prop.get("description"), f"{tool['name']}.{name}"
+
+    def test_client_schema_is_up_to_date(self):
+        with open(CLIENT_SCHEMA_PATH, "r", encoding="utf-8") as f:
+            assert f.read() == render_client_schema(), "run python scripts/export_tool_schema.py"
+
+
+def _sections_response(count):
+    sections = [
+        QASectionDTO(id=i, title=f"Checklist {i}", description="Опис розділу", url=f"http://test/{i}",
+                     confluence_page_id=str(i), space_key="QA", checklists_count=i)
+        for i in range(count)
+    ]
+    return SectionsResponse(sections=sections, total=count, limit=count, offset=0)
+
+
+@pytest.mark.unit
+class TestFastResponses:
+    """Test direct model serialization and response compression."""
+
+    @pytest.fixture
+    def service(self):
+        service = AsyncMock()
+        with patch("app.mcp_tools._get_service", return_value=service):
+            yield service
+
+    def test_json_bytes(self):
+        response = _sections_response(2)
+
+        assert json_bytes(response) == response.model_dump_json().encode("utf-8")
+        assert json.loads(json_bytes({"response": response, 1: "x"})) == {"response": response.model_dump(mode="json"), "1": "x"}
+
+    @pytest.mark.asyncio
+    async def test_tools_return_models_on_request(self, service):
+        service.list_sections.return_value = _sections_response(2)
+
+        assert await qa_get_sections() == _sections_response(2).model_dump()
+        with model_results():
+            assert await qa_get_sections() == _sections_response(2)
+        assert isinstance(await qa_get_sections(), dict)
+
+    def test_tool_call_serializes_model(self, client, service):
+        service.list_sections.return_value = _sections_response(3)
+
+        called = _rpc(client, "tools/call", {"name": "qa.get_sections", "arguments": {}})
+        direct = _rpc(client, "qa.get_sections")
+
+        expected = _sections_response(3).model_dump(mode="json")
+        assert json.loads(called["result"]["content"][0]["text"]) == expected
+        assert direct["result"] == expected
+
+    def test_choose_encoding(self):
+        assert choose_encoding("gzip, deflate", ["br", "gzip"]) == "gzip"
+        assert choose_encoding("gzip, br", ["br", "gzip"]) == "br"
+        assert choose_encoding("br;q=0.5, gzip;q=0.8", ["br", "gzip"]) == "gzip"
+        assert choose_encoding("gzip;q=0, *;q=0.1", ["gzip"]) is None
+        assert choose_encoding("*", ["br", "gzip"]) == "br"
+        assert choose_encoding("identity", ["gzip"]) is None
+        assert choose_encoding(None, ["gzip"]) is None
+
+    def test_large_responses_are_compressed(self, client, service):
+        service.list_sections.return_value = _sections_response(200)
+        large = {"jsonrpc": "2.0", "method": "qa.get_sections", "id": 1}
+
+        with patch.object(compression, "brotli", None):
+            response = client.post("/jsonrpc", json=large, headers={"Accept-Encoding": "br, gzip"})
+            raw = client.post("/jsonrpc", json=large, headers={"Accept-Encoding": "identity"})
+            small = client.post("/jsonrpc", json={"jsonrpc": "2.0", "method": "ping", "id": 2},
+                                headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        # httpx decodes gzip itself; the raw stream is what went over the wire
+        assert int(response.headers["content-length"]) < len(raw.content) // 4
+        assert response.json() == raw.json()
+        assert response.json()["result"]["total"] == 200
+        assert "content-encoding" not in raw.headers
+        assert "content-encoding" not in small.headers and small.json()["result"] == {}
+
+    def test_stdio_client_accepts_gzip(self):
+        body = json.dumps({"jsonrpc": "2.0", "result": {}, "id": 1}).encode("utf-8")
+
+        class Response:
+            headers = {"Content-Encoding": "gzip"}
+
+            def read(self):
+                return gzip.compress(body)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+        with patch("urllib.request.urlopen", return_value=Response()) as urlopen:
+            assert mcp_client_remote.post_jsonrpc("http://test", {"method": "ping"}) == {"jsonrpc": "2.0", "result": {}, "id": 1}
+        assert urlopen.call_args.args[0].get_header("Accept-encoding") == "gzip"
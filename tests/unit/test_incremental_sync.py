@@ -0,0 +1,127 @@
+"""Unit tests for incremental Confluence sync in the unified loader."""
+
+import hashlib
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from app.models import qa_models
+from app.models.qa_models import Checklist, QASection
+from scripts.confluence.unified_loader import LoadingProgress, UnifiedConfluenceLoader
+
+
+def _loader(test_session_factory):
+    loader = UnifiedConfluenceLoader.__new__(UnifiedConfluenceLoader)
+    loader.qa_repo = Mock()
+    loader.qa_repo.get_session.side_effect = test_session_factory
+    loader.load_mysql = True
+    loader.load_vector = True
+    loader.vector_repo = Mock()
+    loader.incremental = True
+    loader.delete_missing = True
+    loader.progress = LoadingProgress()
+    loader._existing_checklists = set()
+    loader._checklist_state = {}
+    loader._config_ids = {}
+    loader._resumed = {}
+    return loader
+
+
+def _store_checklist(session, page_id, content, version, space_key="QA"):
+    if session.get(QASection, 1) is None:
+        session.add(QASection(id=1, title="Section", url="http://test", confluence_page_id="s1", space_key=space_key))
+    session.add(Checklist(
+        id=page_id,
+        confluence_page_id=page_id,
+        title=f"Checklist {page_id}",
+        url="http://test",
+        space_key=space_key,
+        section_id=1,
+        content_hash=hashlib.md5(content.encode()).hexdigest(),
+        version=version
+    ))
+    session.add(qa_models.TestCase(checklist_id=page_id, step="Step", expected_result="Result", order_index=0))
+    session.commit()
+
+
+def _page(page_id, content, version, space="QA"):
+    return {"id": page_id, "title": f"Page {page_id}", "content": content, "version": version, "space": space}
+
+
+@pytest.mark.unit
+class TestIncrementalSync:
+    """Test change detection and replacement of checklists."""
+
+    @pytest.fixture
+    def loader(self, test_session, test_session_factory):
+        _store_checklist(test_session, "100", "<p>old</p>", version=3)
+        _store_checklist(test_session, "200", "<p>other</p>", version=1)
+        loader = _loader(test_session_factory)
+        loader._load_existing_checklists()
+        return loader
+
+    @pytest.mark.asyncio
+    async def test_same_version_is_skipped(self, loader):
+        loader._process_page_mysql = AsyncMock()
+
+        result = await loader._process_page_unified(_page("100", "<p>old</p>", 3))
+
+        assert result["unchanged"] is True
+        loader._process_page_mysql.assert_not_called()
+        loader.vector_repo.delete_document_chunks.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_new_version_with_same_content_only_bumps_version(self, loader, test_session):
+        result = await loader._process_page_unified(_page("100", "<p>old</p>", 4))
+
+        assert result["unchanged"] is True
+        test_session.expire_all()
+        assert test_session.get(Checklist, "100").version == 4
+
+    @pytest.mark.asyncio
+    async def test_changed_page_is_replaced_on_write(self, loader, test_session):
+        loader._process_page_mysql = AsyncMock(
+            return_value={"success": True, "testcases_created": 2, "configs_created": 0}
+        )
+        loader._process_page_vector = AsyncMock(return_value={"success": True, "chunks_created": 1})
+
+        result = await loader._process_page_unified(_page("100", "<p>new</p>", 4))
+
+        assert result["replaced"] is True
+        assert result["mysql_success"] is True
+        page = _page("100", "<p>new</p>", 4)
+        loader._process_page_mysql.assert_awaited_once_with(page, replace=True)
+        loader._process_page_vector.assert_awaited_once_with(page, replace=True)
+        # Nothing is dropped before the new version is written
+        loader.vector_repo.delete_document_chunks.assert_not_called()
+        test_session.expire_all()
+        assert test_session.get(Checklist, "100") is not None
+        assert loader._checklist_state["100"][0] == 4
+
+    @pytest.mark.asyncio
+    async def test_failed_write_keeps_old_version(self, loader, test_session):
+        loader._process_page_mysql = AsyncMock(return_value={"success": False, "reason": "Помилка: db is down"})
+        loader._process_page_vector = AsyncMock(return_value={"success": False, "reason": "Помилка: 429"})
+
+        result = await loader._process_page_unified(_page("100", "<p>new</p>", 4))
+
+        assert result["mysql_success"] is False
+        test_session.expire_all()
+        assert test_session.get(Checklist, "100").version == 3
+        assert test_session.query(qa_models.TestCase).filter(qa_models.TestCase.checklist_id == "100").count() == 1
+        loader.vector_repo.delete_document_chunks.assert_not_called()
+        # Still counts as changed on the next run
+        assert loader._checklist_state["100"][0] == 3
+
+    def test_vanished_pages_in_crawled_spaces_are_deleted(self, loader, test_session, test_session_factory):
+        _store_checklist(test_session, "300", "<p>eng</p>", version=1, space_key="ENG")
+        loader._load_existing_checklists()
+
+        loader._delete_vanished_checklists({"100": "QA"})
+
+        test_session.expire_all()
+        assert test_session.get(Checklist, "200") is None
+        assert test_session.get(Checklist, "100") is not None
+        # Space that was not crawled is left alone
+        assert test_session.get(Checklist, "300") is not None
+        assert loader.progress.deleted_checklists == 1
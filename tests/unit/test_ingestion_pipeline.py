@@ -0,0 +1,379 @@
+"""Unit tests for the staged ingestion pipeline."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from click.testing import CliRunner
+from unittest.mock import Mock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import qa_models
+from app.models.qa_models import Base, Checklist, QASection
+from scripts.confluence.html_table_parser import EnhancedConfluenceTableParser
+from scripts.confluence.ingestion_pipeline import IngestionPipeline, Stage
+from scripts.confluence.unified_loader import LoadingProgress, UnifiedConfluenceLoader, main
+
+
+async def _source(items, pulled=None):
+    for item in items:
+        if pulled is not None:
+            pulled.append(item)
+        yield item
+
+
+@pytest.mark.unit
+class TestIngestionPipeline:
+    """Test queues, workers and counters of the pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_items_pass_through_all_stages(self):
+        written = []
+
+        async def double(x):
+            return x * 2
+
+        async def write(x):
+            written.append(x)
+
+        pipeline = IngestionPipeline([Stage("double", double, workers=3), Stage("write", write)])
+        stats = await pipeline.run(_source(range(20)))
+
+        assert sorted(written) == [x * 2 for x in range(20)]
+        assert stats["double"].processed == 20
+        assert stats["write"].processed == 20
+
+    @pytest.mark.asyncio
+    async def test_stage_workers_run_concurrently(self):
+        active = 0
+        peak = 0
+
+        async def slow(x):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return x
+
+        pipeline = IngestionPipeline([Stage("slow", slow, workers=4)])
+        await pipeline.run(_source(range(12)))
+
+        assert peak == 4
+
+    @pytest.mark.asyncio
+    async def test_batches_respect_batch_size(self):
+        batches = []
+
+        async def write(batch):
+            batches.append(list(batch))
+
+        pipeline = IngestionPipeline([Stage("write", write, batch_size=4, batch_timeout=1.0)])
+        await pipeline.run(_source(range(10)))
+
+        assert all(len(batch) <= 4 for batch in batches)
+        assert sorted(x for batch in batches for x in batch) == list(range(10))
+        assert pipeline.stats["write"].processed == 10
+
+    @pytest.mark.asyncio
+    async def test_slow_stage_applies_backpressure(self):
+        pulled = []
+        written = []
+
+        lag = []
+
+        async def write(x):
+            await asyncio.sleep(0.005)
+            lag.append(len(pulled) - len(written))
+            written.append(x)
+
+        async def passthrough(x):
+            return x
+
+        pipeline = IngestionPipeline([Stage("pass", passthrough), Stage("write", write)], queue_size=1)
+        stats = await pipeline.run(_source(range(30), pulled))
+
+        assert len(written) == 30
+        # Source runs ahead at most by the queued items plus one held by each task
+        assert max(lag) <= 5
+        assert stats["pass"].blocked_seconds > 0
+
+    @pytest.mark.asyncio
+    async def test_failed_items_are_counted_and_skipped(self):
+        errors = []
+        written = []
+
+        async def check(x):
+            if x == 3:
+                raise ValueError("bad item")
+            return x
+
+        async def write(x):
+            written.append(x)
+
+        pipeline = IngestionPipeline(
+            [Stage("check", check), Stage("write", write)],
+            on_error=lambda stage, item, e: errors.append((stage.name, item, str(e)))
+        )
+        stats = await pipeline.run(_source(range(5)))
+
+        assert written == [0, 1, 2, 4]
+        assert stats["check"].failed == 1
+        assert errors == [("check", 3, "bad item")]
+
+    @pytest.mark.asyncio
+    async def test_stop_stops_pulling_source(self):
+        pulled = []
+        pipeline = None
+
+        async def write(x):
+            if x == 2:
+                pipeline.stop()
+
+        pipeline = IngestionPipeline([Stage("write", write)], queue_size=1)
+        await pipeline.run(_source(range(100), pulled))
+
+        assert len(pulled) < 10
+
+
+TABLE_HTML = """
+<table class="confluenceTable">
+    <tr><th>№</th><th>STEP</th><th>EXPECTED RESULT</th><th>SCREENSHOT</th>
+        <th>PRIORITY</th><th>CONFIG</th><th>QA AUTO COVERAGE</th></tr>
+    <tr><td colspan="7"><h3>GENERAL</h3></td></tr>
+    <tr><td colspan="7">Logos</td></tr>
+    <tr><td>1</td><td>Open {name} page.</td><td>Page is opened.</td><td></td>
+        <td>HIGH</td><td>Logos</td><td></td></tr>
+</table>
+"""
+
+
+def _page(page_id):
+    return {
+        "id": page_id,
+        "title": f"Checklist {page_id}",
+        "content": TABLE_HTML.format(name=page_id),
+        "version": 1,
+        "space": "QA",
+        "url": "http://test",
+        "labels": []
+    }
+
+
+@pytest.mark.unit
+class TestPipelinedLoader:
+    """Test the unified loader running through the pipeline."""
+
+    @pytest.fixture
+    def session_factory(self):
+        # Stages write from worker threads, so all threads must share one in-memory database
+        engine = create_engine(
+            "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(engine)
+        yield sessionmaker(bind=engine)
+        engine.dispose()
+
+    @pytest.fixture
+    def test_session(self, session_factory):
+        session = session_factory()
+        yield session
+        session.close()
+
+    @pytest.fixture
+    def loader(self, test_session, session_factory):
+        test_session.add(QASection(id=1, title="Section", url="http://test", confluence_page_id="s1", space_key="QA"))
+        test_session.commit()
+
+        loader = UnifiedConfluenceLoader.__new__(UnifiedConfluenceLoader)
+        loader.use_mock = True
+        loader.load_mysql = True
+        loader.load_vector = True
+        loader.side_by_side = False
+        loader.incremental = False
+        loader.delete_missing = False
+        loader.progress = LoadingProgress()
+        loader.parse_workers = 2
+        loader.embed_concurrency = 2
+        loader.write_batch_size = 10
+        loader._parse_pool = None
+        loader._pipeline_stats = {}
+        loader._existing_checklists = set()
+        loader._checklist_state = {}
+        loader._config_ids = {}
+        loader._checkpoints = None
+        loader._resumed = {}
+        loader._resumed_job_id = None
+        loader._resume_candidates = []
+        loader._sections_config = {}
+        loader.qa_repo = Mock()
+        loader.qa_repo.get_session.side_effect = session_factory
+        loader.html_parser = EnhancedConfluenceTableParser()
+        loader.chunker = Mock()
+        loader.chunker.chunk_text.side_effect = lambda text: [text]
+        loader.embedder = Mock()
+        loader.embedder.embed_batch.side_effect = lambda texts: [[0.1, 0.2] for _ in texts]
+        loader.vector_repo = Mock()
+        loader.vector_repo.upsert_chunks_batch.side_effect = lambda chunks: (len(chunks), 0)
+        loader.confluence_api = Mock(spec=["iter_pages", "get_page_content", "normalize_content"])
+        loader.confluence_api.iter_pages.side_effect = lambda **kwargs: iter([_page(str(i)) for i in range(1, 6)])
+        loader.confluence_api.normalize_content.side_effect = lambda content: content
+        # Threads instead of processes keep the test fast; the worker function is the same
+        loader._create_parse_pool = lambda: ThreadPoolExecutor(max_workers=2)
+        return loader
+
+    @pytest.mark.asyncio
+    async def test_loads_all_pages(self, loader, test_session):
+        result = await loader.load_data()
+
+        assert result["checklists_created"] == 5
+        assert result["testcases_created"] == 5
+        assert result["chunks_created"] == 5
+        assert test_session.query(Checklist).count() == 5
+        assert test_session.query(qa_models.TestCase).count() == 5
+        # Content comes with the page, no second fetch
+        loader.confluence_api.get_page_content.assert_not_called()
+        assert set(loader._pipeline_stats) == {"prepare", "parse", "chunk", "embed", "write"}
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_written_in_batches(self, loader):
+        await loader.load_data()
+
+        written = sum(len(call.args[0]) for call in loader.vector_repo.upsert_chunks_batch.call_args_list)
+        assert written == 5
+        assert loader.vector_repo.upsert_chunks_batch.call_count < 5
+
+    @pytest.mark.asyncio
+    async def test_limit_stops_loading(self, loader, test_session):
+        loader.write_batch_size = 1
+
+        result = await loader.load_data(limit=2)
+
+        assert result["checklists_created"] == 2
+        assert test_session.query(Checklist).count() == 2
+
+    @pytest.mark.asyncio
+    async def test_limit_is_enforced_before_embedding(self, loader):
+        loader.confluence_api.iter_pages.side_effect = lambda **kwargs: iter([_page(str(i)) for i in range(1, 41)])
+
+        result = await loader.load_data(limit=3)
+
+        assert result["checklists_created"] == 3
+        # Pages over the limit are neither parsed nor embedded
+        embedded = [text for call in loader.embedder.embed_batch.call_args_list for text in call.args[0]]
+        assert len(embedded) == 3
+        assert loader._pipeline_stats["parse"].processed == 3
+        # Nothing admitted past the limit, and the crawl stops early
+        assert loader._pipeline_stats["prepare"].processed < 40
+
+    @pytest.mark.asyncio
+    async def test_unchanged_pages_do_not_count_towards_limit(self, loader):
+        await loader.load_data(limit=2)
+        loader.incremental = True
+        loader._load_existing_checklists()
+        loader.progress = LoadingProgress()
+
+        result = await loader.load_data(limit=2)
+
+        assert (result["unchanged_checklists"], result["checklists_created"]) == (2, 2)
+
+    @pytest.mark.asyncio
+    async def test_embedding_failure_keeps_mysql_result(self, loader, test_session):
+        loader.embedder.embed_batch.side_effect = RuntimeError("rate limited")
+
+        result = await loader.load_data()
+
+        assert result["checklists_created"] == 5
+        assert result["chunks_created"] == 0
+        loader.vector_repo.upsert_chunks_batch.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_delete_missing_only_after_space_crawl(self, loader, test_session):
+        test_session.add(Checklist(id="99", title="Old", url="http://test", confluence_page_id="99",
+                                   section_id=1, space_key="QA", content_hash="x"))
+        test_session.commit()
+        loader.incremental = True
+        loader.delete_missing = True
+        loader._load_existing_checklists()
+
+        # A label selection sees only part of the space
+        await loader.load_data(labels=["smoke"])
+        assert test_session.get(Checklist, "99") is not None
+
+        # So does a subtree of root pages
+        loader.use_mock = False
+        loader.confluence_api.iter_pages_by_ids = Mock(return_value=iter([_page("1")]))
+        await loader.load_data(page_ids=["1"])
+        test_session.expire_all()
+        assert test_session.get(Checklist, "99") is not None
+        assert loader.progress.deleted_checklists == 0
+
+        await loader.load_data(space_keys=["QA"])
+        test_session.expire_all()
+        assert test_session.get(Checklist, "99") is None
+        assert test_session.query(Checklist).count() == 5
+
+    @pytest.mark.asyncio
+    async def test_failed_pages_are_not_deleted_as_vanished(self, loader, test_session):
+        await loader.load_data()
+        loader.incremental = True
+        loader.delete_missing = True
+        loader._load_existing_checklists()
+        plan_page = loader._plan_page
+
+        def failing_plan(page):
+            if page["id"] == "3":
+                raise RuntimeError("db is down")
+            return plan_page(page)
+
+        # A page failing in prepare, then a whole write batch failing
+        with patch.object(loader, "_plan_page", side_effect=failing_plan):
+            await loader.load_data(space_keys=["QA"])
+        with patch.object(loader, "_report_page", side_effect=RuntimeError("disk full")):
+            await loader.load_data(space_keys=["QA"])
+
+        assert loader._pipeline_stats["write"].failed == 5
+        assert loader.progress.deleted_checklists == 0
+        test_session.expire_all()
+        assert test_session.query(Checklist).count() == 5
+
+    def test_delete_missing_rejects_partial_selection(self):
+        runner = CliRunner()
+        for args in (["--page-ids", "1"], ["--use-config"], ["--spaces", "QA", "--labels", "smoke"], []):
+            result = runner.invoke(main, ["--incremental", "--delete-missing", *args])
+            assert result.exit_code == 1
+            assert "--delete-missing needs a crawl of whole spaces" in result.output
+
+    @pytest.mark.asyncio
+    async def test_changed_page_is_replaced_in_write_stage(self, loader, test_session):
+        await loader.load_data()
+        loader.incremental = True
+        loader._load_existing_checklists()
+        loader.vector_repo.reset_mock()
+        changed = {**_page("1"), "content": TABLE_HTML.format(name="new"), "version": 2}
+        loader.confluence_api.iter_pages.side_effect = lambda **kwargs: iter([changed])
+        loader.chunker.chunk_text.side_effect = lambda text: ["first", "second"]
+
+        # Parsing and embedding fail: the old version stays everywhere
+        loader.embedder.embed_batch.side_effect = RuntimeError("rate limited")
+        with patch("scripts.confluence.unified_loader.parse_compact_in_worker", side_effect=ValueError("broken")):
+            await loader.load_data()
+        test_session.expire_all()
+        assert test_session.get(Checklist, "1").version == 1
+        assert [tc.step for tc in test_session.get(Checklist, "1").testcases] == ["Open 1 page."]
+        loader.vector_repo.delete_document_chunks.assert_not_called()
+
+        loader.embedder.embed_batch.side_effect = lambda texts: [[0.1, 0.2] for _ in texts]
+        result = await loader.load_data()
+
+        assert result["updated_checklists"] == 1
+        test_session.expire_all()
+        assert test_session.get(Checklist, "1").version == 2
+        assert [tc.step for tc in test_session.get(Checklist, "1").testcases] == ["Open new page."]
+        assert test_session.query(Checklist).count() == 5
+        # Leftover chunks are dropped after the new ones are upserted
+        calls = [call[0] for call in loader.vector_repo.mock_calls]
+        assert calls == ["upsert_chunks_batch", "delete_document_chunks"]
+        loader.vector_repo.delete_document_chunks.assert_called_once_with("1", keep_ordinals=[0, 1])
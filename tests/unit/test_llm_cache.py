@@ -0,0 +1,156 @@
+"""Unit tests for the persistent LLM response cache."""
+
+import json
+
+import pytest
+from unittest.mock import Mock, patch
+
+from app.ai.feature_tagger import FeatureTagger
+from app.ai.llm_cache import LLMResponseCache, content_hash
+from app.ai.qa_analyzer import QAContentAnalyzer
+from scripts.analyze.llm_checklist_analyzer import LLMChecklistAnalyzer
+
+
+def _completion(text):
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = text
+    return response
+
+
+def _client(*texts):
+    client = Mock()
+    client.chat.completions.create.side_effect = [_completion(text) for text in texts]
+    return client
+
+
+ANALYSIS = json.dumps({
+    "section_title": "Checklist WEB",
+    "checklist_description": "Billing",
+    "feature_name": "Billing",
+    "testcases": [{"step": "Open", "expected_result": "Shown", "order_index": 1}],
+    "confidence": 0.9
+})
+
+
+@pytest.mark.unit
+class TestLLMResponseCache:
+    """Test keys, persistence, invalidation and hit rates."""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "cache" / "llm.sqlite")
+
+    def test_entries_survive_reopening(self, path):
+        cache = LLMResponseCache(path, enabled=True)
+        cache.set("qa", "gpt", "1", "abc", {"testcases": [1, 2]})
+        cache.close()
+
+        reopened = LLMResponseCache(path, enabled=True)
+
+        assert reopened.get("qa", "gpt", "1", "abc") == {"testcases": [1, 2]}
+        assert reopened.get("qa", "gpt", "2", "abc") is None
+        assert reopened.get("qa", "other", "1", "abc") is None
+        assert reopened.get("feature", "gpt", "1", "abc") is None
+
+    def test_hit_rates_per_namespace(self, path):
+        cache = LLMResponseCache(path, enabled=True)
+        cache.set("qa", "gpt", "1", "a", {})
+        for key in ("a", "a", "a", "b"):
+            cache.get("qa", "gpt", "1", key)
+        cache.get("feature", "gpt", "1", "a")
+
+        assert cache.stats() == {
+            "feature": {"hits": 0, "misses": 1, "hit_rate": 0.0},
+            "qa": {"hits": 3, "misses": 1, "hit_rate": 0.75},
+        }
+
+    def test_invalidate_with_filters(self, path):
+        cache = LLMResponseCache(path, enabled=True)
+        cache.set("qa", "gpt", "1", "a", {})
+        cache.set("qa", "gpt", "2", "a", {})
+        cache.set("feature", "gpt", "1", "a", {})
+
+        assert cache.invalidate(namespace="qa", prompt_version="1") == 1
+        assert cache.entries() == {"feature": 1, "qa": 1}
+        assert cache.invalidate() == 2
+        assert cache.entries() == {}
+
+    def test_disabled_cache_does_nothing(self, path):
+        cache = LLMResponseCache(path, enabled=False)
+        cache.set("qa", "gpt", "1", "a", {})
+
+        assert cache.get("qa", "gpt", "1", "a") is None
+        assert cache.stats() == {}
+
+    def test_content_hash(self):
+        assert content_hash("Title", "Body") == content_hash("Title", "Body")
+        assert content_hash("Title", "Body") != content_hash("TitleB", "ody")
+        assert len(content_hash("x")) == 64
+
+
+@pytest.mark.unit
+class TestAnalyzersUseCache:
+    """Test that unchanged content skips the chat model."""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return LLMResponseCache(str(tmp_path / "llm.sqlite"), enabled=True)
+
+    def test_qa_analyzer(self, cache):
+        analyzer = QAContentAnalyzer(api_key="test", model="gpt-test", llm_cache=cache)
+        analyzer.client = _client(ANALYSIS, ANALYSIS)
+
+        first = analyzer.analyze_qa_content("WEB: Billing", "<table/>")
+        second = analyzer.analyze_qa_content("WEB: Billing", "<table/>")
+        changed = analyzer.analyze_qa_content("WEB: Billing", "<table>edit</table>")
+
+        assert analyzer.client.chat.completions.create.call_count == 2
+        assert first == second == changed
+        assert second.testcases == [{"step": "Open", "expected_result": "Shown", "order_index": 1}]
+        assert second.parsing_method == "llm"
+        assert cache.stats()["qa_analysis"] == {"hits": 1, "misses": 2, "hit_rate": 1 / 3}
+
+    def test_prompt_version_bump_misses(self, cache):
+        analyzer = QAContentAnalyzer(api_key="test", model="gpt-test", llm_cache=cache)
+        analyzer.client = _client(ANALYSIS, ANALYSIS)
+        analyzer.analyze_qa_content("Title", "content")
+
+        with patch.object(QAContentAnalyzer, "PROMPT_VERSION", "2"):
+            analyzer.analyze_qa_content("Title", "content")
+
+        assert analyzer.client.chat.completions.create.call_count == 2
+
+    def test_failures_are_not_cached(self, cache):
+        analyzer = QAContentAnalyzer(api_key="test", model="gpt-test", llm_cache=cache)
+        analyzer.client = Mock()
+        analyzer.client.chat.completions.create.side_effect = [
+            RuntimeError("timeout"), _completion("no json here"), _completion(ANALYSIS)
+        ]
+
+        assert analyzer.analyze_qa_content("Title", "content").parsing_method == "fallback"
+        assert analyzer.analyze_qa_content("Title", "content").feature_name == "General"
+        assert analyzer.analyze_qa_content("Title", "content").feature_name == "Billing"
+        assert cache.entries() == {"qa_analysis": 1}
+
+    def test_feature_tagger(self, cache):
+        tagger = FeatureTagger(api_key="test", model="gpt-test", llm_cache=cache)
+        tagger.client = _client('{"name": "Billing", "description": "Payments"}', "not json")
+
+        assert tagger.generate_feature_from_document("Doc", "text") == ("Billing", "Payments")
+        assert tagger.generate_feature_from_document("Doc", "text") == ("Billing", "Payments")
+        assert tagger.generate_feature_from_document("Doc", "other") == ("General", "Automatically categorized document")
+        assert tagger.client.chat.completions.create.call_count == 2
+        assert cache.entries() == {"feature_generation": 1}
+
+    def test_checklist_analyzer(self, cache):
+        analyzer = LLMChecklistAnalyzer(llm_cache=cache)
+        analyzer.client = _client(json.dumps({"description": "Billing", "testcases": [{"step": "Open"}]}))
+
+        first = analyzer.analyze_checklist_content("WEB: Billing", "<table/>")
+        second = analyzer.analyze_checklist_content("WEB: Billing", "<table/>")
+
+        assert first == second
+        assert second.description == "Billing"
+        analyzer.client.chat.completions.create.assert_called_once()
+        assert cache.stats()["checklist_analysis"]["hits"] == 1
@@ -102,6 +102,7 @@ class TestMCPTools:
             'qa_search_documents',
             'qa_search_testcases',
             'qa_search_testcases_text',
+            'qa_find_duplicate_testcases',
             'qa_get_sections_mcp',
             'qa_get_checklists',
             'qa_get_testcases',
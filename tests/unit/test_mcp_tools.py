@@ -3,6 +3,9 @@
 Unit tests for MCP tools (mcp_tools.py) with mocks.
 """
 
+import asyncio
+import time
+
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
 from typing import Dict, Any
@@ -11,6 +14,7 @@ from app.mcp_tools import (
     qa_search_documents,
     qa_search_testcases,
     qa_search_testcases_text,
+    qa_find_duplicate_testcases,
     qa_list_features,
     qa_docs_by_feature,
     qa_health,
@@ -28,10 +32,10 @@ class TestQASearchDocuments:
     
     @pytest.mark.asyncio
     @pytest.mark.unit
-    async def test_successful_search(self, mock_openai_embedder, mock_vector_repo):
+    async def test_successful_search(self, mock_openai_embedder, mock_async_vector_repo):
         """Test successful document search."""
         with patch('app.ai.embedder.OpenAIEmbedder', return_value=mock_openai_embedder), \
-             patch('app.data.vectordb_repo.VectorDBRepository', return_value=mock_vector_repo):
+             patch('app.mcp_tools.get_async_vector_repository', return_value=mock_async_vector_repo):
             
             result = await qa_search_documents("test query", top_k=5)
             
@@ -44,13 +48,13 @@ class TestQASearchDocuments:
     
     @pytest.mark.asyncio
     @pytest.mark.unit
-    async def test_embedding_failure(self, mock_vector_repo):
+    async def test_embedding_failure(self, mock_async_vector_repo):
         """Test search when embedding generation fails."""
         mock_embedder = Mock()
         mock_embedder.embed_text.return_value = None
         
         with patch('app.ai.embedder.OpenAIEmbedder', return_value=mock_embedder), \
-             patch('app.data.vectordb_repo.VectorDBRepository', return_value=mock_vector_repo):
+             patch('app.mcp_tools.get_async_vector_repository', return_value=mock_async_vector_repo):
             
             result = await qa_search_documents("test query")
             
@@ -70,6 +74,29 @@ class TestQASearchDocuments:
             assert "Test error" in result["error"]
             assert result["results"] == []
             assert result["count"] == 0
+    
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    async def test_concurrent_searches_overlap(self, mock_openai_embedder, mock_vector_repo):
+        """Test that concurrent document searches do not block each other."""
+        async def slow_search(**kwargs):
+            await asyncio.sleep(0.2)
+            return mock_vector_repo.search.return_value
+        
+        mock_repo = Mock()
+        mock_repo.search = AsyncMock(side_effect=slow_search)
+        
+        with patch('app.ai.embedder.OpenAIEmbedder', return_value=mock_openai_embedder), \
+             patch('app.mcp_tools.get_async_vector_repository', return_value=mock_repo):
+            started = time.perf_counter()
+            results = await asyncio.gather(
+                *(qa_search_documents(f"query {i}") for i in range(5))
+            )
+            elapsed = time.perf_counter() - started
+        
+        assert all(result["success"] for result in results)
+        assert mock_repo.search.await_count == 5
+        assert elapsed < 0.6
 
 
 class TestQASearchTestcases:
@@ -508,6 +535,54 @@ class TestQAGetConfigs:
         assert ">= 0" in result["error"]
 
 
+class TestQAFindDuplicateTestcases:
+    """Test qa_find_duplicate_testcases function."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    async def test_successful_find(self, mock_qa_repo):
+        """Test duplicate groups are limited and passed through with context."""
+        group = {
+            "testcases": [
+                {"id": 1, "checklist_id": "10", "checklist_title": "WEB: Login", "section_id": 1,
+                 "section_title": "Checklist WEB", "step": "Open login", "expected_result": "Shown", "similarity": 0.97},
+                {"id": 2, "checklist_id": "20", "checklist_title": "MOB: Login", "section_id": 2,
+                 "section_title": "Checklist MOB", "step": "Open login", "expected_result": "Shown", "similarity": 0.97},
+            ],
+            "checklists": 2,
+            "sections": 2,
+        }
+        mock_qa_repo.find_semantic_duplicate_testcases.return_value = {
+            "groups": [group, group, group],
+            "testcases_scanned": 100,
+            "skipped_embeddings": 1,
+            "threshold": 0.9,
+        }
+
+        with patch('app.mcp_tools.qa_repo', mock_qa_repo):
+            result = await qa_find_duplicate_testcases(threshold=0.9, section_id=1, limit=2)
+
+        assert result["success"] is True
+        assert result["count"] == 2 and result["total"] == 3
+        assert result["testcases_scanned"] == 100
+        assert result["groups"][0]["testcases"][1]["section_title"] == "Checklist MOB"
+        mock_qa_repo.find_semantic_duplicate_testcases.assert_called_once_with(
+            threshold=0.9, cross_checklist_only=True, section_id=1
+        )
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    async def test_parameter_validation(self):
+        """Test threshold and limit validation."""
+        result = await qa_find_duplicate_testcases(threshold=1.5)
+        assert result["success"] is False
+        assert "threshold" in result["error"]
+
+        result = await qa_find_duplicate_testcases(limit=0)
+        assert result["success"] is False
+        assert "limit must be between 1 and 200" in result["error"]
+
+
 class TestQAGetStatistics:
     """Test qa_get_statistics function."""
     
@@ -0,0 +1,352 @@
+"""Unit tests for MinHash/LSH near-duplicate detection."""
+
+import random
+import time
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.data import near_duplicates
+from app.data.near_duplicates import (
+    DuplicateTestcaseFilter, MinHashIndex, cluster_pairs, embedding_duplicate_clusters, embedding_duplicate_pairs,
+    group_near_duplicates, jaccard, word_set
+)
+from app.data.qa_repository import QARepository
+from app.models import qa_models
+from app.models.qa_models import Base, Checklist, QASection
+from scripts.extract_checklist import UniversalChecklistExtractor
+
+WORDS = ("open click page user login button profile search result shown field enter "
+         "verify check menu settings save cancel error message payment card banner").split()
+
+
+def _sentence(rnd, length):
+    return " ".join(rnd.choice(WORDS) + str(rnd.randint(0, 30)) for _ in range(length))
+
+
+def _variant(rnd, text):
+    """Same sentence with one word replaced: Jaccard around 0.9 for 20 words."""
+    words = text.split()
+    words[rnd.randrange(len(words))] = "changed" + str(rnd.randint(0, 10 ** 6))
+    return " ".join(words)
+
+
+def _reference_dedup(steps):
+    """Original quadratic loop of _remove_duplicates_enhanced."""
+    kept, seen = [], []
+    for step in steps:
+        if not step or len(step.strip()) < 10:
+            continue
+        normalized = near_duplicates.normalize_for_comparison(step)
+        if any(jaccard(normalized.split(), other.split()) > 0.85 for other in seen):
+            continue
+        seen.append(normalized)
+        kept.append(step)
+    return kept
+
+
+def _reference_groups(rows, cross_group_only):
+    """Pairwise scan with exact Jaccard: what group_near_duplicates must return."""
+    rows = [(key, group, word_set(text)) for key, group, text in rows if word_set(text)]
+    parent = {key: key for key, _, _ in rows}
+
+    def find(key):
+        while parent[key] != key:
+            key = parent[key]
+        return key
+
+    for i, (key, group, words) in enumerate(rows):
+        for other, other_group, other_words in rows[:i]:
+            if cross_group_only and group == other_group:
+                continue
+            if jaccard(words, other_words) > near_duplicates.DUPLICATE_THRESHOLD:
+                parent[find(key)] = find(other)
+    clusters = {}
+    for key, _, _ in rows:
+        clusters.setdefault(find(key), []).append(key)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+@pytest.mark.unit
+class TestMinHashIndex:
+    """Test candidate recall and exact verification of the index."""
+
+    def test_finds_pairs_above_threshold(self):
+        rnd = random.Random(46)
+        index = MinHashIndex()
+        originals = [_sentence(rnd, 25) for _ in range(300)]
+        for key, text in enumerate(originals):
+            index.add(key, text)
+
+        for key, text in enumerate(originals[:100]):
+            variant = _variant(rnd, text)
+            expected = jaccard(word_set(variant), word_set(text))
+            matches = index.query(variant)
+            if expected > 0.85:
+                assert matches[0] == (key, pytest.approx(expected))
+            assert all(similarity > 0.85 for _, similarity in matches)
+
+    def test_normalization_and_threshold(self):
+        index = MinHashIndex()
+        index.add("a", "Open the Login page, then click 'Sign in'!")
+
+        assert index.query("open   the login PAGE then click sign in") == [("a", 1.0)]
+        assert index.query("open the login page") == []
+        assert index.query("") == []
+        index.add("b", "   ")
+        assert len(index) == 1
+
+    def test_same_result_as_quadratic_loop(self):
+        rnd = random.Random(7)
+        steps = []
+        for _ in range(400):
+            if steps and rnd.random() < 0.4:
+                steps.append(_variant(rnd, rnd.choice(steps)))
+            else:
+                steps.append(_sentence(rnd, rnd.choice([3, 12, 25])))
+        steps += ["short", "", "Open the page.", "open the page"]
+        extractor = UniversalChecklistExtractor.__new__(UniversalChecklistExtractor)
+
+        unique = extractor._remove_duplicates_enhanced([{"step": step} for step in steps])
+
+        assert [testcase["step"] for testcase in unique] == _reference_dedup(steps)
+
+    def test_dedup_is_roughly_linear(self):
+        rnd = random.Random(3)
+        steps = [{"step": _sentence(rnd, 15)} for _ in range(4000)]
+        extractor = UniversalChecklistExtractor.__new__(UniversalChecklistExtractor)
+
+        started = time.perf_counter()
+        unique = extractor._remove_duplicates_enhanced(steps)
+
+        assert len(unique) == 4000
+        assert time.perf_counter() - started < 5
+
+
+@pytest.mark.unit
+class TestDuplicateTestcaseFilter:
+    """Test the prefix and near-duplicate rules of the testcase filter."""
+
+    def test_rules(self):
+        base = {"step": "Open the billing history page from the profile menu", "expected_result": "List of payments is shown"}
+        duplicates = DuplicateTestcaseFilter([base])
+
+        assert duplicates.is_duplicate({"step": "", "expected_result": None})
+        assert duplicates.is_duplicate({"step": base["step"].upper() + " and wait", "expected_result": "Other"})
+        assert duplicates.is_duplicate({"step": "Something else", "expected_result": "list of payments is shown"})
+        assert duplicates.is_duplicate({"step": "from the profile menu open the billing history page", "expected_result": "x"})
+        assert not duplicates.is_duplicate({"step": "Open the settings page", "expected_result": "Settings are shown"})
+
+        assert duplicates.add_if_new({"step": "Open the settings page", "expected_result": "Settings are shown"})
+        assert not duplicates.add_if_new({"step": "Open the settings page", "expected_result": "Settings are shown"})
+
+
+@pytest.mark.unit
+class TestTableScan:
+    """Test cross-checklist duplicate groups over the testcases table."""
+
+    def test_group_near_duplicates(self):
+        rows = [
+            (1, "A", "open the login page and enter valid credentials"),
+            (2, "A", "open the login page and enter valid credentials"),
+            (3, "B", "open the login page and enter valid credentials"),
+            (4, "C", "Open the login page and enter valid credentials!"),
+            (5, "C", "delete the account"),
+            (6, "D", ""),
+            (7, "E", "archive the old chat history"),
+            (8, "E", "archive the old chat history"),
+        ]
+
+        # 2 is in the same checklist as 1 but also duplicates 3 from another one
+        assert group_near_duplicates(rows) == [[1, 2, 3, 4]]
+        assert group_near_duplicates(rows, cross_group_only=False) == [[1, 2, 3, 4], [7, 8]]
+
+    def test_same_groups_as_pairwise_scan(self):
+        rnd = random.Random(46)
+        texts = [_sentence(rnd, 20) for _ in range(30)]
+        rows = []
+        for key in range(400):
+            choice = rnd.random()
+            if choice < 0.6:
+                text = rnd.choice(texts)
+            elif choice < 0.8:
+                text = _variant(rnd, rnd.choice(texts))
+            else:
+                text = _sentence(rnd, 20)
+            rows.append((key, rnd.choice("ABCD"), text))
+        # Identical texts that only repeat inside one checklist
+        rows += [(1000 + i, "Z", "archive the old chat history") for i in range(3)]
+
+        for cross_group_only in (True, False):
+            assert group_near_duplicates(rows, cross_group_only=cross_group_only) == \
+                _reference_groups(rows, cross_group_only)
+
+    def test_identical_texts_are_linear(self):
+        rows = [(i, i % 7, "Open the login page and enter valid credentials") for i in range(20000)]
+
+        started = time.perf_counter()
+        groups = group_near_duplicates(rows)
+
+        assert groups == [list(range(20000))]
+        assert time.perf_counter() - started < 2
+
+    def test_repository_report(self):
+        engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        session.add(QASection(id=1, title="Section", url="http://test", confluence_page_id="s1", space_key="QA"))
+        for checklist_id in ("1", "2", "3"):
+            session.add(Checklist(id=checklist_id, title=f"Checklist {checklist_id}", url="http://test",
+                                  confluence_page_id=checklist_id, section_id=1, space_key="QA",
+                                  content_hash="x"))
+        texts = [
+            ("1", "Open the search page", "Search results are shown"),
+            ("2", "Open the search page.", "Search results are shown"),
+            ("3", "Open the search page", "Search results are shown!"),
+            ("1", "Open the search page", "Search results are shown"),
+            ("2", "Delete the profile", "Profile is deleted"),
+            ("2", "Delete the profile", "Profile is deleted"),
+        ]
+        for checklist_id, step, expected in texts:
+            session.add(qa_models.TestCase(checklist_id=checklist_id, step=step, expected_result=expected))
+        session.commit()
+
+        repo = QARepository.__new__(QARepository)
+        repo.get_session = sessionmaker(bind=engine)
+
+        groups = repo.find_near_duplicate_testcases(page_size=2)
+
+        assert len(groups) == 1
+        assert [testcase["id"] for testcase in groups[0]["testcases"]] == [1, 2, 3, 4]
+        assert groups[0]["checklists"] == 3
+        assert groups[0]["testcases"][1]["checklist_title"] == "Checklist 2"
+        all_groups = repo.find_near_duplicate_testcases(cross_checklist_only=False)
+        assert [[testcase["id"] for testcase in group["testcases"]] for group in all_groups] == [[1, 2, 3, 4], [5, 6]]
+        assert all_groups[1]["checklists"] == 1
+        session.close()
+        engine.dispose()
+
+
+def _unit_rows(rnd, count, dim=16):
+    matrix = rnd.standard_normal((count, dim)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+@pytest.mark.unit
+class TestEmbeddingDuplicates:
+    """Test the blocked similarity scan over testcase embeddings."""
+
+    def test_blocked_pairs_match_full_matrix(self):
+        rnd = np.random.default_rng(47)
+        matrix = _unit_rows(rnd, 60)
+        # Near copies of earlier rows so some pairs pass the threshold
+        matrix[40:] = matrix[:20] + rnd.normal(0, 0.05, (20, 16)).astype(np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        groups = np.arange(60) % 3
+
+        full = matrix @ matrix.T
+        expected = {(i, j) for i in range(60) for j in range(i + 1, 60) if full[i, j] >= 0.9}
+        expected_cross = {(i, j) for i, j in expected if groups[i] != groups[j]}
+
+        for block_size in (7, 16, 64):
+            pairs = list(embedding_duplicate_pairs(matrix, threshold=0.9, block_size=block_size))
+            assert {(i, j) for i, j, _ in pairs} == expected
+            assert all(i < j and similarity == pytest.approx(full[i, j], abs=1e-5) for i, j, similarity in pairs)
+            cross = embedding_duplicate_pairs(matrix, threshold=0.9, block_size=block_size, groups=groups)
+            assert {(i, j) for i, j, _ in cross} == expected_cross
+        assert len(expected) >= 20 and expected_cross
+
+    def test_cluster_pairs(self):
+        clusters, best = cluster_pairs([(5, 9, 0.93), (1, 5, 0.97), (2, 3, 0.95)])
+
+        assert clusters == [[1, 5, 9], [2, 3]]
+        assert best == {1: 0.97, 5: 0.97, 9: 0.93, 2: 0.95, 3: 0.95}
+        assert cluster_pairs([]) == ([], {})
+
+    @pytest.mark.parametrize("cross_group", [False, True])
+    def test_clusters_match_pairs(self, cross_group):
+        rnd = np.random.default_rng(47)
+        # Exact copies of a few vectors plus near copies of some of them
+        base = _unit_rows(rnd, 6)
+        matrix = base[rnd.integers(0, 6, 80)]
+        matrix[::4] += rnd.normal(0, 0.03, (20, 16)).astype(np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        groups = rnd.integers(0, 3, 80) if cross_group else None
+
+        for block_size in (3, 64):
+            expected_clusters, expected_best = cluster_pairs(
+                embedding_duplicate_pairs(matrix, threshold=0.95, block_size=block_size, groups=groups)
+            )
+            clusters, best = embedding_duplicate_clusters(matrix, threshold=0.95, block_size=block_size, groups=groups)
+            assert clusters == expected_clusters
+            assert best == pytest.approx(expected_best, abs=1e-5)
+        assert len(expected_clusters) > 1
+
+    def test_identical_vectors_are_linear(self):
+        matrix = np.tile(np.array([[0.6, 0.8]], dtype=np.float32), (6000, 1))
+        single_group = np.zeros(6000, dtype=int)
+
+        started = time.perf_counter()
+        clusters, best = embedding_duplicate_clusters(matrix, groups=np.arange(6000) % 50)
+
+        assert clusters == [list(range(6000))] and len(best) == 6000
+        assert time.perf_counter() - started < 2
+        assert embedding_duplicate_clusters(matrix, groups=single_group) == ([], {})
+
+    def test_repository_report(self):
+        engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        session.add(QASection(id=1, title="WEB", url="http://test", confluence_page_id="s1", space_key="QA"))
+        session.add(QASection(id=2, title="MOB", url="http://test", confluence_page_id="s2", space_key="QA"))
+        for checklist_id, section_id in (("1", 1), ("2", 1), ("3", 2)):
+            session.add(Checklist(id=checklist_id, title=f"Checklist {checklist_id}", url="http://test",
+                                  confluence_page_id=checklist_id, section_id=section_id, space_key="QA",
+                                  content_hash="x"))
+        login, logout = [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]
+        rows = [
+            ("1", [2.0, 0.0, 0.0]),   # same direction as login after normalization
+            ("2", [1.0, 0.05, 0.0]),
+            ("3", login),
+            ("1", logout),
+            ("1", [0.0, 1.0, 0.01]),  # same checklist as the previous one
+            ("2", [0.0, 0.0, 1.0]),
+            ("3", [0.0, 0.0, 0.0]),   # zero vector
+            ("3", [1.0, 0.0]),        # other dimension
+            ("3", None),
+        ]
+        for checklist_id, embedding in rows:
+            session.add(qa_models.TestCase(checklist_id=checklist_id, step="Step", expected_result="Result",
+                                           embedding=embedding))
+        session.commit()
+
+        repo = QARepository.__new__(QARepository)
+        repo.get_session = sessionmaker(bind=engine)
+        repo.embedder = Mock(model="text-embedding-3-small", dimensions=3)
+
+        report = repo.find_semantic_duplicate_testcases(threshold=0.95, page_size=2, block_size=2)
+
+        assert report["testcases_scanned"] == 6 and report["skipped_embeddings"] == 2
+        assert [[testcase["id"] for testcase in group["testcases"]] for group in report["groups"]] == [[1, 2, 3]]
+        group = report["groups"][0]
+        assert group["checklists"] == 3 and group["sections"] == 2
+        assert group["testcases"][2]["section_title"] == "MOB"
+        assert group["testcases"][0]["similarity"] == 1.0
+
+        all_groups = repo.find_semantic_duplicate_testcases(threshold=0.95, cross_checklist_only=False)["groups"]
+        assert [[testcase["id"] for testcase in group["testcases"]] for group in all_groups] == [[1, 2, 3], [4, 5]]
+
+        section_report = repo.find_semantic_duplicate_testcases(threshold=0.95, section_id=1)
+        assert section_report["testcases_scanned"] == 5
+        assert [[testcase["id"] for testcase in group["testcases"]] for group in section_report["groups"]] == [[1, 2]]
+
+        # The matrix width comes from the embedder, not from the first row read
+        repo.embedder = Mock(model="text-embedding-3-small", dimensions=2)
+        reduced = repo.find_semantic_duplicate_testcases(threshold=0.95)
+        assert reduced["testcases_scanned"] == 1 and reduced["skipped_embeddings"] == 7
+        session.close()
+        engine.dispose()
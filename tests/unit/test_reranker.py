@@ -0,0 +1,95 @@
+"""Unit tests for search result reranking."""
+
+import time
+
+import pytest
+from unittest.mock import Mock, patch
+
+from app.ai.reranker import RERANKERS, BM25Reranker, Reranker, create_reranker, register_reranker
+from app.mcp_tools import qa_search_documents
+
+
+def _hit(score, title, text):
+    return {
+        "score": score,
+        "feature": {"name": None, "id": None},
+        "document": {"id": title, "title": title, "url": "http://test.com"},
+        "chunk": {"id": title, "text": text, "position": 0},
+    }
+
+
+CANDIDATES = [
+    _hit(0.82, "Deployment", "Rollback procedures and pipeline stages"),
+    _hit(0.80, "Auth checklist", "Password reset and account lockout after failed login attempts"),
+    _hit(0.79, "API guide", "Pagination and sorting of GET endpoints"),
+]
+
+
+@pytest.mark.unit
+class TestBM25Reranker:
+    """Test the local lexical reranker."""
+
+    def test_lexical_match_wins(self):
+        results = BM25Reranker().rerank("password reset lockout", CANDIDATES, top_k=2)
+
+        assert len(results) == 2
+        assert results[0]["document"]["title"] == "Auth checklist"
+        assert results[0]["rerank_score"] >= results[1]["rerank_score"]
+
+    def test_no_overlap_keeps_vector_order(self):
+        results = BM25Reranker().rerank("kubernetes", CANDIDATES, top_k=3)
+
+        assert [r["document"]["title"] for r in results] == ["Deployment", "Auth checklist", "API guide"]
+
+    def test_registry(self):
+        class ConstantReranker(Reranker):
+            name = "constant"
+
+            def score(self, query, texts):
+                return [1.0] * len(texts)
+
+        register_reranker("constant", ConstantReranker)
+        try:
+            assert isinstance(create_reranker("constant"), ConstantReranker)
+        finally:
+            RERANKERS.pop("constant")
+        with pytest.raises(ValueError):
+            create_reranker("missing")
+
+
+@pytest.mark.unit
+class TestSearchDocumentsRerank:
+    """Test the rerank stage of qa_search_documents."""
+
+    @pytest.mark.asyncio
+    async def test_over_retrieves_and_reranks(self, mock_openai_embedder, mock_async_vector_repo):
+        mock_async_vector_repo.search.return_value = CANDIDATES
+
+        with patch('app.ai.embedder.OpenAIEmbedder', return_value=mock_openai_embedder), \
+             patch('app.mcp_tools.get_async_vector_repository', return_value=mock_async_vector_repo), \
+             patch('app.mcp_tools.get_reranker', return_value=BM25Reranker()):
+
+            result = await qa_search_documents("password reset", top_k=1, rerank=True)
+
+        assert result["success"] is True
+        assert result["reranked"] is True
+        assert result["count"] == 1
+        assert result["results"][0]["document"]["title"] == "Auth checklist"
+        assert mock_async_vector_repo.search.call_args.kwargs["top_k"] == 4
+
+    @pytest.mark.asyncio
+    async def test_budget_exceeded_falls_back(self, mock_openai_embedder, mock_async_vector_repo):
+        mock_async_vector_repo.search.return_value = CANDIDATES
+        slow = Mock(name="slow")
+        slow.name = "slow"
+        slow.rerank.side_effect = lambda *args: time.sleep(0.3)
+
+        with patch('app.ai.embedder.OpenAIEmbedder', return_value=mock_openai_embedder), \
+             patch('app.mcp_tools.get_async_vector_repository', return_value=mock_async_vector_repo), \
+             patch('app.mcp_tools.get_reranker', return_value=slow), \
+             patch('app.mcp_tools.settings.rerank_budget_ms', 50):
+
+            result = await qa_search_documents("password reset", top_k=2, rerank=True)
+
+        assert result["reranked"] is False
+        assert [r["document"]["title"] for r in result["results"]] == ["Deployment", "Auth checklist"]
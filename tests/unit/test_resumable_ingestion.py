@@ -0,0 +1,247 @@
+"""Unit tests for checkpointed ingestion jobs and --resume."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from unittest.mock import Mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import qa_models
+from app.models.qa_models import Base, Checklist, IngestionCheckpoint, IngestionJob, QASection
+from scripts.confluence import ingestion_checkpoints
+from scripts.confluence.html_table_parser import EnhancedConfluenceTableParser
+from scripts.confluence.ingestion_checkpoints import CheckpointStore
+from scripts.confluence.unified_loader import LoadingProgress, UnifiedConfluenceLoader
+
+TABLE_HTML = """
+<table class="confluenceTable">
+    <tr><th>STEP</th><th>EXPECTED RESULT</th><th>PRIORITY</th></tr>
+    <tr><td colspan="3"><h3>GENERAL</h3></td></tr>
+    <tr><td colspan="3">Pages</td></tr>
+    <tr><td>Open {name} page.</td><td>Page is opened.</td><td>HIGH</td></tr>
+</table>
+"""
+
+
+def _page(page_id):
+    return {
+        "id": page_id,
+        "title": f"Checklist {page_id}",
+        "content": TABLE_HTML.format(name=page_id),
+        "version": 1,
+        "space": "QA",
+        "url": "http://test",
+        "labels": []
+    }
+
+
+def _pages(crash_after=None):
+    for i in range(1, 7):
+        if crash_after is not None and i > crash_after:
+            # Let the first pages reach the write stage before the crawl dies
+            time.sleep(0.5)
+            raise ConnectionError("Confluence went away")
+        yield _page(str(i))
+
+
+def _checkpoints(session, job_id):
+    session.expire_all()
+    return {
+        row.page_id: row.stage
+        for row in session.query(IngestionCheckpoint).filter(IngestionCheckpoint.job_id == job_id)
+    }
+
+
+@pytest.mark.unit
+class TestResumableLoading:
+    """Test that checkpoints let a new run skip finished pages."""
+
+    @pytest.fixture
+    def session_factory(self):
+        engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        yield sessionmaker(bind=engine)
+        engine.dispose()
+
+    @pytest.fixture
+    def test_session(self, session_factory):
+        session = session_factory()
+        session.add(QASection(id=1, title="Section", url="http://test", confluence_page_id="s1", space_key="QA"))
+        session.commit()
+        yield session
+        session.close()
+
+    @pytest.fixture
+    def make_loader(self, test_session, session_factory):
+        def make(pages=lambda: _pages()):
+            loader = UnifiedConfluenceLoader.__new__(UnifiedConfluenceLoader)
+            loader.use_mock = True
+            loader.load_mysql = True
+            loader.load_vector = True
+            loader.side_by_side = False
+            loader.incremental = False
+            loader.delete_missing = False
+            loader.progress = LoadingProgress()
+            loader.parse_workers = 2
+            loader.embed_concurrency = 2
+            loader.write_batch_size = 2
+            loader._parse_pool = None
+            loader._pipeline_stats = {}
+            loader._existing_checklists = {row[0] for row in test_session.query(Checklist.id)}
+            loader._checklist_state = {}
+            loader._sections_config = {}
+            loader._config_ids = {}
+            loader._checkpoints = None
+            loader._resumed = {}
+            loader._resumed_job_id = None
+            loader._resume_candidates = []
+            loader.qa_repo = Mock()
+            loader.qa_repo.get_session.side_effect = session_factory
+            loader.html_parser = EnhancedConfluenceTableParser()
+            loader.chunker = Mock()
+            loader.chunker.chunk_text.side_effect = lambda text: [text]
+            loader.embedder = Mock()
+            loader.embedder.embed_batch.side_effect = lambda texts: [[0.1, 0.2] for _ in texts]
+            loader.vector_repo = Mock()
+            loader.vector_repo.upsert_chunks_batch.side_effect = lambda chunks: (len(chunks), 0)
+            loader.confluence_api = Mock(spec=["iter_pages", "get_page_content", "normalize_content"])
+            loader.confluence_api.iter_pages.side_effect = lambda **kwargs: pages()
+            loader.confluence_api.get_page_content.side_effect = _page
+            loader.confluence_api.normalize_content.side_effect = lambda content: content
+            loader._create_parse_pool = lambda: ThreadPoolExecutor(max_workers=2)
+            return loader
+
+        return make
+
+    @pytest.mark.asyncio
+    async def test_every_page_gets_a_checkpoint(self, make_loader, test_session):
+        result = await make_loader().load_data(space_keys=["QA"])
+
+        assert _checkpoints(test_session, result["job_id"]) == {str(i): "written" for i in range(1, 7)}
+        job = test_session.get(IngestionJob, result["job_id"])
+        assert job.params["space_keys"] == ["QA"]
+        assert job.params["crawl_complete"] is True
+        stored = test_session.query(IngestionCheckpoint).filter_by(page_id="1").one()
+        assert stored.content_hash == ingestion_checkpoints.content_hash(_page("1"))
+
+    @pytest.mark.asyncio
+    async def test_resume_after_crash_skips_written_pages(self, make_loader, test_session):
+        crashing = make_loader(pages=lambda: _pages(crash_after=4))
+        with pytest.raises(ConnectionError):
+            await crashing.load_data(space_keys=["QA"])
+        job = test_session.query(IngestionJob).one()
+        written_before = {page_id for page_id, stage in _checkpoints(test_session, job.id).items() if stage == "written"}
+        assert written_before and job.status == "failed"
+        assert "crawl_complete" not in job.params
+
+        loader = make_loader()
+        result = await loader.load_data(resume_job_id=job.id)
+
+        # Crawl did not finish, so it runs again with the stored selection
+        assert loader.confluence_api.iter_pages.call_args.kwargs["space_keys"] == ["QA"]
+        embedded = {text.split("\n")[0] for call in loader.embedder.embed_batch.call_args_list for text in call.args[0]}
+        assert embedded == {f"Checklist {i}" for i in range(1, 7) if str(i) not in written_before}
+        assert result["resumed_pages"] == len(written_before)
+        assert result["job_id"] == job.id
+        assert test_session.query(Checklist).count() == 6
+        assert test_session.query(qa_models.TestCase).count() == 6
+        assert set(_checkpoints(test_session, job.id).values()) == {"written"}
+        test_session.expire_all()
+        assert test_session.get(IngestionJob, job.id).status == "success"
+
+    @pytest.mark.asyncio
+    async def test_resume_of_finished_crawl_fetches_only_failed_pages(self, make_loader, test_session):
+        loader = make_loader()
+
+        def embed(texts):
+            if texts[0].startswith("Checklist 3"):
+                raise RuntimeError("rate limited")
+            return [[0.1, 0.2] for _ in texts]
+
+        loader.embedder.embed_batch.side_effect = embed
+        first = await loader.load_data(space_keys=["QA"])
+        assert _checkpoints(test_session, first["job_id"])["3"] == "failed"
+
+        resumed = make_loader()
+        result = await resumed.load_data(resume_job_id=first["job_id"])
+
+        resumed.confluence_api.iter_pages.assert_not_called()
+        resumed.confluence_api.get_page_content.assert_called_once_with("3")
+        assert result["documents_processed"] == 1
+        assert result["chunks_created"] == 1
+        # MySQL part was written by the first run, only the vector part is redone
+        assert result["checklists_created"] == 0
+        assert _checkpoints(test_session, first["job_id"])["3"] == "written"
+
+    @pytest.mark.asyncio
+    async def test_changed_page_is_not_skipped(self, make_loader, test_session):
+        first = await make_loader().load_data()
+
+        changed = make_loader(pages=lambda: (
+            dict(page, content=page["content"] + "<p>edit</p>") if page["id"] == "2" else page for page in _pages()
+        ))
+        # As if the first crawl had not finished: pages are crawled again and compared by hash
+        test_session.query(IngestionJob).update({IngestionJob.params: {"crawl_complete": False}})
+        test_session.commit()
+        result = await changed.load_data(resume_job_id=first["job_id"])
+
+        assert result["resumed_pages"] == 5
+        assert changed.embedder.embed_batch.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_job(self, make_loader):
+        with pytest.raises(ValueError, match="#99"):
+            await make_loader().load_data(resume_job_id=99)
+
+
+@pytest.mark.unit
+class TestCheckpointStore:
+    """Test buffering and upserts of page checkpoints."""
+
+    @pytest.fixture
+    def store(self, test_session_factory):
+        session = test_session_factory()
+        job = IngestionJob(details="test")
+        session.add(job)
+        session.commit()
+        job_id = job.id
+        session.close()
+        return CheckpointStore(test_session_factory, job_id)
+
+    def test_marks_are_written_on_flush(self, store, test_session_factory):
+        store.mark("1", ingestion_checkpoints.FETCHED, "a" * 32)
+        store.mark("1", ingestion_checkpoints.PARSED)
+        store.mark("2", ingestion_checkpoints.FAILED, error="embed: boom")
+
+        assert CheckpointStore.load(test_session_factory, store.job_id) == {}
+        assert store.flush() == 2
+        assert store.flush() == 0
+
+        stored = CheckpointStore.load(test_session_factory, store.job_id)
+        assert stored["1"] == ingestion_checkpoints.PageCheckpoint("parsed", "a" * 32)
+        assert stored["2"].error == "embed: boom" and not stored["2"].done
+
+    def test_update_keeps_known_hash(self, store, test_session_factory):
+        store.mark("1", ingestion_checkpoints.FETCHED, "a" * 32)
+        store.flush()
+        store.mark("1", ingestion_checkpoints.WRITTEN)
+        store.flush()
+
+        stored = CheckpointStore.load(test_session_factory, store.job_id)
+        assert stored == {"1": ingestion_checkpoints.PageCheckpoint("written", "a" * 32)}
+        assert stored["1"].done
+
+    def test_failed_flush_keeps_marks(self, store, test_session_factory):
+        store.mark("1", ingestion_checkpoints.WRITTEN)
+        working_factory = store.session_factory
+        store.session_factory = Mock(side_effect=RuntimeError("db down"))
+
+        with pytest.raises(RuntimeError):
+            store.flush()
+
+        store.session_factory = working_factory
+        assert store.flush() == 1
+        assert CheckpointStore.load(test_session_factory, store.job_id)["1"].done
@@ -0,0 +1,93 @@
+"""Unit tests for Qdrant collection profiles."""
+
+import pytest
+from unittest.mock import Mock, patch
+
+from qdrant_client.models import BinaryQuantization, Disabled, ScalarQuantization
+
+from app.data.vectordb_repo import (
+    COLLECTION_PROFILES,
+    CollectionProfile,
+    VectorDBRepository,
+    get_collection_profile,
+)
+
+
+@pytest.mark.unit
+class TestCollectionProfile:
+    """Test profile to Qdrant config conversion."""
+
+    def test_default_profile_keeps_qdrant_defaults(self):
+        profile = COLLECTION_PROFILES["default"]
+        assert profile.hnsw_config() is None
+        assert profile.quantization_config() is None
+        assert profile.search_params() is None
+        assert profile.vector_params(1536).on_disk is False
+
+    def test_scalar_profile(self):
+        profile = COLLECTION_PROFILES["low_memory"]
+        assert isinstance(profile.quantization_config(), ScalarQuantization)
+        assert profile.vector_params(1536).on_disk is True
+        params = profile.search_params()
+        assert params.hnsw_ef == 128
+        assert params.quantization.rescore is True
+        assert params.quantization.oversampling == 2.0
+
+    def test_binary_profile(self):
+        profile = COLLECTION_PROFILES["binary"]
+        assert isinstance(profile.quantization_config(), BinaryQuantization)
+
+    def test_invalid_quantization(self):
+        with pytest.raises(ValueError):
+            CollectionProfile(name="broken", quantization="pq")
+
+    def test_settings_overrides(self):
+        with patch("app.data.vectordb_repo.settings") as mock_settings:
+            mock_settings.vectordb_collection_profile = "balanced"
+            mock_settings.vectordb_quantization = None
+            mock_settings.vectordb_quantization_oversampling = None
+            mock_settings.vectordb_on_disk = True
+            mock_settings.vectordb_hnsw_m = None
+            mock_settings.vectordb_hnsw_ef_construct = None
+            mock_settings.vectordb_search_ef = 64
+
+            profile = get_collection_profile()
+
+        assert profile.name == "balanced"
+        assert profile.on_disk is True
+        assert profile.search_ef == 64
+        assert profile.hnsw_m == 16
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError):
+            get_collection_profile("missing")
+
+
+@pytest.mark.unit
+class TestApplyCollectionProfile:
+    """Test applying a profile to an existing collection."""
+
+    def test_apply_disables_quantization_for_default(self):
+        with patch("app.data.vectordb_repo.QdrantClient") as client_cls:
+            client = Mock()
+            client_cls.return_value = client
+            repo = VectorDBRepository(profile=COLLECTION_PROFILES["default"])
+
+            assert repo.apply_collection_profile() is True
+
+        kwargs = client.update_collection.call_args.kwargs
+        assert kwargs["quantization_config"] == Disabled.DISABLED
+        assert kwargs["hnsw_config"] is None
+
+    def test_apply_new_profile(self):
+        with patch("app.data.vectordb_repo.QdrantClient") as client_cls:
+            client = Mock()
+            client_cls.return_value = client
+            repo = VectorDBRepository(profile=COLLECTION_PROFILES["default"])
+
+            assert repo.apply_collection_profile(COLLECTION_PROFILES["balanced"]) is True
+
+        kwargs = client.update_collection.call_args.kwargs
+        assert isinstance(kwargs["quantization_config"], ScalarQuantization)
+        assert kwargs["hnsw_config"].m == 16
+        assert repo.profile.name == "balanced"